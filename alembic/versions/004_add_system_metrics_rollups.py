@@ -0,0 +1,41 @@
+"""Add system metrics rollups
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-18
+
+This migration adds the multi-resolution rollup table used by the
+monitoring dashboard charts (1m/5m/1h/1d buckets).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # =========================================================================
+    # System Metrics Rollups Table
+    # =========================================================================
+    op.create_table(
+        'system_metrics_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('metric_name', sa.String(length=100), nullable=False),
+        sa.Column('resolution', sa.String(length=10), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('sample_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('min_value', sa.Float(), nullable=False),
+        sa.Column('max_value', sa.Float(), nullable=False),
+        sa.Column('sum_value', sa.Float(), nullable=False),
+        sa.Column('p95_value', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('metric_name', 'resolution', 'bucket_start', name='uq_rollup_bucket')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('system_metrics_rollups')
@@ -0,0 +1,38 @@
+"""Add popularity counters
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-18
+
+This migration adds the per-day popularity table that backs the
+write-coalesced download/install counters and trending queries.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # =========================================================================
+    # Popularity Daily Table
+    # =========================================================================
+    op.create_table(
+        'popularity_daily',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('target', sa.String(length=50), nullable=False),
+        sa.Column('metric', sa.String(length=50), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('item_id', sa.Integer(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('target', 'metric', 'day', 'item_id', name='uq_popularity_daily')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('popularity_daily')
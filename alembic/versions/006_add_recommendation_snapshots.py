@@ -0,0 +1,39 @@
+"""Add recommendation snapshots
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-18
+
+This migration adds the table holding precomputed co-install
+recommendations, per-user recommendations and trending lists.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # =========================================================================
+    # Recommendation Snapshots Table
+    # =========================================================================
+    op.create_table(
+        'recommendation_snapshots',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('target', sa.String(length=50), nullable=False),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('key_id', sa.Integer(), nullable=False),
+        sa.Column('item_ids', sa.JSON(), nullable=False),
+        sa.Column('scores', sa.JSON(), nullable=False),
+        sa.Column('computed_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('target', 'kind', 'key_id', name='uq_recommendation_snapshot')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('recommendation_snapshots')
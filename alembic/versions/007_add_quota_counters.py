@@ -0,0 +1,86 @@
+"""Add quota counters
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-18
+
+This migration adds per-period running totals for quotas, so quota checks
+read one row instead of summing the usage history. Existing usage of each
+quota's organization and resource type is backfilled into the quota's
+current bucket: all of it for quotas without a period, and the usage
+recorded since the current period began for the others.
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+# Must match crud.enterprise.QUOTA_PERIOD_FORMATS
+PERIOD_FORMATS = {
+    'minute': '%Y%m%d%H%M',
+    'hourly': '%Y%m%d%H',
+    'daily': '%Y%m%d',
+    'monthly': '%Y%m',
+    'yearly': '%Y',
+}
+
+
+def _period_start(period: str, now: datetime) -> datetime:
+    if period == 'minute':
+        return now.replace(second=0, microsecond=0)
+    if period == 'hourly':
+        return now.replace(minute=0, second=0, microsecond=0)
+    if period == 'daily':
+        return datetime(now.year, now.month, now.day)
+    if period == 'monthly':
+        return datetime(now.year, now.month, 1)
+    return datetime(now.year, 1, 1)
+
+
+def upgrade() -> None:
+    # =========================================================================
+    # Quota Counters Table
+    # =========================================================================
+    op.create_table(
+        'quota_counters',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('quota_id', sa.Integer(), nullable=False),
+        sa.Column('period_key', sa.String(length=20), nullable=False),
+        sa.Column('used', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['quota_id'], ['quotas.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('quota_id', 'period_key', name='uq_quota_counter_period')
+    )
+
+    # Usage counts against every quota of its organization and resource type
+    # (most existing records have no quota_id)
+    backfill = (
+        "INSERT INTO quota_counters (quota_id, period_key, used) "
+        "SELECT q.id, :period_key, COALESCE(SUM(u.amount), 0) "
+        "FROM quotas q JOIN usage_records u "
+        "ON u.organization_id = q.organization_id AND u.resource_type = q.resource_type "
+    )
+    bind = op.get_bind()
+    bind.execute(
+        sa.text(backfill + "WHERE q.period IS NULL GROUP BY q.id"),
+        {'period_key': 'total'}
+    )
+
+    # Periodic quotas only read their current bucket
+    now = datetime.utcnow()
+    for period, period_format in PERIOD_FORMATS.items():
+        bind.execute(
+            sa.text(backfill + "AND u.recorded_at >= :since WHERE q.period = :period GROUP BY q.id"),
+            {'period_key': now.strftime(period_format), 'since': _period_start(period, now), 'period': period}
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('quota_counters')
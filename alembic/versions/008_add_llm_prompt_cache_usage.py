@@ -0,0 +1,34 @@
+"""Add prompt cache usage to LLM usage metrics
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-18
+
+This migration records how many prompt tokens each LLM call read from (and
+wrote to) the provider's prompt cache, so cached and uncached input can be
+reported separately.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'llm_usage_metrics',
+        sa.Column('cached_prompt_tokens', sa.Integer(), nullable=True, server_default='0')
+    )
+    op.add_column(
+        'llm_usage_metrics',
+        sa.Column('cache_write_tokens', sa.Integer(), nullable=True, server_default='0')
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('llm_usage_metrics', 'cache_write_tokens')
+    op.drop_column('llm_usage_metrics', 'cached_prompt_tokens')
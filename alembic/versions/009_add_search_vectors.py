@@ -0,0 +1,70 @@
+"""Add full-text search vectors
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-19
+
+This migration adds a generated ``search_vector`` tsvector column with a GIN
+index to each searchable marketplace table, so PostgreSQL keeps the search
+index up to date on every write. Other databases are left unchanged and use
+the embedded search index instead.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+# Table -> (column, tsvector weight); columns missing from a table are skipped
+SEARCH_FIELDS = {
+    'plugins': [
+        ('name', 'A'),
+        ('description', 'B'),
+        ('long_description', 'C'),
+        ('tags', 'B'),
+    ],
+    'templates': [
+        ('name', 'A'),
+        ('template_id', 'B'),
+        ('description', 'B'),
+        ('long_description', 'C'),
+        ('tags', 'B'),
+    ],
+}
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    inspector = sa.inspect(bind)
+    for table, fields in SEARCH_FIELDS.items():
+        if not inspector.has_table(table):
+            continue
+        columns = {column['name'] for column in inspector.get_columns(table)}
+        parts = [
+            f"setweight(to_tsvector('simple', coalesce({column}::text, '')), '{weight}')"
+            for column, weight in fields
+            if column in columns
+        ]
+        op.execute(
+            f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            f"GENERATED ALWAYS AS ({' || '.join(parts)}) STORED"
+        )
+        op.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{table}_search_vector ON {table} USING GIN (search_vector)"
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    for table in SEARCH_FIELDS:
+        op.execute(f"DROP INDEX IF EXISTS idx_{table}_search_vector")
+        op.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector")
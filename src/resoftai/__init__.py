@@ -8,9 +8,17 @@ __version__ = "0.1.0"
 __author__ = "softctwo"
 __email__ = "softctwo@aliyun.com"
 
-from resoftai.core.agent import Agent, AgentRole
-from resoftai.core.workflow import ProjectWorkflow, WorkflowStage
-from resoftai.core.state import ProjectState
+import importlib
+
+# Exported names are imported on first access, so ``import resoftai`` (and the
+# CLI entry point, which reads ``__version__``) stays cheap.
+_LAZY_EXPORTS = {
+    "Agent": "resoftai.core.agent",
+    "AgentRole": "resoftai.core.agent",
+    "ProjectWorkflow": "resoftai.core.workflow",
+    "WorkflowStage": "resoftai.core.state",
+    "ProjectState": "resoftai.core.state",
+}
 
 __all__ = [
     "Agent",
@@ -19,3 +27,15 @@ __all__ = [
     "WorkflowStage",
     "ProjectState",
 ]
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        value = getattr(importlib.import_module(_LAZY_EXPORTS[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
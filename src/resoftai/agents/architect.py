@@ -22,6 +22,9 @@ class ArchitectAgent(Agent):
     - Technical decision making
     """
 
+    # Similar projects get similar early-stage documents, so reuse them
+    semantic_cache_enabled = True
+
     @property
     def name(self) -> str:
         return "Software Architect"
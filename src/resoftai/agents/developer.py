@@ -8,6 +8,7 @@ import logging
 from resoftai.core.agent import Agent, AgentRole, AgentCapability
 from resoftai.core.message_bus import Message, MessageType
 from resoftai.core.state import WorkflowStage, TaskStatus
+from resoftai.core.code_patch import PatchError, apply_patch, validate_syntax
 from resoftai.core.code_quality import get_code_quality_checker, LanguageType
 from resoftai.core.language_support import get_language_support
 
@@ -24,11 +25,18 @@ class DeveloperAgent(Agent):
     - Performance optimization
     """
 
+    # Issues sent to the model per refinement round
+    MAX_ISSUES_PER_ROUND = 5
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.code_checker = get_code_quality_checker()
         self.language_support = get_language_support()
 
+        # "patch" refines with local edits, "regenerate" rewrites the file each round
+        self.refinement_mode = "patch"
+        self.refinement_stats = {"patched": 0, "patch_failed": 0, "regenerated": 0}
+
     @property
     def name(self) -> str:
         return "Software Developer"
@@ -380,6 +388,56 @@ Provide a complete, production-ready implementation guide."""
             ]
         }
 
+    def _patch_prompt(self, code: str, filename: str, quality_report: dict) -> str:
+        """Ask for edits that fix the reported issues in ``code``."""
+        lines = code.splitlines()
+        issues = []
+        for issue in quality_report["issues"][:self.MAX_ISSUES_PER_ROUND]:
+            line = issue["line"]
+            quoted = f" `{lines[line - 1].strip()}`" if line and 0 < line <= len(lines) else ""
+            issues.append(f"- Line {line}:{quoted} {issue['message']} ({issue['suggestion']})")
+        issues_summary = "\n".join(issues)
+
+        return f"""Fix the quality issues below in {filename} with minimal edits.
+
+Current code:
+```
+{code}
+```
+
+Quality Issues Found:
+{issues_summary}
+
+Reply only with search/replace blocks, one per change, in this format:
+
+<<<<<<< SEARCH
+exact lines copied from the current code
+=======
+replacement lines
+>>>>>>> REPLACE
+
+Keep each SEARCH block short but unique in the file. Do not repeat unchanged code."""
+
+    async def _refine_with_patch(self, code: str, filename: str, quality_report: dict) -> Optional[str]:
+        """
+        Fix ``code`` with model-proposed edits applied locally.
+
+        Returns:
+            The patched code, or None if the edits did not apply or broke the syntax
+        """
+        response = await self.generate(self._patch_prompt(code, filename, quality_report))
+        try:
+            patched = apply_patch(code, response)
+        except PatchError as e:
+            logger.info(f"Patch for {filename} did not apply: {e}")
+            return None
+
+        error = validate_syntax(patched, LanguageType(quality_report["language"]))
+        if error:
+            logger.info(f"Patched {filename} is invalid: {error}")
+            return None
+        return patched
+
     async def generate_code_with_quality_check(
         self,
         prompt: str,
@@ -389,6 +447,12 @@ Provide a complete, production-ready implementation guide."""
         """
         Generate code and iteratively improve it based on quality checks.
 
+        After the first generation, each round sends the current code with the
+        line-numbered issues and applies the returned edits locally. Only if the
+        edits do not apply (or break the syntax) is the file regenerated in
+        full. The best-scoring version is returned, so a round cannot make the
+        result worse.
+
         Args:
             prompt: Code generation prompt
             filename: Target filename
@@ -399,23 +463,26 @@ Provide a complete, production-ready implementation guide."""
         """
         logger.info(f"Generating code for {filename} with quality check")
 
-        for iteration in range(max_iterations):
-            # Generate code
-            code = await self.generate(prompt)
-
-            # Check quality
-            quality_report = await self.check_code_quality(code, filename)
+        code = await self.generate(prompt)
+        quality_report = await self.check_code_quality(code, filename)
+        best_code, best_report = code, quality_report
 
+        for iteration in range(1, max_iterations):
             # If quality is good enough, return
-            if quality_report["quality_score"] >= 85 and quality_report["critical_issues"] == 0:
-                logger.info(f"Code quality acceptable (score: {quality_report['quality_score']})")
-                return code, quality_report
+            if best_report["quality_score"] >= 85 and best_report["critical_issues"] == 0:
+                logger.info(f"Code quality acceptable (score: {best_report['quality_score']})")
+                return best_code, best_report
+
+            logger.info(f"Iteration {iteration}: Improving code (score: {best_report['quality_score']})")
+            code = None
+            if self.refinement_mode == "patch":
+                code = await self._refine_with_patch(best_code, filename, best_report)
+                self.refinement_stats["patched" if code is not None else "patch_failed"] += 1
 
-            # If not the last iteration, create improvement prompt
-            if iteration < max_iterations - 1:
+            if code is None:
                 issues_summary = "\n".join([
                     f"- Line {i['line']}: {i['message']} ({i['suggestion']})"
-                    for i in quality_report["issues"][:5]  # Top 5 issues
+                    for i in best_report["issues"][:self.MAX_ISSUES_PER_ROUND]
                 ])
 
                 improvement_prompt = f"""The previous code has quality issues. Please improve it.
@@ -427,8 +494,13 @@ Quality Issues Found:
 
 Please generate improved code that addresses these issues."""
 
-                prompt = improvement_prompt
-                logger.info(f"Iteration {iteration + 1}: Improving code (score: {quality_report['quality_score']})")
+                code = await self.generate(improvement_prompt)
+                self.refinement_stats["regenerated"] += 1
+
+            quality_report = await self.check_code_quality(code, filename)
+            if quality_report["quality_score"] >= best_report["quality_score"]:
+                best_code, best_report = code, quality_report
 
-        logger.warning(f"Max iterations reached. Final quality score: {quality_report['quality_score']}")
-        return code, quality_report
+        if best_report["quality_score"] < 85 or best_report["critical_issues"] > 0:
+            logger.warning(f"Max iterations reached. Final quality score: {best_report['quality_score']}")
+        return best_code, best_report
@@ -21,6 +21,9 @@ class RequirementsAnalystAgent(Agent):
     - Requirements validation and refinement
     """
 
+    # Similar projects get similar early-stage documents, so reuse them
+    semantic_cache_enabled = True
+
     @property
     def name(self) -> str:
         return "Requirements Analyst"
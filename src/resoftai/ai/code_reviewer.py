@@ -1,6 +1,7 @@
 """Intelligent Code Review System powered by AI."""
+import asyncio
 from enum import Enum
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, TYPE_CHECKING
 from dataclasses import dataclass, field
 from datetime import datetime
 import re
@@ -8,6 +9,9 @@ import ast
 
 from resoftai.ai.multi_model_coordinator import MultiModelCoordinator, TaskComplexity
 
+if TYPE_CHECKING:
+    from resoftai.llm.batch import BatchExecutor
+
 
 class IssueSeverity(str, Enum):
     """Severity levels for code issues."""
@@ -69,9 +73,17 @@ class CodeReviewReport:
 class IntelligentCodeReviewer:
     """AI-powered intelligent code review system."""
 
-    def __init__(self, coordinator: MultiModelCoordinator):
-        """Initialize code reviewer with multi-model coordinator."""
+    def __init__(self, coordinator: MultiModelCoordinator, batch_executor: Optional["BatchExecutor"] = None):
+        """
+        Initialize code reviewer with multi-model coordinator.
+
+        Args:
+            coordinator: Coordinator for interactive reviews
+            batch_executor: If given, AI analysis is submitted through the
+                provider's batch API instead (for non-interactive reviews)
+        """
         self.coordinator = coordinator
+        self.batch_executor = batch_executor
 
         # Issue patterns (basic static analysis)
         self.security_patterns = {
@@ -142,9 +154,40 @@ class IntelligentCodeReviewer:
             recommendations=recommendations,
             reviewed_at=datetime.now(),
             review_duration=duration,
-            ai_models_used=["multi-model-coordinator"]
+            ai_models_used=["batch" if self.batch_executor is not None else "multi-model-coordinator"]
         )
 
+    async def review_files(
+        self,
+        files: Dict[str, str],
+        language: str = "python",
+        context: Optional[Dict[str, Any]] = None
+    ) -> List[CodeReviewReport]:
+        """
+        Review several files at once.
+
+        With a batch executor, the AI analysis requests of all files are
+        submitted together as one batch job.
+
+        Args:
+            files: Source code by file path
+            language: Programming language
+            context: Additional context shared by all files
+
+        Returns:
+            One CodeReviewReport per file, in the order given
+        """
+        reviews = [
+            asyncio.ensure_future(self.review_code(code, language, file_path, context))
+            for file_path, code in files.items()
+        ]
+        if self.batch_executor is not None:
+            # Let every review queue its request, then submit them without
+            # waiting for the collect window
+            await asyncio.sleep(0)
+            self.batch_executor.flush()
+        return list(await asyncio.gather(*reviews))
+
     def _static_analysis(
         self,
         code: str,
@@ -330,16 +373,21 @@ For each issue found, provide:
 Format your response as a structured list of issues."""
 
         try:
-            # Use multi-model coordination for high-quality review
-            response = await self.coordinator.execute(
-                prompt=prompt,
-                task_complexity=TaskComplexity.COMPLEX,
-                max_models=3
-            )
+            if self.batch_executor is not None:
+                # One request per file, answered from a batch job
+                output = (await self.batch_executor.generate(prompt)).content
+            else:
+                # Use multi-model coordination for high-quality review
+                response = await self.coordinator.execute(
+                    prompt=prompt,
+                    task_complexity=TaskComplexity.COMPLEX,
+                    max_models=3
+                )
+                output = response.final_output
 
             # Parse AI response into issues
             # (Simplified parsing - in production, use structured output)
-            ai_issues = self._parse_ai_response(response.final_output, file_path)
+            ai_issues = self._parse_ai_response(output, file_path)
             return ai_issues
 
         except Exception as e:
@@ -7,9 +7,11 @@ combining their strengths to produce better results.
 
 import asyncio
 import logging
+import re
+import time
 from dataclasses import dataclass
 from enum import Enum
-from typing import List, Dict, Any, Optional, Callable
+from typing import List, Dict, Any, Optional, Callable, Tuple
 from datetime import datetime
 
 from resoftai.llm.base import LLMProvider, LLMConfig, LLMResponse
@@ -56,6 +58,101 @@ class CollaborationResult:
     consensus_score: Optional[float] = None
     execution_time: float = 0.0
     model_votes: Optional[Dict[str, int]] = None
+    early_exit: Optional[Dict[str, Any]] = None
+
+
+_VERDICT = re.compile(
+    r"\b(?:verdict|decision|result|recommendation)\s*[:=]\s*\**\s*([a-z_ -]+)", re.IGNORECASE
+)
+_VERDICT_SYNONYMS = {
+    "approve": "approve", "approved": "approve", "accept": "approve", "lgtm": "approve",
+    "pass": "approve", "passed": "approve", "yes": "approve",
+    "reject": "reject", "rejected": "reject", "fail": "reject", "failed": "reject", "no": "reject",
+    "request changes": "changes", "request_changes": "changes", "changes requested": "changes",
+    "needs changes": "changes", "needs work": "changes",
+}
+_WORD = re.compile(r"\w+")
+
+
+def extract_verdict(text: str) -> Optional[str]:
+    """Structured verdict of a response ("approve", "reject", "changes"), if it states one."""
+    match = _VERDICT.search(text)
+    if match:
+        phrase = match.group(1).strip().lower()
+        for synonym, verdict in _VERDICT_SYNONYMS.items():
+            if phrase.startswith(synonym):
+                return verdict
+    first = _WORD.search(text)
+    if first and first.group(0).lower() in ("lgtm", "approve", "approved", "reject", "rejected"):
+        return _VERDICT_SYNONYMS[first.group(0).lower()]
+    return None
+
+
+def output_similarity(a: str, b: str) -> float:
+    """
+    Cheap agreement measure between two outputs (0-1).
+
+    Stated verdicts are compared directly; otherwise the word sets of the
+    normalized outputs are compared (Jaccard index).
+    """
+    verdict_a, verdict_b = extract_verdict(a), extract_verdict(b)
+    if verdict_a and verdict_b:
+        return 1.0 if verdict_a == verdict_b else 0.0
+    words_a = set(_WORD.findall(a.lower()))
+    words_b = set(_WORD.findall(b.lower()))
+    if not words_a and not words_b:
+        return 1.0
+    return len(words_a & words_b) / len(words_a | words_b)
+
+
+class ConsensusTracker:
+    """
+    Groups responses into agreeing clusters as they arrive.
+
+    A response joins the first cluster whose representative is at least
+    ``similarity_threshold`` similar to it. The call is settled once the
+    leading cluster has ``quorum`` members, or holds more than
+    ``confidence_threshold`` of the total weight of all participating models.
+    """
+
+    def __init__(
+        self,
+        total_weight: float,
+        quorum: int,
+        confidence_threshold: Optional[float] = None,
+        similarity_threshold: float = 0.8
+    ):
+        self.total_weight = total_weight
+        self.quorum = quorum
+        self.confidence_threshold = confidence_threshold
+        self.similarity_threshold = similarity_threshold
+        # [representative response, members, weight]
+        self.clusters: List[List[Any]] = []
+
+    def add(self, response: Dict[str, Any], weight: float) -> None:
+        """Add a response to its cluster."""
+        for cluster in self.clusters:
+            if output_similarity(cluster[0]["content"], response["content"]) >= self.similarity_threshold:
+                cluster[1].append(response)
+                cluster[2] += weight
+                return
+        self.clusters.append([response, [response], weight])
+
+    def leader(self) -> Optional[List[Any]]:
+        """The cluster with the highest weight."""
+        return max(self.clusters, key=lambda cluster: cluster[2]) if self.clusters else None
+
+    def settled(self) -> bool:
+        """Whether the leading cluster has reached the quorum or confidence threshold."""
+        leader = self.leader()
+        if leader is None:
+            return False
+        if len(leader[1]) >= self.quorum:
+            return True
+        return (
+            self.confidence_threshold is not None
+            and leader[2] / self.total_weight > self.confidence_threshold
+        )
 
 
 class MultiModelCollaborator:
@@ -66,15 +163,39 @@ class MultiModelCollaborator:
     for improved accuracy, reliability, and quality.
     """
 
-    def __init__(self, models: List[ModelConfig]):
+    def __init__(
+        self,
+        models: List[ModelConfig],
+        early_exit: bool = True,
+        quorum: Optional[int] = None,
+        confidence_threshold: Optional[float] = None,
+        similarity_threshold: float = 0.8
+    ):
         """
         Initialize multi-model collaborator.
 
         Args:
             models: List of model configurations
+            early_exit: Stop consensus/ensemble/parallel calls once the models agree
+            quorum: Agreeing responses needed to stop (default: a majority of the models)
+            confidence_threshold: Share of total model weight that also settles a call
+            similarity_threshold: Similarity at which two outputs count as agreeing
         """
         self.models = models
         self.providers: Dict[ModelRole, LLMProvider] = {}
+        self.early_exit = early_exit
+        self.quorum = quorum
+        self.confidence_threshold = confidence_threshold
+        self.similarity_threshold = similarity_threshold
+
+        # Smoothed latency per role, used to estimate what early exit saved
+        self._latency_ewma: Dict[ModelRole, float] = {}
+        self.stats = {
+            "early_exits": 0,
+            "calls_cancelled": 0,
+            "tokens_saved_estimate": 0,
+            "latency_saved_seconds_estimate": 0.0,
+        }
 
         # Initialize providers
         for model_config in models:
@@ -149,35 +270,20 @@ class MultiModelCollaborator:
     ) -> CollaborationResult:
         """
         Consensus strategy: All models vote, majority wins.
-        """
-        # Get responses from all models
-        tasks = []
-        for role, provider in providers.items():
-            tasks.append(self._get_model_response(provider, role, prompt, system_prompt, **kwargs))
-
-        responses = await asyncio.gather(*tasks, return_exceptions=True)
 
-        # Filter out exceptions
-        valid_responses = [r for r in responses if not isinstance(r, Exception)]
-
-        if not valid_responses:
-            raise RuntimeError("All models failed to respond")
+        Responses are grouped by similarity as they arrive; once one group
+        reaches the quorum the remaining calls are cancelled.
+        """
+        valid_responses, tracker, early_exit = await self._gather_until_settled(
+            prompt, providers, system_prompt, **kwargs
+        )
 
-        # Count votes for each unique response
+        # Count votes per group of agreeing responses
         votes: Dict[str, int] = {}
         weighted_votes: Dict[str, float] = {}
-
-        for response in valid_responses:
-            content = response['content']
-            role = response['role']
-            weight = self._get_model_weight(role)
-
-            if content in votes:
-                votes[content] += 1
-                weighted_votes[content] += weight
-            else:
-                votes[content] = 1
-                weighted_votes[content] = weight
+        for representative, members, weight in tracker.clusters:
+            votes[representative['content']] = len(members)
+            weighted_votes[representative['content']] = weight
 
         # Select response with highest weighted vote
         final_output = max(weighted_votes.items(), key=lambda x: x[1])[0]
@@ -190,7 +296,8 @@ class MultiModelCollaborator:
             final_output=final_output,
             individual_outputs=valid_responses,
             consensus_score=consensus_score,
-            model_votes=votes
+            model_votes=votes,
+            early_exit=early_exit
         )
 
     async def _ensemble_strategy(
@@ -202,19 +309,13 @@ class MultiModelCollaborator:
     ) -> CollaborationResult:
         """
         Ensemble strategy: Combine outputs from all models.
-        """
-        # Get responses from all models
-        tasks = []
-        for role, provider in providers.items():
-            tasks.append(self._get_model_response(provider, role, prompt, system_prompt, **kwargs))
-
-        responses = await asyncio.gather(*tasks, return_exceptions=True)
 
-        # Filter out exceptions
-        valid_responses = [r for r in responses if not isinstance(r, Exception)]
-
-        if not valid_responses:
-            raise RuntimeError("All models failed to respond")
+        Stops collecting once the models agree, since further agreeing
+        outputs add little to the combination.
+        """
+        valid_responses, _, early_exit = await self._gather_until_settled(
+            prompt, providers, system_prompt, **kwargs
+        )
 
         # Combine outputs
         combined_output = self._combine_outputs(valid_responses)
@@ -222,7 +323,8 @@ class MultiModelCollaborator:
         return CollaborationResult(
             strategy=CollaborationStrategy.ENSEMBLE,
             final_output=combined_output,
-            individual_outputs=valid_responses
+            individual_outputs=valid_responses,
+            early_exit=early_exit
         )
 
     async def _waterfall_strategy(
@@ -268,27 +370,23 @@ class MultiModelCollaborator:
     ) -> CollaborationResult:
         """
         Parallel strategy: Run all models in parallel, select best result.
-        """
-        # Get responses from all models in parallel
-        tasks = []
-        for role, provider in providers.items():
-            tasks.append(self._get_model_response(provider, role, prompt, system_prompt, **kwargs))
-
-        responses = await asyncio.gather(*tasks, return_exceptions=True)
 
-        # Filter out exceptions
-        valid_responses = [r for r in responses if not isinstance(r, Exception)]
-
-        if not valid_responses:
-            raise RuntimeError("All models failed to respond")
+        Once the models agree, the best of the responses so far is selected
+        without waiting for the slower models.
+        """
+        valid_responses, tracker, early_exit = await self._gather_until_settled(
+            prompt, providers, system_prompt, **kwargs
+        )
 
-        # Select best response based on quality metrics
-        best_response = self._select_best_response(valid_responses)
+        # Select best response based on quality metrics (from the agreeing group when settled early)
+        candidates = tracker.leader()[1] if early_exit else valid_responses
+        best_response = self._select_best_response(candidates)
 
         return CollaborationResult(
             strategy=CollaborationStrategy.PARALLEL,
             final_output=best_response['content'],
-            individual_outputs=valid_responses
+            individual_outputs=valid_responses,
+            early_exit=early_exit
         )
 
     async def _specialist_strategy(
@@ -325,6 +423,89 @@ class MultiModelCollaborator:
             individual_outputs=[response]
         )
 
+    async def _gather_until_settled(
+        self,
+        prompt: str,
+        providers: Dict[ModelRole, LLMProvider],
+        system_prompt: Optional[str],
+        **kwargs
+    ) -> Tuple[List[Dict[str, Any]], ConsensusTracker, Optional[Dict[str, Any]]]:
+        """
+        Query all models concurrently, evaluating agreement as responses arrive.
+
+        Returns:
+            (successful responses in arrival order, consensus tracker,
+             early-exit savings or None if every model was waited for)
+        """
+        start = time.monotonic()
+        tasks = {
+            asyncio.create_task(
+                self._get_model_response(provider, role, prompt, system_prompt, **kwargs)
+            ): role
+            for role, provider in providers.items()
+        }
+        tracker = ConsensusTracker(
+            total_weight=sum(self._get_model_weight(role) for role in providers),
+            quorum=self.quorum or len(providers) // 2 + 1,
+            confidence_threshold=self.confidence_threshold,
+            similarity_threshold=self.similarity_threshold
+        )
+        valid_responses: List[Dict[str, Any]] = []
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        response = task.result()
+                        valid_responses.append(response)
+                        tracker.add(response, self._get_model_weight(response['role']))
+                if self.early_exit and pending and tracker.settled():
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        if not valid_responses:
+            raise RuntimeError("All models failed to respond")
+
+        early_exit = None
+        if pending:
+            early_exit = self._record_early_exit(
+                [tasks[task] for task in pending], valid_responses, time.monotonic() - start
+            )
+        return valid_responses, tracker, early_exit
+
+    def _record_early_exit(
+        self,
+        cancelled_roles: List[ModelRole],
+        responses: List[Dict[str, Any]],
+        elapsed: float
+    ) -> Dict[str, Any]:
+        """Estimate and record the tokens and latency saved by cancelling calls."""
+        tokens = [r['usage'].get('total_tokens', 0) for r in responses if r.get('usage')]
+        tokens_saved = int(sum(tokens) / len(tokens) * len(cancelled_roles)) if tokens else 0
+        # The call would have lasted until the slowest cancelled model usually answers
+        expected = [self._latency_ewma[role] for role in cancelled_roles if role in self._latency_ewma]
+        latency_saved = max(max(expected) - elapsed, 0.0) if expected else 0.0
+
+        self.stats["early_exits"] += 1
+        self.stats["calls_cancelled"] += len(cancelled_roles)
+        self.stats["tokens_saved_estimate"] += tokens_saved
+        self.stats["latency_saved_seconds_estimate"] += latency_saved
+        logger.info(
+            f"Early exit after {len(responses)} responses: cancelled {len(cancelled_roles)} calls, "
+            f"~{tokens_saved} tokens and ~{latency_saved:.2f}s saved"
+        )
+        return {
+            "responses_used": len(responses),
+            "cancelled_roles": [role.value for role in cancelled_roles],
+            "tokens_saved_estimate": tokens_saved,
+            "latency_saved_seconds_estimate": latency_saved,
+        }
+
     async def _get_model_response(
         self,
         provider: LLMProvider,
@@ -334,14 +515,19 @@ class MultiModelCollaborator:
         **kwargs
     ) -> Dict[str, Any]:
         """Get response from a single model."""
+        start = time.monotonic()
         try:
             response = await provider.generate(prompt, system_prompt, **kwargs)
+            latency = time.monotonic() - start
+            previous = self._latency_ewma.get(role)
+            self._latency_ewma[role] = latency if previous is None else previous + 0.2 * (latency - previous)
 
             return {
                 'role': role,
                 'provider': provider.provider_name,
                 'content': response.content,
                 'usage': response.usage,
+                'latency': latency,
                 'timestamp': datetime.now().isoformat()
             }
         except Exception as e:
@@ -1,10 +1,12 @@
 """Multi-Model Coordination System for collaborative AI processing."""
 from enum import Enum
-from typing import List, Dict, Any, Optional, Callable
-from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Callable, Tuple
+from dataclasses import dataclass, field
 import asyncio
+import math
 import statistics
-from collections import Counter
+import time
+from collections import Counter, deque
 
 from resoftai.llm.factory import LLMFactory
 
@@ -53,6 +55,62 @@ class ModelResponse:
     confidence: float = 1.0  # Model's confidence in response
 
 
+@dataclass
+class ModelStats:
+    """Live latency and error statistics for one model."""
+    latency_ewma: Optional[float] = None
+    error_ewma: float = 0.0
+    samples: int = 0
+    recent_latencies: deque = field(default_factory=lambda: deque(maxlen=200))
+
+    # Smoothing factor: weight of the newest observation
+    ALPHA = 0.2
+
+    def record(self, latency: float, success: bool) -> None:
+        """Record the outcome of one request."""
+        self.samples += 1
+        self.error_ewma += self.ALPHA * ((0.0 if success else 1.0) - self.error_ewma)
+        if success:
+            self.recent_latencies.append(latency)
+            if self.latency_ewma is None:
+                self.latency_ewma = latency
+            else:
+                self.latency_ewma += self.ALPHA * (latency - self.latency_ewma)
+
+    def record_cancelled(self, elapsed: float) -> None:
+        """
+        Record a request cancelled after ``elapsed`` seconds.
+
+        Its real latency is at least ``elapsed``; leaving it out would hide
+        exactly the slow tail the hedge delay is computed from. The sample
+        does not count towards the error rate.
+        """
+        self.recent_latencies.append(elapsed)
+        # A lower bound only says something about the mean when it exceeds it
+        if self.latency_ewma is None:
+            self.latency_ewma = elapsed
+        elif elapsed > self.latency_ewma:
+            self.latency_ewma += self.ALPHA * (elapsed - self.latency_ewma)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Latency percentile (0-100) over recent successful requests."""
+        if not self.recent_latencies:
+            return None
+        ordered = sorted(self.recent_latencies)
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Statistics for reporting."""
+        return {
+            "latency_ewma": self.latency_ewma,
+            "error_rate": self.error_ewma,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "samples": self.samples,
+        }
+
+
 @dataclass
 class CoordinatedResponse:
     """Combined response from multiple models."""
@@ -69,11 +127,33 @@ class CoordinatedResponse:
 class MultiModelCoordinator:
     """Coordinates multiple AI models for improved results."""
 
-    def __init__(self, llm_factory: LLMFactory):
-        """Initialize coordinator with LLM factory."""
+    # Latency samples needed before a model's p95 is trusted as hedge delay
+    MIN_HEDGE_SAMPLES = 10
+    # Models whose smoothed error rate exceeds this are routed to last
+    UNHEALTHY_ERROR_RATE = 0.5
+
+    def __init__(
+        self,
+        llm_factory: LLMFactory,
+        hedge_percentile: float = 95.0,
+        hedging: bool = True
+    ):
+        """
+        Initialize coordinator with LLM factory.
+
+        Args:
+            llm_factory: Factory used to create (and pool) providers
+            hedge_percentile: Latency percentile after which a duplicate request is sent
+            hedging: Whether to send hedged duplicate requests
+        """
         self.llm_factory = llm_factory
         self.models: List[ModelConfig] = []
         self.performance_history: Dict[str, List[float]] = {}
+        self.model_stats: Dict[str, ModelStats] = {}
+        self.hedge_percentile = hedge_percentile
+        self.hedging = hedging
+        self._providers: Dict[Tuple[str, str], Any] = {}
+        self.stats = {"hedges_sent": 0, "hedges_won": 0, "cancelled": 0, "early_completions": 0}
 
     def add_model(self, config: ModelConfig) -> None:
         """Add a model to the coordination pool."""
@@ -86,6 +166,7 @@ class MultiModelCoordinator:
             m for m in self.models
             if not (m.provider == provider and m.model_name == model_name)
         ]
+        self._providers.pop((provider, model_name), None)
         return len(self.models) < initial_count
 
     async def execute(
@@ -95,17 +176,24 @@ class MultiModelCoordinator:
         task_complexity: TaskComplexity = TaskComplexity.MODERATE,
         max_models: Optional[int] = None,
         quality_threshold: float = 0.7,
+        first_k: Optional[int] = None,
         **kwargs
     ) -> CoordinatedResponse:
         """
         Execute prompt using multiple models with specified strategy.
 
+        Each model request is hedged: if it has not answered within the model's
+        p95 latency, a duplicate is sent and whichever finishes first wins. With
+        ``first_k`` (or a voting majority) the call completes as soon as enough
+        models have answered, and the slower requests are cancelled.
+
         Args:
             prompt: The input prompt
             strategy: How to combine model outputs
             task_complexity: Complexity level for model selection
             max_models: Maximum number of models to use
             quality_threshold: Minimum quality score for model selection
+            first_k: Complete once this many models have answered successfully
             **kwargs: Additional parameters for models
 
         Returns:
@@ -119,20 +207,25 @@ class MultiModelCoordinator:
         if not selected_models:
             raise ValueError("No models available for execution")
 
-        # Execute on all selected models
-        responses = await self._execute_on_models(selected_models, prompt, **kwargs)
+        # Execute on the selected models, stopping early once the strategy has enough
+        responses = await self._execute_on_models(
+            selected_models, prompt, first_k=first_k,
+            majority=strategy == CombinationStrategy.VOTING, **kwargs
+        )
 
         # Combine responses using strategy
         final_output = self._combine_responses(responses, strategy)
 
         # Calculate metrics
         total_tokens = sum(r.tokens_used for r in responses if r.success)
+        cost_per_token = {(m.provider, m.model_name): m.cost_per_token for m in selected_models}
         total_cost = sum(
-            r.tokens_used * m.cost_per_token
-            for r, m in zip(responses, selected_models)
+            r.tokens_used * cost_per_token[(r.provider, r.model_name)]
+            for r in responses
             if r.success
         )
-        avg_latency = statistics.mean([r.latency for r in responses if r.success])
+        latencies = [r.latency for r in responses if r.success]
+        avg_latency = statistics.mean(latencies) if latencies else 0.0
         consensus_score = self._calculate_consensus(responses)
 
         # Update performance history
@@ -148,6 +241,7 @@ class MultiModelCoordinator:
             consensus_score=consensus_score,
             metadata={
                 "models_used": len(selected_models),
+                "models_completed": len(responses),
                 "successful_responses": sum(1 for r in responses if r.success),
                 "task_complexity": task_complexity.value,
             }
@@ -163,8 +257,13 @@ class MultiModelCoordinator:
         # Filter by quality threshold
         candidates = [m for m in self.models if m.quality_score >= quality_threshold]
 
-        # Sort by priority and quality
-        candidates.sort(key=lambda m: (m.priority, -m.quality_score))
+        # Sort by health, priority and quality; among equals, prefer the faster model
+        candidates.sort(key=lambda m: (
+            not self._is_healthy(m),
+            m.priority,
+            -m.quality_score,
+            self._expected_latency(m),
+        ))
 
         # Determine number of models based on complexity
         if max_models is None:
@@ -183,14 +282,119 @@ class MultiModelCoordinator:
         self,
         models: List[ModelConfig],
         prompt: str,
+        first_k: Optional[int] = None,
+        majority: bool = False,
         **kwargs
     ) -> List[ModelResponse]:
-        """Execute prompt on multiple models concurrently."""
-        tasks = [
-            self._execute_single_model(model, prompt, **kwargs)
-            for model in models
-        ]
-        return await asyncio.gather(*tasks, return_exceptions=False)
+        """
+        Execute prompt on multiple models concurrently.
+
+        Returns as soon as ``first_k`` successful responses are in, or (with
+        ``majority``) once one answer has a majority of all selected models.
+        Requests still running are cancelled (and counted as such by
+        ``_execute_hedged``) and left out of the result. Responses are returned
+        in selection order.
+        """
+        tasks = {
+            asyncio.create_task(self._execute_hedged(model, prompt, **kwargs)): index
+            for index, model in enumerate(models)
+        }
+        completed: Dict[int, ModelResponse] = {}
+        votes: Counter = Counter()
+        needed_votes = len(models) // 2 + 1
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    response = task.result()
+                    completed[tasks[task]] = response
+                    if response.success:
+                        votes[response.content] += 1
+
+                successes = sum(votes.values())
+                if pending and (
+                    (first_k is not None and successes >= first_k)
+                    or (majority and votes and votes.most_common(1)[0][1] >= needed_votes)
+                ):
+                    self.stats["early_completions"] += 1
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        return [completed[index] for index in sorted(completed)]
+
+    def _hedge_delay(self, model_config: ModelConfig) -> Optional[float]:
+        """Seconds to wait before hedging a request, or None to not hedge."""
+        stats = self.model_stats.get(f"{model_config.provider}/{model_config.model_name}")
+        if not self.hedging or stats is None or len(stats.recent_latencies) < self.MIN_HEDGE_SAMPLES:
+            return None
+        return stats.percentile(self.hedge_percentile)
+
+    async def _execute_hedged(
+        self,
+        model_config: ModelConfig,
+        prompt: str,
+        **kwargs
+    ) -> ModelResponse:
+        """
+        Execute on one model, sending a duplicate request if it is slow.
+
+        The duplicate goes out once the request has run longer than the model's
+        p95 latency; the first successful reply wins and the other is cancelled.
+        Every finished attempt is recorded in the model's live statistics, and
+        every cancelled one (lost hedge or early completion of the caller) with
+        its elapsed time as a lower bound of its latency.
+        """
+        delay = self._hedge_delay(model_config)
+        started: Dict[asyncio.Task, float] = {}
+
+        def start_attempt() -> asyncio.Task:
+            task = asyncio.create_task(self._execute_single_model(model_config, prompt, **kwargs))
+            started[task] = time.monotonic()
+            return task
+
+        attempts = [start_attempt()]
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=delay)
+            if not done:
+                attempts.append(start_attempt())
+                self.stats["hedges_sent"] += 1
+
+            response = None
+            pending = set(attempts)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
+                    self._record_latency(result)
+                    if response is None or (result.success and not response.success):
+                        response = result
+                        if len(attempts) > 1 and result.success and task is attempts[1]:
+                            self.stats["hedges_won"] += 1
+                if response.success:
+                    break
+            return response
+        finally:
+            key = f"{model_config.provider}/{model_config.model_name}"
+            for task in attempts:
+                if not task.done():
+                    task.cancel()
+                    self.stats["cancelled"] += 1
+                    self.model_stats.setdefault(key, ModelStats()).record_cancelled(
+                        time.monotonic() - started[task]
+                    )
+
+    def _get_provider(self, model_config: ModelConfig) -> Any:
+        """Pooled provider instance for a model, created on first use."""
+        key = (model_config.provider, model_config.model_name)
+        provider = self._providers.get(key)
+        if provider is None:
+            provider = self._providers[key] = self.llm_factory.create(model_config.provider)
+        return provider
 
     async def _execute_single_model(
         self,
@@ -199,13 +403,11 @@ class MultiModelCoordinator:
         **kwargs
     ) -> ModelResponse:
         """Execute prompt on a single model."""
-        import time
-
-        start_time = time.time()
+        start_time = time.monotonic()
 
         try:
             # Get LLM provider
-            provider = self.llm_factory.create(model_config.provider)
+            provider = self._get_provider(model_config)
 
             # Prepare messages
             messages = kwargs.get("messages", [{"role": "user", "content": prompt}])
@@ -221,7 +423,7 @@ class MultiModelCoordinator:
                 timeout=model_config.timeout
             )
 
-            latency = time.time() - start_time
+            latency = time.monotonic() - start_time
 
             return ModelResponse(
                 provider=model_config.provider,
@@ -239,7 +441,7 @@ class MultiModelCoordinator:
                 model_name=model_config.model_name,
                 content="",
                 tokens_used=0,
-                latency=time.time() - start_time,
+                latency=time.monotonic() - start_time,
                 success=False,
                 error="Timeout",
                 confidence=0.0
@@ -250,7 +452,7 @@ class MultiModelCoordinator:
                 model_name=model_config.model_name,
                 content="",
                 tokens_used=0,
-                latency=time.time() - start_time,
+                latency=time.monotonic() - start_time,
                 success=False,
                 error=str(e),
                 confidence=0.0
@@ -337,6 +539,28 @@ class MultiModelCoordinator:
             return statistics.mean(self.performance_history[key])
         return 0.5  # Default quality
 
+    def _record_latency(self, response: ModelResponse) -> None:
+        """Update a model's live latency and error statistics."""
+        key = f"{response.provider}/{response.model_name}"
+        self.model_stats.setdefault(key, ModelStats()).record(response.latency, response.success)
+
+    def _is_healthy(self, model_config: ModelConfig) -> bool:
+        """Whether a model's recent error rate is acceptable."""
+        stats = self.model_stats.get(f"{model_config.provider}/{model_config.model_name}")
+        return stats is None or stats.samples < 5 or stats.error_ewma < self.UNHEALTHY_ERROR_RATE
+
+    def _expected_latency(self, model_config: ModelConfig) -> float:
+        """Smoothed latency of a model (unknown models sort first so they get measured)."""
+        stats = self.model_stats.get(f"{model_config.provider}/{model_config.model_name}")
+        return stats.latency_ewma if stats and stats.latency_ewma is not None else 0.0
+
+    def get_routing_stats(self) -> Dict[str, Any]:
+        """Live per-model latency/error statistics and hedging counters."""
+        return {
+            **self.stats,
+            "models": {key: stats.to_dict() for key, stats in self.model_stats.items()},
+        }
+
     def _update_performance_history(self, responses: List[ModelResponse]) -> None:
         """Update performance history for models."""
         for response in responses:
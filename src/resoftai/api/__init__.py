@@ -1,5 +1,15 @@
 """Web API for ResoftAI platform."""
 
-from resoftai.api.server import app
+import importlib
 
 __all__ = ["app"]
+
+
+def __getattr__(name):
+    # The legacy server imports every agent; only load it when ``app`` is used,
+    # not whenever a submodule such as ``resoftai.api.main`` is imported.
+    if name == "app":
+        value = importlib.import_module("resoftai.api.server").app
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
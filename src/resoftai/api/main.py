@@ -6,12 +6,26 @@ from contextlib import asynccontextmanager
 import socketio
 
 from resoftai.config import Settings
-from resoftai.db import init_db, close_db
+from resoftai.core.semantic_cache import semantic_cache
+from resoftai.db import engine, init_db, close_db
+from resoftai.llm.pool import provider_pool
+from resoftai.api.middleware import RateLimitMiddleware
 from resoftai.api.routes import (
     auth, projects, agent_activities, files, llm_configs, execution,
-    templates, code_quality, organizations, teams, plugins, ai_capabilities
+    templates, code_quality, organizations, teams, plugins, ai_capabilities,
+    search
 )
+from resoftai.services.audit_pipeline import audit_pipeline
+from resoftai.services.metrics_rollup import metrics_rollup_service
+from resoftai.services.llm_usage import llm_usage_recorder
+from resoftai.services.notification_delivery import notification_delivery
+from resoftai.services.popularity_counters import popularity_counters
+from resoftai.services.quota_engine import quota_engine
+from resoftai.services.recommendations import recommendation_engine
+from resoftai.services.search_service import search_service
+from resoftai.utils.cache import cache_manager
 from resoftai.websocket import sio
+from resoftai.websocket.collaboration import presence
 
 logger = logging.getLogger(__name__)
 settings = Settings()
@@ -24,11 +38,41 @@ async def lifespan(app: FastAPI):
     logger.info("Starting ResoftAI API server...")
     await init_db()
     logger.info("Database initialized")
+    async with engine.connect() as conn:
+        await search_service.detect_postgres_schema(conn)
+    metrics_rollup_service.start()
+    popularity_counters.start()
+    recommendation_engine.start()
+    quota_engine.start()
+    audit_pipeline.spill_path = settings.audit_spill_path
+    audit_pipeline.start()
+    notification_delivery.start()
+    llm_usage_recorder.start()
+    cache_manager.start()
+    semantic_cache.threshold = settings.semantic_cache_threshold
+    semantic_cache.reuse_threshold = settings.semantic_cache_reuse_threshold
+    if settings.semantic_cache_enabled and settings.semantic_cache_path:
+        semantic_cache.load(settings.semantic_cache_path)
+    try:
+        provider_pool.warm([settings.get_llm_config()])
+    except Exception as e:
+        logger.warning(f"Could not warm the default LLM provider: {e}")
 
     yield
 
     # Shutdown
     logger.info("Shutting down ResoftAI API server...")
+    await metrics_rollup_service.stop()
+    await popularity_counters.stop()
+    await recommendation_engine.stop()
+    await quota_engine.stop()
+    await audit_pipeline.stop()
+    await notification_delivery.stop()
+    await llm_usage_recorder.stop()
+    await presence.stop()
+    await cache_manager.stop()
+    await semantic_cache.flush()
+    await provider_pool.close()
     await close_db()
     logger.info("Database connections closed")
 
@@ -87,6 +131,10 @@ API requests are rate-limited based on your subscription tier:
 - Professional: 2000 requests/minute
 - Enterprise: Custom limits
 
+Every response carries `X-RateLimit-Limit`, `X-RateLimit-Remaining` and
+`X-RateLimit-Reset` (seconds until the full allowance is back). Requests over
+the limit receive `429 Too Many Requests` with a `Retry-After` header.
+
 ## Support
 
 - Documentation: https://docs.resoftai.com
@@ -166,6 +214,9 @@ API requests are rate-limited based on your subscription tier:
     ]
 )
 
+# Rate limiting (added before CORS so that 429 responses carry CORS headers)
+app.add_middleware(RateLimitMiddleware, enabled=settings.rate_limit_enabled)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -186,6 +237,7 @@ app.include_router(templates.router, prefix="/api/v1")
 app.include_router(performance.router, prefix="/api")
 app.include_router(monitoring.router, prefix="/api")
 app.include_router(marketplace.router, prefix="/api")
+app.include_router(search.router, prefix="/api")
 
 # AI capabilities routers
 app.include_router(ai_capabilities.router, prefix="/api")
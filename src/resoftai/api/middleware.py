@@ -0,0 +1,227 @@
+"""
+ASGI middleware for the API.
+
+``RateLimitMiddleware`` enforces the per-tier request limits advertised in
+the API docs. Callers are identified by their organization (from the bearer
+token's user), by user when they have no organization, and by client IP
+otherwise. Token decoding and tier lookups are cached in-process, so the
+only shared state touched per request is the rate limiter itself.
+"""
+import json
+import logging
+from typing import Awaitable, Callable, Iterable, Optional, Tuple
+
+from resoftai.auth.security import verify_token
+from resoftai.db import AsyncSessionLocal
+from resoftai.utils.cache import LocalCache, _MISSING
+from resoftai.utils.rate_limit import RateLimiter, RateLimitResult, rate_limiter
+
+logger = logging.getLogger(__name__)
+
+# Requests per minute by organization tier
+TIER_LIMITS = {
+    "free": 100,
+    "starter": 500,
+    "professional": 2000,
+    "enterprise": 10000,  # Default when no custom quota is configured
+}
+
+EXEMPT_PATHS = ("/health", "/docs", "/redoc", "/openapi.json")
+
+
+class RateLimitPolicy:
+    """
+    Map a request to its rate limit key and per-minute limit.
+
+    Enterprise organizations (or any organization) can override the tier
+    default with an ``API_CALLS`` quota whose period is ``"minute"``.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable = AsyncSessionLocal,
+        default_limit: int = TIER_LIMITS["free"],
+        ttl: float = 300,
+        token_ttl: float = 60,
+        maxsize: int = 50_000
+    ):
+        """
+        Initialize policy.
+
+        Args:
+            session_factory: Factory for database sessions used by lookups
+            default_limit: Limit for anonymous callers and users without an organization
+            ttl: Seconds to keep tier lookups
+            token_ttl: Seconds to keep a token's user; bounds how long a token
+                revoked on another worker still counts against its user
+            maxsize: Maximum cached tokens and users each
+        """
+        self.session_factory = session_factory
+        self.default_limit = default_limit
+        self.ttl = ttl
+        self.token_ttl = token_ttl
+        self._tokens = LocalCache(maxsize=maxsize)
+        self._users = LocalCache(maxsize=maxsize)
+
+    async def resolve(self, scope) -> Tuple[str, int]:
+        """
+        Get the rate limit key and limit for a request.
+
+        Args:
+            scope: ASGI HTTP scope
+
+        Returns:
+            Tuple of (key, requests per minute)
+        """
+        user_id = self._user_id(scope)
+        if user_id is None:
+            client = scope.get("client")
+            return f"ip:{client[0] if client else 'unknown'}", self.default_limit
+        return await self.resolve_user(user_id)
+
+    async def resolve_user(self, user_id: int) -> Tuple[str, int]:
+        """Get the rate limit key and limit for an authenticated user."""
+        cached = self._users.get(user_id)
+        if cached is not _MISSING:
+            return cached
+
+        resolved = f"user:{user_id}", self.default_limit
+        try:
+            row = await self.load_organization_limit(user_id)
+            if row is not None:
+                org_id, tier, quota_limit = row
+                tier = getattr(tier, "value", tier)
+                resolved = f"org:{org_id}", quota_limit or TIER_LIMITS.get(tier, self.default_limit)
+        except Exception as e:
+            # Keep serving with the default limit; retried after the TTL
+            logger.warning(f"Rate limit tier lookup failed for user {user_id}: {e}")
+
+        self._users.set(user_id, resolved, ttl=self.ttl)
+        return resolved
+
+    async def load_organization_limit(self, user_id: int):
+        """Load (organization_id, tier, quota limit) for a user from the database."""
+        from resoftai.crud.enterprise import get_user_rate_limit
+
+        async with self.session_factory() as db:
+            return await get_user_rate_limit(db, user_id)
+
+    def invalidate(self, user_id: Optional[int] = None):
+        """
+        Forget cached tiers for one user, or for everyone (e.g. after a tier change).
+
+        Forgetting one user also drops the tokens resolved to them, so a
+        deactivated user's tokens are verified again on their next request.
+        """
+        if user_id is None:
+            self._users.clear()
+            self._tokens.clear()
+        else:
+            self._users.delete(user_id)
+            self._tokens.invalidate_tag(f"user:{user_id}")
+
+    def forget_token(self, token: str):
+        """Drop a token's cached user (e.g. on logout)."""
+        self._tokens.delete(token)
+
+    def _user_id(self, scope) -> Optional[int]:
+        token = None
+        for name, value in scope.get("headers", ()):
+            if name == b"authorization":
+                scheme, _, credentials = value.decode("latin-1").partition(" ")
+                if scheme.lower() == "bearer":
+                    token = credentials.strip()
+                break
+        if not token:
+            return None
+
+        user_id = self._tokens.get(token)
+        if user_id is _MISSING:
+            token_data = verify_token(token, token_type="access")
+            user_id = token_data.user_id if token_data else None
+            tags = (f"user:{user_id}",) if user_id is not None else ()
+            self._tokens.set(token, user_id, ttl=self.token_ttl, tags=tags)
+        return user_id
+
+
+# Global rate limit policy, shared with logout and user deactivation
+rate_limit_policy = RateLimitPolicy()
+
+
+class RateLimitMiddleware:
+    """
+    Enforce per-caller request limits and report them in ``X-RateLimit-*`` headers.
+
+    Rejected requests get ``429 Too Many Requests`` with ``Retry-After``.
+    ``X-RateLimit-Reset`` is the number of seconds until the caller's full
+    allowance is available again.
+    """
+
+    def __init__(
+        self,
+        app,
+        limiter: RateLimiter = rate_limiter,
+        policy: Optional[RateLimitPolicy] = None,
+        period: float = 60,
+        exempt_paths: Iterable[str] = EXEMPT_PATHS,
+        enabled: bool = True
+    ):
+        """
+        Initialize middleware.
+
+        Args:
+            app: Wrapped ASGI application
+            limiter: Rate limiter instance
+            policy: Maps requests to keys and limits (the global policy if not provided)
+            period: Period the limits apply to, in seconds
+            exempt_paths: Paths that are never limited
+            enabled: Pass every request through when False
+        """
+        self.app = app
+        self.limiter = limiter
+        self.policy = policy or rate_limit_policy
+        self.period = period
+        self.exempt_paths = tuple(exempt_paths)
+        self.enabled = enabled
+
+    async def __call__(self, scope, receive, send):
+        if (
+            not self.enabled
+            or scope["type"] != "http"
+            or scope["method"] == "OPTIONS"
+            or scope["path"].startswith(self.exempt_paths)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        key, limit = await self.policy.resolve(scope)
+        result = await self.limiter.hit(key, limit, self.period)
+        headers = [(name.lower().encode(), value.encode()) for name, value in result.headers().items()]
+
+        if not result.allowed:
+            await self._reject(send, result, headers)
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+    @staticmethod
+    async def _reject(send: Callable[[dict], Awaitable[None]], result: RateLimitResult, headers):
+        body = json.dumps({
+            "detail": "Rate limit exceeded",
+            "retry_after": max(round(result.retry_after, 3), 0),
+        }).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                *headers,
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
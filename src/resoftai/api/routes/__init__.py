@@ -1,4 +1,12 @@
 """API routes module."""
-from resoftai.api.routes import auth, projects, code_quality
+
+import importlib
 
 __all__ = ["auth", "projects", "code_quality"]
+
+
+def __getattr__(name):
+    # Route modules are loaded when the application includes them
+    if name in __all__:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -9,17 +9,17 @@ Provides endpoints for:
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_
 from pydantic import BaseModel, Field
 from datetime import datetime
 
 from resoftai.db import get_db
 from resoftai.auth.dependencies import get_current_active_user
 from resoftai.models.user import User
-from resoftai.models.plugin import Plugin, PluginStatus
-from resoftai.models.template import TemplateModel, TemplateStatus
+from resoftai.models.plugin import PluginStatus
+from resoftai.models.template import TemplateStatus
 from resoftai.crud import plugin as plugin_crud
 from resoftai.crud import template as template_crud
+from resoftai.services.marketplace_stats import marketplace_stats
 
 router = APIRouter(prefix="/admin", tags=["admin-review"])
 
@@ -492,60 +492,12 @@ async def get_admin_stats(
 ):
     """
     Get admin dashboard statistics
-    """
-    # Count plugins by status
-    pending_plugins = await db.execute(
-        select(func.count(Plugin.id)).where(Plugin.status == PluginStatus.SUBMITTED)
-    )
-    approved_plugins = await db.execute(
-        select(func.count(Plugin.id)).where(Plugin.status == PluginStatus.APPROVED)
-    )
-    rejected_plugins = await db.execute(
-        select(func.count(Plugin.id)).where(Plugin.status == PluginStatus.REJECTED)
-    )
 
-    # Count templates by status
-    pending_templates = await db.execute(
-        select(func.count(TemplateModel.id)).where(TemplateModel.status == TemplateStatus.SUBMITTED)
-    )
-    approved_templates = await db.execute(
-        select(func.count(TemplateModel.id)).where(TemplateModel.status == TemplateStatus.APPROVED)
-    )
-    rejected_templates = await db.execute(
-        select(func.count(TemplateModel.id)).where(TemplateModel.status == TemplateStatus.REJECTED)
-    )
-
-    # Count total contributors
-    from resoftai.models.template import ContributorProfile
-    total_contributors = await db.execute(
-        select(func.count(ContributorProfile.id))
-    )
-
-    # Calculate total downloads and installs
-    plugin_downloads = await db.execute(
-        select(func.sum(Plugin.downloads_count))
-    )
-    template_downloads = await db.execute(
-        select(func.sum(TemplateModel.downloads_count))
-    )
-    plugin_installs = await db.execute(
-        select(func.sum(Plugin.installs_count))
-    )
-    template_installs = await db.execute(
-        select(func.sum(TemplateModel.installs_count))
-    )
-
-    return AdminStatsResponse(
-        pending_plugins=pending_plugins.scalar_one(),
-        pending_templates=pending_templates.scalar_one(),
-        approved_plugins=approved_plugins.scalar_one(),
-        approved_templates=approved_templates.scalar_one(),
-        rejected_plugins=rejected_plugins.scalar_one(),
-        rejected_templates=rejected_templates.scalar_one(),
-        total_contributors=total_contributors.scalar_one(),
-        total_downloads=(plugin_downloads.scalar_one() or 0) + (template_downloads.scalar_one() or 0),
-        total_installs=(plugin_installs.scalar_one() or 0) + (template_installs.scalar_one() or 0)
-    )
+    Computed in a single aggregate query and cached briefly; approvals,
+    rejections and new submissions invalidate the cache.
+    """
+    stats = await marketplace_stats.get_admin_stats(db)
+    return AdminStatsResponse(**stats)
 
 
 # =============================================================================
@@ -1,10 +1,12 @@
 """API routes for AI capabilities (multi-model, code review, predictive analysis)."""
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+import logging
+from typing import Dict, List, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, Field
 
-from resoftai.db import get_db
+from resoftai.crud.llm_config import get_active_llm_config
+from resoftai.db import AsyncSessionLocal, get_db
 from resoftai.auth import get_current_user, require_admin
 from resoftai.models.user import User
 from resoftai.models.project import Project
@@ -15,10 +17,13 @@ from resoftai.ai.multi_model_coordinator import (
     TaskComplexity,
     ModelConfig
 )
-from resoftai.ai.code_reviewer import IntelligentCodeReviewer, IssueSeverity, IssueCategory
+from resoftai.ai.code_reviewer import CodeReviewReport, IntelligentCodeReviewer, IssueSeverity, IssueCategory
 from resoftai.ai.predictive_analyzer import PredictiveAnalyzer
+from resoftai.llm.base import LLMConfig, ModelProvider
 from resoftai.llm.factory import LLMFactory
-from sqlalchemy import select, desc
+from sqlalchemy import func, select, desc
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/ai", tags=["AI Capabilities"])
 
@@ -55,6 +60,13 @@ class CodeReviewRequest(BaseModel):
     project_id: Optional[int] = Field(None, description="Project ID")
 
 
+class BatchCodeReviewRequest(BaseModel):
+    """Request to review many files without waiting for the results."""
+    files: Dict[str, str] = Field(..., min_length=1, description="Source code by file path")
+    language: str = Field("python", description="Programming language")
+    project_id: Optional[int] = Field(None, description="Project ID")
+
+
 class PredictiveAnalysisRequest(BaseModel):
     """Request for predictive analysis."""
     project_id: int = Field(..., gt=0, description="Project ID")
@@ -224,7 +236,7 @@ async def execute_multi_model(
             }
             for r in result.individual_responses
         ],
-        metadata=result.metadata
+        execution_metadata=result.metadata
     )
     db.add(execution)
     await db.commit()
@@ -261,35 +273,18 @@ async def get_performance_stats(
 
 # ==================== Intelligent Code Review ====================
 
-@router.post("/code-review", response_model=CodeReviewResponse)
-async def review_code(
-    request: CodeReviewRequest,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
-):
-    """
-    Perform intelligent AI-powered code review.
-
-    Analyzes code for security, performance, bugs, and best practices.
-    """
-    # Initialize code reviewer
-    coordinator = get_coordinator()
-    reviewer = IntelligentCodeReviewer(coordinator)
-
-    # Perform review
-    context = {"project_id": request.project_id} if request.project_id else {}
-    report = await reviewer.review_code(
-        code=request.code,
-        language=request.language,
-        file_path=request.file_path,
-        context=context
-    )
-
-    # Save review to database
+async def _save_review(
+    db: AsyncSession,
+    report: CodeReviewReport,
+    project_id: Optional[int],
+    file_path: str,
+    language: str
+) -> CodeReview:
+    """Save a review and its issues to the database."""
     code_review = CodeReview(
-        project_id=request.project_id or 0,
-        file_path=request.file_path,
-        language=request.language,
+        project_id=project_id or 0,
+        file_path=file_path,
+        language=language,
         files_reviewed=report.files_reviewed,
         total_lines=report.total_lines,
         quality_score=report.quality_score,
@@ -328,6 +323,36 @@ async def review_code(
 
     await db.commit()
     await db.refresh(code_review)
+    return code_review
+
+
+@router.post("/code-review", response_model=CodeReviewResponse)
+async def review_code(
+    request: CodeReviewRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Perform intelligent AI-powered code review.
+
+    Analyzes code for security, performance, bugs, and best practices.
+    """
+    # Initialize code reviewer
+    coordinator = get_coordinator()
+    reviewer = IntelligentCodeReviewer(coordinator)
+
+    # Perform review
+    context = {"project_id": request.project_id} if request.project_id else {}
+    report = await reviewer.review_code(
+        code=request.code,
+        language=request.language,
+        file_path=request.file_path,
+        context=context
+    )
+
+    code_review = await _save_review(
+        db, report, request.project_id, request.file_path, request.language
+    )
 
     return CodeReviewResponse(
         id=code_review.id,
@@ -345,6 +370,96 @@ async def review_code(
     )
 
 
+async def _run_batch_review(llm_config: LLMConfig, request: BatchCodeReviewRequest):
+    """Review the files through the provider's batch API and save each review."""
+    batch = LLMFactory.create_batch(llm_config)
+    try:
+        reviewer = IntelligentCodeReviewer(get_coordinator(), batch_executor=batch)
+        context = {"project_id": request.project_id} if request.project_id else {}
+        reports = await reviewer.review_files(request.files, request.language, context)
+        async with AsyncSessionLocal() as db:
+            for file_path, report in zip(request.files, reports):
+                await _save_review(db, report, request.project_id, file_path, request.language)
+    except Exception as e:
+        logger.error(f"Batch code review of {len(request.files)} files failed: {e}", exc_info=True)
+    finally:
+        await batch.close()
+
+
+@router.post("/code-review/batch", status_code=status.HTTP_202_ACCEPTED)
+async def review_code_batch(
+    request: BatchCodeReviewRequest,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Review many files through the provider's batch API.
+
+    Returns at once; batch jobs cost less than real-time calls but can take
+    hours. Each file's review is saved when the job finishes and is listed
+    under the project's code reviews.
+    """
+    llm_config_model = await get_active_llm_config(db, current_user.id)
+    if not llm_config_model:
+        raise HTTPException(status_code=400, detail="No active LLM configuration found")
+
+    llm_config = LLMConfig(
+        provider=ModelProvider(llm_config_model.provider),
+        api_key=llm_config_model.api_key_encrypted,
+        model_name=llm_config_model.model_name,
+        max_tokens=llm_config_model.max_tokens or 8192,
+        temperature=llm_config_model.temperature or 0.7
+    )
+    background_tasks.add_task(_run_batch_review, llm_config, request)
+    return {"status": "submitted", "files": len(request.files)}
+
+
+@router.get("/code-review/project/{project_id}", response_model=List[CodeReviewResponse])
+async def get_project_code_reviews(
+    project_id: int,
+    limit: int = 50,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get the latest code reviews of a project."""
+    from resoftai.models.ai_analysis import CodeIssueModel
+
+    result = await db.execute(
+        select(CodeReview)
+        .where(CodeReview.project_id == project_id)
+        .order_by(desc(CodeReview.reviewed_at))
+        .limit(limit)
+    )
+    reviews = result.scalars().all()
+    counts = {}
+    if reviews:
+        counts_result = await db.execute(
+            select(CodeIssueModel.review_id, func.count())
+            .where(CodeIssueModel.review_id.in_([review.id for review in reviews]))
+            .group_by(CodeIssueModel.review_id)
+        )
+        counts = dict(counts_result.all())
+
+    return [
+        CodeReviewResponse(
+            id=review.id,
+            project_id=review.project_id,
+            file_path=review.file_path,
+            language=review.language,
+            files_reviewed=review.files_reviewed,
+            total_lines=review.total_lines,
+            quality_score=review.quality_score,
+            maintainability_index=review.maintainability_index,
+            security_score=review.security_score,
+            summary=review.summary,
+            recommendations=review.recommendations or [],
+            issues_count=counts.get(review.id, 0)
+        )
+        for review in reviews
+    ]
+
+
 @router.get("/code-review/{review_id}", response_model=CodeReviewResponse)
 async def get_code_review(
     review_id: int,
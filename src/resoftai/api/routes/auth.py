@@ -19,7 +19,8 @@ from resoftai.auth.security import (
     verify_token,
     Token
 )
-from resoftai.auth.dependencies import get_current_active_user
+from resoftai.auth.dependencies import get_current_active_user, oauth2_scheme
+from resoftai.api.middleware import rate_limit_policy
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
@@ -216,12 +217,14 @@ async def get_current_user_info(
 
 @router.post("/logout")
 async def logout(
+    token: str = Depends(oauth2_scheme),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Logout (client should discard tokens).
 
     Args:
+        token: Access token being discarded
         current_user: Current authenticated user
 
     Returns:
@@ -229,4 +232,5 @@ async def logout(
     """
     # In a stateless JWT system, logout is handled client-side by discarding tokens
     # We could implement token blacklisting here if needed
+    rate_limit_policy.forget_token(token)
     return {"message": "Successfully logged out"}
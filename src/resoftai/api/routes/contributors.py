@@ -265,10 +265,7 @@ async def get_my_stats(
     """
     Get current user's contributor statistics
     """
-    # Update stats first
-    await template_crud.update_contributor_stats(db, current_user.id)
-
-    profile = await template_crud.get_contributor_profile(db, current_user.id)
+    profile = await template_crud.update_contributor_stats(db, current_user.id)
 
     if not profile:
         raise HTTPException(
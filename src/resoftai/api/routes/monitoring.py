@@ -1,8 +1,8 @@
 """Enhanced performance monitoring and analytics API routes."""
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Union
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel, Field
-from datetime import datetime
+from datetime import datetime, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from resoftai.db import get_db
@@ -16,13 +16,16 @@ from resoftai.crud.performance_metrics import (
     get_agent_performance_by_role,
     get_agent_performance_summary,
     get_system_metrics_history,
+    get_system_metric_series,
     get_latest_system_metrics,
     get_llm_usage_by_user,
     get_llm_usage_summary,
     get_active_alerts,
     acknowledge_alert,
-    resolve_alert
+    resolve_alert,
+    SYSTEM_METRIC_FIELDS
 )
+from resoftai.utils.timeseries import to_columnar
 
 router = APIRouter(prefix="/monitoring", tags=["monitoring"])
 
@@ -156,6 +159,18 @@ class TimeSeriesResponse(BaseModel):
     """Time series response."""
     metric_name: str
     data_points: List[TimeSeriesDataPoint]
+    resolution: Optional[str] = None
+
+
+class ColumnarTimeSeriesResponse(BaseModel):
+    """Downsampled time series in column-oriented form."""
+    metric_name: str
+    resolution: str
+    bucket_seconds: int
+    start: datetime
+    end: datetime
+    # Integer epoch-second "timestamps" (and "count") next to float statistics
+    columns: Dict[str, List[Union[int, float]]]
 
 
 # Endpoints
@@ -318,6 +333,7 @@ async def get_system_metrics(
 async def get_metric_timeseries(
     metric_name: str,
     hours: int = Query(24, ge=1, le=168),
+    max_points: int = Query(500, ge=10, le=2000),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ) -> Dict[str, Any]:
@@ -327,26 +343,77 @@ async def get_metric_timeseries(
     Args:
         metric_name: Name of the metric
         hours: Number of hours of history
+        max_points: Maximum number of data points (bucket averages)
 
     Returns:
         Time series data
     """
-    metrics_history = await get_system_metrics_history(db, hours)
-
-    # Extract the requested metric
-    data_points = []
-    for metrics in metrics_history:
-        if hasattr(metrics, metric_name):
-            value = getattr(metrics, metric_name)
-            if value is not None:
-                data_points.append({
-                    "timestamp": metrics.timestamp,
-                    "value": float(value)
-                })
+    if metric_name not in SYSTEM_METRIC_FIELDS:
+        return {"metric_name": metric_name, "data_points": []}
+
+    end = datetime.utcnow()
+    series = await get_system_metric_series(
+        db, metric_name, end - timedelta(hours=hours), end, max_points
+    )
+
+    return {
+        "metric_name": metric_name,
+        "resolution": series["resolution"],
+        "data_points": [
+            {"timestamp": bucket.start, "value": bucket.avg}
+            for bucket in series["buckets"]
+        ]
+    }
+
+
+@router.get("/system/series/{metric_name}", response_model=ColumnarTimeSeriesResponse)
+async def get_metric_series(
+    metric_name: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    max_points: int = Query(500, ge=10, le=2000),
+    fields: str = Query("min,max,avg,p95", description="Comma-separated: min, max, avg, p95, count"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Dict[str, Any]:
+    """
+    Get a downsampled, columnar time series for a system metric.
+
+    The resolution (1m/5m/1h/1d) is chosen automatically so that the
+    response never exceeds max_points buckets, whatever the range.
+
+    Args:
+        metric_name: Name of the metric
+        start: Range start (default: 24 hours before end)
+        end: Range end (default: now)
+        max_points: Maximum number of buckets
+        fields: Statistics to include per bucket
+
+    Returns:
+        Columnar time series
+    """
+    if metric_name not in SYSTEM_METRIC_FIELDS:
+        raise HTTPException(status_code=404, detail=f"Unknown metric: {metric_name}")
+
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    invalid = set(requested) - {"min", "max", "avg", "p95", "count"}
+    if invalid or not requested:
+        raise HTTPException(status_code=400, detail=f"Invalid fields: {', '.join(sorted(invalid))}")
+
+    end = end or datetime.utcnow()
+    start = start or end - timedelta(hours=24)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+
+    series = await get_system_metric_series(db, metric_name, start, end, max_points)
 
     return {
         "metric_name": metric_name,
-        "data_points": data_points
+        "resolution": series["resolution"],
+        "bucket_seconds": series["bucket_seconds"],
+        "start": start,
+        "end": end,
+        "columns": to_columnar(series["buckets"], requested)
     }
 
 
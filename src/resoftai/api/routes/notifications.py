@@ -6,11 +6,12 @@ Provides endpoints for managing user notifications and preferences.
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
 from resoftai.db import get_db
 from resoftai.auth.dependencies import get_current_active_user
 from resoftai.models.user import User
+from resoftai.services.notification_delivery import validate_webhook_url
 from resoftai.services.notification_service import get_notification_service
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
@@ -49,7 +50,13 @@ class NotificationPreferenceUpdate(BaseModel):
     quiet_hours_start: Optional[str] = Field(None, pattern="^([01]?[0-9]|2[0-3]):[0-5][0-9]$")
     quiet_hours_end: Optional[str] = Field(None, pattern="^([01]?[0-9]|2[0-3]):[0-5][0-9]$")
     digest_enabled: Optional[bool] = None
-    digest_frequency: Optional[str] = Field(None, regex="^(daily|weekly)$")
+    digest_frequency: Optional[str] = Field(None, pattern="^(daily|weekly)$")
+
+    @field_validator("webhook_url")
+    @classmethod
+    def check_webhook_url(cls, value: Optional[str]) -> Optional[str]:
+        """Only accept https URLs that do not name a local or private host."""
+        return validate_webhook_url(value) if value else value
 
 
 class NotificationPreferenceResponse(BaseModel):
@@ -13,6 +13,7 @@ from resoftai.auth.dependencies import get_current_active_user, require_admin
 from resoftai.models.user import User
 from resoftai.models.enterprise import OrganizationTier
 from resoftai.crud import enterprise as enterprise_crud
+from resoftai.services.audit_pipeline import audit_pipeline
 
 router = APIRouter(prefix="/organizations", tags=["organizations"])
 
@@ -90,8 +91,7 @@ async def create_organization(
     )
 
     # Create audit log
-    await enterprise_crud.create_audit_log(
-        db=db,
+    audit_pipeline.record(
         action="CREATE",
         resource_type="organization",
         resource_id=org.id,
@@ -211,8 +211,7 @@ async def update_organization(
 
     # Create audit log
     if changes:
-        await enterprise_crud.create_audit_log(
-            db=db,
+        audit_pipeline.record(
             action="UPDATE",
             resource_type="organization",
             resource_id=org_id,
@@ -245,15 +244,16 @@ async def delete_organization(
             detail="Organization not found"
         )
 
-    # Create audit log before deletion
-    await enterprise_crud.create_audit_log(
-        db=db,
+    # Create audit log before deletion. The event is written after the
+    # organization is gone, so it must not reference it through the foreign key
+    audit_pipeline.record(
         action="DELETE",
         resource_type="organization",
         resource_id=org_id,
         user_id=current_user.id,
-        organization_id=org_id,
-        description=f"Deleted organization: {org.name}"
+        organization_id=None,
+        description=f"Deleted organization: {org.name}",
+        changes={"organization_id": org_id, "name": org.name}
     )
 
     await enterprise_crud.delete_organization(db, org_id)
@@ -8,6 +8,8 @@ from resoftai.utils.performance import (
     performance_monitor,
     websocket_metrics
 )
+from resoftai.core.semantic_cache import semantic_cache
+from resoftai.llm.pool import provider_pool
 from resoftai.auth.dependencies import get_current_active_user
 from resoftai.models.user import User
 
@@ -78,6 +80,32 @@ async def get_websocket_metrics(
     return websocket_metrics.get_stats()
 
 
+@router.get("/semantic-cache")
+async def get_semantic_cache_stats(
+    current_user: User = Depends(get_current_active_user)
+) -> Dict[str, Any]:
+    """
+    Get semantic cache statistics for agent stage outputs.
+
+    Returns:
+        Lookups, reuse and draft hits, hit rate and tokens saved
+    """
+    return semantic_cache.get_stats()
+
+
+@router.get("/provider-pool")
+async def get_provider_pool_stats(
+    current_user: User = Depends(get_current_active_user)
+) -> Dict[str, Any]:
+    """
+    Get statistics of the shared LLM provider pool.
+
+    Returns:
+        Pooled providers, hits, misses, evictions and hit rate
+    """
+    return provider_pool.get_stats()
+
+
 @router.get("/timing/{metric_name}", response_model=TimingStatsResponse)
 async def get_timing_stats(
     metric_name: str,
@@ -701,7 +701,7 @@ async def track_plugin_version_download(
 
     Call this endpoint before downloading to increment download counter.
     """
-    from sqlalchemy import select, and_, update
+    from sqlalchemy import select, and_
     from resoftai.models.plugin import PluginVersion
 
     result = await db.execute(
@@ -720,15 +720,8 @@ async def track_plugin_version_download(
             detail=f"Version {version} not found"
         )
 
-    # Increment download counter
-    await db.execute(
-        update(PluginVersion)
-        .where(PluginVersion.id == plugin_version.id)
-        .values(downloads_count=PluginVersion.downloads_count + 1)
-    )
-    await db.commit()
-
-    # Also increment plugin download counter
+    # Increment download counters (buffered, flushed in batches)
+    await plugin_crud.increment_plugin_version_downloads(db, plugin_version.id)
     await plugin_crud.increment_plugin_downloads(db, plugin_id)
 
     return {
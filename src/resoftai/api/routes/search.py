@@ -0,0 +1,135 @@
+"""
+Search API Routes
+
+Unified full-text search across marketplace plugins and templates.
+"""
+import time
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from resoftai.db import get_db
+from resoftai.crud import plugin as plugin_crud  # noqa: F401  (registers "plugin")
+from resoftai.crud import template as template_crud  # noqa: F401  (registers "template")
+from resoftai.services.search_service import search_service
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+# Only published items are searchable through the public endpoint
+PUBLIC_FILTERS: Dict[str, Dict[str, Any]] = {
+    "plugin": {"status": "approved"},
+    "template": {"status": "approved"},
+    "community_template": {"status": "published", "visibility": "public"},
+}
+
+DISPLAY_COLUMNS = ("id", "name", "slug", "template_id", "description", "category", "tags")
+
+
+class SearchResultItem(BaseModel):
+    """A single search hit"""
+    type: str
+    id: int
+    score: float
+    name: str
+    slug: Optional[str] = None
+    description: Optional[str] = None
+    category: Optional[str] = None
+    tags: List[str] = []
+
+
+class SearchResponse(BaseModel):
+    """Unified search response"""
+    query: str
+    results: List[SearchResultItem]
+    totals: Dict[str, int]
+    facets: Dict[str, Dict[str, Dict[str, int]]]
+    took_ms: float
+
+
+async def _load_items(db: AsyncSession, name: str, ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """Fetch display fields for hits without loading full ORM objects."""
+    if not ids:
+        return {}
+    table = search_service.get_collection(name).table
+    columns = [table.c[column] for column in DISPLAY_COLUMNS if column in table.c]
+    result = await db.execute(select(*columns).where(table.c.id.in_(ids)))
+    return {row["id"]: dict(row) for row in result.mappings()}
+
+
+@router.get("", response_model=SearchResponse)
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    types: Optional[List[str]] = Query(None, description="Collections to search"),
+    category: Optional[str] = None,
+    tags: Optional[List[str]] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Search plugins and templates
+
+    Results are ranked by relevance (BM25 / ts_rank) with popularity as a
+    tie-breaker. Prefix matches and single-character typos are tolerated.
+    Facet counts cover the full match set of each collection.
+    """
+    started = time.perf_counter()
+    available = search_service.collections()
+    names = types or available
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown search types: {', '.join(unknown)}"
+        )
+
+    hits = []
+    totals: Dict[str, int] = {}
+    facets: Dict[str, Dict[str, Dict[str, int]]] = {}
+    for name in names:
+        filters = dict(PUBLIC_FILTERS.get(name, {}))
+        if category:
+            filters["category"] = category
+        # Each collection returns enough hits to fill the merged page
+        result = await search_service.search(
+            db, name, q, filters=filters, tags=tags, limit=offset + limit
+        )
+        totals[name] = result.total
+        facets[name] = result.facets
+        hits.extend((hit.score, name, hit.doc_id) for hit in result.hits)
+
+    hits.sort(key=lambda hit: -hit[0])
+    page = hits[offset:offset + limit]
+
+    items: Dict[str, Dict[int, Dict[str, Any]]] = {}
+    for name in names:
+        ids = [doc_id for _, hit_name, doc_id in page if hit_name == name]
+        items[name] = await _load_items(db, name, ids)
+
+    results = []
+    for score, name, doc_id in page:
+        item = items[name].get(doc_id)
+        if item is None:
+            continue
+        category_value = item.get("category")
+        results.append(SearchResultItem(
+            type=name,
+            id=doc_id,
+            score=score,
+            name=item["name"],
+            slug=item.get("slug") or item.get("template_id"),
+            description=item.get("description"),
+            category=getattr(category_value, "value", category_value),
+            tags=item.get("tags") or [],
+        ))
+
+    return SearchResponse(
+        query=q,
+        results=results,
+        totals=totals,
+        facets=facets,
+        took_ms=round((time.perf_counter() - started) * 1000, 2),
+    )
@@ -13,6 +13,7 @@ from resoftai.auth.dependencies import get_current_active_user
 from resoftai.models.user import User
 from resoftai.models.enterprise import TeamRole
 from resoftai.crud import enterprise as enterprise_crud
+from resoftai.services.audit_pipeline import audit_pipeline
 
 router = APIRouter(prefix="/teams", tags=["teams"])
 
@@ -107,8 +108,7 @@ async def create_team(
     )
 
     # Create audit log
-    await enterprise_crud.create_audit_log(
-        db=db,
+    audit_pipeline.record(
         action="CREATE",
         resource_type="team",
         resource_id=team.id,
@@ -198,8 +198,7 @@ async def update_team(
     await db.refresh(team)
 
     # Create audit log
-    await enterprise_crud.create_audit_log(
-        db=db,
+    audit_pipeline.record(
         action="UPDATE",
         resource_type="team",
         resource_id=team_id,
@@ -233,8 +232,7 @@ async def delete_team(
     # TODO: Check user has permission to delete this team
 
     # Create audit log before deletion
-    await enterprise_crud.create_audit_log(
-        db=db,
+    audit_pipeline.record(
         action="DELETE",
         resource_type="team",
         resource_id=team_id,
@@ -284,8 +282,7 @@ async def add_team_member(
     )
 
     # Create audit log
-    await enterprise_crud.create_audit_log(
-        db=db,
+    audit_pipeline.record(
         action="CREATE",
         resource_type="team_member",
         resource_id=member.id,
@@ -328,8 +325,7 @@ async def remove_team_member(
         )
 
     # Create audit log
-    await enterprise_crud.create_audit_log(
-        db=db,
+    audit_pipeline.record(
         action="DELETE",
         resource_type="team_member",
         user_id=current_user.id,
@@ -375,8 +371,7 @@ async def update_team_member_role(
         )
 
     # Create audit log
-    await enterprise_crud.create_audit_log(
-        db=db,
+    audit_pipeline.record(
         action="UPDATE",
         resource_type="team_member",
         resource_id=member.id,
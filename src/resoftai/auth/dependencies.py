@@ -1,22 +1,39 @@
-"""Authentication dependencies for FastAPI."""
-from typing import Optional
+"""
+Authentication dependencies for FastAPI.
+
+Authenticated users are resolved to cached ``Principal`` objects rather than
+``User`` rows, so steady-state requests authenticate and authorize without
+database queries.
+"""
+from typing import Callable, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from resoftai.db import get_db
-from resoftai.models.user import User
-from resoftai.crud.user import get_user_by_username, get_user_by_id
-from resoftai.auth.security import verify_token
+from resoftai.crud.user import get_user_by_username
+from resoftai.auth.principal import Principal, principal_cache
+from resoftai.auth.security import verify_token, TokenData
 
 # OAuth2 scheme for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 
+async def _resolve_principal(db: AsyncSession, token_data: TokenData) -> Optional[Principal]:
+    """Resolve token claims to a cached principal (by ID, falling back to username)."""
+    user_id = token_data.user_id
+    if not user_id and token_data.username:
+        user = await get_user_by_username(db, username=token_data.username)
+        user_id = user.id if user else None
+    if not user_id:
+        return None
+    return await principal_cache.get(db, user_id)
+
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_db)
-) -> User:
+) -> Principal:
     """
     Get current authenticated user from JWT token.
 
@@ -25,7 +42,7 @@ async def get_current_user(
         db: Database session
 
     Returns:
-        Current User object
+        Current user's Principal
 
     Raises:
         HTTPException: If token is invalid or user not found
@@ -40,13 +57,7 @@ async def get_current_user(
     if token_data is None:
         raise credentials_exception
 
-    # Try to get user by ID first, fallback to username
-    user: Optional[User] = None
-    if token_data.user_id:
-        user = await get_user_by_id(db, user_id=token_data.user_id)
-    elif token_data.username:
-        user = await get_user_by_username(db, username=token_data.username)
-
+    user = await _resolve_principal(db, token_data)
     if user is None:
         raise credentials_exception
 
@@ -54,8 +65,8 @@ async def get_current_user(
 
 
 async def get_current_active_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: Principal = Depends(get_current_user)
+) -> Principal:
     """
     Get current active user (not deactivated).
 
@@ -63,7 +74,7 @@ async def get_current_active_user(
         current_user: Current user from token
 
     Returns:
-        Current active User object
+        Current active user's Principal
 
     Raises:
         HTTPException: If user is inactive
@@ -77,8 +88,8 @@ async def get_current_active_user(
 
 
 async def require_admin(
-    current_user: User = Depends(get_current_active_user)
-) -> User:
+    current_user: Principal = Depends(get_current_active_user)
+) -> Principal:
     """
     Require admin role.
 
@@ -86,7 +97,7 @@ async def require_admin(
         current_user: Current active user
 
     Returns:
-        Current admin User object
+        Current admin's Principal
 
     Raises:
         HTTPException: If user is not admin
@@ -102,7 +113,7 @@ async def require_admin(
 async def get_optional_user(
     token: Optional[str] = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_db)
-) -> Optional[User]:
+) -> Optional[Principal]:
     """
     Get current user if token is provided, otherwise return None.
     Useful for endpoints that work both with and without authentication.
@@ -112,7 +123,7 @@ async def get_optional_user(
         db: Database session
 
     Returns:
-        User object if authenticated, None otherwise
+        Principal if authenticated, None otherwise
     """
     if not token:
         return None
@@ -121,9 +132,30 @@ async def get_optional_user(
     if token_data is None:
         return None
 
-    if token_data.user_id:
-        return await get_user_by_id(db, user_id=token_data.user_id)
-    elif token_data.username:
-        return await get_user_by_username(db, username=token_data.username)
+    return await _resolve_principal(db, token_data)
 
-    return None
+
+def require_permission(permission_code: str) -> Callable:
+    """
+    Build a dependency requiring a permission granted through user roles.
+
+    Args:
+        permission_code: Permission code (e.g. "project:write")
+
+    Returns:
+        Dependency returning the current active user's Principal
+
+    Raises:
+        HTTPException: If the permission is not granted
+    """
+    async def dependency(
+        current_user: Principal = Depends(get_current_active_user)
+    ) -> Principal:
+        if not current_user.has_permission(permission_code):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Not enough permissions. '{permission_code}' required."
+            )
+        return current_user
+
+    return dependency
@@ -0,0 +1,148 @@
+"""
+Cached authorization principals.
+
+A principal is the part of a user that authentication and authorization
+need: identity, role, active flag and the set of permission codes granted
+through role assignments. Principals are cached in the two-tier cache under
+the tags ``user:<id>`` and ``role:<id>`` (one per assigned role), so the
+write paths that change a user, a role assignment or a role's permissions
+evict exactly the affected entries. In the steady state an authenticated,
+authorized request makes no database queries.
+"""
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from resoftai.crud.user import get_user_by_id
+from resoftai.utils import cache
+from resoftai.utils.cache import CacheManager, _MISSING
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Authenticated user as seen by authorization checks."""
+
+    id: int
+    username: str
+    email: str
+    role: str
+    is_active: bool
+    permissions: FrozenSet[str] = frozenset()
+    role_ids: Tuple[int, ...] = field(default=(), compare=False)
+
+    def has_permission(self, code: str) -> bool:
+        """Check whether a permission code is granted."""
+        return code in self.permissions
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable form for the cache."""
+        return {
+            "id": self.id,
+            "username": self.username,
+            "email": self.email,
+            "role": self.role,
+            "is_active": self.is_active,
+            "permissions": sorted(self.permissions),
+            "role_ids": list(self.role_ids),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Principal":
+        """Rebuild a principal from ``to_dict`` output."""
+        return cls(
+            id=data["id"],
+            username=data["username"],
+            email=data["email"],
+            role=data["role"],
+            is_active=data["is_active"],
+            permissions=frozenset(data["permissions"]),
+            role_ids=tuple(data["role_ids"]),
+        )
+
+
+def principal_tags(data: Dict[str, Any]):
+    """Invalidation tags of a cached principal."""
+    return [f"user:{data['id']}", *(f"role:{role_id}" for role_id in data["role_ids"])]
+
+
+class PrincipalCache:
+    """Resolve user IDs to principals through the two-tier cache."""
+
+    def __init__(self, cache_manager: CacheManager, ttl: int = 300, local_ttl: float = 30):
+        """
+        Initialize principal cache.
+
+        Args:
+            cache_manager: Cache manager instance
+            ttl: Redis time to live in seconds
+            local_ttl: In-process time to live in seconds (bounds staleness
+                when an invalidation message is missed)
+        """
+        self.cache_manager = cache_manager
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+
+    async def get(self, db: AsyncSession, user_id: int) -> Optional[Principal]:
+        """
+        Get a user's principal, loading it on a miss.
+
+        Args:
+            db: Database session (only used on a miss)
+            user_id: User ID
+
+        Returns:
+            Principal or None if the user does not exist
+        """
+        key = f"principal:{user_id}"
+
+        async def load():
+            return await self._load(db, user_id)
+
+        if cache.redis_client:
+            data = await self.cache_manager.fetch(
+                key, load, ttl=self.ttl, tags=principal_tags,
+                local_ttl=self.local_ttl, negative_ttl=15
+            )
+        else:
+            # Without Redis there is only the in-process tier
+            data = self.cache_manager.local.get(key)
+            if data is _MISSING:
+                data = await self.cache_manager._single_flight(key, load)
+                if data is not None:
+                    self.cache_manager.local.set(key, data, ttl=self.local_ttl, tags=principal_tags(data))
+
+        return Principal.from_dict(data) if data is not None else None
+
+    async def _load(self, db: AsyncSession, user_id: int) -> Optional[Dict[str, Any]]:
+        from resoftai.crud.enterprise import get_user_grants
+
+        user = await get_user_by_id(db, user_id)
+        if user is None:
+            return None
+
+        permissions, role_ids = await get_user_grants(db, user_id)
+        return Principal(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            role=user.role,
+            is_active=user.is_active,
+            permissions=frozenset(permissions),
+            role_ids=tuple(sorted(role_ids)),
+        ).to_dict()
+
+    async def invalidate_user(self, user_id: int):
+        """Evict a user's principal (after changing the user or their roles)."""
+        await self.cache_manager.invalidate_tags(f"user:{user_id}")
+
+    async def invalidate_role(self, role_id: int):
+        """Evict the principals of every user holding a role."""
+        await self.cache_manager.invalidate_tags(f"role:{role_id}")
+
+
+# Global principal cache instance
+principal_cache = PrincipalCache(cache.cache_manager)
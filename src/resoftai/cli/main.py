@@ -13,27 +13,9 @@ from rich.table import Table
 from rich import print as rprint
 
 from resoftai import __version__
-from resoftai.config.settings import get_settings
-from resoftai.core.message_bus import MessageBus
-from resoftai.core.state import ProjectState, WorkflowStage
-from resoftai.core.workflow import ProjectWorkflow
-from resoftai.agents import (
-    ProjectManagerAgent,
-    RequirementsAnalystAgent,
-    ArchitectAgent,
-    UXUIDesignerAgent,
-    DeveloperAgent,
-    TestEngineerAgent,
-    QualityExpertAgent,
-)
-from resoftai.generators import (
-    RequirementsDocGenerator,
-    DesignDocGenerator,
-    DatabaseDocGenerator,
-    DeploymentDocGenerator,
-    UserManualGenerator,
-    TrainingManualGenerator,
-)
+
+# Agents, generators and settings are imported inside the commands that use
+# them, so ``resoftai --help`` does not pay for loading them.
 
 console = Console()
 
@@ -72,6 +54,27 @@ def create(requirements: str, name: str, output: str, interactive: bool):
 
 async def _create_project(requirements: str, name: str, output: str, interactive: bool):
     """Create a new project asynchronously."""
+    from resoftai.config.settings import get_settings
+    from resoftai.core.message_bus import MessageBus
+    from resoftai.core.state import ProjectState
+    from resoftai.core.workflow import ProjectWorkflow
+    from resoftai.agents import (
+        ProjectManagerAgent,
+        RequirementsAnalystAgent,
+        ArchitectAgent,
+        UXUIDesignerAgent,
+        DeveloperAgent,
+        TestEngineerAgent,
+        QualityExpertAgent,
+    )
+    from resoftai.generators import (
+        RequirementsDocGenerator,
+        DesignDocGenerator,
+        DatabaseDocGenerator,
+        DeploymentDocGenerator,
+        UserManualGenerator,
+        TrainingManualGenerator,
+    )
 
     console.print(Panel.fit(
         f"[bold green]ResoftAI Multi-Agent Platform v{__version__}[/bold green]\n"
@@ -212,6 +215,8 @@ def status(state_file: str):
 
     STATE_FILE: Path to project state file
     """
+    from resoftai.core.state import ProjectState, TaskStatus
+
     try:
         state = ProjectState.load(Path(state_file))
 
@@ -229,7 +234,6 @@ def status(state_file: str):
         task_table.add_column("Status", style="cyan")
         task_table.add_column("Count", style="magenta")
 
-        from resoftai.core.state import TaskStatus
         for status_type in TaskStatus:
             count = len(state.get_tasks_by_status(status_type))
             task_table.add_row(status_type.value, str(count))
@@ -250,6 +254,8 @@ def status(state_file: str):
 @cli.command()
 def info():
     """Display platform information and configuration."""
+    from resoftai.config.settings import get_settings
+
     settings = get_settings()
 
     info_table = Table(title="ResoftAI Platform Configuration")
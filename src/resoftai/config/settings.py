@@ -55,6 +55,18 @@ class Settings(BaseSettings):
     jwt_access_token_expire_minutes: int = Field(default=30)
     jwt_refresh_token_expire_days: int = Field(default=7)
 
+    # API Rate Limiting
+    rate_limit_enabled: bool = Field(default=True)
+
+    # Audit Logging
+    audit_spill_path: Path = Field(default=Path("/tmp/resoftai-workspace/audit-spill.jsonl"))
+
+    # Semantic cache of agent stage outputs, shared by projects of the same owner
+    semantic_cache_enabled: bool = Field(default=False)
+    semantic_cache_threshold: float = Field(default=0.85)
+    semantic_cache_reuse_threshold: float = Field(default=0.97)
+    semantic_cache_path: Optional[Path] = Field(default=Path("/tmp/resoftai-workspace/semantic-cache.json"))
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         # Ensure workspace directory exists
@@ -1,13 +1,22 @@
 """Core components for the ResoftAI multi-agent platform."""
 
-from resoftai.core.agent import Agent, AgentRole
+import importlib
+
 from resoftai.core.message_bus import MessageBus, Message, MessageType
 from resoftai.core.state import ProjectState, WorkflowStage
-from resoftai.core.workflow import ProjectWorkflow
+
+# The agent base class loads settings and the LLM factory; import it on demand
+_LAZY_EXPORTS = {
+    "Agent": "resoftai.core.agent",
+    "AgentRole": "resoftai.core.agent",
+    "AgentRuntime": "resoftai.core.agent_runtime",
+    "ProjectWorkflow": "resoftai.core.workflow",
+}
 
 __all__ = [
     "Agent",
     "AgentRole",
+    "AgentRuntime",
     "MessageBus",
     "Message",
     "MessageType",
@@ -15,3 +24,15 @@ __all__ = [
     "WorkflowStage",
     "ProjectWorkflow",
 ]
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        value = getattr(importlib.import_module(_LAZY_EXPORTS[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -5,14 +5,18 @@ Base Agent class for all AI agents in the platform.
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from enum import Enum
-from typing import Any, Dict, List, Optional, AsyncIterator
+from collections import deque
+from typing import Any, Dict, List, Optional, AsyncIterator, Tuple
 import logging
+import time
 
+from resoftai.core.context import ContextBuilder, ContextReport, count_tokens
 from resoftai.core.message_bus import Message, MessageBus, MessageType
+from resoftai.core.semantic_cache import CacheMatch, SemanticCache, namespace_for, semantic_cache
 from resoftai.core.state import ProjectState, WorkflowStage
 from resoftai.config.settings import get_settings
 from resoftai.llm.factory import LLMFactory
-from resoftai.llm.base import LLMConfig
+from resoftai.llm.base import LLMConfig, LLMProvider, LLMResponse
 
 logger = logging.getLogger(__name__)
 
@@ -54,12 +58,23 @@ class Agent(ABC):
     - Communication through the message bus
     """
 
+    # Token budget for project-state context in each prompt
+    context_token_budget: int = 3000
+    # Per-stage overrides of the budget
+    context_stage_budgets: Dict[WorkflowStage, int] = {}
+    # Number of recent prompt breakdowns kept in ``prompt_reports``
+    PROMPT_REPORT_HISTORY = 50
+    # Whether outputs are reused across projects through the semantic cache
+    semantic_cache_enabled: bool = False
+
     def __init__(
         self,
         role: AgentRole,
         message_bus: MessageBus,
         project_state: ProjectState,
         llm_config: Optional[LLMConfig] = None,
+        llm: Optional[LLMProvider] = None,
+        subscribe: bool = True,
     ):
         """
         Initialize an agent.
@@ -69,6 +84,10 @@ class Agent(ABC):
             message_bus: Message bus for communication
             project_state: Shared project state
             llm_config: Optional LLM configuration (uses default if not provided)
+            llm: Optional provider to use instead of creating one, e.g. from
+                the shared provider pool
+            subscribe: Whether to subscribe to the message bus; ``False``
+                when an ``AgentRuntime`` dispatches messages to the agent
         """
         self.role = role
         self.message_bus = message_bus
@@ -76,15 +95,30 @@ class Agent(ABC):
         self.settings = get_settings()
 
         # Initialize LLM provider using factory pattern
-        config = llm_config or self.settings.get_llm_config()
-        self.llm = LLMFactory.create(config)
+        if llm is not None:
+            config = llm.config
+            self.llm = llm
+        else:
+            config = llm_config or self.settings.get_llm_config()
+            self.llm = LLMFactory.create(config)
 
         # Statistics tracking
         self.total_tokens = 0
         self.requests_count = 0
+        self.cached_prompt_tokens = 0
+        self.last_context_report: Optional[ContextReport] = None
+        self._last_context: str = ""
+        self.prompt_reports: deque = deque(maxlen=self.PROMPT_REPORT_HISTORY)
+        self.semantic_cache: Optional[SemanticCache] = (
+            semantic_cache
+            if self.semantic_cache_enabled and self.settings.semantic_cache_enabled
+            else None
+        )
+        self.last_cache_match: Optional[CacheMatch] = None
 
         # Subscribe to relevant messages
-        self._setup_subscriptions()
+        if subscribe:
+            self._setup_subscriptions()
 
         logger.info(f"Initialized {self.role.value} agent with {config.provider.value} provider")
 
@@ -223,7 +257,18 @@ class Agent(ABC):
         if stream:
             raise ValueError("For streaming responses, use generate_stream() method")
 
+        prompt, kwargs = self._layout_prompt(prompt, kwargs)
+        cache_key = self._semantic_cache_key(prompt, kwargs)
+        match = self._lookup_semantic_cache(cache_key)
+        if match and match.reuse:
+            self.semantic_cache.record_savings(match.entry.tokens)
+            logger.info(f"{self.name} reused a cached output (similarity {match.similarity})")
+            return match.entry.output
+        if match:
+            prompt = self._draft_prompt(prompt, match)
+
         try:
+            start = time.perf_counter()
             response = await self.llm.generate(
                 prompt=prompt,
                 system_prompt=system_prompt or self.system_prompt,
@@ -233,6 +278,13 @@ class Agent(ABC):
             # Update statistics
             self.total_tokens += response.total_tokens
             self.requests_count += 1
+            self._record_prompt_report(prompt, system_prompt or self.system_prompt, response, kwargs.get("context"))
+            self._record_usage(response, (time.perf_counter() - start) * 1000)
+
+            if cache_key:
+                if match:
+                    self.semantic_cache.record_savings(match.entry.tokens - response.total_tokens)
+                self.semantic_cache.store(*cache_key, response.content, response.total_tokens)
 
             logger.debug(
                 f"{self.name} generated response: {response.total_tokens} tokens "
@@ -262,6 +314,7 @@ class Agent(ABC):
         Yields:
             Response chunks as they are generated
         """
+        prompt, kwargs = self._layout_prompt(prompt, kwargs)
         try:
             async for chunk in self.llm.generate_stream(
                 prompt=prompt,
@@ -353,35 +406,125 @@ class Agent(ABC):
             correlation_id=original_message.correlation_id,
         )
 
-    def get_context_from_state(self) -> str:
+    def get_context_from_state(
+        self,
+        stage: Optional[WorkflowStage] = None,
+        budget: Optional[int] = None
+    ) -> str:
         """
         Get relevant context from project state for this agent.
 
+        Sections are ranked by relevance to the agent's role and the stage and
+        fitted into the token budget; large artifacts that do not fit are
+        replaced by cached summaries. The breakdown is kept in
+        ``last_context_report``.
+
+        Args:
+            stage: Workflow stage (defaults to the project's current stage)
+            budget: Token budget (defaults to the stage or agent budget)
+
         Returns:
             Formatted context string
         """
-        context_parts = [
-            f"Project: {self.project_state.name}",
-            f"Description: {self.project_state.description}",
-            f"Current Stage: {self.project_state.current_stage.value}",
-        ]
-
-        if self.project_state.requirements:
-            context_parts.append(f"Requirements: {self.project_state.requirements}")
-
-        if self.project_state.architecture:
-            context_parts.append(f"Architecture: {self.project_state.architecture}")
-
-        if self.project_state.design:
-            context_parts.append(f"Design: {self.project_state.design}")
-
-        # Add recent decisions
-        if self.project_state.decisions:
-            recent_decisions = self.project_state.decisions[-5:]
-            context_parts.append(
-                "Recent Decisions:\n" +
-                "\n".join([f"- {d['decision']} (by {d['made_by']})"
-                          for d in recent_decisions])
-            )
+        stage = stage or self.project_state.current_stage
+        if budget is None:
+            budget = self.context_stage_budgets.get(stage, self.context_token_budget)
+
+        context, report = ContextBuilder(budget).build(
+            self.project_state, self.role.value, stage=stage
+        )
+        self.last_context_report = report
+        self._last_context = context
+        return context
+
+    # Stands in for the project context once it moves ahead of the prompt
+    CONTEXT_REFERENCE = "(the project context above)"
 
-        return "\n\n".join(context_parts)
+    def _layout_prompt(self, prompt: str, kwargs: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        """
+        Move the project context out of the prompt into its own segment.
+
+        Agents embed the context in the middle of their prompts. Sending it as
+        a separate segment between the system prompt and the request lets the
+        provider cache the static and semi-static prefix across calls.
+        """
+        if "context" in kwargs or not self._last_context or self._last_context not in prompt:
+            return prompt, kwargs
+        prompt = prompt.replace(self._last_context, self.CONTEXT_REFERENCE, 1)
+        return prompt, {**kwargs, "context": self._last_context}
+
+    def _semantic_cache_key(self, prompt: str, kwargs: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+        """
+        Semantic cache (namespace, input) of a call, or None when not cached.
+
+        The namespace is the project owner, the role and the instructions
+        with the project context taken out, so calls asking the same question
+        in projects of the same owner share it; the project context is the
+        input that is compared for similarity. Projects without an owner in
+        ``project_state.metadata["owner"]`` are not cached.
+        """
+        owner = self.project_state.metadata.get("owner")
+        if self.semantic_cache is None or owner is None:
+            return None
+        return namespace_for(str(owner), self.role.value, prompt), kwargs.get("context") or prompt
+
+    def _lookup_semantic_cache(self, cache_key: Optional[Tuple[str, str]]) -> Optional[CacheMatch]:
+        """Look up a similar past output for ``cache_key``."""
+        self.last_cache_match = self.semantic_cache.lookup(*cache_key) if cache_key else None
+        return self.last_cache_match
+
+    def _draft_prompt(self, prompt: str, match: CacheMatch) -> str:
+        """Offer a cached output from a similar project as a draft to adapt."""
+        return f"""{prompt}
+
+A project with similar requirements (similarity {match.similarity:.2f}) produced the draft below.
+Adapt it to this project instead of starting from scratch: keep what applies,
+change what differs and add anything missing. Return only the adapted result.
+
+<draft>
+{match.entry.output}
+</draft>"""
+
+    def _record_usage(self, response: LLMResponse, response_time_ms: float) -> None:
+        """Queue the usage of one LLM call for the project owner's usage metrics."""
+        metadata = self.project_state.metadata
+        if metadata.get("user_id") is None:
+            return
+        # Imported here so importing agents does not load the database layer
+        from resoftai.services.llm_usage import llm_usage_recorder
+
+        usage = getattr(response, "usage", None)
+        llm_usage_recorder.record(
+            user_id=metadata["user_id"],
+            provider=getattr(response.provider, "value", response.provider),
+            model=response.model,
+            usage=usage if isinstance(usage, dict) else None,
+            project_id=metadata.get("project_id"),
+            agent_role=self.role.value,
+            workflow_stage=self.project_state.current_stage.value,
+            response_time_ms=response_time_ms,
+        )
+
+    def _record_prompt_report(
+        self,
+        prompt: str,
+        system_prompt: str,
+        response: LLMResponse,
+        context: Optional[str] = None
+    ) -> None:
+        """Record the prompt-token breakdown of one LLM call."""
+        report = self.last_context_report if context else None
+        usage = getattr(response, "usage", None) or {}
+        cached = usage.get("cached_prompt_tokens", 0) if isinstance(usage, dict) else 0
+        self.cached_prompt_tokens += cached or 0
+        breakdown = {
+            "system_tokens": count_tokens(system_prompt),
+            "context_tokens": report.total_tokens if report else count_tokens(context or ""),
+            "instruction_tokens": count_tokens(prompt),
+            "context_sections": report.to_dict()["sections"] if report else {},
+            "reported_prompt_tokens": usage.get("prompt_tokens"),
+            "cached_prompt_tokens": cached,
+            "completion_tokens": usage.get("completion_tokens"),
+        }
+        self.prompt_reports.append(breakdown)
+        logger.debug(f"{self.name} prompt tokens: {breakdown}")
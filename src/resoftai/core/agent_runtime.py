@@ -0,0 +1,184 @@
+"""
+Lazy per-project agent runtime.
+
+Constructing a workflow used to build every agent up front: each one
+created and validated its own LLM provider and subscribed two closures to
+the project's message bus. ``AgentRuntime`` instead registers agent
+classes and subscribes a single dispatcher per role. An agent is created
+the first time a message is addressed to it, bound to the project's state
+and to the shared provider from ``provider_pool``, so roles whose stages
+are skipped never cost anything and providers (with their HTTP
+connections) are shared by every project using the same ``LLMConfig``.
+
+The runtime is used where a ``Dict[AgentRole, Agent]`` was before::
+
+    agents = AgentRuntime(message_bus, project_state, llm_config)
+    developer = agents[AgentRole.DEVELOPER]  # created on first access
+"""
+
+import logging
+import time
+from typing import Any, Dict, Iterator, List, Optional, Type
+
+from resoftai.config.settings import get_settings
+from resoftai.core.agent import Agent, AgentRole
+from resoftai.core.message_bus import Message, MessageBus, MessageType
+from resoftai.core.state import ProjectState
+from resoftai.llm.base import LLMConfig
+from resoftai.llm.pool import ProviderPool, provider_pool
+
+logger = logging.getLogger(__name__)
+
+
+def default_agent_classes() -> Dict[AgentRole, Type[Agent]]:
+    """Agent classes of the seven standard workflow roles."""
+    from resoftai.agents import (
+        ArchitectAgent,
+        DeveloperAgent,
+        ProjectManagerAgent,
+        QualityExpertAgent,
+        RequirementsAnalystAgent,
+        TestEngineerAgent,
+        UXUIDesignerAgent,
+    )
+
+    return {
+        AgentRole.PROJECT_MANAGER: ProjectManagerAgent,
+        AgentRole.REQUIREMENTS_ANALYST: RequirementsAnalystAgent,
+        AgentRole.ARCHITECT: ArchitectAgent,
+        AgentRole.UXUI_DESIGNER: UXUIDesignerAgent,
+        AgentRole.DEVELOPER: DeveloperAgent,
+        AgentRole.TEST_ENGINEER: TestEngineerAgent,
+        AgentRole.QUALITY_EXPERT: QualityExpertAgent,
+    }
+
+
+class AgentRuntime:
+    """
+    Agents of one project, created on first use.
+
+    Indexing, ``get``, ``in``, ``len`` and iteration cover every registered
+    role. There is no ``values``/``items``: ``instantiated`` returns the
+    agents created so far, so aggregating statistics does not create idle
+    agents.
+    """
+
+    def __init__(
+        self,
+        message_bus: MessageBus,
+        project_state: ProjectState,
+        llm_config: Optional[LLMConfig] = None,
+        agent_classes: Optional[Dict[AgentRole, Type[Agent]]] = None,
+        pool: Optional[ProviderPool] = None,
+    ):
+        """
+        Initialize the runtime.
+
+        Args:
+            message_bus: Message bus of the project
+            project_state: Project state the agents are bound to
+            llm_config: LLM configuration (uses default if not provided)
+            agent_classes: Agent class for each role (the seven standard
+                roles if not provided)
+            pool: Provider pool (the process-wide pool if not provided)
+        """
+        self.message_bus = message_bus
+        self.project_state = project_state
+        self.llm_config = llm_config or get_settings().get_llm_config()
+        self.agent_classes = agent_classes if agent_classes is not None else default_agent_classes()
+        self.pool = pool if pool is not None else provider_pool
+        self._agents: Dict[AgentRole, Agent] = {}
+        self.stats = {
+            "dispatched": 0,
+            "instantiated": 0,
+            "instantiation_seconds": 0.0,
+        }
+
+        for role in self.agent_classes:
+            message_bus.subscribe(f"receiver:{role.value}", self._dispatch_message)
+        message_bus.subscribe(f"type:{MessageType.STAGE_START.value}", self._dispatch_stage_start)
+
+    def _create(self, role: AgentRole) -> Agent:
+        """Create the agent for a role, bound to this project and the pooled provider."""
+        start = time.perf_counter()
+        agent = self.agent_classes[role](
+            role,
+            self.message_bus,
+            self.project_state,
+            llm=self.pool.get(self.llm_config),
+            subscribe=False,
+        )
+        self._agents[role] = agent
+        self.stats["instantiated"] += 1
+        self.stats["instantiation_seconds"] += time.perf_counter() - start
+        return agent
+
+    async def _dispatch_message(self, message: Message) -> None:
+        """Deliver a message to the agent it is addressed to."""
+        agent = self[AgentRole(message.receiver)]
+        self.stats["dispatched"] += 1
+        await agent._handle_message(message)
+
+    async def _dispatch_stage_start(self, message: Message) -> None:
+        """
+        Notify agents of a stage start.
+
+        Agents keeping the default ``on_stage_start`` (which only logs) are
+        not created for it; they are created when work is assigned to them.
+        """
+        for role, agent_class in self.agent_classes.items():
+            agent = self._agents.get(role)
+            if agent is None:
+                if agent_class.on_stage_start is Agent.on_stage_start:
+                    continue
+                agent = self._create(role)
+            await agent._handle_stage_change(message)
+
+    def __getitem__(self, role: AgentRole) -> Agent:
+        agent = self._agents.get(role)
+        if agent is None:
+            if role not in self.agent_classes:
+                raise KeyError(role)
+            agent = self._create(role)
+        return agent
+
+    def get(self, role: AgentRole, default: Any = None) -> Any:
+        """Get the agent for a role, creating it on first use."""
+        return self[role] if role in self.agent_classes else default
+
+    def __contains__(self, role: object) -> bool:
+        return role in self.agent_classes
+
+    def __iter__(self) -> Iterator[AgentRole]:
+        return iter(self.agent_classes)
+
+    def __len__(self) -> int:
+        return len(self.agent_classes)
+
+    def keys(self) -> List[AgentRole]:
+        """Registered roles."""
+        return list(self.agent_classes)
+
+    def instantiated(self) -> Dict[AgentRole, Agent]:
+        """Agents created so far, by role."""
+        return dict(self._agents)
+
+    def is_instantiated(self, role: AgentRole) -> bool:
+        """Whether the agent for a role has been created."""
+        return role in self._agents
+
+    def close(self) -> None:
+        """Unsubscribe the runtime from the message bus."""
+        for role in self.agent_classes:
+            self.message_bus.unsubscribe(f"receiver:{role.value}", self._dispatch_message)
+        self.message_bus.unsubscribe(f"type:{MessageType.STAGE_START.value}", self._dispatch_stage_start)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get runtime statistics."""
+        return {
+            **self.stats,
+            "registered": len(self.agent_classes),
+            "instantiated_roles": [role.value for role in self._agents],
+            "skipped_roles": [role.value for role in self.agent_classes if role not in self._agents],
+            "pool": self.pool.get_stats(),
+        }
@@ -0,0 +1,182 @@
+"""
+Apply LLM-produced edits to source code.
+
+Refinement rounds ask the model for small edits to the current code instead of
+a complete new file. Two formats are accepted:
+
+- search/replace blocks::
+
+    <<<<<<< SEARCH
+    old lines
+    =======
+    new lines
+    >>>>>>> REPLACE
+
+- unified diffs (``@@ -a,b +c,d @@`` hunks)
+
+Edits must match the current code; anything that does not apply raises
+``PatchError`` so the caller can fall back to regenerating the file.
+"""
+
+import ast
+import re
+from typing import List, Optional, Tuple
+
+from resoftai.core.code_quality import LanguageType
+
+
+class PatchError(ValueError):
+    """An edit could not be parsed or applied."""
+
+
+_FENCE = re.compile(r"^```[\w+-]*\n(.*?)\n```\s*$", re.DOTALL | re.MULTILINE)
+_BLOCK = re.compile(
+    r"^<{5,9} SEARCH[^\n]*\n(.*?)^={5,9}[ \t]*\n(.*?)^>{5,9} REPLACE[^\n]*$",
+    re.DOTALL | re.MULTILINE
+)
+_HUNK = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@", re.MULTILINE)
+
+
+def strip_fences(text: str) -> str:
+    """Return the body of the first fenced code block, or ``text`` unchanged."""
+    match = _FENCE.search(text)
+    return match.group(1) if match else text
+
+
+def parse_search_replace(text: str) -> List[Tuple[str, str]]:
+    """Parse search/replace blocks into (search, replace) pairs."""
+    return [(search, replace) for search, replace in _BLOCK.findall(text)]
+
+
+def _locate(code: str, search: str) -> Tuple[int, int]:
+    """
+    Find ``search`` in ``code`` and return its span.
+
+    An exact, unique match is preferred; otherwise lines are compared with
+    surrounding whitespace ignored, since models often get indentation of
+    quoted code slightly wrong.
+    """
+    if not search.strip():
+        raise PatchError("Empty SEARCH block")
+    count = code.count(search)
+    if count == 1:
+        start = code.index(search)
+        return start, start + len(search)
+    if count > 1:
+        raise PatchError(f"SEARCH block matches {count} places: {search.strip()[:60]!r}")
+
+    lines = code.splitlines(keepends=True)
+    wanted = [line.strip() for line in search.strip("\n").splitlines()]
+    matches = [
+        i for i in range(len(lines) - len(wanted) + 1)
+        if [line.strip() for line in lines[i:i + len(wanted)]] == wanted
+    ]
+    if len(matches) != 1:
+        raise PatchError(f"SEARCH block not found: {search.strip()[:60]!r}")
+    start = sum(len(line) for line in lines[:matches[0]])
+    return start, start + sum(len(line) for line in lines[matches[0]:matches[0] + len(wanted)])
+
+
+def apply_search_replace(code: str, edits: List[Tuple[str, str]]) -> str:
+    """Apply (search, replace) edits in order."""
+    for search, replace in edits:
+        start, end = _locate(code, search)
+        matched = code[start:end]
+        # Keep the line ending of the matched region
+        if matched.endswith("\n") and replace and not replace.endswith("\n"):
+            replace += "\n"
+        code = code[:start] + replace + code[end:]
+    return code
+
+
+def apply_unified_diff(code: str, diff: str) -> str:
+    """
+    Apply a unified diff to ``code``.
+
+    Hunk positions are used as a hint: each hunk is placed where its context
+    and removed lines match, searching outwards from the stated line.
+    """
+    lines = code.splitlines()
+    hunks: List[Tuple[int, List[str], List[str]]] = []
+    current: Optional[Tuple[int, List[str], List[str]]] = None
+    for line in diff.splitlines():
+        header = _HUNK.match(line)
+        if header:
+            current = (int(header.group(1)), [], [])
+            hunks.append(current)
+        elif current is None or line.startswith(("---", "+++")):
+            continue
+        elif line.startswith("+"):
+            current[2].append(line[1:])
+        elif line.startswith("-"):
+            current[1].append(line[1:])
+        elif line.startswith(" ") or line == "":
+            current[1].append(line[1:])
+            current[2].append(line[1:])
+        elif line.startswith("\\"):
+            continue
+    if not hunks:
+        raise PatchError("No hunks in diff")
+
+    offset = 0
+    for start, old, new in hunks:
+        hint = max(start - 1 + offset, 0)
+        position = _find_lines(lines, old, hint)
+        if position is None:
+            raise PatchError(f"Hunk at line {start} does not apply")
+        lines[position:position + len(old)] = new
+        offset += len(new) - len(old)
+    return "\n".join(lines) + ("\n" if code.endswith("\n") else "")
+
+
+def _find_lines(lines: List[str], wanted: List[str], hint: int) -> Optional[int]:
+    """Index of ``wanted`` in ``lines`` closest to ``hint`` (whitespace-insensitive)."""
+    if not wanted:
+        return min(hint, len(lines))
+    stripped = [line.strip() for line in wanted]
+    for distance in range(len(lines) + 1):
+        for index in (hint - distance, hint + distance) if distance else (hint,):
+            if 0 <= index <= len(lines) - len(wanted) and [
+                line.strip() for line in lines[index:index + len(wanted)]
+            ] == stripped:
+                return index
+    return None
+
+
+def apply_patch(code: str, response: str) -> str:
+    """
+    Apply an LLM response containing search/replace blocks or a unified diff.
+
+    Raises:
+        PatchError: If the response has no edits or they do not apply
+    """
+    edits = parse_search_replace(response)
+    if edits:
+        return apply_search_replace(code, edits)
+    body = strip_fences(response)
+    if _HUNK.search(body):
+        return apply_unified_diff(code, body)
+    raise PatchError("Response contains no edits")
+
+
+def validate_syntax(code: str, language: LanguageType) -> Optional[str]:
+    """
+    Check that patched code still parses.
+
+    Python is parsed with ``ast``; for other languages only bracket balance is
+    checked. Returns an error message, or None if the code looks valid.
+    """
+    if not code.strip():
+        return "Code is empty"
+    if language == LanguageType.PYTHON:
+        try:
+            ast.parse(code)
+        except SyntaxError as e:
+            return f"SyntaxError at line {e.lineno}: {e.msg}"
+        return None
+    if language == LanguageType.UNKNOWN:
+        return None
+    for opening, closing in ("()", "[]", "{}"):
+        if code.count(opening) != code.count(closing):
+            return f"Unbalanced {opening}{closing}"
+    return None
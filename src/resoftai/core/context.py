@@ -0,0 +1,356 @@
+"""
+Token-budgeted prompt context for agents.
+
+``Agent.get_context_from_state`` used to paste the full requirements,
+architecture and design dicts into every prompt. ``ContextBuilder`` instead
+turns each part of the project state into a section, ranks the sections by
+how relevant they are to the calling agent's role and the current stage, and
+fills a token budget in that order. A section that does not fit in full is
+replaced by a compact summary; summaries are cached by artifact content, so
+the first agent that needs one pays for it and the others reuse it.
+
+Token counts use tiktoken when it is installed and a character-based
+estimate otherwise.
+"""
+import hashlib
+import json
+import math
+import re
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from resoftai.core.state import ProjectState, WorkflowStage
+
+_encoding = None
+_CJK = re.compile(r"[぀-ヿ㐀-䶿一-鿿가-힯]")
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count the tokens of ``text``.
+
+    Uses tiktoken's cl100k_base encoding when available. The fallback counts
+    one token per CJK character and one per four other characters, which is
+    close enough for budgeting.
+    """
+    global _encoding
+    if not text:
+        return 0
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:  # tiktoken is optional
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text, disallowed_special=()))
+    cjk = len(_CJK.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+# Section relevance per agent role (0 leaves the section out entirely)
+ROLE_WEIGHTS: Dict[str, Dict[str, float]] = {
+    "project_manager": {"requirements": 0.9, "architecture": 0.5, "design": 0.3,
+                        "implementation_plan": 0.8, "decisions": 1.0, "feedback": 0.9},
+    "requirements_analyst": {"requirements": 1.0, "architecture": 0.2, "design": 0.2,
+                             "implementation_plan": 0.1, "decisions": 0.6, "feedback": 1.0},
+    "architect": {"requirements": 1.0, "architecture": 1.0, "design": 0.4,
+                  "implementation_plan": 0.5, "decisions": 0.7, "feedback": 0.5},
+    "uxui_designer": {"requirements": 0.9, "architecture": 0.3, "design": 1.0,
+                      "implementation_plan": 0.2, "decisions": 0.5, "feedback": 0.8},
+    "developer": {"requirements": 0.7, "architecture": 1.0, "design": 0.8,
+                  "implementation_plan": 1.0, "decisions": 0.6, "feedback": 0.4},
+    "test_engineer": {"requirements": 1.0, "architecture": 0.7, "design": 0.5,
+                      "implementation_plan": 0.6, "decisions": 0.4, "feedback": 0.4},
+    "quality_expert": {"requirements": 0.8, "architecture": 0.8, "design": 0.5,
+                       "implementation_plan": 0.6, "decisions": 0.6, "feedback": 0.6},
+    "devops_engineer": {"requirements": 0.4, "architecture": 1.0, "design": 0.2,
+                        "implementation_plan": 0.8, "decisions": 0.5, "feedback": 0.3},
+    "security_expert": {"requirements": 0.8, "architecture": 1.0, "design": 0.3,
+                        "implementation_plan": 0.5, "decisions": 0.5, "feedback": 0.3},
+    "performance_engineer": {"requirements": 0.6, "architecture": 1.0, "design": 0.3,
+                             "implementation_plan": 0.7, "decisions": 0.5, "feedback": 0.3},
+}
+
+DEFAULT_WEIGHTS = {"requirements": 0.8, "architecture": 0.8, "design": 0.6,
+                   "implementation_plan": 0.6, "decisions": 0.6, "feedback": 0.5}
+
+# What the current stage makes more relevant, whatever the role
+STAGE_BOOSTS: Dict[WorkflowStage, Dict[str, float]] = {
+    WorkflowStage.REQUIREMENTS_ANALYSIS: {"requirements": 0.3, "feedback": 0.2},
+    WorkflowStage.REQUIREMENTS_REFINEMENT: {"requirements": 0.3, "feedback": 0.3},
+    WorkflowStage.ARCHITECTURE_DESIGN: {"architecture": 0.3, "requirements": 0.1},
+    WorkflowStage.UI_UX_DESIGN: {"design": 0.3},
+    WorkflowStage.CLIENT_REVIEW: {"feedback": 0.4},
+    WorkflowStage.DEVELOPMENT_PLANNING: {"implementation_plan": 0.3},
+    WorkflowStage.IMPLEMENTATION: {"implementation_plan": 0.3, "architecture": 0.1},
+    WorkflowStage.TESTING: {"requirements": 0.2},
+    WorkflowStage.QUALITY_ASSURANCE: {"requirements": 0.1, "architecture": 0.1},
+}
+
+SECTION_TITLES = {
+    "project": "Project",
+    "requirements": "Requirements",
+    "architecture": "Architecture",
+    "design": "Design",
+    "implementation_plan": "Implementation Plan",
+    "decisions": "Recent Decisions",
+    "feedback": "Client Feedback",
+}
+
+# Token targets summaries are made for (then cut to the actual budget)
+SUMMARY_TIERS = (64, 128, 256, 512, 1024, 2048, 4096)
+
+# Summaries of large artifacts by (content hash, token target)
+_SUMMARY_CACHE_SIZE = 256
+_summary_cache: "OrderedDict[Tuple[str, int], str]" = OrderedDict()
+summary_stats = {"hits": 0, "misses": 0}
+
+
+@dataclass
+class ContextSection:
+    """One part of the project state, as included in (or left out of) a prompt."""
+    name: str
+    weight: float
+    tokens: int = 0
+    full_tokens: int = 0
+    mode: str = "dropped"  # full, summary or dropped
+    text: str = ""
+
+
+@dataclass
+class ContextReport:
+    """Token breakdown of one assembled context."""
+    role: str
+    stage: str
+    budget: int
+    sections: List[ContextSection] = field(default_factory=list)
+
+    @property
+    def total_tokens(self) -> int:
+        """Tokens of all included sections."""
+        return sum(section.tokens for section in self.sections)
+
+    @property
+    def full_tokens(self) -> int:
+        """Tokens the unbudgeted context would have used."""
+        return sum(section.full_tokens for section in self.sections)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Breakdown by section, for logging and metrics."""
+        return {
+            "role": self.role,
+            "stage": self.stage,
+            "budget": self.budget,
+            "total_tokens": self.total_tokens,
+            "full_tokens": self.full_tokens,
+            "sections": {
+                section.name: {"tokens": section.tokens, "mode": section.mode}
+                for section in self.sections
+            },
+        }
+
+
+def render_artifact(value: Any) -> str:
+    """Compact, stable text form of a state artifact (JSON, not Python repr)."""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), sort_keys=True, default=str)
+
+
+def _shrink(value: Any, text_chars: int, list_items: int, depth: int) -> Any:
+    """Reduce nested data: shorten strings, keep the first list items, cap depth."""
+    if isinstance(value, str):
+        return value if len(value) <= text_chars else value[:text_chars].rstrip() + "…"
+    if isinstance(value, dict):
+        if depth <= 0:
+            return f"{{{len(value)} keys: {', '.join(map(str, list(value)[:list_items]))}}}"
+        return {key: _shrink(item, text_chars, list_items, depth - 1) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if depth <= 0:
+            return f"[{len(value)} items]"
+        kept = [_shrink(item, text_chars, list_items, depth - 1) for item in value[:list_items]]
+        if len(value) > list_items:
+            kept.append(f"(+{len(value) - list_items} more)")
+        return kept
+    return value
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Longest prefix of ``text`` that fits ``max_tokens`` together with an ellipsis."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(text[:middle].rstrip() + "…") <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low].rstrip() + "…" if low else ""
+
+
+def _summarize_to_tier(value: Any, tier: int) -> str:
+    """Summary of ``value`` within ``tier`` tokens (uncached)."""
+    if isinstance(value, str):
+        return truncate_to_tokens(value, tier)
+    for text_chars, list_items, depth in (
+        (400, 10, 4), (200, 6, 3), (120, 4, 3), (80, 3, 2), (50, 2, 2), (30, 1, 1), (20, 1, 0)
+    ):
+        candidate = render_artifact(_shrink(value, text_chars, list_items, depth))
+        if count_tokens(candidate) <= tier:
+            return candidate
+    # Still too large: cut the smallest rendering to the target
+    return truncate_to_tokens(render_artifact(_shrink(value, 20, 1, 0)), tier)
+
+
+def summarize_artifact(value: Any, max_tokens: int) -> str:
+    """
+    Summarize an artifact to at most ``max_tokens``, reusing earlier summaries.
+
+    Summaries are made for a few fixed sizes (``SUMMARY_TIERS``) and cached
+    by content hash and size, so roles with different remaining budgets share
+    them; the smallest size at or above ``max_tokens`` is then cut to the
+    budget. Structured artifacts lose detail step by step (shorter strings,
+    fewer list items, less nesting); text is cut at the end.
+    """
+    tier = next((size for size in SUMMARY_TIERS if size >= max_tokens), SUMMARY_TIERS[-1])
+    rendered = render_artifact(value)
+    key = (hashlib.sha1(rendered.encode("utf-8")).hexdigest(), tier)
+    summary = _summary_cache.get(key)
+    if summary is not None:
+        _summary_cache.move_to_end(key)
+        summary_stats["hits"] += 1
+    else:
+        summary_stats["misses"] += 1
+        summary = _summarize_to_tier(value, tier)
+        _summary_cache[key] = summary
+        if len(_summary_cache) > _SUMMARY_CACHE_SIZE:
+            _summary_cache.popitem(last=False)
+    return truncate_to_tokens(summary, max(max_tokens, 0))
+
+
+class ContextBuilder:
+    """
+    Assemble prompt context for a role within a token budget
+    """
+
+    # Sections smaller than this are not worth summarizing; they go in whole or not at all
+    MIN_SUMMARY_TOKENS = 40
+
+    def __init__(
+        self,
+        budget: int = 3000,
+        role_weights: Optional[Dict[str, Dict[str, float]]] = None,
+        stage_boosts: Optional[Dict[WorkflowStage, Dict[str, float]]] = None,
+        tokenizer: Callable[[str], int] = count_tokens
+    ):
+        """
+        Initialize context builder.
+
+        Args:
+            budget: Default token budget for the assembled context
+            role_weights: Section relevance per role (defaults to ``ROLE_WEIGHTS``)
+            stage_boosts: Relevance added per stage (defaults to ``STAGE_BOOSTS``)
+            tokenizer: Function counting the tokens of a string
+        """
+        self.budget = budget
+        self.role_weights = role_weights or ROLE_WEIGHTS
+        self.stage_boosts = stage_boosts or STAGE_BOOSTS
+        self.tokenizer = tokenizer
+
+    def _sources(self, state: ProjectState) -> Dict[str, Any]:
+        """Raw content of each rankable section (empty ones are skipped)."""
+        sources: Dict[str, Any] = {
+            "requirements": state.requirements,
+            "architecture": state.architecture,
+            "design": state.design,
+            "implementation_plan": state.implementation_plan,
+        }
+        if state.decisions:
+            sources["decisions"] = "\n".join(
+                f"- {d['decision']} (by {d['made_by']})" for d in state.decisions[-5:]
+            )
+        if state.client_feedback:
+            sources["feedback"] = "\n".join(
+                f"- {f.get('feedback', '')}" for f in state.client_feedback[-5:]
+            )
+        return {name: value for name, value in sources.items() if value}
+
+    def build(
+        self,
+        state: ProjectState,
+        role: str,
+        stage: Optional[WorkflowStage] = None,
+        budget: Optional[int] = None
+    ) -> Tuple[str, ContextReport]:
+        """
+        Build the context string for ``role`` at ``stage``.
+
+        Args:
+            state: Project state to draw from
+            role: Agent role value (e.g. "developer")
+            stage: Workflow stage (defaults to the state's current stage)
+            budget: Token budget (defaults to the builder's)
+
+        Returns:
+            (context text, token report)
+        """
+        stage = stage or state.current_stage
+        budget = self.budget if budget is None else budget
+        weights = dict(self.role_weights.get(role, DEFAULT_WEIGHTS))
+        for name, boost in self.stage_boosts.get(stage, {}).items():
+            weights[name] = weights.get(name, 0) + boost
+
+        report = ContextReport(role=role, stage=stage.value, budget=budget)
+
+        # The project header is always included
+        header = (
+            f"Project: {state.name}\n"
+            f"Description: {state.description}\n"
+            f"Current Stage: {stage.value}"
+        )
+        header_tokens = self.tokenizer(header)
+        report.sections.append(ContextSection("project", 1.0, header_tokens, header_tokens, "full", header))
+        remaining = budget - header_tokens
+
+        sources = self._sources(state)
+        ranked = sorted(
+            (ContextSection(name, weights.get(name, 0.0)) for name in sources),
+            key=lambda section: section.weight,
+            reverse=True
+        )
+        for section in ranked:
+            value = sources[section.name]
+            full_text = render_artifact(value)
+            # Title line plus separator
+            overhead = self.tokenizer(SECTION_TITLES[section.name]) + 2
+            section.full_tokens = self.tokenizer(full_text) + overhead
+            if section.weight <= 0:
+                report.sections.append(section)
+                continue
+
+            if section.full_tokens <= remaining:
+                section.mode, section.text, section.tokens = "full", full_text, section.full_tokens
+            elif remaining - overhead >= self.MIN_SUMMARY_TOKENS:
+                # More relevant sections are summarized first and get the larger share
+                overhead = self.tokenizer(f"{SECTION_TITLES[section.name]} (summary)") + 2
+                summary = summarize_artifact(value, remaining - overhead)
+                section.mode, section.text = "summary", summary
+                section.tokens = self.tokenizer(summary) + overhead
+            if section.mode != "dropped":
+                remaining -= section.tokens
+            report.sections.append(section)
+
+        # Stable section order keeps prompts (and provider prompt caches) consistent
+        order = list(SECTION_TITLES)
+        included = sorted(
+            (section for section in report.sections if section.mode != "dropped"),
+            key=lambda section: order.index(section.name)
+        )
+        parts = [header] + [
+            f"{SECTION_TITLES[section.name]}{' (summary)' if section.mode == 'summary' else ''}:\n{section.text}"
+            for section in included if section.name != "project"
+        ]
+        return "\n\n".join(parts), report
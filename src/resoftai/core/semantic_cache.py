@@ -0,0 +1,422 @@
+"""
+Semantic cache of agent outputs across projects.
+
+Projects with near-duplicate requirements ("REST API for X with auth") ask
+the early-stage agents the same questions about almost the same input.
+``SemanticCache`` remembers each stage output together with a local
+embedding of the stage input and, for a new input, finds the most similar
+past one:
+
+- at or above ``reuse_threshold`` the cached output is returned as is;
+- at or above ``threshold`` it is offered to the agent as a draft to adapt;
+- below that the agent generates from scratch and the output is stored.
+
+Embeddings are hashed bags of words and word bigrams, computed locally with
+the search index tokenizer, so no external embedding service is involved.
+Lookups go through a random-hyperplane LSH index instead of comparing
+against every entry. Entries are namespaced (project owner, agent role and
+prompt template), so only outputs produced for the same owner and the same
+question are compared; one owner's outputs are never offered to another.
+
+Entries are saved at most every ``save_interval`` seconds, in a worker
+thread, rather than on every store.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import random
+from collections import Counter, defaultdict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from resoftai.utils.search_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+SparseVector = Dict[int, float]
+
+# Dimension of the hashed embedding space
+EMBEDDING_DIMENSIONS = 4096
+
+
+def _bucket(feature: str, dimensions: int) -> Tuple[int, float]:
+    """Stable hash of a feature to (dimension, sign)."""
+    digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+    value = int.from_bytes(digest, "big")
+    return value % dimensions, 1.0 if value >> 63 else -1.0
+
+
+def embed(text: str, dimensions: int = EMBEDDING_DIMENSIONS) -> SparseVector:
+    """
+    Embed text as an L2-normalized sparse hashed vector.
+
+    Features are the normalized terms of ``text`` and its adjacent term
+    pairs, weighted by log term frequency. Signed hashing keeps collisions
+    from systematically inflating similarity.
+
+    Args:
+        text: Text to embed
+        dimensions: Size of the hashed space
+
+    Returns:
+        Mapping of dimension to weight (empty for text without terms)
+    """
+    terms = tokenize(text)
+    features = Counter(terms)
+    features.update(f"{a} {b}" for a, b in zip(terms, terms[1:]))
+
+    vector: SparseVector = defaultdict(float)
+    for feature, count in features.items():
+        index, sign = _bucket(feature, dimensions)
+        vector[index] += sign * (1.0 + math.log(count))
+
+    norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+    if not norm:
+        return {}
+    return {index: weight / norm for index, weight in vector.items() if weight}
+
+
+def cosine(a: SparseVector, b: SparseVector) -> float:
+    """Cosine similarity of two normalized sparse vectors."""
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(weight * b.get(index, 0.0) for index, weight in a.items())
+
+
+class LSHIndex:
+    """
+    Approximate nearest-neighbour index using random-hyperplane hashing.
+
+    Each of ``tables`` hash tables buckets a vector by the signs of its dot
+    products with ``bits`` random hyperplanes. Vectors with a small angle
+    between them share a bucket in at least one table with high probability,
+    so a query only compares against the union of its buckets. Buckets are
+    keyed by namespace as well, so namespaces share the hyperplanes.
+    """
+
+    def __init__(
+        self,
+        dimensions: int = EMBEDDING_DIMENSIONS,
+        tables: int = 8,
+        bits: int = 10,
+        seed: int = 0
+    ):
+        self.dimensions = dimensions
+        self.tables = tables
+        self.bits = bits
+        self.seed = seed
+        self._columns: Dict[int, List[float]] = {}
+        self.buckets: List[Dict[Tuple[str, int], Set[int]]] = [defaultdict(set) for _ in range(tables)]
+
+    def _column(self, index: int) -> List[float]:
+        # Hyperplane components for one dimension, drawn on first use so
+        # only dimensions that actually occur are ever generated
+        column = self._columns.get(index)
+        if column is None:
+            rng = random.Random(self.seed * self.dimensions + index)
+            column = [rng.gauss(0.0, 1.0) for _ in range(self.tables * self.bits)]
+            self._columns[index] = column
+        return column
+
+    def _signatures(self, vector: SparseVector) -> List[int]:
+        dots = [0.0] * (self.tables * self.bits)
+        for index, weight in vector.items():
+            for k, component in enumerate(self._column(index)):
+                dots[k] += weight * component
+        signatures = []
+        for table in range(self.tables):
+            signature = 0
+            for dot in dots[table * self.bits:(table + 1) * self.bits]:
+                signature = (signature << 1) | (dot >= 0)
+            signatures.append(signature)
+        return signatures
+
+    def add(self, namespace: str, item_id: int, vector: SparseVector) -> None:
+        """Index a vector under ``item_id``."""
+        for buckets, signature in zip(self.buckets, self._signatures(vector)):
+            buckets[(namespace, signature)].add(item_id)
+
+    def candidates(self, namespace: str, vector: SparseVector) -> Set[int]:
+        """Ids in ``namespace`` sharing a bucket with ``vector`` in any table."""
+        found: Set[int] = set()
+        for buckets, signature in zip(self.buckets, self._signatures(vector)):
+            found |= buckets.get((namespace, signature), set())
+        return found
+
+    def remove(self, namespace: str, item_id: int, vector: SparseVector) -> None:
+        """Remove ``item_id`` indexed with ``vector``."""
+        for buckets, signature in zip(self.buckets, self._signatures(vector)):
+            key = (namespace, signature)
+            bucket = buckets.get(key)
+            if bucket is not None:
+                bucket.discard(item_id)
+                if not bucket:
+                    del buckets[key]
+
+
+@dataclass
+class CacheEntry:
+    """A stored stage output and the input it was produced for."""
+
+    namespace: str
+    text: str
+    output: str
+    tokens: int = 0
+
+
+@dataclass
+class CacheMatch:
+    """Result of a lookup that found a sufficiently similar entry."""
+
+    entry: CacheEntry
+    similarity: float
+    reuse: bool
+
+
+class SemanticCache:
+    """Similarity-matched cache of agent stage outputs."""
+
+    def __init__(
+        self,
+        threshold: float = 0.85,
+        reuse_threshold: float = 0.97,
+        max_entries: int = 5000,
+        path: Optional[Path] = None,
+        dimensions: int = EMBEDDING_DIMENSIONS,
+        save_interval: float = 5.0
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            threshold: Minimum similarity for offering a cached output as a draft
+            reuse_threshold: Minimum similarity for returning it unchanged
+            max_entries: Entries kept before the oldest are dropped
+            path: Optional JSON file the entries are loaded from and saved to
+            dimensions: Size of the hashed embedding space
+            save_interval: Seconds new entries wait before being saved
+                together (when running in an event loop)
+        """
+        self.threshold = threshold
+        self.reuse_threshold = reuse_threshold
+        self.max_entries = max_entries
+        self.path = Path(path) if path else None
+        self.dimensions = dimensions
+        self.save_interval = save_interval
+
+        self._entries: Dict[int, CacheEntry] = {}
+        self._vectors: Dict[int, SparseVector] = {}
+        self._index = LSHIndex(dimensions)
+        self._namespaces: Set[str] = set()
+        self._next_id = 0
+        self._dirty = False
+        self._save_handle: Optional[asyncio.TimerHandle] = None
+        self._save_task: Optional[asyncio.Future] = None
+        self._save_loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.stats = {
+            "lookups": 0,
+            "reuse_hits": 0,
+            "draft_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "tokens_saved": 0,
+            "candidates_compared": 0,
+            "saves": 0,
+        }
+
+        if self.path:
+            self.load(self.path)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, namespace: str, text: str) -> Optional[CacheMatch]:
+        """
+        Find the most similar cached output for ``text``.
+
+        Args:
+            namespace: Question the output answers (owner, role and prompt template)
+            text: Normalized stage input
+
+        Returns:
+            The best match at or above ``threshold``, or None
+        """
+        self.stats["lookups"] += 1
+        vector = embed(text, self.dimensions)
+        best: Optional[Tuple[float, int]] = None
+        if vector and namespace in self._namespaces:
+            candidates = self._index.candidates(namespace, vector)
+            self.stats["candidates_compared"] += len(candidates)
+            for item_id in candidates:
+                if item_id not in self._entries:
+                    continue
+                similarity = cosine(vector, self._vectors[item_id])
+                if best is None or similarity > best[0]:
+                    best = (similarity, item_id)
+
+        if best is None or best[0] < self.threshold:
+            self.stats["misses"] += 1
+            return None
+
+        similarity, item_id = best
+        reuse = similarity >= self.reuse_threshold
+        self.stats["reuse_hits" if reuse else "draft_hits"] += 1
+        return CacheMatch(entry=self._entries[item_id], similarity=round(similarity, 4), reuse=reuse)
+
+    def store(self, namespace: str, text: str, output: str, tokens: int = 0) -> None:
+        """
+        Remember ``output`` as the answer for ``text``.
+
+        Args:
+            namespace: Question the output answers
+            text: Normalized stage input
+            output: Stage output
+            tokens: Tokens spent producing the output
+        """
+        vector = embed(text, self.dimensions)
+        if not vector or not output:
+            return
+        self._add(CacheEntry(namespace, text, output, tokens), vector)
+        self.stats["stores"] += 1
+        self._evict()
+        if self.path:
+            self._schedule_save()
+
+    def record_savings(self, tokens: int) -> None:
+        """Count tokens a hit avoided spending."""
+        self.stats["tokens_saved"] += max(0, tokens)
+
+    def _add(self, entry: CacheEntry, vector: SparseVector) -> None:
+        item_id = self._next_id
+        self._next_id += 1
+        self._entries[item_id] = entry
+        self._vectors[item_id] = vector
+        self._namespaces.add(entry.namespace)
+        self._index.add(entry.namespace, item_id, vector)
+
+    def _evict(self) -> None:
+        # Ids grow with insertion order, so the smallest are the oldest
+        while len(self._entries) > self.max_entries:
+            oldest = min(self._entries)
+            entry = self._entries.pop(oldest)
+            self._index.remove(entry.namespace, oldest, self._vectors.pop(oldest))
+            self.stats["evictions"] += 1
+
+    def _snapshot(self) -> List[CacheEntry]:
+        # Entries are never modified once stored, so a shallow copy is enough
+        return [entry for _, entry in sorted(self._entries.items())]
+
+    def _save(self, entries: List[CacheEntry]) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            tmp.write_text(json.dumps([asdict(entry) for entry in entries], ensure_ascii=False), encoding="utf-8")
+            tmp.replace(self.path)
+            self.stats["saves"] += 1
+        except OSError as e:
+            logger.warning(f"Could not save semantic cache to {self.path}: {e}")
+
+    def _schedule_save(self) -> None:
+        """Save after ``save_interval`` in a worker thread, or right away outside an event loop."""
+        self._dirty = True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._dirty = False
+            self._save(self._snapshot())
+            return
+        if self._save_loop is not loop:
+            # A timer or save left by a loop that has since closed never runs
+            self._save_handle = self._save_task = None
+            self._save_loop = loop
+        if self._save_handle is None and self._save_task is None:
+            self._save_handle = loop.call_later(self.save_interval, self._start_save)
+
+    def _start_save(self) -> None:
+        self._save_handle = None
+        self._dirty = False
+        self._save_task = asyncio.ensure_future(asyncio.to_thread(self._save, self._snapshot()))
+        self._save_task.add_done_callback(self._save_done)
+
+    def _save_done(self, task: asyncio.Future) -> None:
+        self._save_task = None
+        if self._dirty and self.path:
+            self._schedule_save()
+
+    async def flush(self) -> None:
+        """Write entries not saved yet, e.g. at shutdown."""
+        if self._save_loop is not asyncio.get_running_loop():
+            self._save_handle = self._save_task = None
+        if self._save_task is not None:
+            await asyncio.shield(self._save_task)
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
+        if self._dirty and self.path:
+            self._dirty = False
+            await asyncio.to_thread(self._save, self._snapshot())
+
+    def load(self, path: Path) -> None:
+        """
+        Load entries saved at ``path`` and save future entries there.
+
+        Args:
+            path: JSON file written by a previous cache
+        """
+        self.path = Path(path)
+        if self.path.exists():
+            self._load()
+
+    def _load(self) -> None:
+        try:
+            entries = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load semantic cache from {self.path}: {e}")
+            return
+        for item in entries[-self.max_entries:]:
+            entry = CacheEntry(**item)
+            vector = embed(entry.text, self.dimensions)
+            if vector:
+                self._add(entry, vector)
+        logger.info(f"Loaded {len(self._entries)} semantic cache entries from {self.path}")
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
+        self._dirty = False
+        self._entries.clear()
+        self._vectors.clear()
+        self._namespaces.clear()
+        self._index = LSHIndex(self.dimensions)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Counters plus entry count and hit rate
+        """
+        hits = self.stats["reuse_hits"] + self.stats["draft_hits"]
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "hit_rate": hits / self.stats["lookups"] if self.stats["lookups"] else 0.0,
+            "threshold": self.threshold,
+            "reuse_threshold": self.reuse_threshold,
+        }
+
+
+def namespace_for(owner: str, role: str, prompt: str) -> str:
+    """Namespace of outputs answering ``prompt`` for ``role`` in projects of ``owner``."""
+    return f"{owner}:{role}:{hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:16]}"
+
+
+# Global semantic cache shared by all projects in the process
+semantic_cache = SemanticCache()
@@ -10,15 +10,16 @@ Provides database operations for:
 """
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
-from sqlalchemy import select, func, and_, or_, desc
+from sqlalchemy import select, func, and_, or_, desc, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from resoftai.models.enterprise import (
     Organization, Team, TeamMember, Permission, Role,
-    RolePermission, UserRole, Quota, UsageRecord, AuditLog,
+    RolePermission, UserRole, Quota, QuotaCounter, UsageRecord, AuditLog,
     SSOProvider, OrganizationTier, TeamRole, ResourceType, AuditAction
 )
+from resoftai.utils.cache import cache_manager
 
 
 # =============================================================================
@@ -283,6 +284,7 @@ async def assign_permission_to_role(
     db.add(role_perm)
     await db.commit()
     await db.refresh(role_perm)
+    await cache_manager.invalidate_tags(f"role:{role_id}")
     return role_perm
 
 
@@ -303,6 +305,7 @@ async def assign_role_to_user(
     db.add(user_role)
     await db.commit()
     await db.refresh(user_role)
+    await cache_manager.invalidate_tags(f"user:{user_id}")
     return user_role
 
 
@@ -320,14 +323,48 @@ async def get_user_permissions(db: AsyncSession, user_id: int) -> List[str]:
     return list(result.scalars().all())
 
 
+async def get_user_grants(db: AsyncSession, user_id: int) -> tuple[set[str], set[int]]:
+    """
+    Get a user's permission codes and role IDs in one query.
+
+    Returns:
+        (permission codes, IDs of the roles assigned to the user)
+    """
+    result = await db.execute(
+        select(UserRole.role_id, Permission.code)
+        .outerjoin(RolePermission, RolePermission.role_id == UserRole.role_id)
+        .outerjoin(Permission, Permission.id == RolePermission.permission_id)
+        .where(UserRole.user_id == user_id)
+    )
+    permissions, role_ids = set(), set()
+    for role_id, code in result:
+        role_ids.add(role_id)
+        if code is not None:
+            permissions.add(code)
+    return permissions, role_ids
+
+
 async def check_user_permission(
     db: AsyncSession,
     user_id: int,
     permission_code: str
 ) -> bool:
-    """Check if user has a specific permission"""
-    permissions = await get_user_permissions(db, user_id)
-    return permission_code in permissions
+    """
+    Check if user has a specific permission.
+
+    Runs an EXISTS query for the one code instead of loading every permission.
+    Request handlers should prefer the cached ``Principal.has_permission``
+    (see ``auth.dependencies.require_permission``).
+    """
+    query = (
+        select(RolePermission.role_id)
+        .join(Permission, Permission.id == RolePermission.permission_id)
+        .join(UserRole, UserRole.role_id == RolePermission.role_id)
+        .where(UserRole.user_id == user_id, Permission.code == permission_code)
+        .exists()
+    )
+    result = await db.execute(select(query))
+    return bool(result.scalar())
 
 
 # =============================================================================
@@ -353,6 +390,7 @@ async def create_quota(
     db.add(quota)
     await db.commit()
     await db.refresh(quota)
+    await cache_manager.invalidate_tags(f"quota:{organization_id}")
     return quota
 
 
@@ -379,6 +417,126 @@ async def get_quota(
     return result.scalar_one_or_none()
 
 
+# Period buckets for quota counters, as strftime formats
+QUOTA_PERIOD_FORMATS = {
+    "minute": "%Y%m%d%H%M",
+    "hourly": "%Y%m%d%H",
+    "daily": "%Y%m%d",
+    "monthly": "%Y%m",
+    "yearly": "%Y",
+}
+
+
+def quota_period_key(period: Optional[str], now: Optional[datetime] = None) -> str:
+    """
+    Get the counter bucket of a quota period at a point in time.
+
+    Args:
+        period: Quota period (minute, hourly, daily, monthly, yearly or None)
+        now: Point in time (defaults to now, UTC)
+
+    Returns:
+        Bucket key, e.g. "20261018" for daily or "total" without a period
+    """
+    if period is None:
+        return "total"
+    return (now or datetime.utcnow()).strftime(QUOTA_PERIOD_FORMATS[period])
+
+
+def quota_period_end(period: Optional[str], now: Optional[datetime] = None) -> Optional[datetime]:
+    """Get when the current bucket of a quota period ends (None without a period)."""
+    now = now or datetime.utcnow()
+    if period is None:
+        return None
+    if period == "minute":
+        return now.replace(second=0, microsecond=0) + timedelta(minutes=1)
+    if period == "hourly":
+        return now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    if period == "daily":
+        return datetime(now.year, now.month, now.day) + timedelta(days=1)
+    if period == "monthly":
+        return datetime(now.year + now.month // 12, now.month % 12 + 1, 1)
+    return datetime(now.year + 1, 1, 1)
+
+
+async def list_resource_quotas(
+    db: AsyncSession,
+    organization_id: int,
+    resource_type: ResourceType
+) -> List[Quota]:
+    """Get every quota (all periods) of an organization for one resource type"""
+    result = await db.execute(
+        select(Quota).where(
+            and_(
+                Quota.organization_id == organization_id,
+                Quota.resource_type == resource_type
+            )
+        )
+    )
+    return list(result.scalars().all())
+
+
+async def get_quota_used(db: AsyncSession, quota_id: int, period_key: str) -> int:
+    """Get the running usage total of a quota bucket (0 if nothing was used)"""
+    result = await db.execute(
+        select(QuotaCounter.used).where(
+            and_(QuotaCounter.quota_id == quota_id, QuotaCounter.period_key == period_key)
+        )
+    )
+    return result.scalar() or 0
+
+
+async def add_quota_usage(db: AsyncSession, amounts: Dict[tuple, int]) -> None:
+    """
+    Add amounts to quota counters, creating rows as needed.
+
+    Does not commit. Adding 0 just makes sure the row exists.
+
+    Args:
+        db: Database session
+        amounts: {(quota_id, period_key): amount}
+    """
+    values = [
+        {"quota_id": quota_id, "period_key": period_key, "used": amount}
+        for (quota_id, period_key), amount in amounts.items()
+    ]
+    if not values:
+        return
+
+    dialect = db.bind.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        insert = None
+
+    if insert is not None:
+        stmt = insert(QuotaCounter)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["quota_id", "period_key"],
+            set_={"used": QuotaCounter.used + stmt.excluded.used, "updated_at": datetime.utcnow()}
+        )
+        await db.execute(stmt, values)
+        return
+
+    # Portable fallback: update existing rows, insert the rest
+    for value in values:
+        result = await db.execute(
+            update(QuotaCounter)
+            .where(
+                and_(
+                    QuotaCounter.quota_id == value["quota_id"],
+                    QuotaCounter.period_key == value["period_key"]
+                )
+            )
+            .values(used=QuotaCounter.used + value["used"])
+        )
+        if not result.rowcount:
+            db.add(QuotaCounter(**value))
+    await db.flush()
+
+
 async def record_usage(
     db: AsyncSession,
     organization_id: int,
@@ -388,20 +546,27 @@ async def record_usage(
     project_id: Optional[int] = None,
     metadata: Optional[Dict[str, Any]] = None
 ) -> UsageRecord:
-    """Record resource usage"""
-    # Get quota to link
-    quota = await get_quota(db, organization_id, resource_type)
+    """
+    Record resource usage and add it to the quota counters in one commit.
+
+    Metered hot paths should use ``services.quota_engine`` instead, which
+    reserves atomically and writes usage records in batches.
+    """
+    quotas = await list_resource_quotas(db, organization_id, resource_type)
+    # Link the record to the lifetime quota if there is one
+    linked = next((quota for quota in quotas if quota.period is None), quotas[0] if quotas else None)
 
     usage = UsageRecord(
-        quota_id=quota.id if quota else None,
+        quota_id=linked.id if linked else None,
         organization_id=organization_id,
         resource_type=resource_type,
         amount=amount,
         user_id=user_id,
         project_id=project_id,
-        metadata=metadata
+        usage_metadata=metadata
     )
     db.add(usage)
+    await add_quota_usage(db, {(quota.id, quota_period_key(quota.period)): amount for quota in quotas})
     await db.commit()
     await db.refresh(usage)
     return usage
@@ -452,25 +617,78 @@ async def check_quota(
     """
     Check if organization can consume resource
 
+    Reads the quota and its current counter in one query, independent of
+    how much usage history exists.
+
     Returns:
         (can_consume, error_message)
     """
-    quota = await get_quota(db, organization_id, resource_type)
+    result = await db.execute(
+        select(Quota.limit_value, func.coalesce(QuotaCounter.used, 0))
+        .outerjoin(QuotaCounter, and_(
+            QuotaCounter.quota_id == Quota.id,
+            QuotaCounter.period_key == "total"
+        ))
+        .where(
+            and_(
+                Quota.organization_id == organization_id,
+                Quota.resource_type == resource_type,
+                Quota.period.is_(None)
+            )
+        )
+    )
+    row = result.first()
 
-    if not quota:
+    if row is None:
         # No quota means unlimited
         return True, None
 
-    # Calculate current usage
-    stats = await get_usage_stats(db, organization_id, resource_type)
-    current_usage = stats["total_usage"]
-
-    if current_usage + amount > quota.limit_value:
-        return False, f"Quota exceeded for {resource_type}. Limit: {quota.limit_value}, Current: {current_usage}"
+    limit_value, current_usage = row
+    if current_usage + amount > limit_value:
+        return False, f"Quota exceeded for {resource_type}. Limit: {limit_value}, Current: {current_usage}"
 
     return True, None
 
 
+async def get_user_rate_limit(
+    db: AsyncSession,
+    user_id: int
+) -> Optional[tuple[int, OrganizationTier, Optional[int]]]:
+    """
+    Get the API rate limit settings of a user's organization in one query.
+
+    The organization is found through the user's role assignments or team
+    memberships (lowest ID first if there are several).
+
+    Returns:
+        (organization_id, tier, per-minute API_CALLS quota or None), or None
+        if the user belongs to no organization
+    """
+    member_orgs = select(UserRole.organization_id).where(
+        UserRole.user_id == user_id,
+        UserRole.organization_id.is_not(None)
+    ).union(
+        select(Team.organization_id)
+        .join(TeamMember, TeamMember.team_id == Team.id)
+        .where(TeamMember.user_id == user_id)
+    ).subquery()
+
+    query = (
+        select(Organization.id, Organization.tier, Quota.limit_value)
+        .outerjoin(Quota, and_(
+            Quota.organization_id == Organization.id,
+            Quota.resource_type == ResourceType.API_CALLS,
+            Quota.period == "minute"
+        ))
+        .where(Organization.id.in_(select(member_orgs.c[0])), Organization.is_active.is_(True))
+        .order_by(Organization.id)
+        .limit(1)
+    )
+
+    row = (await db.execute(query)).first()
+    return tuple(row) if row else None
+
+
 # =============================================================================
 # Audit Log Operations
 # =============================================================================
@@ -489,7 +707,13 @@ async def create_audit_log(
     success: bool = True,
     error_message: Optional[str] = None
 ) -> AuditLog:
-    """Create an audit log entry"""
+    """
+    Create an audit log entry and commit it immediately
+
+    Request handlers should queue events with
+    ``services.audit_pipeline.audit_pipeline.record`` instead, which writes
+    them in batches off the request path.
+    """
     log = AuditLog(
         user_id=user_id,
         organization_id=organization_id,
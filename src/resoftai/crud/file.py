@@ -12,12 +12,17 @@ from resoftai.utils.performance import timing_decorator
 # File operations
 
 @timing_decorator("crud.get_file")
-@cached(key_func=lambda db, file_id: f"file:{file_id}", ttl=180)
+@cached(
+    key_func=lambda db, file_id: f"file:{file_id}",
+    ttl=180,
+    tags=lambda file: [f"project:{file['project_id']}"],
+    negative_ttl=15
+)
 async def get_file(db: AsyncSession, file_id: int) -> Optional[File]:
     """
     Get file by ID with caching.
 
-    Results are cached for 3 minutes.
+    Results are cached for 3 minutes (missing files for 15 seconds).
     """
     result = await db.execute(
         select(File).where(File.id == file_id)
@@ -106,7 +111,11 @@ async def create_file(
     )
 
     db.add(version)
-    await db.flush()
+    await db.commit()
+    await db.refresh(file)
+
+    # Drop a cached "not found" for the new ID once it is visible to other sessions
+    await cache_manager.delete(f"file:{file.id}")
 
     return file
 
@@ -144,10 +153,10 @@ async def update_file(
     )
 
     db.add(version)
-    await db.flush()
+    await db.commit()
     await db.refresh(file)
 
-    # Invalidate cache
+    # Invalidate after the commit, so a concurrent read cannot cache the old row again
     await cache_manager.delete(f"file:{file_id}")
 
     return file
@@ -155,18 +164,19 @@ async def update_file(
 
 async def delete_file(db: AsyncSession, file_id: int) -> bool:
     """Delete file and all its versions."""
-    file = await get_file(db, file_id)
+    # get_file returns a cached dict; deleting needs the mapped object
+    result = await db.execute(select(File).where(File.id == file_id))
+    file = result.scalar_one_or_none()
 
     if not file:
         return False
 
-    # Delete all versions first (due to foreign key)
-    await db.execute(
-        select(FileVersion).where(FileVersion.file_id == file_id)
-    )
-
+    # Versions are removed through the delete-orphan cascade
     await db.delete(file)
-    await db.flush()
+    await db.commit()
+
+    # Invalidate after the commit, so a concurrent read cannot cache the deleted row again
+    await cache_manager.delete(f"file:{file_id}")
 
     return True
 
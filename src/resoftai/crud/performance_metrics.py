@@ -3,16 +3,26 @@ import logging
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, or_, desc
+from sqlalchemy import select, func, and_, or_, desc, insert, delete
 from sqlalchemy.orm import selectinload
 
 from resoftai.models.performance_metrics import (
     WorkflowMetrics,
     AgentPerformance,
     SystemMetrics,
+    SystemMetricsRollup,
     LLMUsageMetrics,
     PerformanceAlert
 )
+from resoftai.utils.timeseries import (
+    RESOLUTIONS,
+    Bucket,
+    aggregate_points,
+    bucket_start,
+    downsample,
+    merge_buckets,
+    select_resolution,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -291,6 +301,315 @@ async def get_latest_system_metrics(
     return result.scalar_one_or_none()
 
 
+# SystemMetrics rollups
+SYSTEM_METRIC_FIELDS = (
+    "active_workflows",
+    "total_workflows_completed",
+    "total_workflows_failed",
+    "avg_workflow_duration",
+    "total_llm_calls",
+    "total_tokens_used",
+    "avg_tokens_per_call",
+    "llm_error_rate",
+    "cache_hits",
+    "cache_misses",
+    "cache_hit_rate",
+    "cache_size_bytes",
+    "cpu_usage_percent",
+    "memory_usage_mb",
+    "disk_usage_mb",
+    "api_requests_total",
+    "api_requests_success",
+    "api_requests_error",
+    "avg_response_time_ms",
+    "websocket_connections",
+    "websocket_messages_sent",
+    "websocket_messages_received",
+    "active_plugins",
+    "plugin_executions",
+)
+
+_RESOLUTION_NAMES = list(RESOLUTIONS)
+
+# How long each rollup resolution is kept (None = forever)
+ROLLUP_RETENTION_DAYS: Dict[str, Optional[int]] = {
+    "1m": 2,
+    "5m": 14,
+    "1h": 90,
+    "1d": None,
+}
+
+
+def _rollup_to_bucket(rollup: SystemMetricsRollup) -> Bucket:
+    return Bucket(
+        start=rollup.bucket_start,
+        count=rollup.sample_count,
+        min=rollup.min_value,
+        max=rollup.max_value,
+        sum=rollup.sum_value,
+        p95=rollup.p95_value,
+    )
+
+
+async def _get_rollup_watermark(
+    db: AsyncSession,
+    resolution: str
+) -> Optional[datetime]:
+    """Return the end of the newest stored bucket for a resolution."""
+    result = await db.execute(
+        select(func.max(SystemMetricsRollup.bucket_start))
+        .where(SystemMetricsRollup.resolution == resolution)
+    )
+    latest = result.scalar_one_or_none()
+    if latest is None:
+        return None
+    return latest + timedelta(seconds=RESOLUTIONS[resolution])
+
+
+async def rollup_system_metrics(
+    db: AsyncSession,
+    resolution: str,
+    until: Optional[datetime] = None
+) -> int:
+    """
+    Materialize completed buckets for one resolution.
+
+    The finest resolution is built from raw SystemMetrics rows; every
+    coarser resolution is merged from the next finer one, so each run only
+    touches buckets that closed since the previous run.
+
+    Args:
+        resolution: Resolution name (1m, 5m, 1h, 1d)
+        until: Only buckets ending at or before this time are written
+
+    Returns:
+        Number of rollup rows written
+    """
+    seconds = RESOLUTIONS[resolution]
+    end = bucket_start(until or datetime.utcnow(), seconds)
+    start = await _get_rollup_watermark(db, resolution)
+
+    index = _RESOLUTION_NAMES.index(resolution)
+    rows = []
+
+    if index == 0:
+        columns = [getattr(SystemMetrics, name) for name in SYSTEM_METRIC_FIELDS]
+        query = select(SystemMetrics.timestamp, *columns).where(SystemMetrics.timestamp < end)
+        if start is not None:
+            query = query.where(SystemMetrics.timestamp >= start)
+        result = await db.execute(query.order_by(SystemMetrics.timestamp))
+        samples = result.all()
+
+        for position, name in enumerate(SYSTEM_METRIC_FIELDS, start=1):
+            points = ((sample[0], sample[position]) for sample in samples)
+            for bucket in aggregate_points(points, seconds):
+                rows.append((name, bucket))
+    else:
+        finer = _RESOLUTION_NAMES[index - 1]
+        # Never close a coarse bucket before its finer buckets are complete
+        finer_watermark = await _get_rollup_watermark(db, finer)
+        if finer_watermark is None:
+            return 0
+        end = min(end, bucket_start(finer_watermark, seconds))
+
+        query = select(SystemMetricsRollup).where(
+            and_(
+                SystemMetricsRollup.resolution == finer,
+                SystemMetricsRollup.bucket_start < end
+            )
+        )
+        if start is not None:
+            query = query.where(SystemMetricsRollup.bucket_start >= start)
+        result = await db.execute(query.order_by(SystemMetricsRollup.bucket_start))
+
+        by_metric: Dict[str, List[Bucket]] = {}
+        for rollup in result.scalars().all():
+            by_metric.setdefault(rollup.metric_name, []).append(_rollup_to_bucket(rollup))
+        for name, buckets in by_metric.items():
+            for bucket in merge_buckets(buckets, seconds):
+                rows.append((name, bucket))
+
+    if not rows:
+        return 0
+
+    await _upsert_rollups(db, [
+        {
+            "metric_name": name,
+            "resolution": resolution,
+            "bucket_start": bucket.start,
+            "sample_count": bucket.count,
+            "min_value": bucket.min,
+            "max_value": bucket.max,
+            "sum_value": bucket.sum,
+            "p95_value": bucket.p95,
+        }
+        for name, bucket in rows
+    ])
+    await db.flush()
+    return len(rows)
+
+
+async def _upsert_rollups(db: AsyncSession, values: List[Dict[str, Any]]) -> None:
+    """
+    Write rollup rows, replacing buckets that already exist.
+
+    Two workers rolling up concurrently (or a rerun after a crash between
+    writing and committing) can produce the same bucket; the later write wins
+    instead of failing on ``uq_rollup_bucket``.
+    """
+    statistics = ("sample_count", "min_value", "max_value", "sum_value", "p95_value")
+    dialect = db.bind.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(SystemMetricsRollup)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["metric_name", "resolution", "bucket_start"],
+            set_={column: stmt.excluded[column] for column in statistics}
+        )
+        await db.execute(stmt, values)
+        return
+
+    # Portable fallback: drop the buckets being rewritten, then insert them
+    for value in values:
+        await db.execute(
+            delete(SystemMetricsRollup).where(
+                and_(
+                    SystemMetricsRollup.metric_name == value["metric_name"],
+                    SystemMetricsRollup.resolution == value["resolution"],
+                    SystemMetricsRollup.bucket_start == value["bucket_start"]
+                )
+            )
+        )
+    await db.execute(insert(SystemMetricsRollup), values)
+
+
+async def rollup_all_system_metrics(
+    db: AsyncSession,
+    until: Optional[datetime] = None
+) -> Dict[str, int]:
+    """Run rollups for every resolution, finest first."""
+    until = until or datetime.utcnow()
+    return {
+        resolution: await rollup_system_metrics(db, resolution, until)
+        for resolution in _RESOLUTION_NAMES
+    }
+
+
+async def _load_metric_buckets(
+    db: AsyncSession,
+    metric_name: str,
+    resolution: str,
+    start: datetime,
+    end: datetime
+) -> List[Bucket]:
+    """Load stored buckets and fill the not-yet-rolled-up tail from finer data."""
+    seconds = RESOLUTIONS[resolution]
+    result = await db.execute(
+        select(SystemMetricsRollup)
+        .where(
+            and_(
+                SystemMetricsRollup.metric_name == metric_name,
+                SystemMetricsRollup.resolution == resolution,
+                SystemMetricsRollup.bucket_start >= bucket_start(start, seconds),
+                SystemMetricsRollup.bucket_start < end
+            )
+        )
+        .order_by(SystemMetricsRollup.bucket_start)
+    )
+    buckets = [_rollup_to_bucket(rollup) for rollup in result.scalars().all()]
+
+    covered_until = buckets[-1].start + timedelta(seconds=seconds) if buckets else start
+    if covered_until >= end:
+        return buckets
+
+    index = _RESOLUTION_NAMES.index(resolution)
+    if index == 0:
+        column = getattr(SystemMetrics, metric_name)
+        result = await db.execute(
+            select(SystemMetrics.timestamp, column)
+            .where(
+                and_(
+                    SystemMetrics.timestamp >= covered_until,
+                    SystemMetrics.timestamp < end
+                )
+            )
+        )
+        tail = aggregate_points(result.all(), seconds)
+    else:
+        finer = await _load_metric_buckets(
+            db, metric_name, _RESOLUTION_NAMES[index - 1], covered_until, end
+        )
+        tail = merge_buckets(finer, seconds)
+
+    # A partially covered bucket may appear on both sides; keep the stored one
+    return buckets + [bucket for bucket in tail if bucket.start >= covered_until]
+
+
+async def get_system_metric_series(
+    db: AsyncSession,
+    metric_name: str,
+    start: datetime,
+    end: datetime,
+    max_points: int = 500
+) -> Dict[str, Any]:
+    """
+    Get a downsampled series for one system metric.
+
+    The resolution is chosen so the result never exceeds max_points,
+    regardless of how long the requested range is.
+
+    Args:
+        metric_name: One of SYSTEM_METRIC_FIELDS
+        start: Range start
+        end: Range end
+        max_points: Maximum number of buckets to return
+
+    Returns:
+        Dictionary with resolution, bucket_seconds and buckets
+    """
+    if metric_name not in SYSTEM_METRIC_FIELDS:
+        raise ValueError(f"Unknown system metric: {metric_name}")
+
+    resolution = select_resolution(start, end, max_points)
+    buckets = await _load_metric_buckets(db, metric_name, resolution, start, end)
+    buckets, bucket_seconds = downsample(buckets, max_points, RESOLUTIONS[resolution])
+
+    return {
+        "resolution": resolution,
+        "bucket_seconds": bucket_seconds,
+        "buckets": buckets,
+    }
+
+
+async def prune_system_metrics_rollups(
+    db: AsyncSession,
+    retention_days: Optional[Dict[str, Optional[int]]] = None
+) -> int:
+    """Delete fine-grained rollups that are older than their retention window."""
+    retention_days = retention_days or ROLLUP_RETENTION_DAYS
+    now = datetime.utcnow()
+    deleted = 0
+
+    for resolution, days in retention_days.items():
+        if days is None:
+            continue
+        result = await db.execute(
+            delete(SystemMetricsRollup).where(
+                and_(
+                    SystemMetricsRollup.resolution == resolution,
+                    SystemMetricsRollup.bucket_start < now - timedelta(days=days)
+                )
+            )
+        )
+        deleted += result.rowcount or 0
+
+    await db.flush()
+    return deleted
+
+
 # LLMUsageMetrics CRUD
 async def create_llm_usage_metrics(
     db: AsyncSession,
@@ -301,7 +620,7 @@ async def create_llm_usage_metrics(
     completion_tokens: int,
     **kwargs
 ) -> LLMUsageMetrics:
-    """Record LLM usage."""
+    """Record LLM usage (``cached_prompt_tokens`` may be passed as a keyword)."""
     usage = LLMUsageMetrics(
         user_id=user_id,
         provider=provider,
@@ -361,6 +680,9 @@ async def get_llm_usage_summary(
         return {
             "total_calls": 0,
             "total_tokens": 0,
+            "cached_prompt_tokens": 0,
+            "uncached_prompt_tokens": 0,
+            "prompt_cache_hit_rate": 0,
             "total_cost": 0,
             "by_provider": {},
             "by_model": {},
@@ -370,6 +692,8 @@ async def get_llm_usage_summary(
     total_calls = len(usage_records)
     successful_calls = len([u for u in usage_records if u.success])
     total_tokens = sum(u.total_tokens for u in usage_records)
+    prompt_tokens = sum(u.prompt_tokens or 0 for u in usage_records)
+    cached_prompt_tokens = sum(u.cached_prompt_tokens or 0 for u in usage_records)
     total_cost = sum(u.estimated_cost_usd or 0 for u in usage_records)
 
     # Aggregate by provider
@@ -394,6 +718,9 @@ async def get_llm_usage_summary(
     return {
         "total_calls": total_calls,
         "total_tokens": total_tokens,
+        "cached_prompt_tokens": cached_prompt_tokens,
+        "uncached_prompt_tokens": prompt_tokens - cached_prompt_tokens,
+        "prompt_cache_hit_rate": cached_prompt_tokens / prompt_tokens if prompt_tokens else 0,
         "total_cost": total_cost,
         "by_provider": by_provider,
         "by_model": by_model,
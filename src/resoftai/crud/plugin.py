@@ -9,7 +9,7 @@ Provides database operations for:
 """
 from typing import Optional, List, Dict, Any
 from datetime import datetime
-from sqlalchemy import select, func, and_, or_, desc
+from sqlalchemy import select, func, and_, desc
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -18,6 +18,30 @@ from resoftai.models.plugin import (
     PluginComment, PluginCollection, PluginCollectionItem,
     PluginStatus, PluginCategory, InstallationStatus
 )
+from resoftai.services.marketplace_stats import marketplace_stats
+from resoftai.services.popularity_counters import popularity_counters, register_counter_target
+from resoftai.services.recommendations import recommendation_engine, register_recommendation_source
+from resoftai.services.search_service import register_search_collection, search_service
+
+
+register_counter_target("plugin", Plugin, ("downloads_count", "installs_count"))
+register_counter_target("plugin_version", PluginVersion, ("downloads_count",))
+register_search_collection(
+    "plugin",
+    Plugin,
+    {"name": 3.0, "description": 1.5, "long_description": 1.0},
+    filter_fields=("category", "status", "is_featured", "is_official"),
+    boost_field="downloads_count",
+)
+register_recommendation_source(
+    "plugin",
+    Plugin,
+    PluginInstallation,
+    "plugin_id",
+    eligible={"status": PluginStatus.APPROVED},
+    popularity_field="downloads_count",
+    trending_metrics=("downloads_count",),
+)
 
 
 # =============================================================================
@@ -47,6 +71,8 @@ async def create_plugin(
     db.add(plugin)
     await db.commit()
     await db.refresh(plugin)
+    search_service.index_object("plugin", plugin)
+    await marketplace_stats.invalidate(plugin.author_id)
     return plugin
 
 
@@ -81,7 +107,28 @@ async def list_plugins(
     skip: int = 0,
     limit: int = 20
 ) -> List[Plugin]:
-    """List plugins with filters"""
+    """
+    List plugins with filters
+
+    With ``search``, plugins come in relevance order and ``sort_by`` is
+    ignored; filtering and paging happen in the search.
+    """
+    if search:
+        plugins, _ = await search_service.search_objects(
+            db,
+            "plugin",
+            search,
+            filters={
+                "category": category,
+                "status": status,
+                "is_featured": is_featured,
+                "is_official": is_official,
+            },
+            limit=limit,
+            offset=skip,
+        )
+        return plugins
+
     query = select(Plugin)
 
     # Filters
@@ -93,13 +140,6 @@ async def list_plugins(
         query = query.where(Plugin.is_featured == is_featured)
     if is_official is not None:
         query = query.where(Plugin.is_official == is_official)
-    if search:
-        query = query.where(
-            or_(
-                Plugin.name.ilike(f"%{search}%"),
-                Plugin.description.ilike(f"%{search}%")
-            )
-        )
 
     # Sorting
     if sort_by == "downloads":
@@ -134,23 +174,29 @@ async def update_plugin(
     plugin.updated_at = datetime.utcnow()
     await db.commit()
     await db.refresh(plugin)
+    search_service.index_object("plugin", plugin)
+    await marketplace_stats.invalidate(plugin.author_id)
     return plugin
 
 
 async def increment_plugin_downloads(db: AsyncSession, plugin_id: int):
-    """Increment plugin download counter"""
-    plugin = await get_plugin_by_id(db, plugin_id)
-    if plugin:
-        plugin.downloads_count += 1
-        await db.commit()
+    """
+    Increment plugin download counter
+
+    The increment is buffered and applied atomically by the counter
+    service, so hot plugins do not serialize on their row.
+    """
+    await popularity_counters.increment("plugin", plugin_id, "downloads_count")
 
 
 async def increment_plugin_installs(db: AsyncSession, plugin_id: int):
-    """Increment plugin install counter"""
-    plugin = await get_plugin_by_id(db, plugin_id)
-    if plugin:
-        plugin.installs_count += 1
-        await db.commit()
+    """Increment plugin install counter (buffered, see increment_plugin_downloads)"""
+    await popularity_counters.increment("plugin", plugin_id, "installs_count")
+
+
+async def increment_plugin_version_downloads(db: AsyncSession, plugin_version_id: int):
+    """Increment plugin version download counter (buffered)"""
+    await popularity_counters.increment("plugin_version", plugin_version_id, "downloads_count")
 
 
 # =============================================================================
@@ -216,6 +262,8 @@ async def install_plugin(
         status=InstallationStatus.INSTALLING
     )
     db.add(installation)
+    if user_id:
+        await recommendation_engine.invalidate_user(db, "plugin", user_id)
     await db.commit()
     await db.refresh(installation)
 
@@ -305,6 +353,8 @@ async def uninstall_plugin(
         return False
 
     await db.delete(installation)
+    if installation.user_id:
+        await recommendation_engine.invalidate_user(db, "plugin", installation.user_id)
     await db.commit()
     return True
 
@@ -354,6 +404,7 @@ async def update_plugin_rating(db: AsyncSession, plugin_id: int):
         plugin.rating_average = float(avg_rating) if avg_rating else 0.0
         plugin.rating_count = count
         await db.commit()
+        await marketplace_stats.invalidate(plugin.author_id)
 
 
 async def list_reviews(
@@ -518,35 +569,34 @@ async def search_plugins(
     """
     Search plugins by text query
 
-    Searches in name, description, and tags.
+    Searches in name, description and tags, ranked by relevance with
+    downloads as a tie-breaker; tolerates prefixes and single typos.
     """
-    query = select(Plugin).where(Plugin.status == PluginStatus.APPROVED)
-
-    # Text search
-    query = query.where(
-        or_(
-            Plugin.name.ilike(f"%{query_text}%"),
-            Plugin.description.ilike(f"%{query_text}%"),
-            Plugin.long_description.ilike(f"%{query_text}%")
-        )
+    plugins, _ = await search_service.search_objects(
+        db,
+        "plugin",
+        query_text,
+        filters={"status": PluginStatus.APPROVED, "category": category},
+        tags=tags,
+        limit=limit,
     )
+    return plugins
 
-    # Category filter
-    if category:
-        query = query.where(Plugin.category == category)
-
-    # Tag filter (PostgreSQL JSON operator)
-    if tags:
-        for tag in tags:
-            query = query.where(Plugin.tags.contains([tag]))
-
-    # Order by relevance (downloads + rating)
-    query = query.order_by(
-        desc(Plugin.downloads_count + Plugin.rating_average * 1000)
-    ).limit(limit)
 
-    result = await db.execute(query)
-    return list(result.scalars().all())
+async def _get_approved_plugins_in_order(db: AsyncSession, plugin_ids: List[int]) -> List[Plugin]:
+    """Load approved plugins by id, preserving the given order"""
+    if not plugin_ids:
+        return []
+    result = await db.execute(
+        select(Plugin).where(
+            and_(
+                Plugin.id.in_(plugin_ids),
+                Plugin.status == PluginStatus.APPROVED
+            )
+        )
+    )
+    by_id = {plugin.id: plugin for plugin in result.scalars().all()}
+    return [by_id[plugin_id] for plugin_id in plugin_ids if plugin_id in by_id]
 
 
 async def get_trending_plugins(
@@ -557,16 +607,11 @@ async def get_trending_plugins(
     """
     Get trending plugins based on recent downloads
 
-    This is a simplified version. In production, you'd track downloads
-    over time and calculate trends.
+    Served from the precomputed time-decayed trending snapshot, padded
+    with all-time popular plugins when activity is sparse.
     """
-    result = await db.execute(
-        select(Plugin)
-        .where(Plugin.status == PluginStatus.APPROVED)
-        .order_by(desc(Plugin.downloads_count))
-        .limit(limit)
-    )
-    return list(result.scalars().all())
+    plugin_ids = await recommendation_engine.get_trending(db, "plugin", days=days, limit=limit)
+    return await _get_approved_plugins_in_order(db, plugin_ids)
 
 
 async def get_recommended_plugins(
@@ -577,22 +622,8 @@ async def get_recommended_plugins(
     """
     Get recommended plugins for a user
 
-    This is a placeholder for a recommendation system.
-    In production, you'd use ML or collaborative filtering.
+    Served from precomputed co-install recommendations; new users get
+    trending plugins. Installed plugins are never recommended.
     """
-    # For now, return popular plugins the user hasn't installed
-    installed_result = await db.execute(
-        select(PluginInstallation.plugin_id)
-        .where(PluginInstallation.user_id == user_id)
-    )
-    installed_ids = [row for row in installed_result.scalars().all()]
-
-    query = select(Plugin).where(
-        and_(
-            Plugin.status == PluginStatus.APPROVED,
-            Plugin.id.not_in(installed_ids) if installed_ids else True
-        )
-    ).order_by(desc(Plugin.rating_average)).limit(limit)
-
-    result = await db.execute(query)
-    return list(result.scalars().all())
+    plugin_ids = await recommendation_engine.recommend_for_user(db, "plugin", user_id, limit=limit)
+    return await _get_approved_plugins_in_order(db, plugin_ids)
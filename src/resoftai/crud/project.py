@@ -11,12 +11,17 @@ from resoftai.utils.performance import timing_decorator
 
 
 @timing_decorator("crud.get_project_by_id")
-@cached(key_func=lambda db, project_id: f"project:{project_id}", ttl=300)
+@cached(
+    key_func=lambda db, project_id: f"project:{project_id}",
+    ttl=300,
+    tags=lambda project: [f"project:{project['id']}"],
+    negative_ttl=15
+)
 async def get_project_by_id(db: AsyncSession, project_id: int) -> Optional[Project]:
     """
     Get project by ID with caching.
 
-    Results are cached for 5 minutes.
+    Results are cached for 5 minutes (missing projects for 15 seconds).
     """
     result = await db.execute(select(Project).where(Project.id == project_id))
     project = result.scalar_one_or_none()
@@ -126,6 +131,9 @@ async def create_project(
     await db.commit()
     await db.refresh(project)
 
+    # Drop a cached "not found" for the new ID
+    await cache_manager.delete(f"project:{project.id}")
+
     return project
 
 
@@ -159,6 +167,9 @@ async def update_project(
     await db.commit()
     await db.refresh(project)
 
+    # Invalidate cache
+    await cache_manager.delete(f"project:{project_id}")
+
     return project
 
 
@@ -182,6 +193,9 @@ async def delete_project(db: AsyncSession, project_id: int) -> bool:
     await db.delete(project)
     await db.commit()
 
+    # Invalidate the project and its cached files
+    await cache_manager.invalidate_tags(f"project:{project_id}")
+
     return True
 
 
@@ -214,13 +228,8 @@ async def update_project_progress(
     if status:
         update_data["status"] = status
 
-    project = await update_project(db, project_id, **update_data)
-
-    # Invalidate cache
-    if project:
-        await cache_manager.delete(f"project:{project_id}")
-
-    return project
+    # update_project invalidates the cached project
+    return await update_project(db, project_id, **update_data)
 
 
 async def get_projects_by_ids(
@@ -9,8 +9,8 @@ Provides database operations for:
 - Contributor profiles and badges
 """
 from typing import Optional, List, Dict, Any
-from datetime import datetime, timedelta
-from sqlalchemy import select, func, and_, or_, desc
+from datetime import datetime
+from sqlalchemy import select, func, and_, desc
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -20,6 +20,29 @@ from resoftai.models.template import (
     ContributorProfile, ContributorBadge,
     TemplateStatus, TemplateCategory
 )
+from resoftai.services.popularity_counters import popularity_counters, register_counter_target
+from resoftai.services.marketplace_stats import marketplace_stats
+from resoftai.services.recommendations import recommendation_engine, register_recommendation_source
+from resoftai.services.search_service import register_search_collection, search_service
+
+
+register_counter_target("template", TemplateModel, ("downloads_count", "installs_count"))
+register_search_collection(
+    "template",
+    TemplateModel,
+    {"name": 3.0, "description": 1.5, "long_description": 1.0},
+    filter_fields=("category", "status", "is_featured", "is_official"),
+    boost_field="installs_count",
+)
+register_recommendation_source(
+    "template",
+    TemplateModel,
+    TemplateInstallation,
+    "template_id",
+    eligible={"status": TemplateStatus.APPROVED},
+    popularity_field="installs_count",
+    trending_metrics=("installs_count",),
+)
 
 
 # =============================================================================
@@ -51,6 +74,8 @@ async def create_template(
     db.add(template)
     await db.commit()
     await db.refresh(template)
+    search_service.index_object("template", template)
+    await marketplace_stats.invalidate(template.author_id)
     return template
 
 
@@ -86,7 +111,29 @@ async def list_templates(
     skip: int = 0,
     limit: int = 20
 ) -> List[TemplateModel]:
-    """List templates with filters"""
+    """
+    List templates with filters
+
+    With ``search``, templates come in relevance order and ``sort_by`` is
+    ignored; filtering and paging happen in the search.
+    """
+    if search:
+        templates, _ = await search_service.search_objects(
+            db,
+            "template",
+            search,
+            filters={
+                "category": category,
+                "status": status,
+                "is_featured": is_featured,
+                "is_official": is_official,
+            },
+            tags=tags,
+            limit=limit,
+            offset=skip,
+        )
+        return templates
+
     query = select(TemplateModel)
 
     # Filters
@@ -98,13 +145,6 @@ async def list_templates(
         query = query.where(TemplateModel.is_featured == is_featured)
     if is_official is not None:
         query = query.where(TemplateModel.is_official == is_official)
-    if search:
-        query = query.where(
-            or_(
-                TemplateModel.name.ilike(f"%{search}%"),
-                TemplateModel.description.ilike(f"%{search}%")
-            )
-        )
     if tags:
         # Filter by tags (JSON array contains any of the specified tags)
         for tag in tags:
@@ -145,6 +185,8 @@ async def update_template(
     template.updated_at = datetime.utcnow()
     await db.commit()
     await db.refresh(template)
+    search_service.index_object("template", template)
+    await marketplace_stats.invalidate(template.author_id)
     return template
 
 
@@ -156,23 +198,24 @@ async def delete_template(db: AsyncSession, template_id: int) -> bool:
 
     template.status = TemplateStatus.DEPRECATED
     await db.commit()
+    search_service.index_object("template", template)
+    await marketplace_stats.invalidate(template.author_id)
     return True
 
 
 async def increment_template_downloads(db: AsyncSession, template_id: int):
-    """Increment template download counter"""
-    template = await get_template_by_id(db, template_id)
-    if template:
-        template.downloads_count += 1
-        await db.commit()
+    """
+    Increment template download counter
+
+    The increment is buffered and applied atomically by the counter
+    service, so hot templates do not serialize on their row.
+    """
+    await popularity_counters.increment("template", template_id, "downloads_count")
 
 
 async def increment_template_installs(db: AsyncSession, template_id: int):
-    """Increment template install counter"""
-    template = await get_template_by_id(db, template_id)
-    if template:
-        template.installs_count += 1
-        await db.commit()
+    """Increment template install counter (buffered, see increment_template_downloads)"""
+    await popularity_counters.increment("template", template_id, "installs_count")
 
 
 async def search_templates(
@@ -182,28 +225,37 @@ async def search_templates(
     tags: Optional[List[str]] = None,
     limit: int = 20
 ) -> List[TemplateModel]:
-    """Full-text search for templates"""
-    query = select(TemplateModel).where(TemplateModel.status == TemplateStatus.APPROVED)
-
-    # Search in name, description, and tags
-    search_filter = or_(
-        TemplateModel.name.ilike(f"%{query_text}%"),
-        TemplateModel.description.ilike(f"%{query_text}%"),
-        TemplateModel.long_description.ilike(f"%{query_text}%")
+    """
+    Full-text search for templates
+
+    Ranked by relevance with installs as a tie-breaker; tolerates
+    prefixes and single typos.
+    """
+    templates, _ = await search_service.search_objects(
+        db,
+        "template",
+        query_text,
+        filters={"status": TemplateStatus.APPROVED, "category": category},
+        tags=tags,
+        limit=limit,
     )
-    query = query.where(search_filter)
+    return templates
 
-    if category:
-        query = query.where(TemplateModel.category == category)
-
-    if tags:
-        for tag in tags:
-            query = query.where(TemplateModel.tags.contains([tag]))
-
-    query = query.order_by(desc(TemplateModel.rating_average)).limit(limit)
 
-    result = await db.execute(query)
-    return list(result.scalars().all())
+async def _get_approved_templates_in_order(db: AsyncSession, template_ids: List[int]) -> List[TemplateModel]:
+    """Load approved templates by id, preserving the given order"""
+    if not template_ids:
+        return []
+    result = await db.execute(
+        select(TemplateModel).where(
+            and_(
+                TemplateModel.id.in_(template_ids),
+                TemplateModel.status == TemplateStatus.APPROVED
+            )
+        )
+    )
+    by_id = {template.id: template for template in result.scalars().all()}
+    return [by_id[template_id] for template_id in template_ids if template_id in by_id]
 
 
 async def get_trending_templates(
@@ -211,31 +263,14 @@ async def get_trending_templates(
     days: int = 7,
     limit: int = 10
 ) -> List[TemplateModel]:
-    """Get trending templates based on recent activity"""
-    since_date = datetime.utcnow() - timedelta(days=days)
-
-    # Subquery for recent installs
-    recent_installs = (
-        select(
-            TemplateInstallation.template_id,
-            func.count(TemplateInstallation.id).label('recent_installs')
-        )
-        .where(TemplateInstallation.installed_at >= since_date)
-        .group_by(TemplateInstallation.template_id)
-        .subquery()
-    )
+    """
+    Get trending templates based on recent activity
 
-    # Join templates with recent install counts
-    query = (
-        select(TemplateModel)
-        .outerjoin(recent_installs, TemplateModel.id == recent_installs.c.template_id)
-        .where(TemplateModel.status == TemplateStatus.APPROVED)
-        .order_by(desc(func.coalesce(recent_installs.c.recent_installs, 0)))
-        .limit(limit)
-    )
-
-    result = await db.execute(query)
-    return list(result.scalars().all())
+    Served from the precomputed time-decayed trending snapshot of recent
+    installs, padded with all-time popular templates when activity is sparse.
+    """
+    template_ids = await recommendation_engine.get_trending(db, "template", days=days, limit=limit)
+    return await _get_approved_templates_in_order(db, template_ids)
 
 
 async def get_recommended_templates(
@@ -243,47 +278,14 @@ async def get_recommended_templates(
     user_id: int,
     limit: int = 10
 ) -> List[TemplateModel]:
-    """Get personalized template recommendations for a user"""
-    # Get user's template usage history
-    user_templates = await db.execute(
-        select(TemplateInstallation.template_id)
-        .where(TemplateInstallation.user_id == user_id)
-    )
-    used_template_ids = [t for t in user_templates.scalars().all()]
-
-    # Get templates in same categories as user's installed templates
-    if used_template_ids:
-        user_categories = await db.execute(
-            select(TemplateModel.category)
-            .where(TemplateModel.id.in_(used_template_ids))
-            .distinct()
-        )
-        categories = [c for c in user_categories.scalars().all()]
-
-        # Recommend highly-rated templates in same categories that user hasn't used
-        query = (
-            select(TemplateModel)
-            .where(
-                and_(
-                    TemplateModel.status == TemplateStatus.APPROVED,
-                    TemplateModel.category.in_(categories),
-                    ~TemplateModel.id.in_(used_template_ids)
-                )
-            )
-            .order_by(desc(TemplateModel.rating_average))
-            .limit(limit)
-        )
-    else:
-        # For new users, recommend popular templates
-        query = (
-            select(TemplateModel)
-            .where(TemplateModel.status == TemplateStatus.APPROVED)
-            .order_by(desc(TemplateModel.installs_count))
-            .limit(limit)
-        )
+    """
+    Get personalized template recommendations for a user
 
-    result = await db.execute(query)
-    return list(result.scalars().all())
+    Served from precomputed co-install recommendations; new users get
+    trending templates. Templates the user already used are excluded.
+    """
+    template_ids = await recommendation_engine.recommend_for_user(db, "template", user_id, limit=limit)
+    return await _get_approved_templates_in_order(db, template_ids)
 
 
 # =============================================================================
@@ -369,6 +371,7 @@ async def track_template_usage(
 
     # Increment template install count
     await increment_template_installs(db, template_id)
+    await recommendation_engine.invalidate_user(db, "template", user_id)
 
     await db.commit()
     await db.refresh(installation)
@@ -440,6 +443,7 @@ async def update_template_rating_stats(db: AsyncSession, template_id: int):
         template.rating_average = float(row.avg_rating or 0.0)
         template.rating_count = row.count
         await db.commit()
+        await marketplace_stats.invalidate(template.author_id)
 
 
 async def list_template_reviews(
@@ -496,6 +500,7 @@ async def create_contributor_profile(
     db.add(profile)
     await db.commit()
     await db.refresh(profile)
+    await marketplace_stats.invalidate(user_id)
     return profile
 
 
@@ -534,65 +539,24 @@ async def update_contributor_profile(
 async def update_contributor_stats(
     db: AsyncSession,
     user_id: int
-):
-    """Recalculate contributor statistics"""
-    from resoftai.models.plugin import Plugin
+) -> Optional[ContributorProfile]:
+    """
+    Refresh contributor statistics
 
+    The aggregates come from one query and are cached briefly; the
+    profile row is only written when they changed.
+    """
     profile = await get_contributor_profile(db, user_id)
     if not profile:
-        return
-
-    # Count plugins
-    plugin_count = await db.execute(
-        select(func.count(Plugin.id))
-        .where(Plugin.author_id == user_id)
-    )
-    profile.plugins_count = plugin_count.scalar_one()
-
-    # Count templates
-    template_count = await db.execute(
-        select(func.count(TemplateModel.id))
-        .where(TemplateModel.author_id == user_id)
-    )
-    profile.templates_count = template_count.scalar_one()
-
-    # Calculate total downloads
-    plugin_downloads = await db.execute(
-        select(func.sum(Plugin.downloads_count))
-        .where(Plugin.author_id == user_id)
-    )
-    template_downloads = await db.execute(
-        select(func.sum(TemplateModel.downloads_count))
-        .where(TemplateModel.author_id == user_id)
-    )
-    profile.total_downloads = (plugin_downloads.scalar_one() or 0) + (template_downloads.scalar_one() or 0)
-
-    # Calculate total installs
-    plugin_installs = await db.execute(
-        select(func.sum(Plugin.installs_count))
-        .where(Plugin.author_id == user_id)
-    )
-    template_installs = await db.execute(
-        select(func.sum(TemplateModel.installs_count))
-        .where(TemplateModel.author_id == user_id)
-    )
-    profile.total_installs = (plugin_installs.scalar_one() or 0) + (template_installs.scalar_one() or 0)
-
-    # Calculate average rating
-    plugin_ratings = await db.execute(
-        select(func.avg(Plugin.rating_average))
-        .where(and_(Plugin.author_id == user_id, Plugin.rating_count > 0))
-    )
-    template_ratings = await db.execute(
-        select(func.avg(TemplateModel.rating_average))
-        .where(and_(TemplateModel.author_id == user_id, TemplateModel.rating_count > 0))
-    )
+        return None
 
-    plugin_avg = plugin_ratings.scalar_one() or 0
-    template_avg = template_ratings.scalar_one() or 0
-    profile.average_rating = (plugin_avg + template_avg) / 2 if (plugin_avg or template_avg) else 0.0
+    stats = await marketplace_stats.get_contributor_stats(db, user_id)
+    if any(getattr(profile, key) != value for key, value in stats.items()):
+        for key, value in stats.items():
+            setattr(profile, key, value)
+        await db.commit()
 
-    await db.commit()
+    return profile
 
 
 async def get_contributor_leaderboard(
@@ -19,6 +19,21 @@ from resoftai.models.template_community import (
     TemplateVisibility,
     TemplateStatus
 )
+from resoftai.services.popularity_counters import popularity_counters, register_counter_target
+from resoftai.services.search_service import register_search_collection, search_service
+from resoftai.utils.search_index import AnyOf
+
+
+register_counter_target(
+    "community_template", TemplateModel, ("download_count", "usage_count", "view_count")
+)
+register_search_collection(
+    "community_template",
+    TemplateModel,
+    {"name": 3.0, "template_id": 2.0, "description": 1.5},
+    filter_fields=("category", "status", "visibility", "author_id"),
+    boost_field="usage_count",
+)
 
 
 # ===== Template CRUD =====
@@ -50,6 +65,7 @@ async def create_template(
     db.add(template)
     await db.commit()
     await db.refresh(template)
+    search_service.index_object("community_template", template)
     return template
 
 
@@ -111,7 +127,33 @@ async def list_templates(
     sort_by: str = "created_at",
     sort_desc: bool = True
 ) -> tuple[List[TemplateModel], int]:
-    """List templates with filters."""
+    """
+    List templates with filters.
+
+    With ``search``, templates come in relevance order and ``sort_by`` is
+    ignored; filtering and paging happen in the search.
+    """
+    if search:
+        if user_id:
+            visible = AnyOf({"visibility": TemplateVisibility.PUBLIC, "author_id": user_id})
+        else:
+            visible = TemplateVisibility.PUBLIC
+        return await search_service.search_objects(
+            db,
+            "community_template",
+            search,
+            filters={
+                "visibility": visible,
+                # Default to published for public
+                "status": status or (None if user_id else TemplateStatus.PUBLISHED),
+                "category": category,
+            },
+            tags=tags,
+            any_tag=True,
+            limit=limit,
+            offset=skip,
+        )
+
     # Build base query
     query = select(TemplateModel)
     count_query = select(func.count(TemplateModel.id))
@@ -145,15 +187,6 @@ async def list_templates(
         tag_filters = [TemplateModel.tags.contains([tag]) for tag in tags]
         filters.append(or_(*tag_filters))
 
-    # Search filter
-    if search:
-        search_filter = or_(
-            TemplateModel.name.ilike(f"%{search}%"),
-            TemplateModel.description.ilike(f"%{search}%"),
-            TemplateModel.template_id.ilike(f"%{search}%")
-        )
-        filters.append(search_filter)
-
     # Apply all filters
     if filters:
         query = query.where(and_(*filters))
@@ -211,6 +244,7 @@ async def update_template(
 
     await db.commit()
     await db.refresh(template)
+    search_service.index_object("community_template", template)
     return template
 
 
@@ -231,6 +265,7 @@ async def publish_template(
 
     await db.commit()
     await db.refresh(template)
+    search_service.index_object("community_template", template)
     return template
 
 
@@ -247,6 +282,7 @@ async def delete_template(
 
     await db.delete(template)
     await db.commit()
+    search_service.remove_object("community_template", template_id)
     return True
 
 
@@ -255,15 +291,13 @@ async def increment_template_stats(
     template_id: int,
     stat_name: str
 ) -> None:
-    """Increment template statistics."""
-    query = select(TemplateModel).where(TemplateModel.id == template_id)
-    result = await db.execute(query)
-    template = result.scalar_one_or_none()
+    """
+    Increment template statistics.
 
-    if template and hasattr(template, stat_name):
-        current = getattr(template, stat_name)
-        setattr(template, stat_name, current + 1)
-        await db.commit()
+    Buffered through the popularity counter service and flushed in
+    atomic batches; unknown stat names are ignored.
+    """
+    await popularity_counters.increment("community_template", template_id, stat_name)
 
 
 # ===== Template Version CRUD =====
@@ -6,6 +6,7 @@ from datetime import datetime
 
 from resoftai.models.user import User
 from resoftai.auth.security import get_password_hash
+from resoftai.utils.cache import cache_manager
 
 
 async def get_user_by_id(db: AsyncSession, user_id: int) -> Optional[User]:
@@ -104,10 +105,15 @@ async def update_user(
     user.updated_at = datetime.utcnow()
     await db.commit()
     await db.refresh(user)
+    await cache_manager.invalidate_tags(f"user:{user_id}")
 
     return user
 
 
 async def deactivate_user(db: AsyncSession, user_id: int) -> Optional[User]:
     """Deactivate a user (soft delete)."""
-    return await update_user(db, user_id, is_active=False)
+    from resoftai.api.middleware import rate_limit_policy
+
+    user = await update_user(db, user_id, is_active=False)
+    rate_limit_policy.invalidate(user_id)
+    return user
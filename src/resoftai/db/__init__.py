@@ -2,6 +2,7 @@
 from resoftai.db.connection import (
     Base,
     engine,
+    get_engine,
     AsyncSessionLocal,
     get_db,
     init_db,
@@ -11,6 +12,7 @@ from resoftai.db.connection import (
 __all__ = [
     "Base",
     "engine",
+    "get_engine",
     "AsyncSessionLocal",
     "get_db",
     "init_db",
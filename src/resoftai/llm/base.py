@@ -2,11 +2,16 @@
 Base classes for LLM provider abstraction.
 """
 
+import asyncio
+import logging
 from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
 from dataclasses import dataclass
 from typing import Dict, Any, Optional, List
 from enum import Enum
 
+logger = logging.getLogger(__name__)
+
 
 class ModelProvider(str, Enum):
     """Supported LLM providers."""
@@ -18,6 +23,7 @@ class ModelProvider(str, Enum):
     MINIMAX = "minimax"  # Minimax
     GOOGLE = "google"  # Google Gemini
     OPENAI = "openai"  # OpenAI GPT (兼容)
+    REPLAY = "replay"  # Recorded interactions, for offline testing
 
 
 @dataclass
@@ -53,6 +59,74 @@ class LLMResponse:
         """Get total tokens used."""
         return self.usage.get("total_tokens", 0)
 
+    @property
+    def cached_prompt_tokens(self) -> int:
+        """Get prompt tokens served from the provider's prompt cache."""
+        return self.usage.get("cached_prompt_tokens", 0)
+
+
+def layout_messages(
+    prompt: str,
+    system_prompt: Optional[str] = None,
+    context: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Build chat messages ordered from the most to the least stable segment.
+
+    The static system prompt comes first, then the semi-static project context,
+    then the request itself, so repeated calls share the longest possible
+    prefix. Providers with automatic prefix caching (DeepSeek, Moonshot, OpenAI
+    compatible APIs) reuse it without any explicit hint.
+
+    Args:
+        prompt: Dynamic part of the request
+        system_prompt: Static instructions
+        context: Semi-static context shared by several calls
+
+    Returns:
+        Chat messages in OpenAI format
+    """
+    messages = []
+    if system_prompt:
+        messages.append({"role": "system", "content": system_prompt})
+    messages.append({"role": "user", "content": f"{context}\n\n{prompt}" if context else prompt})
+    return messages
+
+
+def normalize_usage(usage: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Add ``cached_prompt_tokens``, ``uncached_prompt_tokens`` and
+    ``cache_write_tokens`` to provider usage.
+
+    Understands DeepSeek (``prompt_cache_hit_tokens``), OpenAI compatible
+    (``prompt_tokens_details.cached_tokens``) and Anthropic
+    (``cache_read_input_tokens`` and ``cache_creation_input_tokens``) usage
+    fields. Providers without prompt caching report no cached tokens.
+
+    Args:
+        usage: Usage dict as returned by the provider
+
+    Returns:
+        The usage dict with the cache fields filled in
+    """
+    usage = dict(usage or {})
+    details = usage.get("prompt_tokens_details") or {}
+    cached = (
+        usage.get("cached_prompt_tokens")
+        or usage.get("prompt_cache_hit_tokens")
+        or usage.get("cache_read_input_tokens")
+        or details.get("cached_tokens")
+        or 0
+    )
+    usage["cached_prompt_tokens"] = cached
+    usage["uncached_prompt_tokens"] = max(usage.get("prompt_tokens", 0) - cached, 0)
+    usage["cache_write_tokens"] = (
+        usage.get("cache_write_tokens")
+        or usage.get("cache_creation_input_tokens")
+        or 0
+    )
+    return usage
+
 
 class LLMProvider(ABC):
     """
@@ -70,6 +144,68 @@ class LLMProvider(ABC):
             config: LLM configuration
         """
         self.config = config
+        self._http_client = None
+        self._http_client_loop = None
+        # Requests currently using the shared client
+        self.requests_in_flight = 0
+        # Clients dropped after their event loop was closed, so nothing could close them
+        self.abandoned_http_clients = 0
+
+    @asynccontextmanager
+    async def http_client(self):
+        """
+        Shared HTTP client for requests to the provider API.
+
+        The client and its connection pool live as long as the provider, so
+        agents sharing a pooled provider also share keep-alive connections.
+        It is recreated when used from another event loop; the replaced
+        client is closed on its own loop.
+
+        Yields:
+            httpx.AsyncClient
+        """
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        if self._http_client is None or self._http_client.is_closed or self._http_client_loop is not loop:
+            self._retire_http_client()
+            self._http_client = httpx.AsyncClient()
+            self._http_client_loop = loop
+        self.requests_in_flight += 1
+        try:
+            yield self._http_client
+        finally:
+            self.requests_in_flight -= 1
+
+    def _retire_http_client(self) -> None:
+        """
+        Drop the shared client of another event loop.
+
+        Its connections belong to that loop, so it is closed there while the
+        loop runs (e.g. in another thread). A closed loop can no longer run
+        ``aclose``; the client is then only counted in
+        ``abandoned_http_clients``.
+        """
+        client, loop = self._http_client, self._http_client_loop
+        self._http_client = None
+        self._http_client_loop = None
+        if client is None or client.is_closed:
+            return
+        if loop is not None and loop.is_running():
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+        else:
+            self.abandoned_http_clients += 1
+            logger.debug(f"Dropped {self.provider_name} HTTP client of a closed event loop")
+
+    async def aclose(self) -> None:
+        """Close the shared HTTP client."""
+        if self._http_client is not None and self._http_client_loop is asyncio.get_running_loop():
+            client = self._http_client
+            self._http_client = None
+            self._http_client_loop = None
+            await client.aclose()
+        else:
+            self._retire_http_client()
 
     @property
     @abstractmethod
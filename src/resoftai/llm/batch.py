@@ -0,0 +1,451 @@
+"""
+Batch execution of LLM requests through provider batch APIs.
+
+Whole-project code reviews, bug predictions, test and document generation do
+not need an answer within seconds. ``BatchExecutor`` collects their requests
+into provider batch jobs (Anthropic Message Batches, Zhipu's OpenAI-compatible
+``/batches``), polls the jobs and hands each caller its own result, which
+costs less and uses far fewer rate-limit units than one real-time call per
+request. Providers without a batch API, failed submissions and individual
+errored requests fall back to real-time ``generate`` calls; jobs that do not
+finish within ``completion_timeout`` are cancelled before their requests do.
+
+Usage::
+
+    executor = LLMFactory.create_batch(config)
+    responses = await executor.run([BatchRequest(prompt=p) for p in prompts])
+    await executor.close()
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from resoftai.llm.base import LLMConfig, LLMProvider, LLMResponse, ModelProvider, layout_messages, normalize_usage
+from resoftai.llm.factory import LLMFactory
+
+logger = logging.getLogger(__name__)
+
+
+class BatchError(RuntimeError):
+    """A batch job could not be submitted or finished unsuccessfully."""
+
+
+@dataclass
+class BatchRequest:
+    """One request in a batch job."""
+    prompt: str
+    system_prompt: Optional[str] = None
+    max_tokens: Optional[int] = None
+    temperature: Optional[float] = None
+    custom_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+
+
+@dataclass
+class BatchStatus:
+    """State of a submitted batch job."""
+    batch_id: str
+    done: bool
+    failed: bool = False
+    counts: Dict[str, int] = field(default_factory=dict)
+
+
+class BatchBackend(ABC):
+    """Provider batch API."""
+
+    def __init__(self, config: LLMConfig, client: Optional[httpx.AsyncClient] = None):
+        self.config = config
+        self.client = client or httpx.AsyncClient(timeout=60.0)
+
+    def _params(self, request: BatchRequest) -> Dict[str, Any]:
+        """Generation parameters with the configuration defaults filled in."""
+        return {
+            "model": self.config.model_name,
+            "max_tokens": request.max_tokens or self.config.max_tokens,
+            "temperature": self.config.temperature if request.temperature is None else request.temperature,
+        }
+
+    @abstractmethod
+    async def submit(self, requests: List[BatchRequest]) -> str:
+        """Create a batch job and return its id."""
+
+    @abstractmethod
+    async def poll(self, batch_id: str) -> BatchStatus:
+        """Current state of a batch job."""
+
+    @abstractmethod
+    async def results(self, batch_id: str) -> Dict[str, Any]:
+        """Results of a finished job: {custom_id: LLMResponse or error message}."""
+
+    @abstractmethod
+    async def cancel(self, batch_id: str) -> None:
+        """Ask the provider to stop processing a job."""
+
+    async def close(self) -> None:
+        """Release the HTTP client."""
+        await self.client.aclose()
+
+
+class AnthropicBatchBackend(BatchBackend):
+    """Anthropic Message Batches API."""
+
+    def __init__(self, config: LLMConfig, client: Optional[httpx.AsyncClient] = None):
+        super().__init__(config, client)
+        self.api_base = config.api_base or "https://api.anthropic.com"
+        self.headers = {
+            "x-api-key": config.api_key,
+            "anthropic-version": "2023-06-01",
+            "content-type": "application/json",
+        }
+
+    async def submit(self, requests: List[BatchRequest]) -> str:
+        body = {"requests": [
+            {
+                "custom_id": request.custom_id,
+                "params": {
+                    **self._params(request),
+                    **({"system": request.system_prompt} if request.system_prompt else {}),
+                    "messages": [{"role": "user", "content": request.prompt}],
+                },
+            }
+            for request in requests
+        ]}
+        response = await self.client.post(f"{self.api_base}/v1/messages/batches", headers=self.headers, json=body)
+        response.raise_for_status()
+        return response.json()["id"]
+
+    async def poll(self, batch_id: str) -> BatchStatus:
+        response = await self.client.get(f"{self.api_base}/v1/messages/batches/{batch_id}", headers=self.headers)
+        response.raise_for_status()
+        data = response.json()
+        return BatchStatus(
+            batch_id=batch_id,
+            done=data["processing_status"] == "ended",
+            counts=data.get("request_counts", {}),
+        )
+
+    async def cancel(self, batch_id: str) -> None:
+        response = await self.client.post(
+            f"{self.api_base}/v1/messages/batches/{batch_id}/cancel", headers=self.headers
+        )
+        response.raise_for_status()
+
+    async def results(self, batch_id: str) -> Dict[str, Any]:
+        response = await self.client.get(
+            f"{self.api_base}/v1/messages/batches/{batch_id}/results", headers=self.headers
+        )
+        response.raise_for_status()
+        results: Dict[str, Any] = {}
+        for line in response.text.splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            result = item["result"]
+            if result["type"] != "succeeded":
+                results[item["custom_id"]] = str(result.get("error") or result["type"])
+                continue
+            message = result["message"]
+            usage = message.get("usage", {})
+            prompt_tokens = usage.get("input_tokens", 0)
+            results[item["custom_id"]] = LLMResponse(
+                content="".join(block.get("text", "") for block in message["content"] if block["type"] == "text"),
+                model=message.get("model", self.config.model_name),
+                provider=ModelProvider.ANTHROPIC,
+                usage=normalize_usage({
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": usage.get("output_tokens", 0),
+                    "total_tokens": prompt_tokens + usage.get("output_tokens", 0),
+                }),
+                raw_response=message
+            )
+        return results
+
+
+class OpenAIBatchBackend(BatchBackend):
+    """OpenAI-compatible batch API (JSONL file upload plus ``/batches``)."""
+
+    DEFAULT_API_BASES = {
+        ModelProvider.ZHIPU: "https://open.bigmodel.cn/api/paas/v4",
+    }
+
+    def __init__(self, config: LLMConfig, client: Optional[httpx.AsyncClient] = None):
+        super().__init__(config, client)
+        self.api_base = config.api_base or self.DEFAULT_API_BASES.get(config.provider, "https://api.openai.com/v1")
+        self.headers = {"Authorization": f"Bearer {config.api_key}"}
+        self._output_files: Dict[str, Optional[str]] = {}
+
+    async def submit(self, requests: List[BatchRequest]) -> str:
+        lines = "\n".join(
+            json.dumps({
+                "custom_id": request.custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {**self._params(request), "messages": layout_messages(request.prompt, request.system_prompt)},
+            }, ensure_ascii=False)
+            for request in requests
+        )
+        upload = await self.client.post(
+            f"{self.api_base}/files",
+            headers=self.headers,
+            data={"purpose": "batch"},
+            files={"file": ("batch.jsonl", lines.encode("utf-8"), "application/jsonl")},
+        )
+        upload.raise_for_status()
+        response = await self.client.post(
+            f"{self.api_base}/batches",
+            headers=self.headers,
+            json={
+                "input_file_id": upload.json()["id"],
+                "endpoint": "/v1/chat/completions",
+                "completion_window": "24h",
+            },
+        )
+        response.raise_for_status()
+        return response.json()["id"]
+
+    async def poll(self, batch_id: str) -> BatchStatus:
+        response = await self.client.get(f"{self.api_base}/batches/{batch_id}", headers=self.headers)
+        response.raise_for_status()
+        data = response.json()
+        self._output_files[batch_id] = data.get("output_file_id")
+        return BatchStatus(
+            batch_id=batch_id,
+            done=data["status"] in ("completed", "failed", "expired", "cancelled"),
+            failed=data["status"] in ("failed", "expired", "cancelled") and not data.get("output_file_id"),
+            counts=data.get("request_counts", {}),
+        )
+
+    async def cancel(self, batch_id: str) -> None:
+        response = await self.client.post(f"{self.api_base}/batches/{batch_id}/cancel", headers=self.headers)
+        response.raise_for_status()
+
+    async def results(self, batch_id: str) -> Dict[str, Any]:
+        file_id = self._output_files.get(batch_id)
+        if not file_id:
+            return {}
+        response = await self.client.get(f"{self.api_base}/files/{file_id}/content", headers=self.headers)
+        response.raise_for_status()
+        results: Dict[str, Any] = {}
+        for line in response.text.splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            reply = item.get("response") or {}
+            if item.get("error") or reply.get("status_code", 200) >= 400:
+                results[item["custom_id"]] = str(item.get("error") or reply.get("body"))
+                continue
+            body = reply["body"]
+            results[item["custom_id"]] = LLMResponse(
+                content=body["choices"][0]["message"]["content"],
+                model=body.get("model", self.config.model_name),
+                provider=self.config.provider,
+                usage=normalize_usage(body.get("usage")),
+                raw_response=body
+            )
+        return results
+
+
+# Providers with a batch API and a real-time provider to fall back to
+BATCH_BACKENDS = {
+    ModelProvider.ANTHROPIC: AnthropicBatchBackend,
+    ModelProvider.ZHIPU: OpenAIBatchBackend,
+}
+
+
+class BatchExecutor:
+    """
+    Collects requests into batch jobs and resolves each caller's future.
+
+    ``generate`` has the same signature as ``LLMProvider.generate``, so the
+    executor can stand in for a provider in non-interactive code paths.
+    Requests are queued until ``max_batch_size`` is reached or
+    ``collect_window`` seconds pass, then submitted as one job.
+    """
+
+    def __init__(
+        self,
+        config: LLMConfig,
+        backend: Optional[BatchBackend] = None,
+        realtime_provider: Optional[LLMProvider] = None,
+        max_batch_size: int = 1000,
+        collect_window: float = 5.0,
+        poll_interval: float = 30.0,
+        completion_timeout: float = 24 * 3600,
+        realtime_concurrency: int = 4
+    ):
+        """
+        Initialize batch executor.
+
+        Args:
+            config: LLM configuration
+            backend: Batch API (None: every request goes through real-time calls)
+            realtime_provider: Provider for fallback calls (created from ``config`` on demand)
+            max_batch_size: Requests per batch job
+            collect_window: Seconds to collect requests before submitting a job
+            poll_interval: Seconds between job status checks
+            completion_timeout: Seconds after which an unfinished job is cancelled and falls back to real-time
+            realtime_concurrency: Concurrent real-time fallback calls
+        """
+        self.config = config
+        self.backend = backend
+        self._realtime_provider = realtime_provider
+        self.max_batch_size = max_batch_size
+        self.collect_window = collect_window
+        self.poll_interval = poll_interval
+        self.completion_timeout = completion_timeout
+        self._realtime_slots = asyncio.Semaphore(realtime_concurrency)
+
+        self._queue: List[tuple] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._jobs: set = set()
+        self.stats = {
+            "requests": 0,
+            "batches_submitted": 0,
+            "batches_cancelled": 0,
+            "batched_responses": 0,
+            "realtime_fallbacks": 0,
+            "failed": 0,
+        }
+
+    @property
+    def realtime_provider(self) -> LLMProvider:
+        """Provider used for real-time fallback calls."""
+        if self._realtime_provider is None:
+            self._realtime_provider = LLMFactory.create(self.config)
+        return self._realtime_provider
+
+    async def generate(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> LLMResponse:
+        """Queue one request and wait for its result."""
+        request = BatchRequest(
+            prompt=prompt,
+            system_prompt=system_prompt,
+            max_tokens=kwargs.get("max_tokens"),
+            temperature=kwargs.get("temperature"),
+        )
+        return await self.submit(request)
+
+    def submit(self, request: BatchRequest) -> "asyncio.Future[LLMResponse]":
+        """Queue a request; the returned future resolves with its response."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.append((request, future))
+        self.stats["requests"] += 1
+        if len(self._queue) >= self.max_batch_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.collect_window, self.flush)
+        return future
+
+    async def run(self, requests: List[BatchRequest]) -> List[LLMResponse]:
+        """Submit ``requests`` and return their responses in order."""
+        futures = [self.submit(request) for request in requests]
+        self.flush()
+        return list(await asyncio.gather(*futures))
+
+    def flush(self) -> None:
+        """Submit everything queued as batch jobs now."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._queue:
+            chunk, self._queue = self._queue[:self.max_batch_size], self._queue[self.max_batch_size:]
+            job = asyncio.ensure_future(self._run_job(chunk))
+            self._jobs.add(job)
+            job.add_done_callback(self._jobs.discard)
+
+    async def drain(self) -> None:
+        """Flush and wait for all jobs to finish."""
+        self.flush()
+        while self._jobs:
+            await asyncio.gather(*list(self._jobs), return_exceptions=True)
+
+    async def close(self) -> None:
+        """Finish outstanding jobs and release the backend."""
+        await self.drain()
+        if self.backend is not None:
+            await self.backend.close()
+
+    async def _run_job(self, chunk: List[tuple]) -> None:
+        """Submit one job, wait for it and resolve its futures."""
+        by_id = {request.custom_id: (request, future) for request, future in chunk}
+        results: Dict[str, Any] = {}
+        if self.backend is not None:
+            batch_id = None
+            try:
+                batch_id = await self.backend.submit([request for request, _ in chunk])
+                self.stats["batches_submitted"] += 1
+                logger.info(f"Submitted batch {batch_id} with {len(chunk)} requests")
+                results = await self._wait_for(batch_id)
+            except Exception as e:
+                logger.warning(f"Batch of {len(chunk)} requests failed, falling back to real-time calls: {e}")
+                if batch_id is not None:
+                    # Stop paying for a job whose requests are about to run in real time.
+                    # It is never polled again, so results it produces later are ignored.
+                    await self._cancel(batch_id)
+
+        fallbacks = []
+        for custom_id, (request, future) in by_id.items():
+            result = results.get(custom_id)
+            if isinstance(result, LLMResponse):
+                self.stats["batched_responses"] += 1
+                if not future.done():
+                    future.set_result(result)
+            else:
+                if result is not None:
+                    logger.info(f"Batch request {custom_id} errored ({result}); retrying in real time")
+                fallbacks.append((request, future))
+        if fallbacks:
+            await asyncio.gather(*(self._realtime(request, future) for request, future in fallbacks))
+
+    async def _wait_for(self, batch_id: str) -> Dict[str, Any]:
+        """Poll a job until it ends and return its results."""
+        deadline = time.monotonic() + self.completion_timeout
+        while True:
+            status = await self.backend.poll(batch_id)
+            if status.done:
+                if status.failed:
+                    # Nothing to cancel; every request falls back to real time
+                    logger.warning(f"Batch {batch_id} failed, falling back to real-time calls")
+                    return {}
+                return await self.backend.results(batch_id)
+            if time.monotonic() >= deadline:
+                raise BatchError(f"Batch {batch_id} did not finish in {self.completion_timeout}s")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _cancel(self, batch_id: str) -> None:
+        """Cancel an abandoned job; failures are logged, not raised."""
+        try:
+            await self.backend.cancel(batch_id)
+            self.stats["batches_cancelled"] += 1
+            logger.info(f"Cancelled batch {batch_id}")
+        except Exception as e:
+            logger.warning(f"Failed to cancel batch {batch_id}: {e}")
+
+    async def _realtime(self, request: BatchRequest, future: asyncio.Future) -> None:
+        """Answer a request with a real-time call."""
+        kwargs = {}
+        if request.max_tokens is not None:
+            kwargs["max_tokens"] = request.max_tokens
+        if request.temperature is not None:
+            kwargs["temperature"] = request.temperature
+        async with self._realtime_slots:
+            try:
+                response = await self.realtime_provider.generate(request.prompt, request.system_prompt, **kwargs)
+                self.stats["realtime_fallbacks"] += 1
+                if not future.done():
+                    future.set_result(response)
+            except Exception as e:
+                self.stats["failed"] += 1
+                if not future.done():
+                    future.set_exception(e)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Executor statistics."""
+        return {**self.stats, "queued": len(self._queue), "running_jobs": len(self._jobs)}
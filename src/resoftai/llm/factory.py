@@ -2,37 +2,45 @@
 LLM Factory for creating provider instances.
 """
 
-from typing import Dict, Type
+from importlib import import_module, metadata
+from typing import TYPE_CHECKING, Any, Dict, Optional, Type, Union
 import logging
 
 from resoftai.llm.base import LLMProvider, LLMConfig, ModelProvider
-from resoftai.llm.providers import (
-    AnthropicProvider,
-    ZhipuProvider,
-    DeepSeekProvider,
-    MoonshotProvider,
-    MinimaxProvider,
-    GoogleProvider,
-)
+
+if TYPE_CHECKING:
+    from resoftai.llm.batch import BatchExecutor
 
 logger = logging.getLogger(__name__)
 
+# Entry point group through which installed packages add (or replace) providers:
+#
+#   [project.entry-points."resoftai.llm_providers"]
+#   openai = "my_package.openai_provider:OpenAIProvider"
+ENTRY_POINT_GROUP = "resoftai.llm_providers"
+
 
 class LLMFactory:
     """
     Factory class for creating LLM provider instances.
+
+    Providers are registered by import path and imported the first time a
+    configuration asks for them, so importing the factory does not pull in
+    every provider SDK.
     """
 
-    _providers: Dict[ModelProvider, Type[LLMProvider]] = {
-        ModelProvider.ANTHROPIC: AnthropicProvider,
-        ModelProvider.ZHIPU: ZhipuProvider,
-        ModelProvider.DEEPSEEK: DeepSeekProvider,
-        ModelProvider.MOONSHOT: MoonshotProvider,
-        ModelProvider.MINIMAX: MinimaxProvider,
-        ModelProvider.GOOGLE: GoogleProvider,
+    _providers: Dict[ModelProvider, str] = {
+        ModelProvider.ANTHROPIC: "resoftai.llm.providers.anthropic_provider:AnthropicProvider",
+        ModelProvider.ZHIPU: "resoftai.llm.providers.zhipu_provider:ZhipuProvider",
+        ModelProvider.DEEPSEEK: "resoftai.llm.providers.deepseek_provider:DeepSeekProvider",
+        ModelProvider.MOONSHOT: "resoftai.llm.providers.moonshot_provider:MoonshotProvider",
+        ModelProvider.MINIMAX: "resoftai.llm.providers.minimax_provider:MinimaxProvider",
+        ModelProvider.GOOGLE: "resoftai.llm.providers.google_provider:GoogleProvider",
     }
 
     _custom_providers: Dict[str, Type[LLMProvider]] = {}
+    _loaded_providers: Dict[str, Type[LLMProvider]] = {}
+    _entry_points: Optional[Dict[str, Any]] = None
 
     @classmethod
     def create(cls, config: LLMConfig) -> LLMProvider:
@@ -48,10 +56,7 @@ class LLMFactory:
         Raises:
             ValueError: If provider is not supported
         """
-        if config.provider not in cls._providers:
-            raise ValueError(f"Unsupported provider: {config.provider}")
-
-        provider_class = cls._providers[config.provider]
+        provider_class = cls.get_provider_class(config.provider)
         provider = provider_class(config)
 
         if not provider.validate_config():
@@ -61,6 +66,71 @@ class LLMFactory:
 
         return provider
 
+    @classmethod
+    def create_batch(cls, config: LLMConfig, **options) -> "BatchExecutor":
+        """
+        Create a batch executor for non-interactive bulk work.
+
+        Providers with a batch API get a batch backend; others are served
+        through real-time calls by the same executor.
+
+        Args:
+            config: LLM configuration
+            **options: BatchExecutor options (batch size, poll interval, ...)
+
+        Returns:
+            BatchExecutor instance
+        """
+        from resoftai.llm.batch import BATCH_BACKENDS, BatchExecutor
+
+        backend_class = BATCH_BACKENDS.get(config.provider)
+        if backend_class is None:
+            logger.info(f"{config.provider.value} has no batch API; batch requests will use real-time calls")
+        return BatchExecutor(config, backend=backend_class(config) if backend_class else None, **options)
+
+    @classmethod
+    def get_provider_class(cls, provider: Union[ModelProvider, str]) -> Type[LLMProvider]:
+        """
+        Resolve the class for a provider, importing its module on first use.
+
+        Custom providers registered at runtime come first, then installed
+        entry points, then the built-in providers.
+
+        Raises:
+            ValueError: If provider is not supported
+        """
+        name = getattr(provider, "value", provider)
+        if name in cls._custom_providers:
+            return cls._custom_providers[name]
+
+        if name not in cls._loaded_providers:
+            target = cls._discover_entry_points().get(name)
+            if target is None:
+                target = next((path for key, path in cls._providers.items() if key.value == name), None)
+            if target is None:
+                raise ValueError(f"Unsupported provider: {provider}")
+
+            if isinstance(target, str):
+                module_name, _, class_name = target.partition(":")
+                cls._loaded_providers[name] = getattr(import_module(module_name), class_name)
+            else:
+                cls._loaded_providers[name] = target.load()
+
+        return cls._loaded_providers[name]
+
+    @classmethod
+    def _discover_entry_points(cls) -> Dict[str, Any]:
+        if cls._entry_points is None:
+            try:
+                found = metadata.entry_points()
+                group = found.select(group=ENTRY_POINT_GROUP) if hasattr(found, "select") \
+                    else found.get(ENTRY_POINT_GROUP, [])
+                cls._entry_points = {entry_point.name: entry_point for entry_point in group}
+            except Exception as e:
+                logger.warning(f"Could not read LLM provider entry points: {e}")
+                cls._entry_points = {}
+        return cls._entry_points
+
     @classmethod
     def register_custom_provider(
         cls,
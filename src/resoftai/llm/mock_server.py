@@ -0,0 +1,203 @@
+"""
+Local HTTP mock of the OpenAI-style chat completion endpoints.
+
+The DeepSeek, Moonshot and Zhipu providers talk to
+``{api_base}/.../chat/completions``. ``MockLLMServer`` answers any path
+ending in ``/chat/completions`` from a cassette, with the same timing and
+fault profile as ``ReplayProvider``, so the unmodified providers can be
+exercised end to end (HTTP, SSE streaming, error handling) offline::
+
+    async with MockLLMServer(cassette, profile, on_miss="synthesize") as server:
+        config = LLMConfig(provider=ModelProvider.DEEPSEEK, api_key="test",
+                           model_name="deepseek-chat", api_base=server.url)
+
+It can also run standalone for manual benchmarks::
+
+    python -m resoftai.llm.mock_server --port 8900 --cassette runs.jsonl --synthesize
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from resoftai.llm.replay import Cassette, ReplayMiss, ReplayProfile, Replayer, request_key
+
+logger = logging.getLogger(__name__)
+
+
+def _split_messages(messages: List[Dict[str, Any]]) -> Dict[str, Optional[str]]:
+    """Recover (system prompt, prompt) from OpenAI-format messages."""
+    system = next((m["content"] for m in messages if m.get("role") == "system"), None)
+    prompt = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+    return {"system_prompt": system, "prompt": prompt}
+
+
+def create_mock_app(replayer: Replayer) -> FastAPI:
+    """
+    Build the mock application.
+
+    Requests are keyed like ``ReplayProvider`` keys them, with the project
+    context folded into the user message as the providers send it.
+    """
+    app = FastAPI(title="ResoftAI mock LLM server")
+
+    @app.post("/{prefix:path}chat/completions")
+    async def chat_completions(request: Request, prefix: str = ""):
+        body = await request.json()
+        model = body.get("model", "mock")
+        parts = _split_messages(body.get("messages", []))
+
+        fault = replayer.fault()
+        if fault == "timeout":
+            await asyncio.sleep(replayer.profile.timeout_seconds)
+            return JSONResponse({"error": {"message": "Injected timeout"}}, status_code=504)
+        if fault:
+            headers = {"Retry-After": "1"} if fault == "429" else {}
+            return JSONResponse(
+                {"error": {"message": f"Injected {fault}", "type": "mock_error"}},
+                status_code=int(fault),
+                headers=headers,
+            )
+
+        key = request_key(model, parts["prompt"], parts["system_prompt"])
+        prompt_text = "\n".join(filter(None, [parts["system_prompt"], parts["prompt"]]))
+        try:
+            interaction = replayer.resolve(key, model, prompt_text)
+        except ReplayMiss as e:
+            return JSONResponse({"error": {"message": str(e), "type": "replay_miss"}}, status_code=404)
+
+        ttft, chunks = replayer.timeline(interaction)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+
+        if not body.get("stream"):
+            await asyncio.sleep(ttft + sum(delay for _, delay in chunks))
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": interaction.model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": interaction.content},
+                    "finish_reason": "stop",
+                }],
+                "usage": interaction.usage,
+            }
+
+        async def events():
+            await asyncio.sleep(ttft)
+            for text, delay in chunks:
+                await asyncio.sleep(delay)
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "model": interaction.model,
+                    "choices": [{"index": 0, "delta": {"content": text}, "finish_reason": None}],
+                }
+                yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/stats")
+    async def stats():
+        return replayer.get_stats()
+
+    return app
+
+
+class MockLLMServer:
+    """Mock upstream server running in the current event loop."""
+
+    def __init__(
+        self,
+        cassette: Optional[Cassette] = None,
+        profile: Optional[ReplayProfile] = None,
+        on_miss: str = "error",
+        host: str = "127.0.0.1",
+        port: int = 0
+    ):
+        """
+        Initialize the server.
+
+        Args:
+            cassette: Recorded interactions to serve
+            profile: Timing and fault profile
+            on_miss: ``error`` answers unrecorded requests with 404,
+                ``synthesize`` with filler text
+            host: Interface to bind
+            port: Port to bind (0 picks a free one)
+        """
+        self.replayer = Replayer(cassette or Cassette(), profile, on_miss=on_miss)
+        self.app = create_mock_app(self.replayer)
+        self.host = host
+        self.port = port
+        self._server: Optional[uvicorn.Server] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL to use as ``LLMConfig.api_base``."""
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> None:
+        """Start serving and wait until the port is bound."""
+        config = uvicorn.Config(self.app, host=self.host, port=self.port, log_level="warning", lifespan="off")
+        self._server = uvicorn.Server(config)
+        self._task = asyncio.create_task(self._server.serve())
+        while not self._server.started:
+            if self._task.done():
+                self._task.result()
+            await asyncio.sleep(0.01)
+        self.port = self._server.servers[0].sockets[0].getsockname()[1]
+        logger.info(f"Mock LLM server listening on {self.url}")
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        if self._server is not None:
+            self._server.should_exit = True
+            await self._task
+            self._server = None
+
+    async def __aenter__(self) -> "MockLLMServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the mock server from the command line."""
+    parser = argparse.ArgumentParser(description="Mock OpenAI-style LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--cassette", help="JSONL cassette to serve")
+    parser.add_argument("--synthesize", action="store_true", help="Answer unrecorded requests with filler text")
+    parser.add_argument("--profile", help="ReplayProfile values as JSON")
+    args = parser.parse_args(argv)
+
+    profile = ReplayProfile.from_dict(json.loads(args.profile) if args.profile else None)
+    server = MockLLMServer(
+        Cassette(args.cassette), profile,
+        on_miss="synthesize" if args.synthesize else "error",
+        host=args.host, port=args.port,
+    )
+
+    async def serve():
+        await server.start()
+        await server._task
+
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Process-wide pool of LLM providers.
+
+Providers hold no per-project state, so every agent configured with the same
+``LLMConfig`` can share one instance, together with its HTTP connection
+pool. ``ProviderPool.get`` returns the pooled provider and only goes through
+``LLMFactory.create`` (class resolution, validation, logging) for
+configurations it has not seen yet. Evicted providers are closed once their
+in-flight requests finish.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Set, Tuple
+
+from resoftai.llm.base import LLMConfig, LLMProvider
+from resoftai.llm.factory import LLMFactory
+
+logger = logging.getLogger(__name__)
+
+
+def config_key(config: LLMConfig) -> Tuple[Any, ...]:
+    """
+    Hashable key identifying providers built from equal configurations.
+
+    The API key is hashed so pool keys can be logged or exposed in metrics.
+    """
+    return (
+        getattr(config.provider, "value", config.provider),
+        config.model_name,
+        hashlib.sha256((config.api_key or "").encode()).hexdigest()[:16],
+        config.api_base,
+        config.max_tokens,
+        config.temperature,
+        config.top_p,
+        json.dumps(config.extra_params or {}, sort_keys=True, default=str),
+    )
+
+
+class ProviderPool:
+    """Shared providers keyed by ``LLMConfig``, least recently used evicted first."""
+
+    def __init__(self, max_size: int = 64, close_grace: float = 60.0):
+        """
+        Initialize the pool.
+
+        Args:
+            max_size: Maximum number of pooled providers
+            close_grace: Seconds an evicted provider's in-flight requests
+                may take before its HTTP client is closed anyway
+        """
+        self.max_size = max_size
+        self.close_grace = close_grace
+        self._providers: "OrderedDict[Tuple[Any, ...], LLMProvider]" = OrderedDict()
+        self._closing: Set[asyncio.Task] = set()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "closed": 0,
+        }
+
+    def get(self, config: LLMConfig) -> LLMProvider:
+        """
+        Get the pooled provider for a configuration, creating it on first use.
+
+        Args:
+            config: LLM configuration
+
+        Returns:
+            Shared provider instance
+        """
+        key = config_key(config)
+        provider = self._providers.get(key)
+        if provider is not None:
+            self._providers.move_to_end(key)
+            self.stats["hits"] += 1
+            return provider
+
+        provider = LLMFactory.create(config)
+        self.stats["misses"] += 1
+        self._providers[key] = provider
+        if len(self._providers) > self.max_size:
+            _, evicted = self._providers.popitem(last=False)
+            self.stats["evictions"] += 1
+            self._schedule_close(evicted)
+        return provider
+
+    def _schedule_close(self, provider: LLMProvider) -> None:
+        """Close an evicted provider in the background."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Without a running loop no client can be open on this thread's loop
+            provider._retire_http_client()
+            return
+        task = loop.create_task(self._close_evicted(provider))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def _close_evicted(self, provider: LLMProvider) -> None:
+        """Close an evicted provider once the agents still holding it are done."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.close_grace
+        while provider.requests_in_flight and loop.time() < deadline:
+            await asyncio.sleep(0.05)
+        try:
+            await provider.aclose()
+            self.stats["closed"] += 1
+        except Exception as e:
+            logger.warning(f"Failed to close evicted {provider.provider_name} provider: {e}")
+
+    def warm(self, configs: Iterable[LLMConfig]) -> int:
+        """
+        Create providers ahead of the first project that needs them.
+
+        Args:
+            configs: Configurations to create providers for
+
+        Returns:
+            Number of providers created
+        """
+        misses = self.stats["misses"]
+        for config in configs:
+            self.get(config)
+        return self.stats["misses"] - misses
+
+    def __len__(self) -> int:
+        return len(self._providers)
+
+    async def close(self) -> None:
+        """Close the providers' HTTP clients and empty the pool."""
+        providers = list(self._providers.values())
+        self._providers.clear()
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+        for provider in providers:
+            try:
+                await provider.aclose()
+            except Exception as e:
+                logger.warning(f"Failed to close {provider.provider_name} provider: {e}")
+
+    def clear(self) -> None:
+        """Drop all pooled providers without closing them."""
+        self._providers.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool statistics."""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "providers": len(self._providers),
+            "max_size": self.max_size,
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+        }
+
+
+# Global provider pool
+provider_pool = ProviderPool()
@@ -1,11 +1,17 @@
 """LLM provider implementations."""
 
-from resoftai.llm.providers.anthropic_provider import AnthropicProvider
-from resoftai.llm.providers.zhipu_provider import ZhipuProvider
-from resoftai.llm.providers.deepseek_provider import DeepSeekProvider
-from resoftai.llm.providers.moonshot_provider import MoonshotProvider
-from resoftai.llm.providers.minimax_provider import MinimaxProvider
-from resoftai.llm.providers.google_provider import GoogleProvider
+import importlib
+
+# Provider modules import their SDKs, so each is only loaded when used
+_PROVIDER_MODULES = {
+    "AnthropicProvider": "resoftai.llm.providers.anthropic_provider",
+    "ZhipuProvider": "resoftai.llm.providers.zhipu_provider",
+    "DeepSeekProvider": "resoftai.llm.providers.deepseek_provider",
+    "MoonshotProvider": "resoftai.llm.providers.moonshot_provider",
+    "MinimaxProvider": "resoftai.llm.providers.minimax_provider",
+    "GoogleProvider": "resoftai.llm.providers.google_provider",
+    "ReplayProvider": "resoftai.llm.providers.replay_provider",
+}
 
 __all__ = [
     "AnthropicProvider",
@@ -14,4 +20,17 @@ __all__ = [
     "MoonshotProvider",
     "MinimaxProvider",
     "GoogleProvider",
+    "ReplayProvider",
 ]
+
+
+def __getattr__(name):
+    if name in _PROVIDER_MODULES:
+        value = getattr(importlib.import_module(_PROVIDER_MODULES[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
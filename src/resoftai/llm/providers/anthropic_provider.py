@@ -1,10 +1,10 @@
 """Anthropic Claude provider implementation."""
 
-from typing import Optional
+from typing import Any, Dict, List, Optional, Tuple
 import logging
-from anthropic import Anthropic, AsyncAnthropic
+from anthropic import NOT_GIVEN, Anthropic, AsyncAnthropic
 
-from resoftai.llm.base import LLMProvider, LLMResponse, LLMConfig, ModelProvider
+from resoftai.llm.base import LLMProvider, LLMResponse, LLMConfig, ModelProvider, normalize_usage
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +20,27 @@ class AnthropicProvider(LLMProvider):
     def provider_name(self) -> str:
         return "Anthropic Claude"
 
+    @staticmethod
+    def _layout(
+        prompt: str,
+        system_prompt: Optional[str],
+        context: Optional[str]
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Build system blocks and messages with prompt-cache breakpoints.
+
+        The system prompt and the shared context each end with an ephemeral
+        ``cache_control`` breakpoint, so later calls from the same agent (and
+        other calls on the same project context) read them from the cache.
+        """
+        cache = {"type": "ephemeral"}
+        system = [{"type": "text", "text": system_prompt, "cache_control": cache}] if system_prompt else []
+        content = []
+        if context:
+            content.append({"type": "text", "text": context, "cache_control": cache})
+        content.append({"type": "text", "text": prompt})
+        return system, [{"role": "user", "content": content}]
+
     async def generate(
         self,
         prompt: str,
@@ -28,13 +49,13 @@ class AnthropicProvider(LLMProvider):
     ) -> LLMResponse:
         """Generate response using Claude."""
         try:
-            messages = [{"role": "user", "content": prompt}]
+            system, messages = self._layout(prompt, system_prompt, kwargs.get("context"))
 
             response = await self.client.messages.create(
                 model=self.config.model_name,
                 max_tokens=kwargs.get("max_tokens", self.config.max_tokens),
                 temperature=kwargs.get("temperature", self.config.temperature),
-                system=system_prompt or "",
+                system=system or NOT_GIVEN,
                 messages=messages
             )
 
@@ -48,11 +69,7 @@ class AnthropicProvider(LLMProvider):
                 content=content,
                 model=response.model,
                 provider=ModelProvider.ANTHROPIC,
-                usage={
-                    "prompt_tokens": response.usage.input_tokens,
-                    "completion_tokens": response.usage.output_tokens,
-                    "total_tokens": response.usage.input_tokens + response.usage.output_tokens,
-                },
+                usage=self._usage(response.usage),
                 raw_response=response
             )
 
@@ -60,6 +77,20 @@ class AnthropicProvider(LLMProvider):
             logger.error(f"Anthropic API error: {e}")
             raise
 
+    @staticmethod
+    def _usage(usage: Any) -> Dict[str, int]:
+        """Usage in the common format; ``input_tokens`` excludes cache reads and writes."""
+        cache_read = getattr(usage, "cache_read_input_tokens", None) or 0
+        cache_write = getattr(usage, "cache_creation_input_tokens", None) or 0
+        prompt_tokens = usage.input_tokens + cache_read + cache_write
+        return normalize_usage({
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": usage.output_tokens,
+            "total_tokens": prompt_tokens + usage.output_tokens,
+            "cache_read_input_tokens": cache_read,
+            "cache_creation_input_tokens": cache_write,
+        })
+
     async def generate_stream(
         self,
         prompt: str,
@@ -68,13 +99,13 @@ class AnthropicProvider(LLMProvider):
     ):
         """Generate streaming response using Claude."""
         try:
-            messages = [{"role": "user", "content": prompt}]
+            system, messages = self._layout(prompt, system_prompt, kwargs.get("context"))
 
             async with self.client.messages.stream(
                 model=self.config.model_name,
                 max_tokens=kwargs.get("max_tokens", self.config.max_tokens),
                 temperature=kwargs.get("temperature", self.config.temperature),
-                system=system_prompt or "",
+                system=system or NOT_GIVEN,
                 messages=messages
             ) as stream:
                 async for text in stream.text_stream:
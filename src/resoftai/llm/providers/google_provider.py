@@ -2,9 +2,8 @@
 
 from typing import Optional
 import logging
-import httpx
 
-from resoftai.llm.base import LLMProvider, LLMResponse, LLMConfig, ModelProvider
+from resoftai.llm.base import LLMProvider, LLMResponse, LLMConfig, ModelProvider, normalize_usage
 
 logger = logging.getLogger(__name__)
 
@@ -34,9 +33,11 @@ class GoogleProvider(LLMProvider):
                 contents.append({"role": "user", "parts": [{"text": system_prompt}]})
                 contents.append({"role": "model", "parts": [{"text": "Understood. I'll follow these instructions."}]})
 
-            contents.append({"role": "user", "parts": [{"text": prompt}]})
+            # Shared context before the request keeps the prefix stable for implicit caching
+            parts = [{"text": kwargs["context"]}] if kwargs.get("context") else []
+            contents.append({"role": "user", "parts": parts + [{"text": prompt}]})
 
-            async with httpx.AsyncClient() as client:
+            async with self.http_client() as client:
                 response = await client.post(
                     f"{self.api_base}/models/{self.config.model_name}:generateContent",
                     params={"key": self.config.api_key},
@@ -71,13 +72,14 @@ class GoogleProvider(LLMProvider):
                     "prompt_tokens": metadata.get("promptTokenCount", 0),
                     "completion_tokens": metadata.get("candidatesTokenCount", 0),
                     "total_tokens": metadata.get("totalTokenCount", 0),
+                    "cached_prompt_tokens": metadata.get("cachedContentTokenCount", 0),
                 }
 
             return LLMResponse(
                 content=content,
                 model=self.config.model_name,
                 provider=ModelProvider.GOOGLE,
-                usage=usage,
+                usage=normalize_usage(usage),
                 raw_response=data
             )
 
@@ -98,9 +100,11 @@ class GoogleProvider(LLMProvider):
                 contents.append({"role": "user", "parts": [{"text": system_prompt}]})
                 contents.append({"role": "model", "parts": [{"text": "Understood."}]})
 
-            contents.append({"role": "user", "parts": [{"text": prompt}]})
+            # Shared context before the request keeps the prefix stable for implicit caching
+            parts = [{"text": kwargs["context"]}] if kwargs.get("context") else []
+            contents.append({"role": "user", "parts": parts + [{"text": prompt}]})
 
-            async with httpx.AsyncClient() as client:
+            async with self.http_client() as client:
                 async with client.stream(
                     "POST",
                     f"{self.api_base}/models/{self.config.model_name}:streamGenerateContent",
@@ -2,9 +2,10 @@
 
 from typing import Optional
 import logging
-import httpx
 
-from resoftai.llm.base import LLMProvider, LLMResponse, LLMConfig, ModelProvider
+from resoftai.llm.base import (
+    LLMProvider, LLMResponse, LLMConfig, ModelProvider, layout_messages, normalize_usage
+)
 
 logger = logging.getLogger(__name__)
 
@@ -29,12 +30,9 @@ class MinimaxProvider(LLMProvider):
     ) -> LLMResponse:
         """Generate response using Minimax."""
         try:
-            messages = []
-            if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
-            messages.append({"role": "user", "content": prompt})
+            messages = layout_messages(prompt, system_prompt, kwargs.get("context"))
 
-            async with httpx.AsyncClient() as client:
+            async with self.http_client() as client:
                 response = await client.post(
                     f"{self.api_base}/text/chatcompletion_v2",
                     headers={
@@ -57,7 +55,7 @@ class MinimaxProvider(LLMProvider):
                 content=data["choices"][0]["message"]["content"],
                 model=data.get("model", self.config.model_name),
                 provider=ModelProvider.MINIMAX,
-                usage=data.get("usage", {}),
+                usage=normalize_usage(data.get("usage")),
                 raw_response=data
             )
 
@@ -73,12 +71,9 @@ class MinimaxProvider(LLMProvider):
     ):
         """Generate streaming response using Minimax."""
         try:
-            messages = []
-            if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
-            messages.append({"role": "user", "content": prompt})
+            messages = layout_messages(prompt, system_prompt, kwargs.get("context"))
 
-            async with httpx.AsyncClient() as client:
+            async with self.http_client() as client:
                 async with client.stream(
                     "POST",
                     f"{self.api_base}/text/chatcompletion_v2",
@@ -0,0 +1,158 @@
+"""Record/replay provider implementation for offline testing and benchmarks."""
+
+import asyncio
+import logging
+import time
+from dataclasses import replace
+from typing import Optional
+
+from resoftai.llm.base import LLMConfig, LLMProvider, LLMResponse, ModelProvider, normalize_usage
+from resoftai.llm.factory import LLMFactory
+from resoftai.llm.replay import (
+    Cassette, Interaction, ReplayProfile, Replayer, estimate_tokens, fault_error, request_key
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayProvider(LLMProvider):
+    """
+    Provider answering from a cassette of recorded interactions.
+
+    Configured through ``LLMConfig.extra_params``:
+
+    - ``cassette``: JSONL file of recorded interactions
+    - ``mode``: ``replay`` (default) or ``record``
+    - ``upstream``: provider recorded from in record mode, e.g. ``deepseek``
+    - ``on_miss``: ``error`` (default) or ``synthesize`` for unrecorded requests
+    - ``profile``: ReplayProfile values (``ttft``, ``tokens_per_second``,
+      ``chunk_tokens``, ``error_rates``, ``time_scale``, ``seed``)
+
+    In record mode every call goes to the upstream provider and is appended
+    to the cassette with its timing; in replay mode no network is used.
+    """
+
+    def __init__(self, config: LLMConfig):
+        super().__init__(config)
+        params = config.extra_params
+        self.mode = params.get("mode", "replay")
+        self.cassette = Cassette(params.get("cassette"))
+        self.replayer = Replayer(
+            self.cassette,
+            ReplayProfile.from_dict(params.get("profile")),
+            on_miss=params.get("on_miss", "error"),
+        )
+        self.upstream: Optional[LLMProvider] = None
+        if self.mode == "record" and params.get("upstream"):
+            upstream = ModelProvider(params["upstream"])
+            self.upstream = LLMFactory.get_provider_class(upstream)(replace(config, provider=upstream))
+
+    @property
+    def provider_name(self) -> str:
+        return "Replay"
+
+    def _key(self, prompt: str, system_prompt: Optional[str], kwargs) -> str:
+        return request_key(self.config.model_name, prompt, system_prompt, kwargs.get("context"))
+
+    def _replay(self, prompt: str, system_prompt: Optional[str], kwargs) -> Interaction:
+        """Draw an injected fault or the interaction answering the request."""
+        fault = self.replayer.fault()
+        if fault:
+            raise fault_error(fault, f"replay://{self.config.model_name}")
+        prompt_text = "\n".join(filter(None, [system_prompt, kwargs.get("context"), prompt]))
+        return self.replayer.resolve(self._key(prompt, system_prompt, kwargs), self.config.model_name, prompt_text)
+
+    def _response(self, interaction: Interaction) -> LLMResponse:
+        return LLMResponse(
+            content=interaction.content,
+            model=interaction.model,
+            provider=self.config.provider,
+            usage=normalize_usage(interaction.usage),
+        )
+
+    async def generate(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        **kwargs
+    ) -> LLMResponse:
+        """Replay (or record) a response."""
+        if self.mode == "record":
+            return await self._record(prompt, system_prompt, **kwargs)
+
+        interaction = self._replay(prompt, system_prompt, kwargs)
+        ttft, chunks = self.replayer.timeline(interaction)
+        delay = ttft + sum(chunk_delay for _, chunk_delay in chunks)
+        if delay:
+            await asyncio.sleep(delay)
+        return self._response(interaction)
+
+    async def generate_stream(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        **kwargs
+    ):
+        """Replay (or record) a streamed response chunk by chunk."""
+        if self.mode == "record":
+            async for chunk in self._record_stream(prompt, system_prompt, **kwargs):
+                yield chunk
+            return
+
+        interaction = self._replay(prompt, system_prompt, kwargs)
+        ttft, chunks = self.replayer.timeline(interaction)
+        if ttft:
+            await asyncio.sleep(ttft)
+        for text, delay in chunks:
+            if delay:
+                await asyncio.sleep(delay)
+            yield text
+
+    async def _record(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> LLMResponse:
+        start = time.monotonic()
+        response = await self.upstream.generate(prompt, system_prompt, **kwargs)
+        self.cassette.record(Interaction(
+            key=self._key(prompt, system_prompt, kwargs),
+            model=response.model,
+            content=response.content,
+            usage={k: v for k, v in response.usage.items() if isinstance(v, (int, float))},
+            latency=round(time.monotonic() - start, 4),
+        ))
+        return response
+
+    async def _record_stream(self, prompt: str, system_prompt: Optional[str] = None, **kwargs):
+        start = last = time.monotonic()
+        ttft = None
+        parts, chunks = [], []
+        async for chunk in self.upstream.generate_stream(prompt, system_prompt, **kwargs):
+            now = time.monotonic()
+            if ttft is None:
+                ttft = now - start
+            chunks.append([len(chunk), round(now - last, 4)])
+            last = now
+            parts.append(chunk)
+            yield chunk
+
+        content = "".join(parts)
+        completion_tokens = estimate_tokens(content)
+        self.cassette.record(Interaction(
+            key=self._key(prompt, system_prompt, kwargs),
+            model=self.config.model_name,
+            content=content,
+            # Streaming APIs used here do not report usage, so it is estimated
+            usage={"completion_tokens": completion_tokens, "total_tokens": completion_tokens},
+            latency=round(last - start, 4),
+            ttft=round(ttft or 0.0, 4),
+            chunks=chunks,
+        ))
+
+    def validate_config(self) -> bool:
+        """Validate replay configuration."""
+        if self.mode == "record":
+            return self.upstream is not None and self.upstream.validate_config()
+        return self.mode == "replay"
+
+
+def register_replay_provider(name: str = ModelProvider.REPLAY.value) -> None:
+    """Make ``ReplayProvider`` available to ``LLMFactory.create`` under ``name``."""
+    LLMFactory.register_custom_provider(name, ReplayProvider)
@@ -2,9 +2,10 @@
 
 from typing import Optional
 import logging
-import httpx
 
-from resoftai.llm.base import LLMProvider, LLMResponse, LLMConfig, ModelProvider
+from resoftai.llm.base import (
+    LLMProvider, LLMResponse, LLMConfig, ModelProvider, layout_messages, normalize_usage
+)
 
 logger = logging.getLogger(__name__)
 
@@ -28,12 +29,9 @@ class ZhipuProvider(LLMProvider):
     ) -> LLMResponse:
         """Generate response using GLM."""
         try:
-            messages = []
-            if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
-            messages.append({"role": "user", "content": prompt})
+            messages = layout_messages(prompt, system_prompt, kwargs.get("context"))
 
-            async with httpx.AsyncClient() as client:
+            async with self.http_client() as client:
                 response = await client.post(
                     f"{self.api_base}/chat/completions",
                     headers={
@@ -56,7 +54,7 @@ class ZhipuProvider(LLMProvider):
                 content=data["choices"][0]["message"]["content"],
                 model=data["model"],
                 provider=ModelProvider.ZHIPU,
-                usage=data.get("usage", {}),
+                usage=normalize_usage(data.get("usage")),
                 raw_response=data
             )
 
@@ -72,12 +70,9 @@ class ZhipuProvider(LLMProvider):
     ):
         """Generate streaming response using GLM."""
         try:
-            messages = []
-            if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
-            messages.append({"role": "user", "content": prompt})
+            messages = layout_messages(prompt, system_prompt, kwargs.get("context"))
 
-            async with httpx.AsyncClient() as client:
+            async with self.http_client() as client:
                 async with client.stream(
                     "POST",
                     f"{self.api_base}/chat/completions",
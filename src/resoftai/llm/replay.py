@@ -0,0 +1,343 @@
+"""
+Recorded LLM interactions and simulated upstream behaviour, for offline testing.
+
+A ``Cassette`` is a JSONL file with one recorded interaction per line: the
+request key, the response text and usage, the total latency, the time to
+first token and, for streamed calls, the size and delay of every chunk.
+``Replayer`` answers requests from a cassette and shapes the answer with a
+``ReplayProfile``:
+
+- latency comes from the recording, or from a time-to-first-token
+  distribution plus a token rate;
+- streamed responses are cut into chunks with recorded or simulated timing;
+- faults (HTTP 429, 5xx, timeouts) are injected at configurable rates.
+
+``ReplayProvider`` uses it in-process and ``MockLLMServer`` serves it over
+OpenAI-style HTTP endpoints, so throughput and latency of the orchestration
+can be measured without API keys or network access.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import random
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Faults a profile can inject; numbers are HTTP status codes
+FAULTS = ("429", "500", "502", "503", "timeout")
+
+
+class ReplayMiss(LookupError):
+    """No recorded interaction matches a request."""
+
+
+def request_key(
+    model: str,
+    prompt: str,
+    system_prompt: Optional[str] = None,
+    context: Optional[str] = None
+) -> str:
+    """
+    Key identifying a request in a cassette.
+
+    The context is folded into the user message the way ``layout_messages``
+    sends it, so requests recorded in-process and requests arriving at the
+    mock server over HTTP share keys.
+    """
+    user = f"{context}\n\n{prompt}" if context else prompt
+    payload = json.dumps([model, system_prompt or "", user], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:24]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count used for synthesized usage and token rates."""
+    return max(1, math.ceil(len(text) / 4)) if text else 0
+
+
+@dataclass
+class Distribution:
+    """
+    Random distribution of a duration in seconds.
+
+    ``kind`` is ``fixed`` (``value``), ``uniform`` (``low``..``high``),
+    ``normal`` (``mean``, ``stddev``) or ``lognormal`` (``median``,
+    ``sigma``). Samples are never negative.
+    """
+
+    kind: str = "fixed"
+    params: Dict[str, float] = field(default_factory=dict)
+
+    @classmethod
+    def parse(cls, spec: Union[None, float, Dict[str, Any], "Distribution"]) -> Optional["Distribution"]:
+        """Build a distribution from a number or a ``{"dist": kind, ...}`` dict."""
+        if spec is None or isinstance(spec, Distribution):
+            return spec
+        if isinstance(spec, (int, float)):
+            return cls("fixed", {"value": float(spec)})
+        params = {key: float(value) for key, value in spec.items() if key != "dist"}
+        return cls(spec.get("dist", "fixed"), params)
+
+    def sample(self, rng: random.Random) -> float:
+        """Draw one duration."""
+        p = self.params
+        if self.kind == "fixed":
+            value = p.get("value", 0.0)
+        elif self.kind == "uniform":
+            value = rng.uniform(p.get("low", 0.0), p.get("high", 0.0))
+        elif self.kind == "normal":
+            value = rng.gauss(p.get("mean", 0.0), p.get("stddev", 0.0))
+        elif self.kind == "lognormal":
+            value = rng.lognormvariate(math.log(p.get("median", 1.0)), p.get("sigma", 0.0))
+        else:
+            raise ValueError(f"Unknown distribution: {self.kind}")
+        return max(0.0, value)
+
+
+@dataclass
+class ReplayProfile:
+    """How replayed responses are timed and which faults are injected."""
+
+    # Time to first token; None uses the recorded value
+    ttft: Optional[Distribution] = None
+    # Completion tokens per second after the first token; None uses the recording
+    tokens_per_second: Optional[float] = None
+    # Completion tokens per streamed chunk when chunks are simulated
+    chunk_tokens: int = 8
+    # Probability of each fault in FAULTS per request
+    error_rates: Dict[str, float] = field(default_factory=dict)
+    # Multiplier on every delay (0 replays instantly)
+    time_scale: float = 1.0
+    # How long an injected server-side timeout hangs before answering
+    timeout_seconds: float = 65.0
+    seed: Optional[int] = None
+
+    def __post_init__(self):
+        self.ttft = Distribution.parse(self.ttft)
+        self.error_rates = {str(fault): float(rate) for fault, rate in self.error_rates.items()}
+        unknown = set(self.error_rates) - set(FAULTS)
+        if unknown:
+            raise ValueError(f"Unknown faults {sorted(unknown)}; expected some of {FAULTS}")
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "ReplayProfile":
+        """Build a profile from plain configuration values."""
+        return cls(**(data or {}))
+
+
+@dataclass
+class Interaction:
+    """One recorded request and response."""
+
+    key: str
+    model: str
+    content: str
+    usage: Dict[str, Any] = field(default_factory=dict)
+    latency: float = 0.0
+    ttft: Optional[float] = None
+    # [characters, seconds since the previous chunk] per streamed chunk
+    chunks: Optional[List[List[float]]] = None
+
+    def to_json(self) -> str:
+        return json.dumps({k: v for k, v in asdict(self).items() if v is not None}, ensure_ascii=False)
+
+
+class Cassette:
+    """Recorded interactions, optionally backed by a JSONL file."""
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        """
+        Initialize the cassette.
+
+        Args:
+            path: JSONL file to load from and append recordings to
+        """
+        self.path = Path(path) if path else None
+        self.interactions: Dict[str, List[Interaction]] = {}
+        self._positions: Dict[str, int] = {}
+        if self.path and self.path.exists():
+            self._load()
+
+    def __len__(self) -> int:
+        return sum(len(items) for items in self.interactions.values())
+
+    def _load(self) -> None:
+        with self.path.open(encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    self._add(Interaction(**json.loads(line)))
+        logger.info(f"Loaded {len(self)} recorded interactions from {self.path}")
+
+    def _add(self, interaction: Interaction) -> None:
+        self.interactions.setdefault(interaction.key, []).append(interaction)
+
+    def get(self, key: str) -> Optional[Interaction]:
+        """
+        Next recorded interaction for ``key``.
+
+        Repeated identical requests replay their recordings in order and
+        start over once all have been used.
+        """
+        items = self.interactions.get(key)
+        if not items:
+            return None
+        position = self._positions.get(key, 0)
+        self._positions[key] = position + 1
+        return items[position % len(items)]
+
+    def record(self, interaction: Interaction) -> None:
+        """Add an interaction and append it to the file."""
+        self._add(interaction)
+        if self.path:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(interaction.to_json() + "\n")
+
+
+class Replayer:
+    """Answers requests from a cassette, shaped by a profile."""
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        profile: Optional[ReplayProfile] = None,
+        on_miss: str = "error",
+        synthetic_tokens: int = 200
+    ):
+        """
+        Initialize the replayer.
+
+        Args:
+            cassette: Recorded interactions
+            profile: Timing and fault profile
+            on_miss: ``error`` raises ReplayMiss for unrecorded requests,
+                ``synthesize`` answers them with deterministic filler text
+            synthetic_tokens: Length of synthesized answers
+        """
+        if on_miss not in ("error", "synthesize"):
+            raise ValueError(f"on_miss must be 'error' or 'synthesize', not {on_miss!r}")
+        self.cassette = cassette
+        self.profile = profile or ReplayProfile()
+        self.on_miss = on_miss
+        self.synthetic_tokens = synthetic_tokens
+        self.rng = random.Random(self.profile.seed)
+
+        self.stats: Dict[str, Any] = {
+            "replayed": 0,
+            "synthesized": 0,
+            "misses": 0,
+            "tokens_served": 0,
+            "faults": {fault: 0 for fault in FAULTS},
+        }
+
+    def resolve(self, key: str, model: str, prompt_text: str) -> Interaction:
+        """
+        Interaction answering the request with ``key``.
+
+        Raises:
+            ReplayMiss: If nothing is recorded and ``on_miss`` is ``error``
+        """
+        interaction = self.cassette.get(key)
+        if interaction is not None:
+            self.stats["replayed"] += 1
+        elif self.on_miss == "error":
+            self.stats["misses"] += 1
+            raise ReplayMiss(f"No recorded interaction for request {key}")
+        else:
+            self.stats["synthesized"] += 1
+            interaction = self._synthesize(key, model, prompt_text)
+        self.stats["tokens_served"] += interaction.usage.get("total_tokens", 0)
+        return interaction
+
+    def _synthesize(self, key: str, model: str, prompt_text: str) -> Interaction:
+        words = [f"token{i % 10}" for i in range(self.synthetic_tokens)]
+        content = f"[replay {key}] " + " ".join(words)
+        prompt_tokens = estimate_tokens(prompt_text)
+        completion_tokens = estimate_tokens(content)
+        return Interaction(
+            key=key,
+            model=model,
+            content=content,
+            usage={
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        )
+
+    def fault(self) -> Optional[str]:
+        """Draw the fault to inject into the next request, if any."""
+        for fault in FAULTS:
+            rate = self.profile.error_rates.get(fault, 0.0)
+            if rate and self.rng.random() < rate:
+                self.stats["faults"][fault] += 1
+                return fault
+        return None
+
+    def timeline(self, interaction: Interaction) -> Tuple[float, List[Tuple[str, float]]]:
+        """
+        Time to first token and (text, delay before it) for every chunk.
+
+        Delays follow the profile's token rate when set, then the recorded
+        chunk timing, then the recorded latency spread evenly over simulated
+        chunks; every delay is multiplied by the profile's ``time_scale``.
+        """
+        profile = self.profile
+        content = interaction.content
+        if profile.ttft is not None:
+            ttft = profile.ttft.sample(self.rng)
+        elif interaction.ttft is not None:
+            ttft = interaction.ttft
+        else:
+            ttft = interaction.latency / 2
+
+        if interaction.chunks and profile.tokens_per_second is None:
+            chunks, start = [], 0
+            for i, (size, delay) in enumerate(interaction.chunks):
+                size = int(size)
+                chunks.append((content[start:start + size], 0.0 if i == 0 else delay))
+                start += size
+            if start < len(content):
+                chunks.append((content[start:], 0.0))
+        else:
+            size = max(1, profile.chunk_tokens * 4)
+            pieces = [content[i:i + size] for i in range(0, len(content), size)] or [""]
+            if profile.tokens_per_second:
+                delay = profile.chunk_tokens / profile.tokens_per_second
+            else:
+                delay = max(interaction.latency - ttft, 0.0) / max(len(pieces) - 1, 1)
+            chunks = [(piece, 0.0 if i == 0 else delay) for i, piece in enumerate(pieces)]
+
+        scale = profile.time_scale
+        return ttft * scale, [(text, delay * scale) for text, delay in chunks]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get replay statistics.
+
+        Returns:
+            Replayed, synthesized and missed requests and injected faults
+        """
+        return {**self.stats, "faults": dict(self.stats["faults"]), "recorded": len(self.cassette)}
+
+
+def fault_error(fault: str, url: str) -> Exception:
+    """
+    Exception a provider call raises for an injected fault.
+
+    Matches what the HTTP providers raise: ``httpx.HTTPStatusError`` from
+    ``raise_for_status`` for error statuses and ``httpx.ReadTimeout``.
+    """
+    request = httpx.Request("POST", url)
+    if fault == "timeout":
+        return httpx.ReadTimeout("Injected timeout", request=request)
+    status = int(fault)
+    headers = {"Retry-After": "1"} if status == 429 else {}
+    response = httpx.Response(status, headers=headers, json={"error": {"message": f"Injected {status}"}}, request=request)
+    return httpx.HTTPStatusError(f"Injected HTTP {status}", request=request, response=response)
@@ -6,13 +6,17 @@ from resoftai.models.task import Task
 from resoftai.models.file import File, FileVersion
 from resoftai.models.llm_config import LLMConfigModel
 from resoftai.models.log import Log
+from resoftai.models.ai_analysis import CodeIssueModel, CodeReview, PredictiveAnalysis, MultiModelExecution
 from resoftai.models.performance_metrics import (
     WorkflowMetrics,
     AgentPerformance,
     SystemMetrics,
+    SystemMetricsRollup,
     LLMUsageMetrics,
     PerformanceAlert
 )
+from resoftai.models.popularity import PopularityDaily
+from resoftai.models.recommendation import RecommendationSnapshot
 
 __all__ = [
     "User",
@@ -23,9 +27,16 @@ __all__ = [
     "FileVersion",
     "LLMConfigModel",
     "Log",
+    "CodeIssueModel",
+    "CodeReview",
+    "PredictiveAnalysis",
+    "MultiModelExecution",
     "WorkflowMetrics",
     "AgentPerformance",
     "SystemMetrics",
+    "SystemMetricsRollup",
     "LLMUsageMetrics",
     "PerformanceAlert",
+    "PopularityDaily",
+    "RecommendationSnapshot",
 ]
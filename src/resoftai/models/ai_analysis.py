@@ -4,7 +4,7 @@ from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
 
-from resoftai.db.base import Base
+from resoftai.db import Base
 
 
 class AnalysisType(str, enum.Enum):
@@ -143,7 +143,8 @@ class MultiModelExecution(Base):
 
     # Model Responses
     individual_responses = Column(JSON)  # List of response objects
-    metadata = Column(JSON)
+    # "metadata" is reserved on declarative classes; the column keeps its name
+    execution_metadata = Column("metadata", JSON)
 
     created_at = Column(DateTime, default=datetime.utcnow)
 
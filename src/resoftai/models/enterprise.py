@@ -352,7 +352,8 @@ class UsageRecord(Base):
     project_id = Column(Integer, ForeignKey("projects.id", ondelete="SET NULL"), nullable=True)
 
     # Metadata
-    metadata = Column(JSON, nullable=True)  # Additional context (e.g., LLM model used)
+    # "metadata" is reserved on declarative classes, so the column is mapped under another name
+    usage_metadata = Column("metadata", JSON, nullable=True)  # Additional context (e.g., LLM model used)
 
     # Timestamps
     recorded_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
@@ -369,6 +370,30 @@ class UsageRecord(Base):
         return f"<UsageRecord(org_id={self.organization_id}, resource='{self.resource_type}', amount={self.amount})>"
 
 
+class QuotaCounter(Base):
+    """
+    Running usage total of a quota for one period
+
+    One row per quota and period bucket (e.g. "20261018" for a daily quota,
+    "total" for a quota without period), so checking a quota reads a single
+    row instead of summing usage records.
+    """
+    __tablename__ = "quota_counters"
+
+    id = Column(Integer, primary_key=True, index=True)
+    quota_id = Column(Integer, ForeignKey("quotas.id", ondelete="CASCADE"), nullable=False)
+    period_key = Column(String(20), nullable=False)
+    used = Column(BigInteger, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint('quota_id', 'period_key', name='uq_quota_counter_period'),
+    )
+
+    def __repr__(self):
+        return f"<QuotaCounter(quota_id={self.quota_id}, period='{self.period_key}', used={self.used})>"
+
+
 # =============================================================================
 # Audit Logging
 # =============================================================================
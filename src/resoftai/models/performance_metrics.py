@@ -1,7 +1,7 @@
 """Performance metrics models for enhanced monitoring."""
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import String, Text, Integer, Float, DateTime, ForeignKey, JSON, Index
+from sqlalchemy import String, Text, Integer, Float, DateTime, ForeignKey, JSON, Index, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from resoftai.db import Base
@@ -175,6 +175,37 @@ class SystemMetrics(Base):
         return f"<SystemMetrics(id={self.id}, timestamp='{self.timestamp}', active_workflows={self.active_workflows})>"
 
 
+class SystemMetricsRollup(Base):
+    """Pre-aggregated system metrics at a fixed resolution (1m/5m/1h/1d)."""
+
+    __tablename__ = "system_metrics_rollups"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    metric_name: Mapped[str] = mapped_column(String(100), nullable=False)
+    resolution: Mapped[str] = mapped_column(String(10), nullable=False)  # 1m, 5m, 1h, 1d
+    bucket_start: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    # Aggregates
+    sample_count: Mapped[int] = mapped_column(Integer, default=0)
+    min_value: Mapped[float] = mapped_column(Float, nullable=False)
+    max_value: Mapped[float] = mapped_column(Float, nullable=False)
+    sum_value: Mapped[float] = mapped_column(Float, nullable=False)
+    p95_value: Mapped[float] = mapped_column(Float, nullable=False)
+
+    __table_args__ = (
+        # Also serves range scans by (metric, resolution, time)
+        UniqueConstraint('metric_name', 'resolution', 'bucket_start', name='uq_rollup_bucket'),
+    )
+
+    @property
+    def avg_value(self) -> float:
+        """Mean value over the bucket."""
+        return self.sum_value / self.sample_count if self.sample_count else 0.0
+
+    def __repr__(self) -> str:
+        return f"<SystemMetricsRollup(metric='{self.metric_name}', resolution='{self.resolution}', bucket='{self.bucket_start}')>"
+
+
 class LLMUsageMetrics(Base):
     """Track LLM usage for billing and optimization."""
 
@@ -192,6 +223,9 @@ class LLMUsageMetrics(Base):
     prompt_tokens: Mapped[int] = mapped_column(Integer, default=0)
     completion_tokens: Mapped[int] = mapped_column(Integer, default=0)
     total_tokens: Mapped[int] = mapped_column(Integer, default=0)
+    # Prompt tokens read from the provider's prompt cache, and written to it
+    cached_prompt_tokens: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    cache_write_tokens: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
 
     # Cost estimation (if available)
     estimated_cost_usd: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
@@ -0,0 +1,27 @@
+"""Popularity counter models for marketplace trending."""
+from datetime import date
+from sqlalchemy import String, Integer, Date, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from resoftai.db import Base
+
+
+class PopularityDaily(Base):
+    """Per-day activity counts for a marketplace item (downloads, installs, views)."""
+
+    __tablename__ = "popularity_daily"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    target: Mapped[str] = mapped_column(String(50), nullable=False)  # plugin, template, ...
+    metric: Mapped[str] = mapped_column(String(50), nullable=False)  # counter column name
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+    item_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        # Leading columns match the trending query: target/metric/day range, grouped by item
+        UniqueConstraint('target', 'metric', 'day', 'item_id', name='uq_popularity_daily'),
+    )
+
+    def __repr__(self) -> str:
+        return f"<PopularityDaily(target='{self.target}', item_id={self.item_id}, metric='{self.metric}', day='{self.day}', count={self.count})>"
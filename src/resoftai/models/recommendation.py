@@ -0,0 +1,36 @@
+"""Precomputed marketplace recommendation and trending snapshots."""
+from datetime import datetime
+from typing import List
+from sqlalchemy import String, Integer, DateTime, JSON, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from resoftai.db import Base
+
+
+class RecommendationSnapshot(Base):
+    """
+    A precomputed ranked list of marketplace item ids.
+
+    ``kind`` is one of:
+        similar  - items co-installed with item ``key_id``
+        user     - personalized recommendations for user ``key_id``
+        trending - time-decayed trending items over a ``key_id``-day window
+    """
+
+    __tablename__ = "recommendation_snapshots"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    target: Mapped[str] = mapped_column(String(50), nullable=False)  # plugin, template, ...
+    kind: Mapped[str] = mapped_column(String(20), nullable=False)
+    key_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    item_ids: Mapped[List[int]] = mapped_column(JSON, nullable=False)
+    scores: Mapped[List[float]] = mapped_column(JSON, nullable=False)
+    computed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        # Every read is a single lookup on this key
+        UniqueConstraint('target', 'kind', 'key_id', name='uq_recommendation_snapshot'),
+    )
+
+    def __repr__(self) -> str:
+        return f"<RecommendationSnapshot(target='{self.target}', kind='{self.kind}', key_id={self.key_id}, items={len(self.item_ids or [])})>"
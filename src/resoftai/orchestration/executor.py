@@ -1,7 +1,7 @@
 """Project execution service."""
 import asyncio
 import logging
-from typing import Dict, Optional
+from typing import Dict, Optional, Type
 from datetime import datetime
 from pathlib import Path
 
@@ -26,6 +26,9 @@ class ProjectExecutor:
     # Class-level registry of running executors
     _running_executors: Dict[int, 'ProjectExecutor'] = {}
 
+    # Orchestrator created by start()
+    orchestrator_class: Type[WorkflowOrchestrator] = WorkflowOrchestrator
+
     def __init__(
         self,
         project: Project,
@@ -62,7 +65,8 @@ class ProjectExecutor:
             project_id=project.id,
             requirements=project.requirements,
             llm_config=self.llm_config,
-            output_directory=str(output_dir)
+            output_directory=str(output_dir),
+            owner_id=project.user_id
         )
 
         # Create orchestrator
@@ -171,7 +175,7 @@ class ProjectExecutor:
         )
 
         # Create orchestrator
-        self.orchestrator = WorkflowOrchestrator(self.workflow_config)
+        self.orchestrator = self.orchestrator_class(self.workflow_config)
 
         # Start execution task
         self.execution_task = asyncio.create_task(self._execute_workflow())
@@ -21,6 +21,7 @@ from pathlib import Path
 from resoftai.core.message_bus import MessageBus
 from resoftai.core.state import ProjectState
 from resoftai.core.agent import AgentRole
+from resoftai.core.agent_runtime import AgentRuntime
 from resoftai.agents import (
     ProjectManagerAgent,
     RequirementsAnalystAgent,
@@ -109,6 +110,9 @@ class OptimizedWorkflowConfig:
     # Parallel execution
     max_parallel_agents: int = 3
 
+    # Project owner; only projects of the same owner share semantic cache entries
+    owner_id: Optional[int] = None
+
 
 class AgentResultCache:
     """Cache for agent execution results to avoid redundant LLM calls."""
@@ -283,10 +287,15 @@ class OptimizedWorkflowOrchestrator:
         """Initialize optimized workflow orchestrator."""
         self.config = config
         self.message_bus = MessageBus()
+        # Agents bill their LLM usage to the project and its owner
+        metadata = {"project_id": config.project_id, "user_id": config.owner_id}
+        if config.owner_id is not None:
+            metadata["owner"] = f"user:{config.owner_id}"
         self.project_state = ProjectState(
             name=f"Project {config.project_id}",
             description=config.requirements,
-            requirements={"raw_text": config.requirements}
+            requirements={"raw_text": config.requirements},
+            metadata=metadata
         )
 
         # Initialize agents
@@ -308,47 +317,24 @@ class OptimizedWorkflowOrchestrator:
 
         logger.info(f"Optimized workflow orchestrator initialized for project {config.project_id}")
 
-    def _initialize_agents(self) -> Dict[AgentRole, Any]:
-        """Initialize all agents."""
-        agents = {
-            AgentRole.PROJECT_MANAGER: ProjectManagerAgent(
-                self.message_bus,
-                self.project_state,
-                self.config.llm_config
-            ),
-            AgentRole.REQUIREMENT_ANALYST: RequirementsAnalystAgent(
-                self.message_bus,
-                self.project_state,
-                self.config.llm_config
-            ),
-            AgentRole.ARCHITECT: ArchitectAgent(
-                self.message_bus,
-                self.project_state,
-                self.config.llm_config
-            ),
-            AgentRole.UI_DESIGNER: UXUIDesignerAgent(
-                self.message_bus,
-                self.project_state,
-                self.config.llm_config
-            ),
-            AgentRole.DEVELOPER: DeveloperAgent(
-                self.message_bus,
-                self.project_state,
-                self.config.llm_config
-            ),
-            AgentRole.TEST_ENGINEER: TestEngineerAgent(
-                self.message_bus,
-                self.project_state,
-                self.config.llm_config
-            ),
-            AgentRole.QA_ENGINEER: QualityExpertAgent(
-                self.message_bus,
-                self.project_state,
-                self.config.llm_config
-            )
-        }
+    def _initialize_agents(self) -> AgentRuntime:
+        """Register the agents; each is created when first needed."""
+        agents = AgentRuntime(
+            self.message_bus,
+            self.project_state,
+            self.config.llm_config,
+            agent_classes={
+                AgentRole.PROJECT_MANAGER: ProjectManagerAgent,
+                AgentRole.REQUIREMENTS_ANALYST: RequirementsAnalystAgent,
+                AgentRole.ARCHITECT: ArchitectAgent,
+                AgentRole.UXUI_DESIGNER: UXUIDesignerAgent,
+                AgentRole.DEVELOPER: DeveloperAgent,
+                AgentRole.TEST_ENGINEER: TestEngineerAgent,
+                AgentRole.QUALITY_EXPERT: QualityExpertAgent,
+            },
+        )
 
-        logger.info(f"Initialized {len(agents)} agents")
+        logger.info(f"Registered {len(agents)} agents")
         return agents
 
     async def execute(self, resume_from_checkpoint: bool = False) -> bool:
@@ -490,7 +476,7 @@ class OptimizedWorkflowOrchestrator:
     async def _run_requirement_analysis(self):
         """Run requirement analysis agents."""
         pm = self.agents[AgentRole.PROJECT_MANAGER]
-        analyst = self.agents[AgentRole.REQUIREMENT_ANALYST]
+        analyst = self.agents[AgentRole.REQUIREMENTS_ANALYST]
 
         await pm.process()
         await analyst.process()
@@ -536,7 +522,7 @@ class OptimizedWorkflowOrchestrator:
 
     async def _run_ui_design(self):
         """Run UI design agent."""
-        designer = self.agents[AgentRole.UI_DESIGNER]
+        designer = self.agents[AgentRole.UXUI_DESIGNER]
         await designer.process()
 
     async def _execute_development(self):
@@ -593,7 +579,7 @@ class OptimizedWorkflowOrchestrator:
 
     async def _run_qa_review(self):
         """Run QA review with developer feedback."""
-        qa = self.agents[AgentRole.QA_ENGINEER]
+        qa = self.agents[AgentRole.QUALITY_EXPERT]
         developer = self.agents[AgentRole.DEVELOPER]
 
         iteration = 0
@@ -634,8 +620,8 @@ class OptimizedWorkflowOrchestrator:
             "progress_percentage": int((completed_stages / total_stages) * 100),
             "stage_history": [s.value for s in self.stage_history],
             "errors": self.errors,
-            "total_tokens": sum(agent.total_tokens for agent in self.agents.values()),
-            "total_requests": sum(agent.requests_count for agent in self.agents.values()),
+            "total_tokens": sum(agent.total_tokens for agent in self.agents.instantiated().values()),
+            "total_requests": sum(agent.requests_count for agent in self.agents.instantiated().values()),
             "stage_timings": self.stage_timings,
             "total_time_seconds": total_time,
             "cache_stats": {
@@ -8,6 +8,7 @@ from enum import Enum
 from resoftai.core.message_bus import MessageBus
 from resoftai.core.state import ProjectState
 from resoftai.core.agent import AgentRole
+from resoftai.core.agent_runtime import AgentRuntime
 from resoftai.agents import (
     ProjectManagerAgent,
     RequirementsAnalystAgent,
@@ -50,6 +51,9 @@ class WorkflowConfig:
     test_framework: str = "pytest"
     code_style: str = "pep8"
 
+    # Project owner; only projects of the same owner share semantic cache entries
+    owner_id: Optional[int] = None
+
 
 class WorkflowOrchestrator:
     """Orchestrates multi-agent workflow for software development."""
@@ -62,10 +66,15 @@ class WorkflowOrchestrator:
         """
         self.config = config
         self.message_bus = MessageBus()
+        # Agents bill their LLM usage to the project and its owner
+        metadata = {"project_id": config.project_id, "user_id": config.owner_id}
+        if config.owner_id is not None:
+            metadata["owner"] = f"user:{config.owner_id}"
         self.project_state = ProjectState(
             name=f"Project {config.project_id}",
             description=config.requirements,
-            requirements={"raw_text": config.requirements}
+            requirements={"raw_text": config.requirements},
+            metadata=metadata
         )
 
         # Initialize agents
@@ -78,51 +87,28 @@ class WorkflowOrchestrator:
 
         logger.info(f"Workflow orchestrator initialized for project {config.project_id}")
 
-    def _initialize_agents(self) -> Dict[AgentRole, Any]:
-        """Initialize all agents.
+    def _initialize_agents(self) -> AgentRuntime:
+        """Register the agents; each is created when first needed.
 
         Returns:
-            Dictionary mapping agent roles to agent instances
+            Runtime mapping agent roles to agent instances
         """
-        agents = {
-            AgentRole.PROJECT_MANAGER: ProjectManagerAgent(
-                self.message_bus,
-                self.project_state,
-                self.config.llm_config
-            ),
-            AgentRole.REQUIREMENT_ANALYST: RequirementsAnalystAgent(
-                self.message_bus,
-                self.project_state,
-                self.config.llm_config
-            ),
-            AgentRole.ARCHITECT: ArchitectAgent(
-                self.message_bus,
-                self.project_state,
-                self.config.llm_config
-            ),
-            AgentRole.UI_DESIGNER: UXUIDesignerAgent(
-                self.message_bus,
-                self.project_state,
-                self.config.llm_config
-            ),
-            AgentRole.DEVELOPER: DeveloperAgent(
-                self.message_bus,
-                self.project_state,
-                self.config.llm_config
-            ),
-            AgentRole.TEST_ENGINEER: TestEngineerAgent(
-                self.message_bus,
-                self.project_state,
-                self.config.llm_config
-            ),
-            AgentRole.QA_ENGINEER: QualityExpertAgent(
-                self.message_bus,
-                self.project_state,
-                self.config.llm_config
-            )
-        }
+        agents = AgentRuntime(
+            self.message_bus,
+            self.project_state,
+            self.config.llm_config,
+            agent_classes={
+                AgentRole.PROJECT_MANAGER: ProjectManagerAgent,
+                AgentRole.REQUIREMENTS_ANALYST: RequirementsAnalystAgent,
+                AgentRole.ARCHITECT: ArchitectAgent,
+                AgentRole.UXUI_DESIGNER: UXUIDesignerAgent,
+                AgentRole.DEVELOPER: DeveloperAgent,
+                AgentRole.TEST_ENGINEER: TestEngineerAgent,
+                AgentRole.QUALITY_EXPERT: QualityExpertAgent,
+            },
+        )
 
-        logger.info(f"Initialized {len(agents)} agents")
+        logger.info(f"Registered {len(agents)} agents")
         return agents
 
     async def execute(self) -> bool:
@@ -206,7 +192,7 @@ class WorkflowOrchestrator:
     async def _run_requirement_analysis(self):
         """Run requirement analysis stage."""
         pm = self.agents[AgentRole.PROJECT_MANAGER]
-        analyst = self.agents[AgentRole.REQUIREMENT_ANALYST]
+        analyst = self.agents[AgentRole.REQUIREMENTS_ANALYST]
 
         # PM initializes project
         await pm.process()
@@ -227,7 +213,7 @@ class WorkflowOrchestrator:
 
     async def _run_ui_design(self):
         """Run UI design stage."""
-        designer = self.agents[AgentRole.UI_DESIGNER]
+        designer = self.agents[AgentRole.UXUI_DESIGNER]
 
         # Designer creates UI/UX designs
         await designer.process()
@@ -279,7 +265,7 @@ class WorkflowOrchestrator:
 
     async def _run_qa_review(self):
         """Run QA review stage."""
-        qa = self.agents[AgentRole.QA_ENGINEER]
+        qa = self.agents[AgentRole.QUALITY_EXPERT]
         developer = self.agents[AgentRole.DEVELOPER]
 
         # QA reviews the project
@@ -316,8 +302,8 @@ class WorkflowOrchestrator:
             "progress_percentage": int((completed_stages / total_stages) * 100),
             "stage_history": [s.value for s in self.stage_history],
             "errors": self.errors,
-            "total_tokens": sum(agent.total_tokens for agent in self.agents.values()),
-            "total_requests": sum(agent.requests_count for agent in self.agents.values())
+            "total_tokens": sum(agent.total_tokens for agent in self.agents.instantiated().values()),
+            "total_requests": sum(agent.requests_count for agent in self.agents.instantiated().values())
         }
 
     def get_artifacts(self) -> Dict[str, Any]:
@@ -0,0 +1,462 @@
+"""
+Audit Pipeline
+
+Write-behind audit logging.
+
+Audited requests call ``record``, which only appends the event to a bounded
+in-memory queue. A background task writes queued events in batches - a
+multi-row INSERT, or COPY when running on PostgreSQL with asyncpg - when the
+batch size is reached or the flush interval elapses.
+
+Delivery is at-least-once: a batch that cannot be written in time (slow or
+unavailable database), and any event arriving while the queue is full, is
+appended to a local JSONL spill file. The spill file is replayed after the
+next successful write, so an event can be stored twice if the process dies
+mid-replay, but it is never dropped.
+
+A batch the database rejects (constraint or data error) is retried one event
+at a time; events that are still rejected go to a ``.rejected`` file instead
+of blocking the batches behind them.
+
+Every process spills to its own file (the process id is appended to
+``spill_path``), so workers sharing a spill directory never write to the same
+file. Files left by processes that are no longer running are adopted and
+replayed by the next worker that replays its own.
+"""
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import threading
+import uuid
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+
+from resoftai.db import AsyncSessionLocal
+from resoftai.models.enterprise import AuditAction, AuditLog
+from resoftai.services.periodic import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+# Every event carries every column, so batches can be inserted as one statement
+AUDIT_COLUMNS = (
+    "user_id", "organization_id", "action", "resource_type", "resource_id",
+    "description", "changes", "ip_address", "user_agent", "session_id",
+    "success", "error_message", "created_at",
+)
+
+
+def _is_rejected(error: Exception) -> bool:
+    """Whether the database refused the rows themselves (SQLSTATE class 22 or 23), not the request."""
+    if isinstance(error, (IntegrityError, DataError)):
+        return True
+    sqlstate = getattr(error, "sqlstate", None) or getattr(getattr(error, "orig", None), "sqlstate", None)
+    return isinstance(sqlstate, str) and sqlstate[:2] in ("22", "23")
+
+
+def _process_alive(pid: int) -> bool:
+    """Whether process ``pid`` is running. Assumed so where it cannot be probed safely."""
+    if pid == os.getpid() or os.name == "nt":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _to_action(action: Union[AuditAction, str]) -> AuditAction:
+    """Accept enum members, member names ("CREATE") and values ("create")."""
+    if isinstance(action, AuditAction):
+        return action
+    try:
+        return AuditAction[action.upper()]
+    except KeyError:
+        return AuditAction(action)
+
+
+class AuditPipeline:
+    """
+    Buffered, batched audit log writer
+    """
+
+    def __init__(
+        self,
+        max_queue: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 2.0,
+        write_timeout: float = 5.0,
+        spill_path: Optional[Path] = None,
+        use_copy: bool = True,
+        session_factory=AsyncSessionLocal
+    ):
+        """
+        Initialize audit pipeline.
+
+        Args:
+            max_queue: Events held in memory before new ones go to the spill file
+            batch_size: Queued events that trigger an early flush (and rows per write)
+            flush_interval: Seconds between flushes
+            write_timeout: Seconds a batch write may take before it is spilled
+            spill_path: JSONL file for events that could not be written
+            use_copy: Use COPY instead of INSERT on PostgreSQL/asyncpg
+            session_factory: Factory for database sessions
+        """
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.write_timeout = write_timeout
+        self.spill_path = Path(spill_path or Path(tempfile.gettempdir()) / "resoftai-audit-spill.jsonl")
+        self.use_copy = use_copy
+        self.session_factory = session_factory
+        self._queue: Deque[Dict[str, Any]] = deque()
+        # Events that arrived while the queue was full, waiting to be spilled
+        self._overflow: List[Dict[str, Any]] = []
+        self._overflow_task: Optional[asyncio.Task] = None
+        self._spill_lock = threading.Lock()
+        self._flush_lock = asyncio.Lock()
+        self._flusher = PeriodicTask(self.flush, flush_interval, "audit flush", run_on_stop=True)
+        self.stats = {
+            "enqueued": 0,
+            "written": 0,
+            "spilled": 0,
+            "replayed": 0,
+            "flushes": 0,
+            "failed_writes": 0,
+            "rejected": 0,
+            # Age of the oldest event of the last written batch
+            "flush_lag_seconds": 0.0,
+            "max_flush_lag_seconds": 0.0,
+        }
+
+    def record(
+        self,
+        action: Union[AuditAction, str],
+        resource_type: str,
+        resource_id: Optional[int] = None,
+        user_id: Optional[int] = None,
+        organization_id: Optional[int] = None,
+        description: Optional[str] = None,
+        changes: Optional[Dict[str, Any]] = None,
+        ip_address: Optional[str] = None,
+        user_agent: Optional[str] = None,
+        session_id: Optional[str] = None,
+        success: bool = True,
+        error_message: Optional[str] = None
+    ):
+        """
+        Queue an audit event. Never waits for the database.
+
+        Takes the same fields as ``crud.enterprise.create_audit_log``.
+        """
+        event = {
+            "user_id": user_id,
+            "organization_id": organization_id,
+            "action": _to_action(action),
+            "resource_type": resource_type,
+            "resource_id": resource_id,
+            "description": description,
+            "changes": changes,
+            "ip_address": ip_address,
+            "user_agent": user_agent,
+            "session_id": session_id,
+            "success": success,
+            "error_message": error_message,
+            "created_at": datetime.utcnow(),
+        }
+        self.stats["enqueued"] += 1
+
+        if len(self._queue) >= self.max_queue:
+            # Memory stays bounded; the event is replayed from disk later
+            self._overflow.append(event)
+            self._schedule_overflow_spill()
+        else:
+            self._queue.append(event)
+
+        if len(self._queue) >= self.batch_size:
+            self._flusher.wake()
+
+    async def flush(self) -> int:
+        """
+        Write all queued events, then replay the spill file if the write worked.
+
+        Returns:
+            Number of events written to the database
+        """
+        if self._overflow_task is not None and not self._overflow_task.done():
+            await asyncio.shield(self._overflow_task)
+        async with self._flush_lock:
+            written = 0
+            healthy = True
+
+            while self._queue:
+                batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+                batch_written, ok = await self._write_or_spill(batch)
+                written += batch_written
+                if not ok:
+                    healthy = False
+                    # Spill the rest too rather than wait on a struggling database
+                    rest = list(self._queue)
+                    self._queue.clear()
+                    if rest:
+                        await asyncio.to_thread(self._spill, rest)
+                    break
+
+            if healthy:
+                written += await self._replay_spill()
+
+            if written:
+                self.stats["flushes"] += 1
+            return written
+
+    def _schedule_overflow_spill(self):
+        """Spill overflowing events in a worker thread, or right away outside an event loop."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            events, self._overflow = self._overflow, []
+            self._spill(events)
+            return
+        if self._overflow_task is None or self._overflow_task.done():
+            self._overflow_task = loop.create_task(self._spill_overflow())
+
+    async def _spill_overflow(self):
+        while self._overflow:
+            events, self._overflow = self._overflow, []
+            await asyncio.to_thread(self._spill, events)
+
+    async def _write_batch(self, batch: List[Dict[str, Any]]) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Write a batch, isolating events the database rejects.
+
+        Returns:
+            Number of events written and the events left unwritten because
+            the database failed or did not answer in time
+        """
+        try:
+            await asyncio.wait_for(self._write(batch), timeout=self.write_timeout)
+            return len(batch), []
+        except Exception as e:
+            self.stats["failed_writes"] += 1
+            if not _is_rejected(e):
+                logger.warning(f"Audit write of {len(batch)} events failed: {e!r}")
+                return 0, batch
+            logger.warning(f"Audit batch of {len(batch)} events rejected, retrying one by one: {e!r}")
+
+        written = 0
+        rejected = []
+        for index, event in enumerate(batch):
+            try:
+                await asyncio.wait_for(self._write([event]), timeout=self.write_timeout)
+                written += 1
+            except Exception as e:
+                if not _is_rejected(e):
+                    self.stats["failed_writes"] += 1
+                    logger.warning(f"Audit write failed: {e!r}")
+                    await asyncio.to_thread(self._quarantine, rejected)
+                    return written, batch[index:]
+                logger.error(f"Audit event rejected by the database, quarantined: {e!r}")
+                rejected.append(event)
+        await asyncio.to_thread(self._quarantine, rejected)
+        return written, []
+
+    async def _write_or_spill(self, batch: List[Dict[str, Any]]) -> Tuple[int, bool]:
+        """Write a batch and spill what could not be written; returns (written, all handled)."""
+        written, unwritten = await self._write_batch(batch)
+        if written:
+            lag = (datetime.utcnow() - min(event["created_at"] for event in batch)).total_seconds()
+            self.stats["written"] += written
+            self.stats["flush_lag_seconds"] = lag
+            self.stats["max_flush_lag_seconds"] = max(self.stats["max_flush_lag_seconds"], lag)
+        if unwritten:
+            logger.warning(f"Spilling {len(unwritten)} audit events to disk")
+            await asyncio.to_thread(self._spill, unwritten)
+            return written, False
+        return written, True
+
+    async def _write(self, batch: List[Dict[str, Any]]):
+        async with self.session_factory() as session:
+            conn = await session.connection()
+            if self.use_copy and conn.dialect.name == "postgresql" and conn.dialect.driver == "asyncpg":
+                raw = await conn.get_raw_connection()
+                await raw.driver_connection.copy_records_to_table(
+                    AuditLog.__tablename__,
+                    records=[self._copy_row(event) for event in batch],
+                    columns=AUDIT_COLUMNS
+                )
+            else:
+                # Core insert: a plain executemany that needs no ORM mapper setup
+                await session.execute(insert(AuditLog.__table__), batch)
+            await session.commit()
+
+    @staticmethod
+    def _copy_row(event: Dict[str, Any]) -> tuple:
+        """Column values as asyncpg expects them (enum by name, JSON as text)."""
+        row = dict(event, action=event["action"].name)
+        if row["changes"] is not None:
+            row["changes"] = json.dumps(row["changes"])
+        return tuple(row[column] for column in AUDIT_COLUMNS)
+
+    def _owned_path(self, kind: str = "") -> Path:
+        """Path of this process's ``kind`` file; the owner's pid is always the last suffix."""
+        infix = f".{kind}" if kind else ""
+        return self.spill_path.with_name(f"{self.spill_path.name}{infix}.{os.getpid()}")
+
+    @property
+    def _spill_file(self) -> Path:
+        return self._owned_path()
+
+    @property
+    def _replay_path(self) -> Path:
+        return self._owned_path("replay")
+
+    @property
+    def _rejected_path(self) -> Path:
+        return self._owned_path("rejected")
+
+    @staticmethod
+    def _dump(event: Dict[str, Any]) -> str:
+        return json.dumps(
+            dict(event, action=event["action"].name, created_at=event["created_at"].isoformat()),
+            default=str
+        )
+
+    def _append(self, path: Path, events: List[Dict[str, Any]]):
+        lines = [self._dump(event) for event in events]
+        with self._spill_lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _spill(self, events: List[Dict[str, Any]]):
+        if events:
+            self._append(self._spill_file, events)
+            self.stats["spilled"] += len(events)
+
+    def _quarantine(self, events: List[Dict[str, Any]]):
+        if events:
+            self._append(self._rejected_path, events)
+            self.stats["rejected"] += len(events)
+
+    def _adopt_orphans(self):
+        """Take over spill and replay files of processes that are no longer running."""
+        prefix = self.spill_path.name + "."
+        # Files written before spill files were per process
+        legacy = [self.spill_path, self.spill_path.with_name(prefix + "replay")]
+        candidates = [path for path in legacy if path.exists()]
+        if self.spill_path.parent.exists():
+            for path in self.spill_path.parent.iterdir():
+                kind, _, owner = path.name[len(prefix):].rpartition(".")
+                if (
+                    path.name.startswith(prefix) and path not in legacy and owner.isdigit()
+                    and kind != "rejected" and not _process_alive(int(owner))
+                ):
+                    candidates.append(path)
+        for path in candidates:
+            try:
+                # Renaming is atomic, so only one worker adopts each file
+                os.replace(path, self._owned_path(f"adopted-{uuid.uuid4().hex[:8]}"))
+            except FileNotFoundError:
+                continue
+            logger.info(f"Adopted audit spill file {path.name}")
+
+    def _claim_spill(self) -> List[Dict[str, Any]]:
+        """Move this process's spill files aside (new spills start a fresh file) and load them."""
+        with self._spill_lock:
+            self._adopt_orphans()
+            # A replay file left by an earlier failed replay goes first
+            if not self._replay_path.exists():
+                adopted = sorted(self.spill_path.parent.glob(f"{self.spill_path.name}.adopted-*.{os.getpid()}"))
+                sources = [path for path in [*adopted, self._spill_file] if path.exists()]
+                if not sources:
+                    return []
+                if sources == [self._spill_file]:
+                    os.replace(self._spill_file, self._replay_path)
+                else:
+                    tmp = self._replay_path.with_name(self._replay_path.name + ".tmp")
+                    with open(tmp, "w", encoding="utf-8") as out:
+                        for source in sources:
+                            text = source.read_text(encoding="utf-8")
+                            out.write(text if not text or text.endswith("\n") else text + "\n")
+                        out.flush()
+                        os.fsync(out.fileno())
+                    os.replace(tmp, self._replay_path)
+                    for source in sources:
+                        source.unlink(missing_ok=True)
+            with open(self._replay_path, encoding="utf-8") as f:
+                lines = f.readlines()
+
+        events = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                # Torn write from a crash; the rest of the file is still good
+                logger.error(f"Skipping unreadable audit spill line: {line[:200]!r}")
+                continue
+            event["action"] = AuditAction[event["action"]]
+            event["created_at"] = datetime.fromisoformat(event["created_at"])
+            events.append(event)
+        return events
+
+    async def _replay_spill(self) -> int:
+        events = await asyncio.to_thread(self._claim_spill)
+        if not events and not self._replay_path.exists():
+            return 0
+
+        replayed = 0
+        for start in range(0, len(events), self.batch_size):
+            batch = events[start:start + self.batch_size]
+            written, unwritten = await self._write_batch(batch)
+            self.stats["written"] += written
+            replayed += written
+            if unwritten:
+                logger.warning("Audit spill replay failed, will retry")
+                # Keep only what is still unwritten for the next attempt
+                await asyncio.to_thread(self._rewrite_replay, unwritten + events[start + len(batch):])
+                self.stats["replayed"] += replayed
+                return replayed
+
+        self._replay_path.unlink(missing_ok=True)
+        self.stats["replayed"] += replayed
+        if events:
+            logger.info(f"Replayed {replayed} spilled audit events")
+        return replayed
+
+    def _rewrite_replay(self, events: List[Dict[str, Any]]):
+        with self._spill_lock:
+            tmp = self._replay_path.with_name(self._replay_path.name + ".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.writelines(self._dump(event) + "\n" for event in events)
+            os.replace(tmp, self._replay_path)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get audit pipeline statistics, including the age of the oldest queued event."""
+        oldest = (datetime.utcnow() - self._queue[0]["created_at"]).total_seconds() if self._queue else 0.0
+        return {**self.stats, "queued": len(self._queue), "oldest_queued_seconds": oldest}
+
+    def start(self):
+        """Start the periodic flush task on the running event loop."""
+        self._flusher.start()
+
+    async def stop(self):
+        """Stop the flush task and flush (or spill) whatever is still queued."""
+        await self._flusher.stop()
+        if self._overflow_task is not None:
+            await self._overflow_task
+            self._overflow_task = None
+
+
+# Global audit pipeline instance
+audit_pipeline = AuditPipeline()
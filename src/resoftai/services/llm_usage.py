@@ -0,0 +1,154 @@
+"""
+LLM Usage Recorder
+
+Write-behind persistence of per-call LLM usage.
+
+Agents call ``record`` after every LLM call; it only appends the usage to a
+bounded in-memory queue, so a slow database never delays a workflow. A
+background task writes queued records with ``create_llm_usage_metrics`` at
+every flush interval, which feeds the usage summaries (including the prompt
+cache hit rate) served by the monitoring API.
+"""
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Optional
+
+from resoftai.crud.performance_metrics import create_llm_usage_metrics
+from resoftai.db import AsyncSessionLocal
+from resoftai.services.periodic import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+
+class LLMUsageRecorder:
+    """
+    Buffered writer of LLMUsageMetrics rows
+    """
+
+    def __init__(
+        self,
+        max_queue: int = 10000,
+        flush_interval: float = 5.0,
+        session_factory=AsyncSessionLocal
+    ):
+        """
+        Initialize usage recorder.
+
+        Args:
+            max_queue: Records held in memory; the oldest are dropped beyond it
+            flush_interval: Seconds between flushes
+            session_factory: Factory for database sessions
+        """
+        self.max_queue = max_queue
+        self.session_factory = session_factory
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self._flush_lock = asyncio.Lock()
+        self._flusher = PeriodicTask(self.flush, flush_interval, "LLM usage flush", run_on_stop=True)
+        self.stats = {
+            "recorded": 0,
+            "written": 0,
+            "dropped": 0,
+            "failed_flushes": 0,
+        }
+
+    def record(
+        self,
+        user_id: Optional[int],
+        provider: str,
+        model: str,
+        usage: Optional[Dict[str, Any]],
+        project_id: Optional[int] = None,
+        agent_role: Optional[str] = None,
+        workflow_stage: Optional[str] = None,
+        response_time_ms: Optional[float] = None
+    ):
+        """
+        Queue the usage of one LLM call. Never waits for the database.
+
+        Calls without a user (e.g. workflows started outside the API) are
+        not recorded, since every usage row belongs to a user.
+
+        Args:
+            user_id: User the call is billed to
+            provider: Provider name
+            model: Model name
+            usage: Usage dict as normalized by ``normalize_usage``
+            project_id: Project the call was made for
+            agent_role: Role of the calling agent
+            workflow_stage: Workflow stage of the project
+            response_time_ms: Duration of the call
+        """
+        if user_id is None:
+            return
+        usage = usage or {}
+        if len(self._queue) >= self.max_queue:
+            self._queue.popleft()
+            self.stats["dropped"] += 1
+        self._queue.append({
+            "user_id": user_id,
+            "provider": provider,
+            "model": model,
+            "prompt_tokens": usage.get("prompt_tokens") or 0,
+            "completion_tokens": usage.get("completion_tokens") or 0,
+            "cached_prompt_tokens": usage.get("cached_prompt_tokens") or 0,
+            "cache_write_tokens": usage.get("cache_write_tokens") or 0,
+            "project_id": project_id,
+            "agent_role": agent_role,
+            "workflow_stage": workflow_stage,
+            "response_time_ms": response_time_ms,
+            "timestamp": datetime.utcnow(),
+        })
+        self.stats["recorded"] += 1
+
+    async def flush(self) -> int:
+        """
+        Write all queued records in one transaction.
+
+        Records are put back at the front of the queue if the write fails,
+        and retried at the next flush.
+
+        Returns:
+            Number of records written
+        """
+        async with self._flush_lock:
+            if not self._queue:
+                return 0
+            batch = list(self._queue)
+            self._queue.clear()
+            try:
+                async with self.session_factory() as session:
+                    for record in batch:
+                        await create_llm_usage_metrics(session, **record)
+                    await session.commit()
+            except Exception:
+                self.stats["failed_flushes"] += 1
+                # Keep the newest records if the queue filled up meanwhile
+                room = max(self.max_queue - len(self._queue), 0)
+                kept = batch[-room:] if room else []
+                self.stats["dropped"] += len(batch) - len(kept)
+                self._queue.extendleft(reversed(kept))
+                raise
+            self.stats["written"] += len(batch)
+            return len(batch)
+
+    def clear(self):
+        """Drop queued records without writing them."""
+        self._queue.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get usage recorder statistics."""
+        return {**self.stats, "queued": len(self._queue)}
+
+    def start(self):
+        """Start the periodic flush task on the running event loop."""
+        self._flusher.start()
+
+    async def stop(self):
+        """Stop the flush task and write whatever is still queued."""
+        await self._flusher.stop()
+
+
+# Global usage recorder instance
+llm_usage_recorder = LLMUsageRecorder()
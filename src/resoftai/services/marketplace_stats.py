@@ -0,0 +1,186 @@
+"""
+Marketplace Statistics Service
+
+Aggregate counts for the admin dashboard and contributor profiles.
+
+Each table is aggregated in a single pass using filtered counts
+(``COUNT(*) FILTER (WHERE ...)``), and the per-table aggregates are joined
+into one statement, so a dashboard load is one round trip. Results are kept
+for a short TTL in the shared cache (in-process tier, plus Redis when
+available) under a tag per key, and invalidated by tag when submissions,
+reviews or approvals change them.
+"""
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import case, func, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from resoftai.utils import cache
+from resoftai.utils.cache import _MISSING
+
+logger = logging.getLogger(__name__)
+
+ADMIN_STATS_KEY = "stats:admin"
+CONTRIBUTOR_STATS_KEY = "stats:contributor:{user_id}"
+
+
+def count_where(db: AsyncSession, condition):
+    """
+    Count rows matching a condition inside an aggregate query.
+
+    Uses ``COUNT(*) FILTER (WHERE ...)`` where supported and a
+    ``SUM(CASE ...)`` equivalent elsewhere.
+    """
+    if db.bind.dialect.name in ("postgresql", "sqlite"):
+        return func.count().filter(condition)
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+class MarketplaceStatsService:
+    """
+    Compute and cache marketplace aggregate statistics
+    """
+
+    def __init__(self, ttl: int = 30):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    async def _cached(self, key: str, compute: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Read stats through the cache, tagged with their own key."""
+        loaded = []
+
+        async def load():
+            loaded.append(True)
+            return await compute()
+
+        manager = cache.cache_manager
+        if cache.redis_client:
+            stats = await manager.fetch(key, load, ttl=self.ttl, tags=[key])
+        else:
+            # Without Redis there is only the in-process tier
+            stats = manager.local.get(key)
+            if stats is _MISSING:
+                stats = await manager._single_flight(key, load)
+                manager.local.set(key, stats, ttl=self.ttl, tags=[key])
+
+        if loaded:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return stats
+
+    async def invalidate(self, author_id: Optional[int] = None):
+        """
+        Drop cached admin stats and, if given, one contributor's stats.
+
+        Args:
+            author_id: Contributor whose plugins/templates changed
+        """
+        tags = [ADMIN_STATS_KEY]
+        if author_id:
+            tags.append(CONTRIBUTOR_STATS_KEY.format(user_id=author_id))
+        await cache.cache_manager.invalidate_tags(*tags)
+
+    async def compute_admin_stats(self, db: AsyncSession) -> Dict[str, int]:
+        """
+        Compute admin dashboard statistics in one statement.
+
+        Returns:
+            Counts of plugins/templates by review status, contributor count,
+            and total downloads/installs
+        """
+        from resoftai.models.plugin import Plugin, PluginStatus
+        from resoftai.models.template import TemplateModel, TemplateStatus, ContributorProfile
+
+        plugins = select(
+            count_where(db, Plugin.status == PluginStatus.SUBMITTED).label("pending_plugins"),
+            count_where(db, Plugin.status == PluginStatus.APPROVED).label("approved_plugins"),
+            count_where(db, Plugin.status == PluginStatus.REJECTED).label("rejected_plugins"),
+            func.coalesce(func.sum(Plugin.downloads_count), 0).label("plugin_downloads"),
+            func.coalesce(func.sum(Plugin.installs_count), 0).label("plugin_installs"),
+        ).subquery()
+        templates = select(
+            count_where(db, TemplateModel.status == TemplateStatus.SUBMITTED).label("pending_templates"),
+            count_where(db, TemplateModel.status == TemplateStatus.APPROVED).label("approved_templates"),
+            count_where(db, TemplateModel.status == TemplateStatus.REJECTED).label("rejected_templates"),
+            func.coalesce(func.sum(TemplateModel.downloads_count), 0).label("template_downloads"),
+            func.coalesce(func.sum(TemplateModel.installs_count), 0).label("template_installs"),
+        ).subquery()
+        contributors = select(
+            func.count(ContributorProfile.id).label("total_contributors")
+        ).subquery()
+
+        result = await db.execute(
+            select(plugins, templates, contributors).select_from(
+                plugins.join(templates, true()).join(contributors, true())
+            )
+        )
+        row = result.mappings().one()
+
+        return {
+            "pending_plugins": row["pending_plugins"],
+            "pending_templates": row["pending_templates"],
+            "approved_plugins": row["approved_plugins"],
+            "approved_templates": row["approved_templates"],
+            "rejected_plugins": row["rejected_plugins"],
+            "rejected_templates": row["rejected_templates"],
+            "total_contributors": row["total_contributors"],
+            "total_downloads": int(row["plugin_downloads"]) + int(row["template_downloads"]),
+            "total_installs": int(row["plugin_installs"]) + int(row["template_installs"]),
+        }
+
+    async def compute_contributor_stats(self, db: AsyncSession, user_id: int) -> Dict[str, Any]:
+        """
+        Compute one contributor's statistics in one statement.
+
+        Args:
+            user_id: Contributor user ID
+
+        Returns:
+            plugins_count, templates_count, total_downloads, total_installs
+            and average_rating (mean of the plugin and template averages)
+        """
+        from resoftai.models.plugin import Plugin
+        from resoftai.models.template import TemplateModel
+
+        def author_aggregate(model, prefix: str):
+            return select(
+                func.count(model.id).label(f"{prefix}_count"),
+                func.coalesce(func.sum(model.downloads_count), 0).label(f"{prefix}_downloads"),
+                func.coalesce(func.sum(model.installs_count), 0).label(f"{prefix}_installs"),
+                func.avg(
+                    case((model.rating_count > 0, model.rating_average), else_=None)
+                ).label(f"{prefix}_rating"),
+            ).where(model.author_id == user_id).subquery()
+
+        plugins = author_aggregate(Plugin, "plugin")
+        templates = author_aggregate(TemplateModel, "template")
+        result = await db.execute(
+            select(plugins, templates).select_from(plugins.join(templates, true()))
+        )
+        row = result.mappings().one()
+
+        plugin_avg = float(row["plugin_rating"] or 0)
+        template_avg = float(row["template_rating"] or 0)
+        return {
+            "plugins_count": row["plugin_count"],
+            "templates_count": row["template_count"],
+            "total_downloads": int(row["plugin_downloads"]) + int(row["template_downloads"]),
+            "total_installs": int(row["plugin_installs"]) + int(row["template_installs"]),
+            "average_rating": (plugin_avg + template_avg) / 2 if (plugin_avg or template_avg) else 0.0,
+        }
+
+    async def get_admin_stats(self, db: AsyncSession) -> Dict[str, int]:
+        """Get admin dashboard statistics (cached for ``ttl`` seconds)."""
+        return await self._cached(ADMIN_STATS_KEY, lambda: self.compute_admin_stats(db))
+
+    async def get_contributor_stats(self, db: AsyncSession, user_id: int) -> Dict[str, Any]:
+        """Get a contributor's statistics (cached for ``ttl`` seconds)."""
+        key = CONTRIBUTOR_STATS_KEY.format(user_id=user_id)
+        return await self._cached(key, lambda: self.compute_contributor_stats(db, user_id))
+
+
+# Global marketplace statistics instance
+marketplace_stats = MarketplaceStatsService()
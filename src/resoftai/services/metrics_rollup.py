@@ -0,0 +1,50 @@
+"""
+Metrics Rollup Service
+
+Periodically materializes multi-resolution rollups of system metrics so
+dashboard charts read a bounded number of pre-aggregated rows.
+"""
+import logging
+from typing import Dict
+
+from resoftai.db import AsyncSessionLocal
+from resoftai.crud.performance_metrics import (
+    rollup_all_system_metrics,
+    prune_system_metrics_rollups,
+)
+from resoftai.services.periodic import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsRollupService:
+    """
+    Background task that rolls up SystemMetrics into 1m/5m/1h/1d buckets
+    """
+
+    def __init__(self, interval_seconds: float = 60.0, session_factory=AsyncSessionLocal):
+        self.session_factory = session_factory
+        self._rollup = PeriodicTask(self.run_once, interval_seconds, "metrics rollup", run_on_start=True)
+
+    async def run_once(self) -> Dict[str, int]:
+        """Roll up all closed buckets and prune expired ones."""
+        async with self.session_factory() as session:
+            written = await rollup_all_system_metrics(session)
+            pruned = await prune_system_metrics_rollups(session)
+            await session.commit()
+
+        if any(written.values()) or pruned:
+            logger.debug(f"Metrics rollup wrote {written}, pruned {pruned}")
+        return written
+
+    def start(self):
+        """Start the periodic rollup task on the running event loop."""
+        self._rollup.start()
+
+    async def stop(self):
+        """Stop the periodic rollup task."""
+        await self._rollup.stop()
+
+
+# Global rollup service instance
+metrics_rollup_service = MetricsRollupService()
@@ -0,0 +1,513 @@
+"""
+Notification Delivery
+
+Delivers persisted notifications off the request path.
+
+``NotificationService`` stores notifications and hands them to ``submit``,
+which only queues delivery jobs. Each channel has its own queue and a fixed
+number of workers, so a slow SMTP server or webhook endpoint only holds up
+deliveries on that channel:
+
+- in-app: pushed to the user's WebSocket sessions (``broadcast_to_user``)
+- email: handed to the configured email sender
+- webhook: POSTed through one shared HTTP client, which keeps connections
+  to each endpoint alive between deliveries. Only https URLs whose host
+  resolves to public addresses are called, and redirects are not followed,
+  so a user-supplied URL cannot reach internal services
+
+Failed jobs are retried with exponential backoff and jitter. Emails for a
+user who receives many notifications in a short window (or who opted into
+digests) are held and sent as one digest. Delivery status is written back
+to the ``notifications`` table in batches. On shutdown, queued, retrying and
+held jobs get ``drain_timeout`` seconds to be delivered; whatever is left is
+recorded as undelivered in the ``notifications`` table.
+"""
+import asyncio
+import ipaddress
+import logging
+import random
+import socket
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+from sqlalchemy import update
+
+from resoftai.db import AsyncSessionLocal
+from resoftai.models.notification import Notification, NotificationChannel, NotificationPriority
+from resoftai.services.periodic import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+EmailSender = Callable[[str, str, str], Awaitable[None]]
+
+DIGEST_WINDOWS = {"daily": 86400, "weekly": 604800}
+
+
+class PermanentDeliveryError(Exception):
+    """Delivery failed in a way retrying will not fix."""
+
+
+@dataclass
+class DeliveryJob:
+    """One delivery to one target; digests cover several notifications."""
+    channel: NotificationChannel
+    user_id: int
+    notification_ids: List[int]
+    payloads: List[Dict[str, Any]]
+    target: Optional[str] = None  # Email address or webhook URL
+    attempts: int = 0
+
+
+@dataclass
+class _Digest:
+    due_at: float
+    jobs: List[DeliveryJob] = field(default_factory=list)
+
+
+def _is_public_address(address: str) -> bool:
+    ip = ipaddress.ip_address(address)
+    return not (
+        ip.is_private or ip.is_loopback or ip.is_link_local or ip.is_multicast
+        or ip.is_reserved or ip.is_unspecified
+    )
+
+
+def validate_webhook_url(url: str) -> str:
+    """
+    Check a webhook URL before it is saved.
+
+    Args:
+        url: URL supplied by the user
+
+    Returns:
+        The URL
+
+    Raises:
+        ValueError: If the URL is not https or names a local or private host
+    """
+    parts = urlsplit(url)
+    if parts.scheme != "https" or not parts.hostname:
+        raise ValueError("Webhook URL must be an https URL")
+    host = parts.hostname.lower()
+    if host == "localhost" or host.endswith(".localhost"):
+        raise ValueError("Webhook URL must not point to a local host")
+    try:
+        public = _is_public_address(host)
+    except ValueError:
+        return url  # A host name, checked again when it is resolved
+    if not public:
+        raise ValueError("Webhook URL must not point to a private address")
+    return url
+
+
+async def _log_email(to: str, subject: str, body: str):
+    # TODO: Integrate an email service (SMTP, SendGrid, AWS SES, etc.)
+    logger.info(f"Email would be sent to {to}: {subject}")
+
+
+class NotificationDelivery:
+    """
+    Queued, per-channel notification delivery with retries and digests
+    """
+
+    def __init__(
+        self,
+        concurrency: Optional[Dict[NotificationChannel, int]] = None,
+        max_attempts: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 300.0,
+        digest_threshold: int = 5,
+        digest_window: float = 300.0,
+        flush_interval: float = 1.0,
+        webhook_timeout: float = 10.0,
+        drain_timeout: float = 10.0,
+        email_sender: Optional[EmailSender] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+        connection_manager=None,
+        session_factory=AsyncSessionLocal
+    ):
+        """
+        Initialize notification delivery.
+
+        Args:
+            concurrency: Workers per channel
+            max_attempts: Attempts per job before it is marked as failed
+            backoff_base: Delay before the first retry in seconds (doubles per attempt)
+            backoff_max: Longest delay between attempts in seconds
+            digest_threshold: Emails per user within ``digest_window`` before digesting
+            digest_window: Seconds emails are held for a digest
+            flush_interval: Seconds between status writes and digest releases
+            webhook_timeout: Seconds to wait for a webhook endpoint
+            drain_timeout: Seconds ``stop`` waits for outstanding jobs
+            email_sender: Coroutine sending (to, subject, body); logs by default
+            http_client: Client for webhooks (created on start if omitted)
+            connection_manager: WebSocket manager (``resoftai.websocket.manager`` by default)
+            session_factory: Factory for database sessions
+        """
+        self.concurrency = {
+            NotificationChannel.IN_APP: 8,
+            NotificationChannel.EMAIL: 4,
+            NotificationChannel.WEBHOOK: 8,
+            **(concurrency or {}),
+        }
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.digest_threshold = digest_threshold
+        self.digest_window = digest_window
+        self.webhook_timeout = webhook_timeout
+        self.drain_timeout = drain_timeout
+        self.email_sender = email_sender or _log_email
+        self.http_client = http_client
+        self._owns_client = http_client is None
+        self.connection_manager = connection_manager
+        self.session_factory = session_factory
+
+        self._queues: Dict[NotificationChannel, asyncio.Queue] = {
+            channel: asyncio.Queue() for channel in NotificationChannel
+        }
+        self._workers: List[asyncio.Task] = []
+        self._flusher = PeriodicTask(self._write_periodic, flush_interval, "notification status write")
+        # Retry timers and the job each one requeues
+        self._retry_handles: Dict[asyncio.TimerHandle, DeliveryJob] = {}
+        # Jobs submitted and not yet delivered or given up on (queued, retrying or held)
+        self._outstanding = 0
+        self._recent_emails: Dict[int, Deque[float]] = defaultdict(deque)
+        self._digests: Dict[int, _Digest] = {}
+        # Pending column updates per notification, written in one batch
+        self._status: Dict[int, Dict[str, Any]] = {}
+        self.stats = {
+            "submitted": 0,
+            "delivered": 0,
+            "retries": 0,
+            "failed": 0,
+            "digested": 0,
+            "digests_sent": 0,
+            "status_writes": 0,
+            "abandoned": 0,
+        }
+
+    def submit(
+        self,
+        notification: Dict[str, Any],
+        channels: List[NotificationChannel],
+        email: Optional[str] = None,
+        webhook_url: Optional[str] = None,
+        digest_frequency: Optional[str] = None
+    ):
+        """
+        Queue delivery of a stored notification. Never waits for a channel.
+
+        Args:
+            notification: Notification payload (must include ``id`` and ``user_id``)
+            channels: Channels to deliver on
+            email: Recipient address for the email channel
+            webhook_url: Endpoint for the webhook channel
+            digest_frequency: The user's digest setting ("daily", "weekly") if enabled
+        """
+        user_id = notification["user_id"]
+        for channel in channels:
+            target = {NotificationChannel.EMAIL: email, NotificationChannel.WEBHOOK: webhook_url}.get(channel)
+            if channel != NotificationChannel.IN_APP and not target:
+                if channel == NotificationChannel.EMAIL:
+                    logger.warning(f"No email found for user {user_id}")
+                continue
+
+            job = DeliveryJob(channel, user_id, [notification["id"]], [notification], target)
+            self.stats["submitted"] += 1
+            self._outstanding += 1
+
+            if channel == NotificationChannel.EMAIL and self._should_digest(notification, digest_frequency):
+                self._hold_for_digest(job, digest_frequency)
+            else:
+                self._queues[channel].put_nowait(job)
+
+    def _should_digest(self, notification: Dict[str, Any], digest_frequency: Optional[str]) -> bool:
+        if notification.get("priority") == NotificationPriority.URGENT.value:
+            return False
+        user_id = notification["user_id"]
+        if digest_frequency or user_id in self._digests:
+            return True
+
+        now = asyncio.get_running_loop().time()
+        recent = self._recent_emails[user_id]
+        while recent and recent[0] <= now - self.digest_window:
+            recent.popleft()
+        if len(recent) >= self.digest_threshold:
+            return True
+        recent.append(now)
+        return False
+
+    def _hold_for_digest(self, job: DeliveryJob, digest_frequency: Optional[str]):
+        digest = self._digests.get(job.user_id)
+        if digest is None:
+            window = DIGEST_WINDOWS.get(digest_frequency, self.digest_window)
+            digest = self._digests[job.user_id] = _Digest(asyncio.get_running_loop().time() + window)
+        digest.jobs.append(job)
+        self.stats["digested"] += 1
+
+    def release_digests(self, force: bool = False) -> int:
+        """
+        Queue held emails whose digest window has closed as one email per user.
+
+        Args:
+            force: Release every digest regardless of its window
+
+        Returns:
+            Number of digest emails queued
+        """
+        now = asyncio.get_running_loop().time()
+        stale = [user_id for user_id, recent in self._recent_emails.items()
+                 if not recent or recent[-1] <= now - self.digest_window]
+        for user_id in stale:
+            del self._recent_emails[user_id]
+
+        due = [user_id for user_id, digest in self._digests.items() if force or digest.due_at <= now]
+        for user_id in due:
+            jobs = self._digests.pop(user_id).jobs
+            job = DeliveryJob(
+                NotificationChannel.EMAIL,
+                user_id,
+                [nid for held in jobs for nid in held.notification_ids],
+                [payload for held in jobs for payload in held.payloads],
+                jobs[-1].target
+            )
+            # The held jobs become one
+            self._outstanding -= len(jobs) - 1
+            self._queues[NotificationChannel.EMAIL].put_nowait(job)
+            self.stats["digests_sent"] += 1
+        return len(due)
+
+    async def _worker(self, channel: NotificationChannel):
+        queue = self._queues[channel]
+        while True:
+            job = await queue.get()
+            try:
+                await self._deliver(job)
+            except asyncio.CancelledError:
+                # Leave the job for stop() to record as undelivered
+                queue.put_nowait(job)
+                raise
+            except Exception as e:
+                self._retry_or_fail(job, e)
+            else:
+                self.stats["delivered"] += 1
+                self._set_status(job, sent=True)
+                self._outstanding -= 1
+            finally:
+                queue.task_done()
+
+    async def _deliver(self, job: DeliveryJob):
+        if job.channel == NotificationChannel.IN_APP:
+            manager = self.connection_manager
+            if manager is None:
+                from resoftai.websocket.manager import manager
+            for payload in job.payloads:
+                await manager.broadcast_to_user(job.user_id, "notification", payload)
+        elif job.channel == NotificationChannel.EMAIL:
+            subject, body = self._render_email(job.payloads)
+            await self.email_sender(job.target, subject, body)
+        else:
+            await self._check_webhook_target(job.target)
+            payload = job.payloads[0] if len(job.payloads) == 1 else {"notifications": job.payloads}
+            response = await self._client().post(job.target, json=payload)
+            if response.status_code == 429 or response.status_code >= 500:
+                raise RuntimeError(f"Webhook returned {response.status_code}")
+            if response.status_code >= 400:
+                raise PermanentDeliveryError(f"Webhook returned {response.status_code}")
+
+    async def _check_webhook_target(self, url: str):
+        """Refuse URLs saved before validation and hosts resolving to non-public addresses."""
+        try:
+            validate_webhook_url(url)
+        except ValueError as e:
+            raise PermanentDeliveryError(str(e))
+        addresses = await self._resolve(urlsplit(url).hostname)
+        if not addresses or not all(_is_public_address(address) for address in addresses):
+            raise PermanentDeliveryError(f"Webhook host {urlsplit(url).hostname} is not a public address")
+
+    async def _resolve(self, host: str) -> List[str]:
+        """Addresses a host name resolves to."""
+        infos = await asyncio.get_running_loop().getaddrinfo(host, 443, type=socket.SOCK_STREAM)
+        # Drop IPv6 scope ids ("fe80::1%eth0")
+        return [info[4][0].split("%")[0] for info in infos]
+
+    @staticmethod
+    def _render_email(payloads: List[Dict[str, Any]]) -> Tuple[str, str]:
+        if len(payloads) == 1:
+            return payloads[0]["title"], payloads[0]["message"]
+        lines = [f"- {payload['title']}" for payload in payloads]
+        return f"You have {len(payloads)} new notifications", "\n".join(lines)
+
+    def _client(self) -> httpx.AsyncClient:
+        if self.http_client is None:
+            self.http_client = httpx.AsyncClient(
+                timeout=self.webhook_timeout,
+                follow_redirects=False,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+            )
+        return self.http_client
+
+    def _retry_or_fail(self, job: DeliveryJob, error: Exception):
+        job.attempts += 1
+        if isinstance(error, PermanentDeliveryError) or job.attempts >= self.max_attempts:
+            self.stats["failed"] += 1
+            logger.error(
+                f"Giving up on {job.channel.value} delivery of notifications "
+                f"{job.notification_ids} after {job.attempts} attempts: {error}"
+            )
+            self._set_status(job, error=str(error))
+            self._outstanding -= 1
+            return
+
+        self.stats["retries"] += 1
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (job.attempts - 1)) * random.uniform(0.5, 1.0)
+        loop = asyncio.get_running_loop()
+        handle = None
+
+        def requeue():
+            self._retry_handles.pop(handle, None)
+            self._queues[job.channel].put_nowait(job)
+
+        handle = loop.call_later(delay, requeue)
+        self._retry_handles[handle] = job
+
+    def _set_status(self, job: DeliveryJob, sent: bool = False, error: Optional[str] = None):
+        prefix = {NotificationChannel.EMAIL: "email", NotificationChannel.WEBHOOK: "webhook"}.get(job.channel)
+        if prefix is None:
+            return
+        values = (
+            {f"{prefix}_sent": True, f"{prefix}_sent_at": datetime.utcnow(), f"{prefix}_error": None}
+            if sent else {f"{prefix}_error": error}
+        )
+        for notification_id in job.notification_ids:
+            self._status.setdefault(notification_id, {}).update(values)
+
+    async def flush_status(self) -> int:
+        """
+        Write buffered delivery status to the notifications table.
+
+        Returns:
+            Number of notifications updated
+        """
+        status, self._status = self._status, {}
+        if not status:
+            return 0
+        try:
+            async with self.session_factory() as session:
+                # Bulk UPDATE by primary key, grouped by the columns being set
+                await session.execute(
+                    update(Notification),
+                    [{"id": notification_id, **values} for notification_id, values in status.items()]
+                )
+                await session.commit()
+        except Exception:
+            for notification_id, values in status.items():
+                self._status[notification_id] = {**values, **self._status.get(notification_id, {})}
+            raise
+        self.stats["status_writes"] += len(status)
+        return len(status)
+
+    async def drain(self):
+        """Wait until every submitted job (except held digests) is done, then write status."""
+        await self._wait_idle()
+        await self.flush_status()
+
+    async def _wait_idle(self):
+        """Wait until every submitted job (except held digests) is done."""
+        while self._outstanding > self._held():
+            await asyncio.sleep(0.01)
+
+    def _abandon(self) -> int:
+        """Record queued and retrying jobs as undelivered and drop them."""
+        jobs = list(self._retry_handles.values())
+        for handle in self._retry_handles:
+            handle.cancel()
+        self._retry_handles.clear()
+        for queue in self._queues.values():
+            while not queue.empty():
+                jobs.append(queue.get_nowait())
+                queue.task_done()
+
+        for job in jobs:
+            self._set_status(job, error="Not delivered before shutdown")
+            self._outstanding -= 1
+        if jobs:
+            logger.warning(f"Shutting down with {len(jobs)} notification deliveries undelivered")
+        self.stats["abandoned"] += len(jobs)
+        return len(jobs)
+
+    def _held(self) -> int:
+        return sum(len(digest.jobs) for digest in self._digests.values())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get delivery statistics."""
+        return {
+            **self.stats,
+            "queued": {channel.value: queue.qsize() for channel, queue in self._queues.items()},
+            "retrying": len(self._retry_handles),
+            "held_for_digest": self._held(),
+        }
+
+    async def _write_periodic(self):
+        self.release_digests()
+        await self.flush_status()
+
+    def start(self):
+        """Start the channel workers and the status/digest task on the running event loop."""
+        if self._flusher.running:
+            return
+        for channel, workers in self.concurrency.items():
+            for _ in range(workers):
+                self._workers.append(asyncio.create_task(self._worker(channel)))
+        self._flusher.start()
+        logger.info("Started notification delivery workers")
+
+    async def stop(self, timeout: Optional[float] = None):
+        """
+        Stop the workers and write whatever status is still buffered.
+
+        Held digests are released and jobs waiting for a retry are requeued
+        at once, then the workers get ``timeout`` seconds (``drain_timeout``
+        by default) to deliver everything. Jobs still undelivered after that
+        are recorded with an error instead of being lost silently.
+
+        Args:
+            timeout: Seconds to wait for outstanding jobs
+        """
+        if self._workers:
+            self.release_digests(force=True)
+            for handle, job in list(self._retry_handles.items()):
+                handle.cancel()
+                self._queues[job.channel].put_nowait(job)
+            self._retry_handles.clear()
+            try:
+                await asyncio.wait_for(
+                    self._wait_idle(), self.drain_timeout if timeout is None else timeout
+                )
+            except asyncio.TimeoutError:
+                pass
+
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        await self._flusher.stop()
+        self._abandon()
+
+        if self.http_client is not None and self._owns_client:
+            await self.http_client.aclose()
+            self.http_client = None
+
+        try:
+            await self.flush_status()
+        except Exception as e:
+            logger.error(f"Error writing notification delivery status on shutdown: {e}")
+
+
+# Global notification delivery instance
+notification_delivery = NotificationDelivery()
@@ -1,7 +1,8 @@
 """
 Notification Service
 
-Handles creation and delivery of notifications across multiple channels.
+Handles creation of notifications; delivery across channels is queued on
+``notification_delivery``.
 """
 import logging
 from typing import List, Dict, Any, Optional
@@ -14,6 +15,7 @@ from resoftai.models.notification import (
     NotificationType, NotificationChannel, NotificationPriority
 )
 from resoftai.models.user import User
+from resoftai.services.notification_delivery import notification_delivery
 
 logger = logging.getLogger(__name__)
 
@@ -40,7 +42,7 @@ class NotificationService:
         expires_in_days: Optional[int] = None
     ) -> Notification:
         """
-        Create and deliver a notification
+        Create a notification and queue its delivery
 
         Args:
             user_id: Recipient user ID
@@ -57,48 +59,91 @@ class NotificationService:
         Returns:
             Created notification
         """
-        # Get user preferences
-        prefs = await self._get_user_preferences(user_id)
-
-        # Determine delivery channels
-        if channels is None:
-            channels = await self._get_enabled_channels(user_id, notification_type, prefs)
-
-        # Calculate expiration
-        expires_at = None
-        if expires_in_days:
-            expires_at = datetime.utcnow() + timedelta(days=expires_in_days)
-
-        # Create notification
-        notification = Notification(
-            user_id=user_id,
-            type=notification_type,
-            priority=priority,
+        notifications = await self.create_notifications(
+            [user_id],
+            notification_type=notification_type,
             title=title,
             message=message,
-            data=data or {},
+            data=data,
             action_url=action_url,
             action_text=action_text,
-            channels=[ch.value for ch in channels],
-            expires_at=expires_at
+            priority=priority,
+            channels=channels,
+            expires_in_days=expires_in_days
         )
+        return notifications[0]
 
-        self.db.add(notification)
-        await self.db.commit()
-        await self.db.refresh(notification)
+    async def create_notifications(
+        self,
+        user_ids: List[int],
+        notification_type: NotificationType,
+        title: str,
+        message: str,
+        data: Optional[Dict[str, Any]] = None,
+        action_url: Optional[str] = None,
+        action_text: Optional[str] = None,
+        priority: NotificationPriority = NotificationPriority.NORMAL,
+        channels: Optional[List[NotificationChannel]] = None,
+        expires_in_days: Optional[int] = None
+    ) -> List[Notification]:
+        """
+        Create the same notification for many users in one transaction
+
+        Preferences and email addresses are loaded with one query each, all
+        rows are inserted together, and delivery (in-app, email, webhook) is
+        queued on ``notification_delivery`` rather than awaited.
 
-        # Deliver via channels
-        if NotificationChannel.EMAIL in channels:
-            await self._send_email(notification, prefs)
+        Returns:
+            Created notifications, in ``user_ids`` order
+        """
+        if not user_ids:
+            return []
 
-        if NotificationChannel.WEBHOOK in channels:
-            await self._send_webhook(notification, prefs)
+        prefs_by_user = await self._get_preferences(user_ids)
+        emails = await self._get_emails(user_ids)
 
-        logger.info(
-            f"Created notification {notification.id} for user {user_id}: {notification_type}"
-        )
+        expires_at = None
+        if expires_in_days:
+            expires_at = datetime.utcnow() + timedelta(days=expires_in_days)
 
-        return notification
+        notifications = []
+        user_channels = []
+        for user_id in user_ids:
+            prefs = prefs_by_user.get(user_id)
+            enabled = channels
+            if enabled is None:
+                enabled = await self._get_enabled_channels(user_id, notification_type, prefs)
+            user_channels.append(enabled)
+            notifications.append(Notification(
+                user_id=user_id,
+                type=notification_type,
+                priority=priority,
+                title=title,
+                message=message,
+                data=data or {},
+                action_url=action_url,
+                action_text=action_text,
+                channels=[ch.value for ch in enabled],
+                expires_at=expires_at
+            ))
+
+        self.db.add_all(notifications)
+        await self.db.flush()
+        payloads = [self._payload(notification) for notification in notifications]
+        await self.db.commit()
+
+        for payload, enabled in zip(payloads, user_channels):
+            prefs = prefs_by_user.get(payload["user_id"])
+            notification_delivery.submit(
+                payload,
+                enabled,
+                email=emails.get(payload["user_id"]),
+                webhook_url=prefs.webhook_url if prefs else None,
+                digest_frequency=(prefs.digest_frequency or "default") if prefs and prefs.digest_enabled else None
+            )
+
+        logger.info(f"Created {len(notifications)} {notification_type} notification(s)")
+        return notifications
 
     async def notify_plugin_approved(
         self,
@@ -276,12 +321,17 @@ class NotificationService:
         )
         return result.scalar_one()
 
-    async def _get_user_preferences(self, user_id: int) -> Optional[NotificationPreference]:
-        """Get user notification preferences"""
+    async def _get_preferences(self, user_ids: List[int]) -> Dict[int, NotificationPreference]:
+        """Get notification preferences of several users"""
         result = await self.db.execute(
-            select(NotificationPreference).where(NotificationPreference.user_id == user_id)
+            select(NotificationPreference).where(NotificationPreference.user_id.in_(user_ids))
         )
-        return result.scalar_one_or_none()
+        return {prefs.user_id: prefs for prefs in result.scalars()}
+
+    async def _get_emails(self, user_ids: List[int]) -> Dict[int, str]:
+        """Get email addresses of several users"""
+        result = await self.db.execute(select(User.id, User.email).where(User.id.in_(user_ids)))
+        return {user_id: email for user_id, email in result if email}
 
     async def _get_enabled_channels(
         self,
@@ -307,60 +357,21 @@ class NotificationService:
 
         return channels
 
-    async def _send_email(
-        self,
-        notification: Notification,
-        prefs: Optional[NotificationPreference]
-    ):
-        """Send notification via email"""
-        try:
-            # Get user email
-            result = await self.db.execute(
-                select(User).where(User.id == notification.user_id)
-            )
-            user = result.scalar_one_or_none()
-
-            if not user or not user.email:
-                logger.warning(f"No email found for user {notification.user_id}")
-                return
-
-            # TODO: Implement actual email sending
-            # This would integrate with an email service (SendGrid, AWS SES, etc.)
-            logger.info(f"Email would be sent to {user.email}: {notification.title}")
-
-            # Update notification
-            notification.email_sent = True
-            notification.email_sent_at = datetime.utcnow()
-            await self.db.commit()
-
-        except Exception as e:
-            logger.error(f"Failed to send email for notification {notification.id}: {e}")
-            notification.email_error = str(e)
-            await self.db.commit()
-
-    async def _send_webhook(
-        self,
-        notification: Notification,
-        prefs: Optional[NotificationPreference]
-    ):
-        """Send notification via webhook"""
-        try:
-            if not prefs or not prefs.webhook_url:
-                return
-
-            # TODO: Implement actual webhook sending
-            # This would make HTTP POST to user's webhook URL
-            logger.info(f"Webhook would be sent to {prefs.webhook_url}: {notification.title}")
-
-            # Update notification
-            notification.webhook_sent = True
-            notification.webhook_sent_at = datetime.utcnow()
-            await self.db.commit()
-
-        except Exception as e:
-            logger.error(f"Failed to send webhook for notification {notification.id}: {e}")
-            notification.webhook_error = str(e)
-            await self.db.commit()
+    @staticmethod
+    def _payload(notification: Notification) -> Dict[str, Any]:
+        """Serializable form of a notification, as delivered to clients"""
+        return {
+            "id": notification.id,
+            "user_id": notification.user_id,
+            "type": notification.type.value,
+            "priority": notification.priority.value,
+            "title": notification.title,
+            "message": notification.message,
+            "data": notification.data,
+            "action_url": notification.action_url,
+            "action_text": notification.action_text,
+            "created_at": notification.created_at.isoformat() if notification.created_at else None,
+        }
 
 
 # Convenience function to get notification service
@@ -0,0 +1,92 @@
+"""
+Periodic Background Task
+
+Runs a service's coroutine (flush, rollup, refresh) every few seconds on
+the event loop, for the services that buffer work in memory and write it
+out in batches. Errors are logged and the task keeps running.
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """
+    Call a coroutine function every ``interval`` seconds
+    """
+
+    def __init__(
+        self,
+        callback: Callable[[], Awaitable[object]],
+        interval: float,
+        name: str,
+        run_on_start: bool = False,
+        run_on_stop: bool = False
+    ):
+        """
+        Initialize periodic task.
+
+        Args:
+            callback: Coroutine function to call
+            interval: Seconds between calls
+            name: Description used in log messages (e.g. "audit flush")
+            run_on_start: Call right away instead of after the first interval
+            run_on_stop: Call once more after stopping (final flush)
+        """
+        self.callback = callback
+        self.interval = interval
+        self.name = name
+        self.run_on_start = run_on_start
+        self.run_on_stop = run_on_stop
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the task is running."""
+        return self._task is not None and not self._task.done()
+
+    def wake(self):
+        """Call the callback now instead of waiting for the interval."""
+        self._wakeup.set()
+
+    def start(self):
+        """Start the task on the running event loop."""
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Started {self.name} task")
+
+    async def stop(self):
+        """Stop the task, then call the callback once more if ``run_on_stop``."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        if self.run_on_stop:
+            try:
+                await self.callback()
+            except Exception as e:
+                logger.error(f"Error in {self.name} on shutdown: {e}")
+
+    async def _run(self):
+        if not self.run_on_start:
+            await self._wait()
+        while True:
+            try:
+                await self.callback()
+            except Exception as e:
+                logger.error(f"Error in {self.name}: {e}", exc_info=True)
+            await self._wait()
+
+    async def _wait(self):
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
@@ -0,0 +1,320 @@
+"""
+Popularity Counter Service
+
+Write-coalesced download/install/view counters for marketplace items.
+
+Increments are buffered (in Redis when available, otherwise in process
+memory) and flushed periodically as batched atomic
+``UPDATE ... SET col = col + :n`` statements, so concurrent downloads never
+read-modify-write the same row. Each flush also upserts per-day counts into
+``popularity_daily``, which backs the trending queries.
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, bindparam, desc, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from resoftai.db import AsyncSessionLocal
+from resoftai.models.popularity import PopularityDaily
+from resoftai.services.periodic import PeriodicTask
+from resoftai.utils import cache
+
+logger = logging.getLogger(__name__)
+
+# Redis hash holding pending increments from all workers
+PENDING_HASH_KEY = "counters:pending"
+
+CounterKey = Tuple[str, int, str]  # (target, item_id, column)
+
+
+@dataclass
+class CounterTarget:
+    """A table whose integer columns are maintained by the counter service."""
+    name: str
+    model: Any
+    columns: Tuple[str, ...]
+
+
+_targets: Dict[str, CounterTarget] = {}
+
+
+def register_counter_target(name: str, model: Any, columns: Tuple[str, ...]):
+    """
+    Register a model whose counter columns are flushed by the service.
+
+    Args:
+        name: Target name used in counter keys (e.g. "plugin")
+        model: SQLAlchemy model class with an integer ``id`` primary key
+        columns: Counter column names that may be incremented
+    """
+    _targets[name] = CounterTarget(name=name, model=model, columns=tuple(columns))
+
+
+def get_counter_target(name: str) -> Optional[CounterTarget]:
+    """Get a registered counter target."""
+    return _targets.get(name)
+
+
+@dataclass
+class CounterStats:
+    """Counters about the counter service itself."""
+    increments: int = 0
+    flushes: int = 0
+    rows_updated: int = 0
+    last_flush_at: Optional[datetime] = None
+    last_flush_seconds: float = 0.0
+    pending_by_target: Dict[str, int] = field(default_factory=dict)
+
+
+class PopularityCounters:
+    """
+    Buffer counter increments and flush them in atomic batches
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = 5.0,
+        use_redis: bool = True,
+        session_factory=AsyncSessionLocal
+    ):
+        self.use_redis = use_redis
+        self.session_factory = session_factory
+        self._pending: Dict[CounterKey, int] = defaultdict(int)
+        self._flush_lock = asyncio.Lock()
+        self._flusher = PeriodicTask(self.flush, flush_interval, "popularity counter flush", run_on_stop=True)
+        self.stats = CounterStats()
+
+    @staticmethod
+    def _encode(key: CounterKey) -> str:
+        target, item_id, column = key
+        return f"{target}:{item_id}:{column}"
+
+    @staticmethod
+    def _decode(raw: str) -> Optional[CounterKey]:
+        try:
+            target, item_id, column = raw.split(":")
+            return target, int(item_id), column
+        except ValueError:
+            logger.warning(f"Ignoring malformed counter key: {raw}")
+            return None
+
+    async def increment(self, target: str, item_id: int, column: str, amount: int = 1) -> None:
+        """
+        Buffer an increment.
+
+        Args:
+            target: Registered target name
+            item_id: Primary key of the row
+            column: Counter column to increment
+            amount: Increment amount
+        """
+        registered = _targets.get(target)
+        if not registered or column not in registered.columns:
+            logger.warning(f"Ignoring increment of unregistered counter {target}.{column}")
+            return
+
+        key = (target, item_id, column)
+        self.stats.increments += 1
+
+        if self.use_redis and cache.redis_client:
+            value = await cache.cache_manager.hash_increment(
+                PENDING_HASH_KEY, self._encode(key), amount
+            )
+            if value:
+                return
+
+        self._pending[key] += amount
+
+    def pending(self) -> Dict[CounterKey, int]:
+        """Increments buffered in this process (not yet flushed)."""
+        return dict(self._pending)
+
+    async def _drain(self) -> Dict[CounterKey, int]:
+        """Take all buffered increments, local and shared."""
+        drained, self._pending = self._pending, defaultdict(int)
+
+        if self.use_redis and cache.redis_client:
+            shared = await cache.cache_manager.drain_hash(PENDING_HASH_KEY)
+            for raw, amount in shared.items():
+                key = self._decode(raw)
+                if key:
+                    drained[key] += int(amount)
+
+        return {key: amount for key, amount in drained.items() if amount}
+
+    async def _apply(self, db: AsyncSession, increments: Dict[CounterKey, int]) -> int:
+        """Apply increments with one executemany UPDATE per (target, column)."""
+        grouped: Dict[Tuple[str, str], List[Dict[str, int]]] = defaultdict(list)
+        for (target, item_id, column), amount in increments.items():
+            grouped[(target, column)].append({"b_id": item_id, "b_amount": amount})
+
+        rows = 0
+        for (target, column), params in grouped.items():
+            table = _targets[target].model.__table__
+            counter = table.c[column]
+            await db.execute(
+                update(table)
+                .where(table.c.id == bindparam("b_id"))
+                .values({column: func.coalesce(counter, 0) + bindparam("b_amount")}),
+                params
+            )
+            rows += len(params)
+
+        today = datetime.utcnow().date()
+        await self._upsert_daily(db, [
+            {
+                "target": target,
+                "metric": column,
+                "day": today,
+                "item_id": item_id,
+                "count": amount,
+            }
+            for (target, item_id, column), amount in increments.items()
+        ])
+        return rows
+
+    async def _upsert_daily(self, db: AsyncSession, values: List[Dict[str, Any]]):
+        """Add counts to today's popularity rows, creating them as needed."""
+        if not values:
+            return
+
+        dialect = db.bind.dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            insert = None
+
+        if insert is not None:
+            stmt = insert(PopularityDaily)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["target", "metric", "day", "item_id"],
+                set_={"count": PopularityDaily.count + stmt.excluded.count}
+            )
+            await db.execute(stmt, values)
+            return
+
+        # Portable fallback: update existing rows, insert the rest
+        for value in values:
+            result = await db.execute(
+                update(PopularityDaily)
+                .where(
+                    and_(
+                        PopularityDaily.target == value["target"],
+                        PopularityDaily.metric == value["metric"],
+                        PopularityDaily.day == value["day"],
+                        PopularityDaily.item_id == value["item_id"]
+                    )
+                )
+                .values(count=PopularityDaily.count + value["count"])
+            )
+            if not result.rowcount:
+                db.add(PopularityDaily(**value))
+        await db.flush()
+
+    async def flush(self, db: Optional[AsyncSession] = None) -> int:
+        """
+        Flush buffered increments to the database.
+
+        Args:
+            db: Session to use; a new one is opened and committed if omitted
+
+        Returns:
+            Number of counter rows updated
+        """
+        async with self._flush_lock:
+            increments = await self._drain()
+            if not increments:
+                return 0
+
+            started = datetime.utcnow()
+            try:
+                if db is not None:
+                    rows = await self._apply(db, increments)
+                    await db.commit()
+                else:
+                    async with self.session_factory() as session:
+                        rows = await self._apply(session, increments)
+                        await session.commit()
+            except Exception:
+                # Put the increments back so the next flush retries them
+                for key, amount in increments.items():
+                    self._pending[key] += amount
+                raise
+
+            self.stats.flushes += 1
+            self.stats.rows_updated += rows
+            self.stats.last_flush_at = started
+            self.stats.last_flush_seconds = (datetime.utcnow() - started).total_seconds()
+            return rows
+
+    async def get_trending(
+        self,
+        db: AsyncSession,
+        target: str,
+        metrics: Tuple[str, ...],
+        days: int = 7,
+        limit: int = 10
+    ) -> List[Tuple[int, int]]:
+        """
+        Get the items with the most activity over the last ``days`` days.
+
+        Args:
+            target: Registered target name
+            metrics: Counter columns to sum (e.g. ("installs_count",))
+            days: Window size in days
+            limit: Maximum number of items
+
+        Returns:
+            List of (item_id, count) sorted by count descending
+        """
+        since = (datetime.utcnow() - timedelta(days=days)).date()
+        total = func.sum(PopularityDaily.count).label("total")
+        result = await db.execute(
+            select(PopularityDaily.item_id, total)
+            .where(
+                and_(
+                    PopularityDaily.target == target,
+                    PopularityDaily.metric.in_(metrics),
+                    PopularityDaily.day >= since
+                )
+            )
+            .group_by(PopularityDaily.item_id)
+            .order_by(desc(total))
+            .limit(limit)
+        )
+        return [(row[0], int(row[1])) for row in result.all()]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get counter service statistics."""
+        pending_by_target: Dict[str, int] = defaultdict(int)
+        for (target, _, _), amount in self._pending.items():
+            pending_by_target[target] += amount
+        self.stats.pending_by_target = dict(pending_by_target)
+
+        return {
+            "increments": self.stats.increments,
+            "flushes": self.stats.flushes,
+            "rows_updated": self.stats.rows_updated,
+            "last_flush_at": self.stats.last_flush_at.isoformat() if self.stats.last_flush_at else None,
+            "last_flush_seconds": self.stats.last_flush_seconds,
+            "pending_by_target": self.stats.pending_by_target,
+        }
+
+    def start(self):
+        """Start the periodic flush task on the running event loop."""
+        self._flusher.start()
+
+    async def stop(self):
+        """Stop the flush task and flush whatever is still buffered."""
+        await self._flusher.stop()
+
+
+# Global popularity counter instance
+popularity_counters = PopularityCounters()
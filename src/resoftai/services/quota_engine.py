@@ -0,0 +1,478 @@
+"""
+Quota Engine
+
+O(1) quota enforcement for metered operations.
+
+Each quota keeps a running counter per period bucket (see
+``crud.enterprise.quota_period_key``). ``reserve`` checks every quota of an
+organization's resource and adds the amount to all of them atomically, or
+to none:
+
+- With Redis, one Lua script checks and increments the bucket counters in a
+  single round trip. Counters missing from Redis are seeded from the
+  ``quota_counters`` table, which is kept up to date by the batched flush.
+- Without Redis, a conditional ``UPDATE ... WHERE used + :amount <= limit``
+  on ``quota_counters`` does the same in one short transaction.
+
+Usage records are buffered and written in batches for auditing, and a
+quota's warning threshold is reported exactly once per period: only the
+reservation that crosses it sees ``warning=True``.
+"""
+import asyncio
+import logging
+import math
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from resoftai.crud.enterprise import (
+    add_quota_usage, list_resource_quotas, quota_period_end, quota_period_key
+)
+from resoftai.db import AsyncSessionLocal
+from resoftai.models.enterprise import QuotaCounter, ResourceType, UsageRecord
+from resoftai.services.periodic import PeriodicTask
+from resoftai.utils import cache
+from resoftai.utils.cache import _MISSING
+
+logger = logging.getLogger(__name__)
+
+# KEYS: bucket counters. ARGV: amount, then per key: limit, warn_at, ttl, seed.
+# Returns {-1, i} when key i is missing and no seed was passed, {0, i, used}
+# when key i would exceed its limit, else {1, used_1, crossed_1, ...}.
+RESERVE_SCRIPT = """
+local amount = tonumber(ARGV[1])
+for i, key in ipairs(KEYS) do
+    local base = 1 + (i - 1) * 4
+    local used = redis.call('GET', key)
+    if not used then
+        local seed = ARGV[base + 4]
+        if seed == '' then return {-1, i} end
+        used = seed
+        local ttl = tonumber(ARGV[base + 3])
+        if ttl > 0 then
+            redis.call('SET', key, seed, 'EX', ttl)
+        else
+            redis.call('SET', key, seed)
+        end
+    end
+    used = tonumber(used)
+    if used + amount > tonumber(ARGV[base + 1]) then return {0, i, used} end
+end
+local result = {1}
+for i, key in ipairs(KEYS) do
+    local warn_at = tonumber(ARGV[1 + (i - 1) * 4 + 2])
+    local used = redis.call('INCRBY', key, amount)
+    local crossed = 0
+    if used - amount < warn_at and used >= warn_at then crossed = 1 end
+    table.insert(result, used)
+    table.insert(result, crossed)
+end
+return result
+"""
+
+RELEASE_SCRIPT = """
+for i, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 1 then
+        redis.call('DECRBY', key, ARGV[1])
+    end
+end
+return 1
+"""
+
+
+@dataclass(frozen=True)
+class QuotaSpec:
+    """The parts of a Quota row the engine needs."""
+    id: int
+    limit_value: int
+    period: Optional[str]
+    warning_threshold: Optional[float]
+
+    @property
+    def warn_at(self) -> int:
+        """Usage at which the warning is due (beyond the limit if disabled)."""
+        if not self.warning_threshold:
+            return self.limit_value + 1
+        return math.ceil(self.limit_value * self.warning_threshold)
+
+
+@dataclass
+class QuotaDecision:
+    """Outcome of a reservation."""
+    allowed: bool
+    limit: Optional[int] = None
+    used: int = 0
+    period: Optional[str] = None
+    warning: bool = False
+    message: Optional[str] = None
+
+    @property
+    def remaining(self) -> Optional[int]:
+        """Units left in the tightest quota (None when unlimited)."""
+        return None if self.limit is None else max(self.limit - self.used, 0)
+
+
+WarningListener = Callable[[int, ResourceType, QuotaSpec, int], Awaitable[None]]
+
+
+class QuotaEngine:
+    """
+    Atomic check-and-reserve over period-bucketed quota counters
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = 5.0,
+        batch_size: int = 500,
+        spec_ttl: float = 60.0,
+        use_redis: bool = True,
+        session_factory=AsyncSessionLocal
+    ):
+        """
+        Initialize quota engine.
+
+        Args:
+            flush_interval: Seconds between usage record flushes
+            batch_size: Buffered records that trigger an early flush
+            spec_ttl: Seconds to keep quota definitions in process
+            use_redis: Keep counters in Redis when it is available
+            session_factory: Factory for database sessions
+        """
+        self.batch_size = batch_size
+        self.spec_ttl = spec_ttl
+        self.use_redis = use_redis
+        self.session_factory = session_factory
+        self._records: List[Dict[str, Any]] = []
+        # Counter increments made in Redis and not yet written to quota_counters
+        self._deltas: Dict[Tuple[int, str], int] = defaultdict(int)
+        self._seeded: set = set()
+        self._scripts: Dict[str, Any] = {}
+        self._script_client = None
+        self._flush_lock = asyncio.Lock()
+        self._flusher = PeriodicTask(self.flush, flush_interval, "quota usage flush", run_on_stop=True)
+        self._listeners: List[WarningListener] = []
+        self.stats = {
+            "reservations": 0,
+            "rejections": 0,
+            "warnings": 0,
+            "records_written": 0,
+            "flushes": 0,
+        }
+
+    def add_warning_listener(self, listener: WarningListener):
+        """
+        Register a coroutine called when a quota crosses its warning threshold.
+
+        Args:
+            listener: Called with (organization_id, resource_type, quota, used)
+        """
+        self._listeners.append(listener)
+
+    async def get_specs(
+        self,
+        db: AsyncSession,
+        organization_id: int,
+        resource_type: ResourceType
+    ) -> Tuple[QuotaSpec, ...]:
+        """Get an organization's quotas for a resource, cached in process."""
+        key = f"quota:{organization_id}:{getattr(resource_type, 'value', resource_type)}"
+        specs = cache.cache_manager.local.get(key)
+        if specs is _MISSING:
+            quotas = await list_resource_quotas(db, organization_id, resource_type)
+            specs = tuple(
+                QuotaSpec(quota.id, quota.limit_value, quota.period, quota.warning_threshold)
+                for quota in quotas
+            )
+            # Evicted by crud.enterprise.create_quota through the org tag
+            cache.cache_manager.local.set(key, specs, ttl=self.spec_ttl, tags=[f"quota:{organization_id}"])
+        return specs
+
+    async def reserve(
+        self,
+        db: AsyncSession,
+        organization_id: int,
+        resource_type: ResourceType,
+        amount: int = 1,
+        user_id: Optional[int] = None,
+        project_id: Optional[int] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> QuotaDecision:
+        """
+        Reserve ``amount`` units against every quota of a resource, or none.
+
+        Args:
+            db: Database session (used to load quota definitions on a miss)
+            organization_id: Organization ID
+            resource_type: Metered resource
+            amount: Units to consume
+            user_id: Consuming user, for the usage record
+            project_id: Consuming project, for the usage record
+            metadata: Additional context for the usage record
+
+        Returns:
+            QuotaDecision (``allowed`` is False if any quota would be exceeded)
+        """
+        specs = await self.get_specs(db, organization_id, resource_type)
+        if not specs:
+            # No quota means unlimited
+            return QuotaDecision(allowed=True)
+
+        now = datetime.utcnow()
+        buckets = [quota_period_key(spec.period, now) for spec in specs]
+
+        if self.use_redis and cache.redis_client:
+            outcome = await self._reserve_redis(specs, buckets, amount, now)
+        else:
+            outcome = await self._reserve_db(specs, buckets, amount)
+
+        allowed, used_by_quota, crossed = outcome
+        tightest = min(range(len(specs)), key=lambda i: specs[i].limit_value - used_by_quota[i])
+        spec = specs[tightest]
+        decision = QuotaDecision(
+            allowed=allowed,
+            limit=spec.limit_value,
+            used=used_by_quota[tightest],
+            period=spec.period,
+            warning=any(crossed)
+        )
+
+        if not allowed:
+            self.stats["rejections"] += 1
+            decision.message = (
+                f"Quota exceeded for {getattr(resource_type, 'value', resource_type)}. "
+                f"Limit: {spec.limit_value}, Current: {used_by_quota[tightest]}"
+            )
+            return decision
+
+        self.stats["reservations"] += 1
+        self._records.append({
+            "quota_id": specs[0].id,
+            "organization_id": organization_id,
+            "resource_type": resource_type,
+            "amount": amount,
+            "user_id": user_id,
+            "project_id": project_id,
+            "usage_metadata": metadata,
+            "recorded_at": now,
+        })
+        if len(self._records) >= self.batch_size:
+            self._flusher.wake()
+
+        for index, did_cross in enumerate(crossed):
+            if did_cross:
+                await self._warn(organization_id, resource_type, specs[index], used_by_quota[index])
+        return decision
+
+    async def release(
+        self,
+        organization_id: int,
+        resource_type: ResourceType,
+        specs: Tuple[QuotaSpec, ...],
+        amount: int = 1
+    ):
+        """
+        Give back units of a reservation that was not used.
+
+        The refund is also recorded as a negative usage record, so usage
+        records and counters keep adding up.
+
+        Args:
+            organization_id: Organization ID
+            resource_type: Metered resource
+            specs: Quotas the units were reserved against (from ``get_specs``)
+            amount: Units to give back
+        """
+        if not specs:
+            return
+
+        now = datetime.utcnow()
+        buckets = [(spec.id, quota_period_key(spec.period, now)) for spec in specs]
+        if self.use_redis and cache.redis_client:
+            keys = [self._redis_key(quota_id, bucket) for quota_id, bucket in buckets]
+            await self._script("release", RELEASE_SCRIPT)(keys=keys, args=[amount])
+            for bucket in buckets:
+                self._deltas[bucket] -= amount
+        else:
+            async with self.session_factory() as session:
+                await add_quota_usage(session, {bucket: -amount for bucket in buckets})
+                await session.commit()
+
+        self._records.append({
+            "quota_id": specs[0].id,
+            "organization_id": organization_id,
+            "resource_type": resource_type,
+            "amount": -amount,
+            "user_id": None,
+            "project_id": None,
+            "usage_metadata": {"released": True},
+            "recorded_at": now,
+        })
+
+    async def _reserve_redis(
+        self,
+        specs: Tuple[QuotaSpec, ...],
+        buckets: List[str],
+        amount: int,
+        now: datetime
+    ) -> Tuple[bool, List[int], List[bool]]:
+        keys = [self._redis_key(spec.id, bucket) for spec, bucket in zip(specs, buckets)]
+        seed_all = any((spec.id, bucket) not in self._seeded for spec, bucket in zip(specs, buckets))
+
+        for _ in range(2):
+            args: List[Any] = [amount]
+            seeds = await self._load_seeds(specs, buckets) if seed_all else {}
+            for spec, bucket in zip(specs, buckets):
+                end = quota_period_end(spec.period, now)
+                # Keep finished buckets a little longer for late readers
+                ttl = int((end - now).total_seconds()) + 3600 if end else 0
+                args += [spec.limit_value, spec.warn_at, ttl, seeds.get((spec.id, bucket), "")]
+
+            result = await self._script("reserve", RESERVE_SCRIPT)(keys=keys, args=args)
+            status = int(result[0])
+            if status == -1:
+                # Counter expired or Redis was reset: seed every bucket and retry
+                seed_all = True
+                continue
+
+            self._seeded.update((spec.id, bucket) for spec, bucket in zip(specs, buckets))
+            if status == 0:
+                used = [0] * len(specs)
+                used[int(result[1]) - 1] = int(result[2])
+                return False, used, [False] * len(specs)
+
+            used = [int(value) for value in result[1::2]]
+            for spec, bucket in zip(specs, buckets):
+                self._deltas[(spec.id, bucket)] += amount
+            return True, used, [bool(int(flag)) for flag in result[2::2]]
+
+        raise RuntimeError("Quota counters could not be seeded")
+
+    async def _load_seeds(self, specs: Tuple[QuotaSpec, ...], buckets: List[str]) -> Dict[Tuple[int, str], int]:
+        """Current totals of buckets: the stored counter plus unflushed increments."""
+        wanted = list(zip((spec.id for spec in specs), buckets))
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(QuotaCounter.quota_id, QuotaCounter.period_key, QuotaCounter.used).where(
+                    QuotaCounter.quota_id.in_([quota_id for quota_id, _ in wanted])
+                )
+            )
+            stored = {(quota_id, period_key): used for quota_id, period_key, used in result}
+        return {bucket: stored.get(bucket, 0) + self._deltas.get(bucket, 0) for bucket in wanted}
+
+    async def _reserve_db(
+        self,
+        specs: Tuple[QuotaSpec, ...],
+        buckets: List[str],
+        amount: int
+    ) -> Tuple[bool, List[int], List[bool]]:
+        async with self.session_factory() as session:
+            # Adding 0 creates missing bucket rows, so the conditional UPDATEs can match
+            await add_quota_usage(session, {(spec.id, bucket): 0 for spec, bucket in zip(specs, buckets)})
+
+            used: List[int] = []
+            for index, (spec, bucket) in enumerate(zip(specs, buckets)):
+                result = await session.execute(
+                    update(QuotaCounter)
+                    .where(
+                        and_(
+                            QuotaCounter.quota_id == spec.id,
+                            QuotaCounter.period_key == bucket,
+                            QuotaCounter.used + amount <= spec.limit_value
+                        )
+                    )
+                    .values(used=QuotaCounter.used + amount, updated_at=datetime.utcnow())
+                    .returning(QuotaCounter.used)
+                )
+                new_used = result.scalar()
+                if new_used is None:
+                    # Over the limit: undo the buckets already incremented
+                    await session.rollback()
+                    current = await session.execute(
+                        select(QuotaCounter.used).where(
+                            and_(QuotaCounter.quota_id == spec.id, QuotaCounter.period_key == bucket)
+                        )
+                    )
+                    rejected = [0] * len(specs)
+                    rejected[index] = current.scalar() or 0
+                    return False, rejected, [False] * len(specs)
+                used.append(new_used)
+
+            await session.commit()
+
+        crossed = [used[i] - amount < spec.warn_at <= used[i] for i, spec in enumerate(specs)]
+        return True, used, crossed
+
+    def _redis_key(self, quota_id: int, bucket: str) -> str:
+        return cache.cache_manager._make_key(f"quota:{quota_id}:{bucket}")
+
+    def _script(self, name: str, source: str):
+        client = cache.redis_client
+        if self._script_client is not client:
+            self._scripts.clear()
+            self._script_client = client
+        if name not in self._scripts:
+            # register_script runs EVALSHA and only resends the source on NOSCRIPT
+            self._scripts[name] = client.register_script(source)
+        return self._scripts[name]
+
+    async def _warn(self, organization_id: int, resource_type: ResourceType, spec: QuotaSpec, used: int):
+        self.stats["warnings"] += 1
+        logger.warning(
+            f"Organization {organization_id} reached {used}/{spec.limit_value} of its "
+            f"{spec.period or 'total'} {getattr(resource_type, 'value', resource_type)} quota"
+        )
+        for listener in self._listeners:
+            try:
+                await listener(organization_id, resource_type, spec, used)
+            except Exception as e:
+                logger.error(f"Quota warning listener failed: {e}")
+
+    async def flush(self) -> int:
+        """
+        Write buffered usage records (and Redis counter increments) to the database.
+
+        Returns:
+            Number of usage records written
+        """
+        async with self._flush_lock:
+            records, self._records = self._records, []
+            deltas, self._deltas = self._deltas, defaultdict(int)
+            if not records and not any(deltas.values()):
+                return 0
+
+            try:
+                async with self.session_factory() as session:
+                    if records:
+                        await session.execute(insert(UsageRecord), records)
+                    await add_quota_usage(session, {bucket: amount for bucket, amount in deltas.items() if amount})
+                    await session.commit()
+            except Exception:
+                # Keep everything for the next flush
+                self._records = records + self._records
+                for bucket, amount in deltas.items():
+                    self._deltas[bucket] += amount
+                raise
+
+            self.stats["records_written"] += len(records)
+            self.stats["flushes"] += 1
+            return len(records)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get quota engine statistics."""
+        return {**self.stats, "pending_records": len(self._records)}
+
+    def start(self):
+        """Start the periodic flush task on the running event loop."""
+        self._flusher.start()
+
+    async def stop(self):
+        """Stop the flush task and flush whatever is still buffered."""
+        await self._flusher.stop()
+
+
+# Global quota engine instance
+quota_engine = QuotaEngine()
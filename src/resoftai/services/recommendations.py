@@ -0,0 +1,530 @@
+"""
+Recommendation Service
+
+Precomputed recommendations and trending lists for marketplace items.
+
+A periodic refresh builds, per registered source:
+    - item-to-item co-install similarity (cosine over the user/item install
+      matrix), top-K neighbours per item
+    - time-decayed trending scores from the per-day popularity counters
+
+and stores them as ``recommendation_snapshots`` rows. Per-user
+recommendations are derived from the neighbour lists by the same
+background task, the first time a user asks for them, and invalidated
+when the user installs or uninstalls an item. Reads never compute or
+write: a missing snapshot is answered with a cheap fallback (popular or
+trending items) and its computation is queued.
+"""
+import asyncio
+import logging
+import math
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from itertools import combinations
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, delete, desc, func, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from resoftai.db import AsyncSessionLocal
+from resoftai.models.popularity import PopularityDaily
+from resoftai.models.recommendation import RecommendationSnapshot
+from resoftai.services.periodic import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+# Items stored per snapshot row
+MAX_STORED_ITEMS = 50
+
+# Trending windows (days) precomputed by every refresh
+DEFAULT_TRENDING_WINDOWS = (7,)
+
+KIND_SIMILAR = "similar"
+KIND_USER = "user"
+KIND_TRENDING = "trending"
+
+Ranked = List[Tuple[int, float]]
+
+
+@dataclass
+class RecommendationSource:
+    """A marketplace item table and the installations that link users to it."""
+    name: str  # also the popularity counter target name
+    model: Any
+    installation_model: Any
+    item_column: str  # installation column referencing the item
+    eligible: Dict[str, Any] = field(default_factory=dict)  # item column -> required value
+    popularity_field: str = "downloads_count"
+    trending_metrics: Tuple[str, ...] = ("downloads_count",)
+    user_column: str = "user_id"
+
+
+_sources: Dict[str, RecommendationSource] = {}
+
+
+def register_recommendation_source(
+    name: str,
+    model: Any,
+    installation_model: Any,
+    item_column: str,
+    eligible: Optional[Dict[str, Any]] = None,
+    popularity_field: str = "downloads_count",
+    trending_metrics: Tuple[str, ...] = ("downloads_count",)
+):
+    """
+    Register a marketplace item type for recommendations.
+
+    Args:
+        name: Source name (matches the popularity counter target)
+        model: Item model with an integer ``id`` primary key
+        installation_model: Model with ``user_id`` and ``item_column`` columns
+        item_column: Installation column holding the item id
+        eligible: Column values an item must have to be recommended
+        popularity_field: Item column used to pad short lists
+        trending_metrics: Popularity counter metrics that drive trending
+    """
+    _sources[name] = RecommendationSource(
+        name=name,
+        model=model,
+        installation_model=installation_model,
+        item_column=item_column,
+        eligible=dict(eligible or {}),
+        popularity_field=popularity_field,
+        trending_metrics=tuple(trending_metrics),
+    )
+
+
+def compute_similarities(
+    pairs: Iterable[Tuple[int, int]],
+    neighbours: int = 20,
+    max_user_items: int = 200,
+    eligible: Optional[Set[int]] = None
+) -> Dict[int, Ranked]:
+    """
+    Item-to-item cosine similarity from co-installations.
+
+    Args:
+        pairs: (user_id, item_id) installation pairs
+        neighbours: Neighbours kept per item
+        max_user_items: Cap on items per user (bounds the pairwise cost)
+        eligible: If given, only these items are kept as neighbours
+
+    Returns:
+        Mapping of item id to [(neighbour id, similarity)] best first
+    """
+    users: Dict[int, Set[int]] = defaultdict(set)
+    for user_id, item_id in pairs:
+        users[user_id].add(item_id)
+
+    item_users: Counter = Counter()
+    co_installs: Dict[int, Counter] = defaultdict(Counter)
+    for items in users.values():
+        items = sorted(items)[:max_user_items]
+        item_users.update(items)
+        for a, b in combinations(items, 2):
+            co_installs[a][b] += 1
+            co_installs[b][a] += 1
+
+    similarities: Dict[int, Ranked] = {}
+    for item_id, counts in co_installs.items():
+        scored = [
+            (other, count / math.sqrt(item_users[item_id] * item_users[other]))
+            for other, count in counts.items()
+            if eligible is None or other in eligible
+        ]
+        scored.sort(key=lambda pair: (-pair[1], pair[0]))
+        if scored:
+            similarities[item_id] = scored[:neighbours]
+    return similarities
+
+
+def decayed_scores(
+    rows: Iterable[Tuple[int, date, int]],
+    today: date,
+    half_life_days: float
+) -> Ranked:
+    """
+    Exponentially time-decayed activity scores.
+
+    Args:
+        rows: (item_id, day, count) rows
+        today: Reference day (age 0)
+        half_life_days: Days after which activity counts half
+
+    Returns:
+        [(item_id, score)] best first
+    """
+    scores: Dict[int, float] = defaultdict(float)
+    for item_id, day, count in rows:
+        age = max((today - day).days, 0)
+        scores[item_id] += count * 0.5 ** (age / half_life_days)
+    return sorted(scores.items(), key=lambda pair: (-pair[1], pair[0]))
+
+
+def _merge_padding(ranked: Ranked, padding: Iterable[int], exclude: Set[int], size: int) -> Ranked:
+    """Append padding items (score 0) until the list holds ``size`` items."""
+    seen = set(exclude) | {item_id for item_id, _ in ranked}
+    merged = list(ranked)
+    for item_id in padding:
+        if len(merged) >= size:
+            break
+        if item_id not in seen:
+            merged.append((item_id, 0.0))
+            seen.add(item_id)
+    return merged
+
+
+class RecommendationEngine:
+    """
+    Refresh and serve precomputed recommendation snapshots
+    """
+
+    def __init__(
+        self,
+        refresh_interval: float = 600.0,
+        neighbours: int = 20,
+        half_life_days: float = 3.0,
+        session_factory=AsyncSessionLocal
+    ):
+        self.neighbours = neighbours
+        self.half_life_days = half_life_days
+        self.session_factory = session_factory
+        self._pending: Set[Tuple[str, str, int]] = set()
+        # Refreshes drop user snapshots, so they never overlap with computing them
+        self._lock = asyncio.Lock()
+        self._refresher = PeriodicTask(self._refresh, refresh_interval, "recommendation refresh", run_on_start=True)
+        self._computer = PeriodicTask(self._compute, refresh_interval, "recommendation computation")
+
+    # ------------------------------------------------------------------
+    # Snapshot storage
+    # ------------------------------------------------------------------
+
+    async def _lookup(self, db: AsyncSession, target: str, kind: str, key_id: int) -> Optional[List[int]]:
+        result = await db.execute(
+            select(RecommendationSnapshot.item_ids).where(
+                and_(
+                    RecommendationSnapshot.target == target,
+                    RecommendationSnapshot.kind == kind,
+                    RecommendationSnapshot.key_id == key_id
+                )
+            )
+        )
+        return result.scalar_one_or_none()
+
+    async def _store(self, db: AsyncSession, target: str, kind: str, key_id: int, ranked: Ranked):
+        """Insert or replace one snapshot row."""
+        values = {
+            "target": target,
+            "kind": kind,
+            "key_id": key_id,
+            "item_ids": [item_id for item_id, _ in ranked[:MAX_STORED_ITEMS]],
+            "scores": [round(score, 6) for _, score in ranked[:MAX_STORED_ITEMS]],
+            "computed_at": datetime.utcnow(),
+        }
+
+        dialect = db.bind.dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            if dialect == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            stmt = dialect_insert(RecommendationSnapshot).values(values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["target", "kind", "key_id"],
+                set_={
+                    "item_ids": stmt.excluded.item_ids,
+                    "scores": stmt.excluded.scores,
+                    "computed_at": stmt.excluded.computed_at,
+                }
+            )
+            await db.execute(stmt)
+            return
+
+        # Portable fallback; a concurrent writer storing the same key wins
+        try:
+            async with db.begin_nested():
+                await self._delete(db, target, kind, [key_id])
+                await db.execute(insert(RecommendationSnapshot).values(values))
+        except IntegrityError:
+            pass
+
+    async def _delete(self, db: AsyncSession, target: str, kind: str, key_ids: Optional[List[int]] = None):
+        conditions = [RecommendationSnapshot.target == target, RecommendationSnapshot.kind == kind]
+        if key_ids is not None:
+            conditions.append(RecommendationSnapshot.key_id.in_(key_ids))
+        await db.execute(
+            delete(RecommendationSnapshot)
+            .where(and_(*conditions))
+            .execution_options(synchronize_session=False)
+        )
+
+    # ------------------------------------------------------------------
+    # Computation
+    # ------------------------------------------------------------------
+
+    def _eligible_conditions(self, source: RecommendationSource) -> List[Any]:
+        table = source.model.__table__
+        return [table.c[column] == value for column, value in source.eligible.items()]
+
+    async def _popular_ids(
+        self,
+        db: AsyncSession,
+        source: RecommendationSource,
+        limit: int = MAX_STORED_ITEMS
+    ) -> List[int]:
+        table = source.model.__table__
+        result = await db.execute(
+            select(table.c.id)
+            .where(and_(*self._eligible_conditions(source)))
+            .order_by(desc(table.c[source.popularity_field]), table.c.id)
+            .limit(limit)
+        )
+        return list(result.scalars().all())
+
+    async def _compute_trending(self, db: AsyncSession, source: RecommendationSource, days: int) -> Ranked:
+        today = datetime.utcnow().date()
+        since = today - timedelta(days=days)
+        result = await db.execute(
+            select(PopularityDaily.item_id, PopularityDaily.day, func.sum(PopularityDaily.count))
+            .where(
+                and_(
+                    PopularityDaily.target == source.name,
+                    PopularityDaily.metric.in_(source.trending_metrics),
+                    PopularityDaily.day >= since
+                )
+            )
+            .group_by(PopularityDaily.item_id, PopularityDaily.day)
+        )
+        ranked = decayed_scores(result.all(), today, self.half_life_days)
+
+        # Drop items that are no longer eligible, then pad with all-time popular ones
+        table = source.model.__table__
+        if ranked:
+            result = await db.execute(
+                select(table.c.id).where(
+                    and_(table.c.id.in_([item_id for item_id, _ in ranked]), *self._eligible_conditions(source))
+                )
+            )
+            eligible = set(result.scalars().all())
+            ranked = [(item_id, score) for item_id, score in ranked if item_id in eligible]
+
+        padding = await self._popular_ids(db, source)
+        return _merge_padding(ranked[:MAX_STORED_ITEMS], padding, set(), MAX_STORED_ITEMS)
+
+    async def refresh(self, db: AsyncSession, name: str) -> Dict[str, int]:
+        """
+        Recompute similarity and trending snapshots for one source.
+
+        Stored per-user recommendations are dropped and rebuilt on demand
+        from the new neighbour lists.
+
+        Args:
+            name: Registered source name
+
+        Returns:
+            Counts of snapshot rows written per kind
+        """
+        source = _sources[name]
+        table = source.model.__table__
+        installations = source.installation_model.__table__
+
+        result = await db.execute(select(table.c.id).where(and_(*self._eligible_conditions(source))))
+        eligible = set(result.scalars().all())
+
+        result = await db.execute(
+            select(installations.c[source.user_column], installations.c[source.item_column]).distinct()
+        )
+        similarities = compute_similarities(result.all(), self.neighbours, eligible=eligible)
+
+        await self._delete(db, name, KIND_SIMILAR)
+        await self._delete(db, name, KIND_USER)
+        await self._delete(db, name, KIND_TRENDING)
+
+        now = datetime.utcnow()
+        if similarities:
+            await db.execute(insert(RecommendationSnapshot), [
+                {
+                    "target": name,
+                    "kind": KIND_SIMILAR,
+                    "key_id": item_id,
+                    "item_ids": [other for other, _ in ranked],
+                    "scores": [round(score, 6) for _, score in ranked],
+                    "computed_at": now,
+                }
+                for item_id, ranked in similarities.items()
+            ])
+
+        for days in DEFAULT_TRENDING_WINDOWS:
+            await self._store(db, name, KIND_TRENDING, days, await self._compute_trending(db, source, days))
+
+        return {KIND_SIMILAR: len(similarities), KIND_TRENDING: len(DEFAULT_TRENDING_WINDOWS)}
+
+    async def refresh_all(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Refresh every registered source in its own transaction.
+
+        A failing source is rolled back, logged and reported as
+        ``{"error": message}`` without stopping the others.
+
+        Returns:
+            Per-source row counts, or the error of sources that failed
+        """
+        written: Dict[str, Dict[str, Any]] = {}
+        for name in list(_sources):
+            async with self.session_factory() as session:
+                try:
+                    written[name] = await self.refresh(session, name)
+                    await session.commit()
+                except Exception as e:
+                    await session.rollback()
+                    logger.error(f"Error refreshing recommendations for {name}: {e}", exc_info=True)
+                    written[name] = {"error": str(e)}
+        return written
+
+    # ------------------------------------------------------------------
+    # Serving
+    # ------------------------------------------------------------------
+
+    async def get_trending(self, db: AsyncSession, name: str, days: int = 7, limit: int = 10) -> List[int]:
+        """
+        Get trending item ids (a single lookup).
+
+        Until the window's snapshot exists, the most popular items are
+        returned and the snapshot is queued for the background task.
+
+        Args:
+            name: Registered source name
+            days: Trending window in days
+            limit: Maximum number of ids
+
+        Returns:
+            Item ids, most trending first
+        """
+        item_ids = await self._lookup(db, name, KIND_TRENDING, days)
+        if item_ids is None:
+            self._schedule(name, KIND_TRENDING, days)
+            return await self._popular_ids(db, _sources[name], limit)
+        return item_ids[:limit]
+
+    async def recommend_for_user(self, db: AsyncSession, name: str, user_id: int, limit: int = 10) -> List[int]:
+        """
+        Get personalized recommendations (a single lookup once computed).
+
+        Until the user's snapshot exists, trending items the user does not
+        have are returned and the snapshot is queued for the background task.
+
+        Args:
+            name: Registered source name
+            user_id: User ID
+            limit: Maximum number of ids
+
+        Returns:
+            Recommended item ids, best first
+        """
+        item_ids = await self._lookup(db, name, KIND_USER, user_id)
+        if item_ids is not None:
+            return item_ids[:limit]
+
+        self._schedule(name, KIND_USER, user_id)
+        installed = await self._installed_ids(db, _sources[name], user_id)
+        trending = await self.get_trending(db, name, DEFAULT_TRENDING_WINDOWS[0], limit + len(installed))
+        return [item_id for item_id in trending if item_id not in installed][:limit]
+
+    async def _installed_ids(self, db: AsyncSession, source: RecommendationSource, user_id: int) -> Set[int]:
+        installations = source.installation_model.__table__
+        result = await db.execute(
+            select(installations.c[source.item_column])
+            .where(installations.c[source.user_column] == user_id)
+            .distinct()
+        )
+        return set(result.scalars().all())
+
+    async def _compute_user(self, db: AsyncSession, name: str, user_id: int) -> Ranked:
+        """
+        Items co-installed with the user's items, weighted by summed
+        similarity, padded with trending items and never containing items
+        the user already has.
+        """
+        installed = await self._installed_ids(db, _sources[name], user_id)
+
+        scores: Dict[int, float] = defaultdict(float)
+        if installed:
+            result = await db.execute(
+                select(RecommendationSnapshot.item_ids, RecommendationSnapshot.scores).where(
+                    and_(
+                        RecommendationSnapshot.target == name,
+                        RecommendationSnapshot.kind == KIND_SIMILAR,
+                        RecommendationSnapshot.key_id.in_(installed)
+                    )
+                )
+            )
+            for neighbour_ids, neighbour_scores in result.all():
+                for item_id, score in zip(neighbour_ids, neighbour_scores):
+                    if item_id not in installed:
+                        scores[item_id] += score
+
+        ranked = sorted(scores.items(), key=lambda pair: (-pair[1], pair[0]))[:MAX_STORED_ITEMS]
+        trending = await self.get_trending(db, name, DEFAULT_TRENDING_WINDOWS[0], MAX_STORED_ITEMS)
+        return _merge_padding(ranked, trending, installed, MAX_STORED_ITEMS)
+
+    async def invalidate_user(self, db: AsyncSession, name: str, user_id: int):
+        """Drop a user's stored recommendations (call when their installs change)."""
+        await self._delete(db, name, KIND_USER, [user_id])
+
+    # ------------------------------------------------------------------
+    # Background refresh
+    # ------------------------------------------------------------------
+
+    def _schedule(self, name: str, kind: str, key_id: int):
+        """Queue a missing snapshot for the background task."""
+        self._pending.add((name, kind, key_id))
+        self._computer.wake()
+
+    async def compute_pending(self) -> int:
+        """
+        Compute and store the snapshots queued by reads.
+
+        Trending windows go first so user lists are padded from them.
+        Each snapshot is stored in its own transaction; failures are logged.
+
+        Returns:
+            Number of snapshots processed
+        """
+        pending, self._pending = self._pending, set()
+        for name, kind, key_id in sorted(pending, key=lambda item: item[1] != KIND_TRENDING):
+            async with self.session_factory() as session:
+                try:
+                    if kind == KIND_TRENDING:
+                        ranked = await self._compute_trending(session, _sources[name], key_id)
+                    else:
+                        ranked = await self._compute_user(session, name, key_id)
+                    await self._store(session, name, kind, key_id, ranked)
+                    await session.commit()
+                except Exception as e:
+                    await session.rollback()
+                    logger.error(f"Error computing {kind} recommendations {key_id} for {name}: {e}", exc_info=True)
+        return len(pending)
+
+    async def _refresh(self):
+        async with self._lock:
+            await self.refresh_all()
+
+    async def _compute(self):
+        async with self._lock:
+            await self.compute_pending()
+
+    def start(self):
+        """Start the periodic refresh and the computation of queued snapshots."""
+        self._refresher.start()
+        self._computer.start()
+
+    async def stop(self):
+        """Stop the background tasks."""
+        await self._refresher.stop()
+        await self._computer.stop()
+
+
+# Global recommendation engine instance
+recommendation_engine = RecommendationEngine()
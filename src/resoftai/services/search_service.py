@@ -0,0 +1,505 @@
+"""
+Search Service
+
+Full-text search for marketplace templates, plugins and community templates.
+
+On PostgreSQL, registered tables have a generated ``search_vector`` tsvector
+column with a GIN index (added by migration 009 and maintained by the
+database on every write) and are queried with prefix tsqueries ranked by ``ts_rank_cd``. On other databases,
+and as the typo-tolerant fallback when PostgreSQL finds nothing, an embedded
+inverted index (``utils.search_index``) is kept in each process, updated on
+write and incrementally synced from ``updated_at``. On PostgreSQL that index
+is only built in the background, never inside the request that missed.
+Rows deleted by other processes are evicted when they come up as hits.
+"""
+import asyncio
+import enum
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, cast, desc, func, literal_column, or_, select, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from resoftai.db import AsyncSessionLocal
+from resoftai.utils.search_index import AnyOf, InvertedIndex, SearchHit, SearchResult, tokenize
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SearchCollection:
+    """A searchable table."""
+    name: str
+    model: Any
+    fields: Dict[str, float]  # column -> weight
+    tags_field: Optional[str] = "tags"
+    filter_fields: Tuple[str, ...] = ()
+    boost_field: Optional[str] = None
+    updated_field: str = "updated_at"
+
+    @property
+    def table(self):
+        return self.model.__table__
+
+
+def _plain(value: Any) -> Any:
+    """Store enums by value so filters accept either form."""
+    return value.value if isinstance(value, enum.Enum) else value
+
+
+def _plain_filter(value: Any) -> Any:
+    if isinstance(value, AnyOf):
+        return AnyOf({key: _plain_filter(inner) for key, inner in value.filters.items()})
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [_plain(inner) for inner in value]
+    return _plain(value)
+
+
+def _filter_condition(table, key: str, value: Any):
+    """SQL condition for one search filter."""
+    if isinstance(value, AnyOf):
+        return or_(*(_filter_condition(table, name, inner) for name, inner in value.filters.items()))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return table.c[key].in_(list(value))
+    return table.c[key] == value
+
+
+class SearchService:
+    """
+    Unified search over registered collections
+    """
+
+    def __init__(
+        self,
+        sync_interval: float = 5.0,
+        rebuild_interval: float = 600.0,
+        session_factory=AsyncSessionLocal
+    ):
+        self.sync_interval = sync_interval
+        self.rebuild_interval = rebuild_interval
+        self.session_factory = session_factory
+        self._building: Dict[str, asyncio.Task] = {}
+        self._collections: Dict[str, SearchCollection] = {}
+        self._indexes: Dict[str, InvertedIndex] = {}
+        self._synced_until: Dict[str, Any] = {}
+        self._last_sync: Dict[str, float] = {}
+        self._last_rebuild: Dict[str, float] = {}
+        self._postgres_ready: set = set()
+
+    # ------------------------------------------------------------------
+    # Registration
+    # ------------------------------------------------------------------
+
+    def register_collection(self, collection: SearchCollection):
+        """Register (or replace) a searchable collection."""
+        self._collections[collection.name] = collection
+        self._indexes.pop(collection.name, None)
+
+    def collections(self) -> List[str]:
+        """Names of registered collections."""
+        return list(self._collections)
+
+    def get_collection(self, name: str) -> SearchCollection:
+        """Get a registered collection or raise KeyError."""
+        return self._collections[name]
+
+    async def detect_postgres_schema(self, conn) -> None:
+        """
+        Find the collections whose table has a ``search_vector`` column.
+
+        No-op on databases other than PostgreSQL. Collections without the
+        column (migration 009 not applied yet) use the embedded index.
+
+        Args:
+            conn: Async connection
+        """
+        if conn.dialect.name != "postgresql":
+            return
+
+        tables = {collection.table.name for collection in self._collections.values()}
+        result = await conn.execute(
+            select(literal_column("table_name"))
+            .select_from(text("information_schema.columns"))
+            .where(literal_column("column_name") == "search_vector")
+            .where(literal_column("table_name").in_(sorted(tables)))
+        )
+        found = set(result.scalars())
+        for name, collection in self._collections.items():
+            if collection.table.name in found:
+                self._postgres_ready.add(name)
+            else:
+                logger.warning(
+                    f"No search_vector column on {collection.table.name}; "
+                    f"searching {name} with the embedded index"
+                )
+
+    # ------------------------------------------------------------------
+    # Embedded index maintenance
+    # ------------------------------------------------------------------
+
+    def _columns(self, collection: SearchCollection) -> List[Any]:
+        table = collection.table
+        names = ["id", *collection.fields, *collection.filter_fields, collection.updated_field]
+        if collection.tags_field:
+            names.append(collection.tags_field)
+        if collection.boost_field:
+            names.append(collection.boost_field)
+        return [table.c[name] for name in dict.fromkeys(names)]
+
+    def _add_to_index(self, index: InvertedIndex, collection: SearchCollection, values: Dict[str, Any]):
+        boost = 0.0
+        if collection.boost_field:
+            boost = math.log1p(max(values.get(collection.boost_field) or 0, 0))
+
+        index.add(
+            values["id"],
+            {column: (values.get(column), weight) for column, weight in collection.fields.items()},
+            tags=values.get(collection.tags_field) if collection.tags_field else None,
+            attributes={name: _plain(values.get(name)) for name in collection.filter_fields},
+            boost=boost,
+        )
+
+    async def _load(
+        self,
+        db: AsyncSession,
+        collection: SearchCollection,
+        index: InvertedIndex,
+        since=None
+    ) -> Tuple[int, Any]:
+        updated = collection.table.c[collection.updated_field]
+
+        query = select(*self._columns(collection))
+        if since is not None:
+            query = query.where(updated >= since)
+        result = await db.execute(query)
+
+        latest = since
+        loaded = 0
+        for row in result.mappings():
+            self._add_to_index(index, collection, row)
+            loaded += 1
+            if row[collection.updated_field] and (latest is None or row[collection.updated_field] > latest):
+                latest = row[collection.updated_field]
+        return loaded, latest
+
+    async def _rebuild(self, db: AsyncSession, name: str) -> InvertedIndex:
+        """Build a collection's embedded index from scratch and swap it in."""
+        collection = self._collections[name]
+        started = time.monotonic()
+        index = InvertedIndex()
+        loaded, latest = await self._load(db, collection, index)
+        self._indexes[name] = index
+        self._synced_until[name] = latest
+        self._last_rebuild[name] = self._last_sync[name] = started
+        logger.info(
+            f"Built search index '{name}' with {loaded} documents "
+            f"in {(time.monotonic() - started) * 1000:.0f}ms"
+        )
+        return index
+
+    def _schedule_rebuild(self, name: str):
+        """Rebuild a collection's index in a background task with its own session."""
+        task = self._building.get(name)
+        if task is not None and not task.done():
+            return
+
+        async def rebuild():
+            async with self.session_factory() as db:
+                await self._rebuild(db, name)
+
+        task = asyncio.create_task(rebuild())
+        self._building[name] = task
+        task.add_done_callback(lambda done: self._rebuild_done(name, done))
+
+    def _rebuild_done(self, name: str, task: asyncio.Task):
+        if self._building.get(name) is task:
+            del self._building[name]
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Background rebuild of search index '{name}' failed: {task.exception()!r}")
+
+    async def _ensure_index(
+        self,
+        db: AsyncSession,
+        name: str,
+        rebuild_inline: bool = True
+    ) -> Optional[InvertedIndex]:
+        """
+        Build the embedded index on first use and keep it in sync.
+
+        Args:
+            db: Database session
+            name: Collection name
+            rebuild_inline: Build (or periodically rebuild) the index in this
+                call; otherwise schedule it in the background and use the
+                current index, if any
+
+        Returns:
+            The index, or None while it is still being built in the background
+        """
+        collection = self._collections[name]
+        now = time.monotonic()
+        rebuild_due = name not in self._indexes or now - self._last_rebuild.get(name, 0) > self.rebuild_interval
+
+        if rebuild_due and rebuild_inline:
+            return await self._rebuild(db, name)
+        if rebuild_due:
+            self._schedule_rebuild(name)
+
+        index = self._indexes.get(name)
+        if index is not None and now - self._last_sync.get(name, 0) > self.sync_interval:
+            _, latest = await self._load(db, collection, index, since=self._synced_until.get(name))
+            self._synced_until[name] = latest
+            self._last_sync[name] = now
+        return index
+
+    async def _drop_deleted_hits(
+        self,
+        db: AsyncSession,
+        collection: SearchCollection,
+        index: InvertedIndex,
+        result: SearchResult
+    ) -> SearchResult:
+        """
+        Evict hits whose rows no longer exist.
+
+        ``remove_object`` only reaches this process's index, and syncing by
+        ``updated_at`` never sees deletes, so rows deleted elsewhere are
+        checked here, one query for the returned page. Facet counts may still
+        include them until the next rebuild.
+        """
+        ids = [hit.doc_id for hit in result.hits]
+        if not ids:
+            return result
+        table = collection.table
+        existing = set((await db.execute(select(table.c.id).where(table.c.id.in_(ids)))).scalars())
+        deleted = [doc_id for doc_id in ids if doc_id not in existing]
+        if not deleted:
+            return result
+        for doc_id in deleted:
+            index.remove(doc_id)
+        return SearchResult(
+            hits=[hit for hit in result.hits if hit.doc_id in existing],
+            total=max(result.total - len(deleted), 0),
+            facets=result.facets,
+        )
+
+    def _uses_postgres(self, db: AsyncSession, name: str) -> bool:
+        """Whether a collection is searched with its tsvector column."""
+        return name in self._postgres_ready and db.bind.dialect.name == "postgresql"
+
+    def index_object(self, name: str, obj: Any):
+        """
+        Index (or re-index) an ORM object after a write.
+
+        Only affects indexes that have already been built; others pick up
+        the change when they are built.
+        """
+        collection = self._collections.get(name)
+        index = self._indexes.get(name)
+        if collection is None or index is None:
+            return
+        values = {column.name: getattr(obj, column.name, None) for column in self._columns(collection)}
+        self._add_to_index(index, collection, values)
+
+    def remove_object(self, name: str, object_id: int):
+        """Remove an object from the embedded index after a delete."""
+        index = self._indexes.get(name)
+        if index is not None:
+            index.remove(object_id)
+
+    # ------------------------------------------------------------------
+    # Querying
+    # ------------------------------------------------------------------
+
+    async def _search_postgres(
+        self,
+        db: AsyncSession,
+        collection: SearchCollection,
+        terms: List[str],
+        filters: Dict[str, Any],
+        tags: Optional[Sequence[str]],
+        any_tag: bool,
+        limit: int,
+        offset: int,
+        facet_fields: Sequence[str]
+    ) -> SearchResult:
+        table = collection.table
+        vector = literal_column(f"{table.name}.search_vector")
+        tsquery = func.to_tsquery("simple", " & ".join(f"{term}:*" for term in terms))
+
+        conditions = [vector.op("@@")(tsquery)]
+        conditions.extend(_filter_condition(table, key, value) for key, value in filters.items())
+        if tags and collection.tags_field:
+            tag_conditions = [cast(table.c[collection.tags_field], JSONB).contains([tag]) for tag in tags]
+            conditions.append(or_(*tag_conditions) if any_tag else and_(*tag_conditions))
+        where = and_(*conditions)
+
+        rank = func.ts_rank_cd(vector, tsquery).label("rank")
+        order = [desc(rank)]
+        if collection.boost_field:
+            order.append(desc(table.c[collection.boost_field]))
+
+        result = await db.execute(
+            select(table.c.id, rank).where(where).order_by(*order).offset(offset).limit(limit)
+        )
+        hits = [SearchHit(doc_id=row[0], score=round(float(row[1]), 6)) for row in result.all()]
+
+        total = (await db.execute(select(func.count()).select_from(table).where(where))).scalar_one()
+
+        facets: Dict[str, Dict[str, int]] = {}
+        if collection.tags_field:
+            tag = func.jsonb_array_elements_text(cast(table.c[collection.tags_field], JSONB)).label("tag")
+            result = await db.execute(
+                select(tag, func.count().label("n"))
+                .where(where)
+                .group_by(literal_column("tag"))
+                .order_by(desc(literal_column("n")))
+                .limit(20)
+            )
+            facets["tags"] = {str(row[0]).lower(): row[1] for row in result.all()}
+        for name in facet_fields:
+            if name not in table.c:
+                continue
+            result = await db.execute(
+                select(table.c[name], func.count())
+                .where(where)
+                .group_by(table.c[name])
+                .order_by(desc(func.count()))
+                .limit(20)
+            )
+            facets[name] = {str(_plain(row[0])): row[1] for row in result.all() if row[0] is not None}
+
+        return SearchResult(hits=hits, total=total, facets=facets)
+
+    async def search(
+        self,
+        db: AsyncSession,
+        name: str,
+        query: str,
+        filters: Optional[Dict[str, Any]] = None,
+        tags: Optional[Sequence[str]] = None,
+        limit: int = 20,
+        offset: int = 0,
+        facet_fields: Sequence[str] = ("category",),
+        any_tag: bool = False
+    ) -> SearchResult:
+        """
+        Search one collection.
+
+        Args:
+            name: Collection name
+            query: Free-text query
+            filters: Exact-match filters on the collection's filter fields
+                (a list means "any of"; an ``AnyOf`` ORs filters on several fields)
+            tags: Tags every hit must carry
+            limit: Maximum hits
+            offset: Hits to skip
+            facet_fields: Filter fields to compute facet counts for
+            any_tag: Hits need only one of ``tags``
+
+        Returns:
+            SearchResult with ranked hits, total and facets
+        """
+        collection = self._collections[name]
+        filters = {key: _plain_filter(value) for key, value in (filters or {}).items() if value is not None}
+
+        if not tokenize(query):
+            return SearchResult(hits=[], total=0)
+
+        if self._uses_postgres(db, name):
+            # The tsvector holds unstemmed words, so prefix terms must not be stemmed
+            terms = list(dict.fromkeys(tokenize(query, stem=False)))
+            result = await self._search_postgres(
+                db, collection, terms, filters, tags, any_tag, limit, offset, facet_fields
+            )
+            if result.total:
+                return result
+            # No exact/prefix match: fall back to the typo-tolerant index,
+            # which is built in the background rather than in this request
+            index = await self._ensure_index(db, name, rebuild_inline=False)
+            if index is None:
+                return result
+        else:
+            index = await self._ensure_index(db, name)
+
+        result = index.search(
+            query,
+            filters=filters,
+            tags=tags,
+            limit=limit,
+            offset=offset,
+            any_tag=any_tag,
+            facet_fields=facet_fields,
+        )
+        return await self._drop_deleted_hits(db, collection, index, result)
+
+    async def search_objects(
+        self,
+        db: AsyncSession,
+        name: str,
+        query: str,
+        filters: Optional[Dict[str, Any]] = None,
+        tags: Optional[Sequence[str]] = None,
+        limit: int = 20,
+        offset: int = 0,
+        any_tag: bool = False
+    ) -> Tuple[List[Any], int]:
+        """
+        Search one collection and load the page of matching rows in rank order.
+
+        Filtering and paging happen in the search itself, so list endpoints
+        get every match their filters allow, not a filtered top-N.
+
+        Returns:
+            Tuple of (ORM objects, total matches)
+        """
+        result = await self.search(
+            db, name, query, filters=filters, tags=tags, limit=limit, offset=offset,
+            facet_fields=(), any_tag=any_tag
+        )
+        ids = [hit.doc_id for hit in result.hits]
+        if not ids:
+            return [], result.total
+
+        model = self._collections[name].model
+        rows = await db.execute(select(model).where(model.id.in_(ids)))
+        by_id = {row.id: row for row in rows.scalars().all()}
+        return [by_id[doc_id] for doc_id in ids if doc_id in by_id], result.total
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Index sizes per collection."""
+        return {
+            name: {
+                "documents": len(index),
+                "terms": index.vocabulary_size,
+                "postgres": name in self._postgres_ready,
+            }
+            for name, index in self._indexes.items()
+        }
+
+
+# Global search service instance
+search_service = SearchService()
+
+
+def register_search_collection(
+    name: str,
+    model: Any,
+    fields: Dict[str, float],
+    tags_field: Optional[str] = "tags",
+    filter_fields: Tuple[str, ...] = (),
+    boost_field: Optional[str] = None
+):
+    """Register a searchable collection with the global search service."""
+    search_service.register_collection(SearchCollection(
+        name=name,
+        model=model,
+        fields=fields,
+        tags_field=tags_field,
+        filter_fields=filter_fields,
+        boost_field=boost_field,
+    ))
@@ -1,12 +1,46 @@
-"""Redis caching utilities for performance optimization."""
+"""
+Redis caching utilities for performance optimization.
+
+Reads through ``cached`` go to a bounded in-process LRU (L1) before Redis (L2).
+Concurrent misses for a key share one recomputation, entries are refreshed
+early with a probability that rises towards expiry (XFetch), and ``None``
+results can be cached briefly. Invalidation works by key or by tag: each tag
+is a Redis set of the keys stored under it, so no keyspace scan is needed,
+and every invalidation is published so other workers evict their L1 copies.
+"""
+import copy
 import json
 import logging
-from typing import Any, Optional, Callable
+import math
+import random
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
 from functools import wraps
 import asyncio
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+
+def _dumps(value: Any):
+    """Serialize a value for Redis (orjson when available, JSON otherwise)."""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value)
+
+
+def _loads(data: Any) -> Any:
+    """Deserialize a value written by ``_dumps``."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 # Redis client instance (will be initialized on app startup)
 redis_client: Optional[Any] = None
 
@@ -45,17 +79,113 @@ async def close_redis():
         logger.info("Redis connection closed")
 
 
+_MISSING = object()
+
+# Cached entry: (value, seconds it took to compute, wall-clock expiry)
+CacheEntry = Tuple[Any, float, float]
+
+
+class LocalCache:
+    """Bounded in-process LRU cache with per-entry TTL and tags."""
+
+    def __init__(self, maxsize: int = 10000):
+        """
+        Initialize local cache.
+
+        Args:
+            maxsize: Maximum number of entries kept in memory
+        """
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, Tuple[float, Any, Tuple[str, ...]]]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Any:
+        """Get a live entry, or ``_MISSING``."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        if entry[0] <= time.monotonic():
+            self.delete(key)
+            return _MISSING
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: str, value: Any, ttl: float, tags: Iterable[str] = ()):
+        """Store an entry for ``ttl`` seconds, evicting the least recently used."""
+        if ttl <= 0:
+            return
+        if key in self._entries:
+            self.delete(key)
+
+        tags = tuple(tags)
+        self._entries[key] = (time.monotonic() + ttl, value, tags)
+        for tag in tags:
+            self._tags[tag].add(key)
+
+        while len(self._entries) > self.maxsize:
+            old_key, (_, _, old_tags) = self._entries.popitem(last=False)
+            self._untag(old_key, old_tags)
+
+    def delete(self, key: str):
+        """Drop an entry."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._untag(key, entry[2])
+
+    def invalidate_tag(self, tag: str):
+        """Drop every entry stored under a tag."""
+        for key in self._tags.pop(tag, ()):
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._untag(key, entry[2])
+
+    def clear(self):
+        """Drop all entries."""
+        self._entries.clear()
+        self._tags.clear()
+
+    def _untag(self, key: str, tags: Tuple[str, ...]):
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
 class CacheManager:
     """Manager for Redis caching operations."""
 
-    def __init__(self, prefix: str = "resoftai"):
+    def __init__(self, prefix: str = "resoftai", local_maxsize: int = 10000):
         """
         Initialize cache manager.
 
         Args:
             prefix: Key prefix for all cache entries
+            local_maxsize: Maximum entries in the in-process L1 cache
         """
         self.prefix = prefix
+        self.local = LocalCache(local_maxsize)
+        self.instance_id = uuid.uuid4().hex
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Renamed hashes of drains whose read failed, retried by the next drain
+        self._unread_drains: Dict[str, List[str]] = {}
+        self._listener: Optional[asyncio.Task] = None
+        self.stats = {
+            "l1_hits": 0,
+            "l2_hits": 0,
+            "misses": 0,
+            "early_refreshes": 0,
+            "coalesced": 0,
+        }
+
+    @property
+    def invalidation_channel(self) -> str:
+        """Pub/sub channel carrying key and tag invalidations."""
+        return f"{self.prefix}:invalidate"
 
     def _make_key(self, key: str) -> str:
         """Create prefixed cache key."""
@@ -78,7 +208,7 @@ class CacheManager:
             full_key = self._make_key(key)
             value = await redis_client.get(full_key)
             if value:
-                return json.loads(value)
+                return _loads(value)
             return None
         except Exception as e:
             logger.error(f"Cache get error for key {key}: {e}")
@@ -106,7 +236,7 @@ class CacheManager:
 
         try:
             full_key = self._make_key(key)
-            serialized = json.dumps(value)
+            serialized = _dumps(value)
             await redis_client.setex(full_key, ttl, serialized)
             return True
         except Exception as e:
@@ -123,17 +253,47 @@ class CacheManager:
         Returns:
             True if successful, False otherwise
         """
+        self.local.delete(key)
         if not redis_client:
             return False
 
         try:
             full_key = self._make_key(key)
             await redis_client.delete(full_key)
+            await self._publish_invalidation(keys=[key])
             return True
         except Exception as e:
             logger.error(f"Cache delete error for key {key}: {e}")
             return False
 
+    async def invalidate_tags(self, *tags: str) -> int:
+        """
+        Delete every entry stored under any of the given tags.
+
+        Args:
+            *tags: Tags passed to ``fetch``/``cached``
+
+        Returns:
+            Number of Redis keys deleted
+        """
+        for tag in tags:
+            self.local.invalidate_tag(tag)
+        if not redis_client or not tags:
+            return 0
+
+        try:
+            tag_keys = [self._make_key(f"tag:{tag}") for tag in tags]
+            members = set()
+            for tag_key in tag_keys:
+                members.update(await redis_client.smembers(tag_key))
+
+            deleted = await redis_client.delete(*members, *tag_keys)
+            await self._publish_invalidation(tags=list(tags))
+            return deleted
+        except Exception as e:
+            logger.error(f"Cache tag invalidation error for {tags}: {e}")
+            return 0
+
     async def exists(self, key: str) -> bool:
         """
         Check if key exists in cache.
@@ -158,6 +318,9 @@ class CacheManager:
         """
         Clear all keys matching a pattern.
 
+        This scans the keyspace; prefer ``invalidate_tags`` for grouped
+        invalidation.
+
         Args:
             pattern: Key pattern (e.g., "user:*")
 
@@ -201,6 +364,300 @@ class CacheManager:
             logger.error(f"Cache increment error for key {key}: {e}")
             return 0
 
+    async def hash_increment(self, key: str, field: str, amount: int = 1) -> int:
+        """
+        Increment a field of a hash in cache.
+
+        Args:
+            key: Cache key of the hash
+            field: Hash field
+            amount: Amount to increment by
+
+        Returns:
+            New field value
+        """
+        if not redis_client:
+            return 0
+
+        try:
+            full_key = self._make_key(key)
+            return await redis_client.hincrby(full_key, field, amount)
+        except Exception as e:
+            logger.error(f"Cache hash increment error for key {key}: {e}")
+            return 0
+
+    async def drain_hash(self, key: str) -> dict:
+        """
+        Atomically read and remove a hash of counters.
+
+        The hash is renamed before being read, so increments issued by
+        other workers while draining land in a fresh hash and are not lost.
+        If the read fails, the renamed hash is kept and read again by the
+        next drain of the same key; counters found in several drained
+        hashes are added up.
+
+        Args:
+            key: Cache key of the hash
+
+        Returns:
+            Hash contents (empty if missing or Redis unavailable)
+        """
+        if not redis_client:
+            return {}
+
+        full_key = self._make_key(key)
+        unread = self._unread_drains.setdefault(full_key, [])
+        draining_key = f"{full_key}:draining:{uuid.uuid4().hex}"
+        try:
+            await redis_client.rename(full_key, draining_key)
+            unread.append(draining_key)
+        except Exception:
+            # Missing key: only earlier unread drains are left, if any
+            pass
+
+        values: Dict[str, Any] = {}
+        for draining in list(unread):
+            try:
+                drained = await redis_client.hgetall(draining)
+            except Exception as e:
+                logger.error(f"Cache drain error for key {key}, will retry: {e}")
+                continue
+            unread.remove(draining)
+            for field, value in drained.items():
+                values[field] = int(values[field]) + int(value) if field in values else value
+            try:
+                await redis_client.delete(draining)
+            except Exception as e:
+                # Already counted: never read it again, even if it stays behind
+                logger.warning(f"Could not delete drained hash {draining}: {e}")
+
+        if not unread:
+            del self._unread_drains[full_key]
+        return values
+
+    async def fetch(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: int = 3600,
+        tags: Any = (),
+        local_ttl: Optional[float] = None,
+        negative_ttl: int = 0,
+        beta: float = 1.0,
+        copy: bool = False
+    ) -> Any:
+        """
+        Read a value through the L1 and Redis tiers, loading it on a miss.
+
+        Concurrent misses for the same key share one ``loader`` call. A hit
+        may still trigger a recomputation shortly before expiry, with a
+        probability that grows with how long the value took to compute
+        (XFetch), so hot keys are refreshed by one caller before they expire
+        for everyone. Without Redis the loader is called every time (with
+        single-flight).
+
+        The returned value is shared with the L1 tier and with concurrent
+        callers: treat it as read-only, or pass ``copy=True`` to get a
+        private copy.
+
+        Args:
+            key: Cache key
+            loader: Coroutine function computing the value
+            ttl: Redis time to live in seconds
+            tags: Tags for group invalidation (see ``invalidate_tags``), or a
+                function mapping a non-None value to its tags
+            local_ttl: L1 time to live (defaults to ``ttl``)
+            negative_ttl: Seconds to cache a ``None`` result (0 disables)
+            beta: Early refresh eagerness (0 disables)
+            copy: Return a deep copy the caller may mutate
+
+        Returns:
+            Cached or freshly loaded value
+        """
+        detach = _detach if copy else _shared
+        if not redis_client:
+            return detach(await self._single_flight(key, loader))
+
+        def tags_for(value) -> Tuple[str, ...]:
+            if not callable(tags):
+                return tuple(tags)
+            return tuple(tags(value)) if value is not None else ()
+
+        entry = self.local.get(key)
+        if entry is not _MISSING:
+            self.stats["l1_hits"] += 1
+        else:
+            entry = await self._get_entry(key)
+            if entry is not None:
+                self.stats["l2_hits"] += 1
+                self._store_local(key, entry, local_ttl or ttl, tags_for(entry[0]))
+
+        if entry is _MISSING or entry is None:
+            self.stats["misses"] += 1
+        elif not _should_refresh(entry, beta):
+            return detach(entry[0])
+        else:
+            self.stats["early_refreshes"] += 1
+
+        async def load():
+            start = time.monotonic()
+            value = await loader()
+            entry_ttl = ttl if value is not None else negative_ttl
+            if entry_ttl > 0:
+                entry = (value, time.monotonic() - start, time.time() + entry_ttl)
+                value_tags = tags_for(value)
+                await self._set_entry(key, entry, entry_ttl, value_tags)
+                self._store_local(key, entry, min(local_ttl or ttl, entry_ttl), value_tags)
+            return value
+
+        return detach(await self._single_flight(key, load))
+
+    async def _single_flight(self, key: str, load: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``load`` once for concurrent callers of the same key."""
+        future = self._inflight.get(key)
+        if future is not None:
+            self.stats["coalesced"] += 1
+            # wait() raises CancelledError only if this caller is cancelled, never
+            # because the leader was, and it leaves the shared future alone
+            await asyncio.wait((future,))
+            if future.cancelled():
+                # The leader was cancelled; load independently
+                return await load()
+            return future.result()
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await load()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so a leader without waiters doesn't log a warning
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def _store_local(self, key: str, entry: CacheEntry, ttl: float, tags: Tuple[str, ...]):
+        # Never keep an L1 copy past the Redis expiry
+        self.local.set(key, entry, min(ttl, entry[2] - time.time()), tags)
+
+    async def _get_entry(self, key: str) -> Optional[CacheEntry]:
+        try:
+            data = await redis_client.get(self._make_key(key))
+            if not data:
+                return None
+            entry = _loads(data)
+            if isinstance(entry, list) and len(entry) == 3:
+                return tuple(entry)
+            return None
+        except Exception as e:
+            logger.error(f"Cache get error for key {key}: {e}")
+            return None
+
+    async def _set_entry(self, key: str, entry: CacheEntry, ttl: int, tags: Tuple[str, ...]):
+        full_key = self._make_key(key)
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                pipe.setex(full_key, ttl, _dumps(list(entry)))
+                for tag in tags:
+                    tag_key = self._make_key(f"tag:{tag}")
+                    pipe.sadd(tag_key, full_key)
+                    pipe.expire(tag_key, ttl)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Cache set error for key {key}: {e}")
+
+    async def _publish_invalidation(self, keys: Iterable[str] = (), tags: Iterable[str] = ()):
+        message = {"origin": self.instance_id, "keys": list(keys), "tags": list(tags)}
+        await redis_client.publish(self.invalidation_channel, _dumps(message))
+
+    def handle_invalidation(self, data: Any):
+        """
+        Apply an invalidation published by another worker to the L1 cache.
+
+        Args:
+            data: Message payload from the invalidation channel
+        """
+        message = _loads(data)
+        if message.get("origin") == self.instance_id:
+            return
+        for key in message.get("keys", ()):
+            self.local.delete(key)
+        for tag in message.get("tags", ()):
+            self.local.invalidate_tag(tag)
+
+    def start(self):
+        """Start listening for invalidations from other workers."""
+        if redis_client and self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        """Stop the invalidation listener."""
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    async def _listen(self):
+        while True:
+            pubsub = None
+            try:
+                pubsub = redis_client.pubsub()
+                await pubsub.subscribe(self.invalidation_channel)
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self.handle_invalidation(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Entries may be stale until the L1 TTL while disconnected
+                logger.error(f"Cache invalidation listener error: {e}")
+                self.local.clear()
+                await asyncio.sleep(1)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.close()
+                    except Exception:
+                        pass
+
+
+def _should_refresh(entry: CacheEntry, beta: float) -> bool:
+    """XFetch: recompute early with probability rising as expiry approaches."""
+    _, delta, expires_at = entry
+    now = time.time()
+    if now >= expires_at:
+        return True
+    if beta <= 0 or delta <= 0:
+        return False
+    return now - delta * beta * math.log(1.0 - random.random()) >= expires_at
+
+
+def _shared(value: Any) -> Any:
+    """A cached value as is, shared with the L1 tier and other callers."""
+    return value
+
+
+def _detach(value: Any) -> Any:
+    """
+    Copy of a cached value for one caller.
+
+    L1 entries and single-flight results are shared by every caller, so a
+    caller mutating its result must not change what others get.
+    """
+    if value is None or isinstance(value, (str, bytes, int, float, bool)):
+        return value
+    return copy.deepcopy(value)
+
 
 # Global cache manager instance
 cache_manager = CacheManager()
@@ -209,15 +666,28 @@ cache_manager = CacheManager()
 def cached(
     key_func: Callable = None,
     ttl: int = 3600,
-    key_prefix: str = ""
+    key_prefix: str = "",
+    tags: Callable = None,
+    local_ttl: Optional[float] = None,
+    negative_ttl: int = 0,
+    beta: float = 1.0,
+    copy: bool = False
 ):
     """
     Decorator for caching function results.
 
+    Results are shared between callers and must not be mutated unless
+    ``copy`` is set.
+
     Args:
         key_func: Function to generate cache key from args/kwargs
         ttl: Time to live in seconds
         key_prefix: Prefix for cache key
+        tags: Tags for ``invalidate_tags``, or a function mapping a result to its tags
+        local_ttl: In-process (L1) time to live, defaults to ``ttl``
+        negative_ttl: Seconds to cache ``None`` results (0 disables)
+        beta: Early refresh eagerness (0 disables)
+        copy: Give each caller its own deep copy of the result
 
     Example:
         @cached(key_func=lambda user_id: f"user:{user_id}", ttl=300)
@@ -230,78 +700,25 @@ def cached(
         async def wrapper(*args, **kwargs):
             # Generate cache key
             if key_func:
-                cache_key = f"{key_prefix}:{key_func(*args, **kwargs)}"
+                cache_key = key_func(*args, **kwargs)
             else:
                 # Default: use function name and args
                 args_str = "_".join(str(arg) for arg in args)
                 kwargs_str = "_".join(f"{k}={v}" for k, v in kwargs.items())
-                cache_key = f"{key_prefix}:{func.__name__}:{args_str}:{kwargs_str}"
-
-            # Try to get from cache
-            cached_value = await cache_manager.get(cache_key)
-            if cached_value is not None:
-                logger.debug(f"Cache hit for key: {cache_key}")
-                return cached_value
-
-            # Execute function
-            result = await func(*args, **kwargs)
-
-            # Cache result
-            await cache_manager.set(cache_key, result, ttl)
-            logger.debug(f"Cached result for key: {cache_key}")
-
-            return result
+                cache_key = f"{func.__name__}:{args_str}:{kwargs_str}"
+            if key_prefix:
+                cache_key = f"{key_prefix}:{cache_key}"
+
+            return await cache_manager.fetch(
+                cache_key,
+                lambda: func(*args, **kwargs),
+                ttl=ttl,
+                tags=tags or (),
+                local_ttl=local_ttl,
+                negative_ttl=negative_ttl,
+                beta=beta,
+                copy=copy
+            )
 
         return wrapper
     return decorator
-
-
-class RateLimiter:
-    """Rate limiter using Redis."""
-
-    def __init__(self, cache_manager: CacheManager):
-        """
-        Initialize rate limiter.
-
-        Args:
-            cache_manager: Cache manager instance
-        """
-        self.cache_manager = cache_manager
-
-    async def is_allowed(
-        self,
-        key: str,
-        max_requests: int,
-        window_seconds: int
-    ) -> bool:
-        """
-        Check if request is allowed under rate limit.
-
-        Args:
-            key: Rate limit key (e.g., user ID or IP)
-            max_requests: Maximum requests allowed
-            window_seconds: Time window in seconds
-
-        Returns:
-            True if request is allowed, False otherwise
-        """
-        if not redis_client:
-            return True  # Allow if Redis not available
-
-        try:
-            rate_key = f"ratelimit:{key}:{window_seconds}"
-            current = await self.cache_manager.increment(rate_key)
-
-            # Set expiry on first request
-            if current == 1:
-                full_key = self.cache_manager._make_key(rate_key)
-                await redis_client.expire(full_key, window_seconds)
-
-            return current <= max_requests
-        except Exception as e:
-            logger.error(f"Rate limit check error: {e}")
-            return True  # Allow on error
-
-
-# Global rate limiter instance
-rate_limiter = RateLimiter(cache_manager)
@@ -1,15 +1,16 @@
 """
 Operational Transformation (OT) algorithm for collaborative text editing.
 
-This module implements a simplified OT algorithm for resolving conflicts
-in real-time collaborative editing.
+This module implements retain/insert/delete text operations with linear-time
+transform and compose (the model used by ot.js and ShareDB's text type) for
+resolving conflicts in real-time collaborative editing.
 
 References:
 - https://en.wikipedia.org/wiki/Operational_transformation
 - https://operational-transformation.github.io/
 """
 
-from typing import List, Dict, Any, Tuple, Optional
+from typing import List, Dict, Any, Tuple, Optional, Union
 from dataclasses import dataclass
 from enum import Enum
 
@@ -45,11 +46,35 @@ class Operation:
             return f"Retain({self.length} chars from {self.position})"
 
 
+Component = Union[int, str]
+
+
+def _is_retain(component: Component) -> bool:
+    return isinstance(component, int) and component > 0
+
+
+def _is_delete(component: Component) -> bool:
+    return isinstance(component, int) and component < 0
+
+
+def _is_insert(component: Component) -> bool:
+    return isinstance(component, str)
+
+
+def _component_length(component: Component) -> int:
+    return len(component) if isinstance(component, str) else abs(component)
+
+
 class TextOperation:
     """
     A sequence of operations that transforms one text to another.
 
-    Operations are stored in a normalized form for efficient transformation.
+    Operations are stored as a normalized list of components walked from the
+    start of the document: a positive int retains that many characters, a
+    negative int deletes that many characters and a string is inserted.
+    Anything after the last component is retained. Adjacent components of the
+    same kind are merged and an insert always precedes a delete at the same
+    spot, so equivalent operations have one representation.
     """
 
     def __init__(self, operations: List[Operation] = None):
@@ -57,9 +82,136 @@ class TextOperation:
         Initialize text operation.
 
         Args:
-            operations: List of operations
+            operations: List of positional operations, with positions
+                relative to the original text
+        """
+        self.components: List[Component] = []
+
+        index = 0
+        for op in sorted(operations or [], key=lambda op: (op.position, op.type != OperationType.INSERT)):
+            if op.type == OperationType.RETAIN:
+                continue
+            if op.position > index:
+                self.retain(op.position - index)
+                index = op.position
+
+            if op.type == OperationType.INSERT:
+                self.insert(op.text)
+            elif op.type == OperationType.DELETE:
+                # Overlapping deletes are merged
+                end = op.position + op.length
+                if end > index:
+                    self.delete(end - index)
+                    index = end
+
+    @classmethod
+    def from_components(cls, components: List[Component]) -> 'TextOperation':
+        """
+        Create operation from serialized components (see ``to_components``).
+
+        Args:
+            components: Retain counts, delete counts (negative) and insert strings
+
+        Returns:
+            TextOperation instance
+        """
+        operation = cls()
+        for component in components:
+            if _is_insert(component):
+                operation.insert(component)
+            elif _is_retain(component):
+                operation.retain(component)
+            elif _is_delete(component):
+                operation.delete(-component)
+        return operation
+
+    def to_components(self) -> List[Component]:
+        """Serialize to a JSON-friendly component list without the trailing retain."""
+        components = list(self.components)
+        if components and _is_retain(components[-1]):
+            components.pop()
+        return components
+
+    def retain(self, length: int) -> 'TextOperation':
+        """Skip over ``length`` characters."""
+        if length <= 0:
+            return self
+        if self.components and _is_retain(self.components[-1]):
+            self.components[-1] += length
+        else:
+            self.components.append(length)
+        return self
+
+    def insert(self, text: str) -> 'TextOperation':
+        """Insert ``text`` at the current position."""
+        if not text:
+            return self
+        components = self.components
+        if components and _is_insert(components[-1]):
+            components[-1] += text
+        elif components and _is_delete(components[-1]):
+            if len(components) > 1 and _is_insert(components[-2]):
+                components[-2] += text
+            else:
+                components.insert(len(components) - 1, text)
+        else:
+            components.append(text)
+        return self
+
+    def delete(self, length: int) -> 'TextOperation':
+        """Delete ``length`` characters at the current position."""
+        if length <= 0:
+            return self
+        if self.components and _is_delete(self.components[-1]):
+            self.components[-1] -= length
+        else:
+            self.components.append(-length)
+        return self
+
+    @property
+    def operations(self) -> List[Operation]:
+        """
+        Positional view of this operation.
+
+        Positions are relative to the original text; a delete is listed before
+        an insert at the same position (a replace).
         """
-        self.operations = operations or []
+        result = []
+        index = 0
+        pending_insert = None
+
+        for component in self.components:
+            if _is_insert(component):
+                pending_insert = Operation(type=OperationType.INSERT, position=index, text=component)
+                continue
+
+            if _is_delete(component):
+                result.append(Operation(type=OperationType.DELETE, position=index, length=-component))
+                index -= component
+            else:
+                index += component
+
+            if pending_insert:
+                result.append(pending_insert)
+                pending_insert = None
+
+        if pending_insert:
+            result.append(pending_insert)
+        return result
+
+    @property
+    def base_length(self) -> int:
+        """Minimum length of a text this operation can be applied to."""
+        return sum(c if _is_retain(c) else -c for c in self.components if not _is_insert(c))
+
+    @property
+    def target_length(self) -> int:
+        """Length of the text produced from a text of ``base_length`` characters."""
+        return sum(len(c) if _is_insert(c) else c for c in self.components if not _is_delete(c))
+
+    def is_noop(self) -> bool:
+        """True if applying this operation leaves any text unchanged."""
+        return all(_is_retain(c) for c in self.components)
 
     @classmethod
     def from_monaco_change(cls, change: Dict[str, Any]) -> 'TextOperation':
@@ -83,8 +235,6 @@ class TextOperation:
                 'text': 'Hello'
             }
         """
-        operations = []
-
         # Extract range information
         range_obj = change.get('range', {})
         start_line = range_obj.get('startLineNumber', 1)
@@ -96,63 +246,42 @@ class TextOperation:
         position = (start_line - 1) * 80 + (start_col - 1)
         end_position = (end_line - 1) * 80 + (end_col - 1)
 
-        text = change.get('text', '')
-
-        # If range is not empty, it's a replace (delete + insert)
-        if end_position > position:
-            delete_length = end_position - position
-            operations.append(Operation(
-                type=OperationType.DELETE,
-                position=position,
-                length=delete_length
-            ))
-
-        # If text is not empty, insert it
-        if text:
-            operations.append(Operation(
-                type=OperationType.INSERT,
-                position=position,
-                text=text
-            ))
-
-        return cls(operations)
+        # A non-empty range with text is a replace (delete + insert)
+        return cls().retain(position).insert(change.get('text', '')).delete(end_position - position)
 
     def apply(self, text: str) -> str:
         """
         Apply this operation to text.
 
+        Components reaching past the end of the text are clamped to it.
+
         Args:
             text: Original text
 
         Returns:
             Transformed text
         """
-        result = text
-
-        # Sort operations by position (descending) to apply from end to beginning
-        # This prevents position shifting issues - changes at later positions
-        # don't affect earlier positions
-        sorted_ops = sorted(
-            self.operations,
-            key=lambda op: op.position,
-            reverse=True
-        )
-
-        for op in sorted_ops:
-            if op.type == OperationType.INSERT:
-                pos = op.position
-                result = result[:pos] + op.text + result[pos:]
-            elif op.type == OperationType.DELETE:
-                pos = op.position
-                result = result[:pos] + result[pos + op.length:]
+        parts = []
+        index = 0
 
-        return result
+        for component in self.components:
+            if _is_insert(component):
+                parts.append(component)
+            elif component > 0:
+                parts.append(text[index:index + component])
+                index += component
+            else:
+                index -= component
+
+        parts.append(text[index:])
+        return "".join(parts)
 
     def compose(self, other: 'TextOperation') -> 'TextOperation':
         """
         Compose this operation with another operation.
 
-        compose(A, B) means: apply A first, then apply B.
+        compose(A, B) means: apply A first, then apply B. Runs in
+        O(len(A) + len(B)) components.
 
         Args:
             other: Operation to compose with
@@ -160,8 +289,75 @@ class TextOperation:
         Returns:
             Composed operation
         """
-        # Simplified composition - in production use a proper OT library
-        return TextOperation(self.operations + other.operations)
+        result = TextOperation()
+        ops1, ops2 = self.components, other.components
+        i1 = i2 = 0
+        op1 = ops1[0] if ops1 else None
+        op2 = ops2[0] if ops2 else None
+
+        while op1 is not None or op2 is not None:
+            # Deletes in A and inserts in B don't interact with the other side
+            if op1 is not None and _is_delete(op1):
+                result.delete(-op1)
+                i1 += 1
+                op1 = ops1[i1] if i1 < len(ops1) else None
+                continue
+            if op2 is not None and _is_insert(op2):
+                result.insert(op2)
+                i2 += 1
+                op2 = ops2[i2] if i2 < len(ops2) else None
+                continue
+
+            # Past the end of one side, the other side is taken as is
+            if op1 is None:
+                if _is_retain(op2):
+                    result.retain(op2)
+                else:
+                    result.delete(-op2)
+                i2 += 1
+                op2 = ops2[i2] if i2 < len(ops2) else None
+                continue
+            if op2 is None:
+                if _is_insert(op1):
+                    result.insert(op1)
+                else:
+                    result.retain(op1)
+                i1 += 1
+                op1 = ops1[i1] if i1 < len(ops1) else None
+                continue
+
+            length = min(_component_length(op1), abs(op2))
+            if _is_insert(op1):
+                if _is_retain(op2):
+                    result.insert(op1[:length])
+                # An insert deleted by B cancels out
+                op1 = op1[length:]
+            else:
+                if _is_retain(op2):
+                    result.retain(length)
+                else:
+                    result.delete(length)
+                op1 -= length
+            op2 = op2 - length if op2 > 0 else op2 + length
+
+            if not op1:
+                i1 += 1
+                op1 = ops1[i1] if i1 < len(ops1) else None
+            if not op2:
+                i2 += 1
+                op2 = ops2[i2] if i2 < len(ops2) else None
+
+        return result._trimmed()
+
+    def _trimmed(self) -> 'TextOperation':
+        if self.components and _is_retain(self.components[-1]):
+            self.components.pop()
+        return self
+
+    def __eq__(self, other):
+        if not isinstance(other, TextOperation):
+            return NotImplemented
+        return self.to_components() == other.to_components()
 
     def __repr__(self):
         return f"TextOperation({self.operations})"
@@ -173,7 +369,12 @@ def transform(op1: TextOperation, op2: TextOperation) -> Tuple[TextOperation, Te
 
     This is the core of OT. Given two operations that were applied to the same
     document state, transform them so they can be applied in any order and
-    produce the same result.
+    produce the same result:
+    ``op2'.apply(op1.apply(text)) == op1'.apply(op2.apply(text))``.
+
+    Both component lists are walked once with two cursors, so the cost is
+    O(len(op1) + len(op2)). When both insert at the same position, op1's text
+    goes first. Overlapping deletes remove the shared range only once.
 
     Args:
         op1: First operation
@@ -189,92 +390,53 @@ def transform(op1: TextOperation, op2: TextOperation) -> Tuple[TextOperation, Te
         - A's operation adjusted for B's change
         - B's operation adjusted for A's change
     """
-    # Simplified transformation - handles basic cases
-    # In production, use a proper OT library like ShareDB
-
-    transformed_ops1 = []
-    transformed_ops2 = []
-
-    for op_a in op1.operations:
-        for op_b in op2.operations:
-            # Both are inserts
-            if op_a.type == OperationType.INSERT and op_b.type == OperationType.INSERT:
-                if op_b.position <= op_a.position:
-                    # op_b comes before op_a, adjust op_a's position
-                    transformed_ops1.append(Operation(
-                        type=OperationType.INSERT,
-                        position=op_a.position + len(op_b.text),
-                        text=op_a.text
-                    ))
-                    transformed_ops2.append(op_b)
-                else:
-                    # op_a comes before op_b, adjust op_b's position
-                    transformed_ops1.append(op_a)
-                    transformed_ops2.append(Operation(
-                        type=OperationType.INSERT,
-                        position=op_b.position + len(op_a.text),
-                        text=op_b.text
-                    ))
-
-            # Both are deletes
-            elif op_a.type == OperationType.DELETE and op_b.type == OperationType.DELETE:
-                # Handle overlapping deletes
-                if op_b.position <= op_a.position:
-                    # op_b comes before op_a
-                    if op_b.position + op_b.length <= op_a.position:
-                        # No overlap
-                        transformed_ops1.append(Operation(
-                            type=OperationType.DELETE,
-                            position=op_a.position - op_b.length,
-                            length=op_a.length
-                        ))
-                        transformed_ops2.append(op_b)
-                    else:
-                        # Overlapping - complex case
-                        # For simplicity, keep both
-                        transformed_ops1.append(op_a)
-                        transformed_ops2.append(op_b)
-                else:
-                    transformed_ops1.append(op_a)
-                    transformed_ops2.append(Operation(
-                        type=OperationType.DELETE,
-                        position=op_b.position - op_a.length,
-                        length=op_b.length
-                    ))
-
-            # One insert, one delete
-            elif op_a.type == OperationType.INSERT and op_b.type == OperationType.DELETE:
-                if op_b.position <= op_a.position:
-                    transformed_ops1.append(Operation(
-                        type=OperationType.INSERT,
-                        position=max(0, op_a.position - op_b.length),
-                        text=op_a.text
-                    ))
-                else:
-                    transformed_ops1.append(op_a)
-                transformed_ops2.append(op_b)
-
-            elif op_a.type == OperationType.DELETE and op_b.type == OperationType.INSERT:
-                if op_b.position <= op_a.position:
-                    transformed_ops1.append(Operation(
-                        type=OperationType.DELETE,
-                        position=op_a.position + len(op_b.text),
-                        length=op_a.length
-                    ))
-                else:
-                    transformed_ops1.append(op_a)
-                transformed_ops2.append(op_b)
-
-    # If no transformations were made, return original operations
-    if not transformed_ops1:
-        transformed_ops1 = op1.operations
-    if not transformed_ops2:
-        transformed_ops2 = op2.operations
-
-    return (
-        TextOperation(transformed_ops1),
-        TextOperation(transformed_ops2)
-    )
+    prime1, prime2 = TextOperation(), TextOperation()
+    ops1, ops2 = op1.components, op2.components
+    i1 = i2 = 0
+    a = ops1[0] if ops1 else None
+    b = ops2[0] if ops2 else None
+
+    while a is not None or b is not None:
+        if a is not None and _is_insert(a):
+            prime1.insert(a)
+            prime2.retain(len(a))
+            i1 += 1
+            a = ops1[i1] if i1 < len(ops1) else None
+            continue
+        if b is not None and _is_insert(b):
+            prime1.retain(len(b))
+            prime2.insert(b)
+            i2 += 1
+            b = ops2[i2] if i2 < len(ops2) else None
+            continue
+
+        # Past its last component an operation retains the rest of the text
+        length_a = abs(a) if a is not None else abs(b)
+        length_b = abs(b) if b is not None else length_a
+        length = min(length_a, length_b)
+        a_deletes = a is not None and a < 0
+        b_deletes = b is not None and b < 0
+
+        if a_deletes and not b_deletes:
+            prime1.delete(length)
+        elif b_deletes and not a_deletes:
+            prime2.delete(length)
+        elif not a_deletes and not b_deletes:
+            prime1.retain(length)
+            prime2.retain(length)
+
+        if a is not None:
+            a = a - length if a > 0 else a + length
+            if not a:
+                i1 += 1
+                a = ops1[i1] if i1 < len(ops1) else None
+        if b is not None:
+            b = b - length if b > 0 else b + length
+            if not b:
+                i2 += 1
+                b = ops2[i2] if i2 < len(ops2) else None
+
+    return prime1._trimmed(), prime2._trimmed()
 
 
 class OTDocument:
@@ -344,12 +506,10 @@ class OTDocument:
         Returns:
             Transformed operation that can be applied to current version
         """
-        # Get all operations between from_version and current version
-        concurrent_ops = self.get_operations_since(from_version)
-
-        # Transform against each concurrent operation
+        # History holds one entry per version starting at 1, so the concurrent
+        # operations are a contiguous tail
         transformed = operation
-        for concurrent_op in concurrent_ops:
+        for _, concurrent_op in self.history[max(from_version, 0):]:
             transformed, _ = transform(transformed, concurrent_op)
 
         return transformed
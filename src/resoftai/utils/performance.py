@@ -157,6 +157,7 @@ class WebSocketMetrics:
         self.bytes_received = 0
         self.errors = 0
         self.reconnections = 0
+        self.room_fanout: Dict[str, Dict[str, float]] = {}
 
     def connection_opened(self):
         """Record connection opened."""
@@ -196,6 +197,61 @@ class WebSocketMetrics:
         performance_monitor.increment_counter('websocket.messages.received')
         performance_monitor.increment_counter('websocket.bytes.received', size_bytes)
 
+    def broadcast_completed(self, room: str, recipients: int, size_bytes: int, duration: float):
+        """
+        Record a room broadcast.
+
+        Args:
+            room: Room name (e.g. ``project:1`` or ``file:42``)
+            recipients: Number of sessions the message was delivered to
+            size_bytes: Encoded message size in bytes
+            duration: Fan-out latency in seconds
+        """
+        stats = self.room_fanout.get(room)
+        if stats is None:
+            stats = self.room_fanout[room] = {
+                'broadcasts': 0,
+                'recipients': 0,
+                'bytes': 0,
+                'total_time': 0.0,
+                'max_time': 0.0,
+            }
+        stats['broadcasts'] += 1
+        stats['recipients'] += recipients
+        stats['bytes'] += size_bytes * recipients
+        stats['total_time'] += duration
+        stats['max_time'] = max(stats['max_time'], duration)
+        performance_monitor.record_timing('websocket.fanout', duration)
+
+    def room_closed(self, room: str):
+        """Forget fan-out statistics for a room that has no members left."""
+        self.room_fanout.pop(room, None)
+
+    def get_room_stats(self, limit: int = 20) -> Dict[str, Any]:
+        """
+        Get fan-out statistics for the busiest rooms.
+
+        Args:
+            limit: Maximum number of rooms to return
+
+        Returns:
+            Room name -> broadcasts, average recipients, bytes delivered,
+            average and maximum fan-out latency in milliseconds
+        """
+        busiest = sorted(
+            self.room_fanout.items(), key=lambda item: item[1]['recipients'], reverse=True
+        )[:limit]
+        return {
+            room: {
+                'broadcasts': int(stats['broadcasts']),
+                'avg_recipients': stats['recipients'] / stats['broadcasts'],
+                'bytes_delivered': int(stats['bytes']),
+                'avg_latency_ms': stats['total_time'] / stats['broadcasts'] * 1000,
+                'max_latency_ms': stats['max_time'] * 1000,
+            }
+            for room, stats in busiest
+        }
+
     def error_occurred(self):
         """Record error."""
         self.errors += 1
@@ -223,7 +279,8 @@ class WebSocketMetrics:
             ),
             'avg_message_size_received': (
                 self.bytes_received / self.messages_received if self.messages_received > 0 else 0
-            )
+            ),
+            'rooms': self.get_room_stats()
         }
 
 
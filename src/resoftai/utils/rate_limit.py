@@ -0,0 +1,277 @@
+"""
+Distributed rate limiting with GCRA.
+
+Each key stores a single "theoretical arrival time" (TAT). A request is
+allowed when it does not push the TAT more than one period ahead of now, so
+a limit of N per period admits bursts of up to N and then one request every
+period / N. The check and update run in one Lua script, which makes them
+atomic across workers and costs a single Redis round trip.
+
+Most requests make no round trip at all: a key that is being hit repeatedly
+takes a small lease of tokens per script call and spends it locally, and a
+rejected key is answered locally until it may retry. Without Redis (or when
+a call fails) the same algorithm runs in-process instead of failing open.
+"""
+import logging
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from resoftai.utils import cache
+
+logger = logging.getLogger(__name__)
+
+GCRA_SCRIPT = """
+if redis.replicate_commands then redis.replicate_commands() end
+local limit = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local quantity = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local interval = period / limit
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local available = math.max(math.floor((now + period - tat) / interval + 1e-9), 0)
+local granted = math.min(quantity, available)
+local retry_after = 0
+if granted > 0 then
+    tat = tat + granted * interval
+    redis.call('SET', KEYS[1], string.format('%.6f', tat), 'PX', math.ceil((tat - now) * 1000))
+else
+    retry_after = tat + interval - period - now
+end
+return {granted, available - granted, string.format('%.6f', tat - now), string.format('%.6f', retry_after)}
+"""
+
+
+def gcra(
+    tat: float,
+    now: float,
+    limit: int,
+    period: float,
+    quantity: int = 1
+) -> Tuple[float, int, int, float, float]:
+    """
+    Take up to ``quantity`` tokens from a GCRA bucket.
+
+    This is the in-process twin of ``GCRA_SCRIPT``.
+
+    Args:
+        tat: Stored theoretical arrival time (0 for a new key)
+        now: Current time
+        limit: Requests allowed per period
+        period: Period length in seconds
+        quantity: Tokens wanted
+
+    Returns:
+        Tuple of (new_tat, granted, remaining, reset_after, retry_after)
+    """
+    interval = period / limit
+    tat = max(tat, now)
+    available = max(math.floor((now + period - tat) / interval + 1e-9), 0)
+    granted = min(quantity, available)
+    retry_after = 0.0
+    if granted > 0:
+        tat += granted * interval
+    else:
+        retry_after = tat + interval - period - now
+    return tat, granted, available - granted, tat - now, retry_after
+
+
+@dataclass
+class RateLimitResult:
+    """Outcome of a rate limit check."""
+
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float
+    retry_after: float = 0.0
+
+    def headers(self) -> Dict[str, str]:
+        """``X-RateLimit-*`` headers (and ``Retry-After`` when rejected)."""
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(max(self.remaining, 0)),
+            "X-RateLimit-Reset": str(math.ceil(self.reset_after)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(math.ceil(self.retry_after), 1))
+        return headers
+
+
+class _KeyState:
+    """Locally held lease for one key."""
+
+    __slots__ = ("limit", "tokens", "remaining", "reset_at", "blocked_until", "refilled_at")
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.tokens = 0
+        self.remaining = 0
+        self.reset_at = 0.0
+        self.blocked_until = 0.0
+        self.refilled_at = float("-inf")
+
+
+class RateLimiter:
+    """
+    GCRA rate limiter backed by one Redis script, with an in-process fallback.
+
+    Leases are only taken for keys seen again within ``hot_interval``
+    seconds, so keys hit occasionally never strand tokens on a worker. Each
+    lease is at most ``lease_fraction`` of the limit (capped at
+    ``max_lease``), which bounds how far workers can overshoot the limit
+    together.
+    """
+
+    def __init__(
+        self,
+        cache_manager: "cache.CacheManager",
+        lease_fraction: float = 0.02,
+        max_lease: int = 50,
+        hot_interval: float = 1.0,
+        max_keys: int = 100_000
+    ):
+        """
+        Initialize rate limiter.
+
+        Args:
+            cache_manager: Cache manager instance (used for key namespacing)
+            lease_fraction: Fraction of the limit a hot key leases per call
+            max_lease: Upper bound on tokens leased per call
+            hot_interval: Seconds between refills for a key to count as hot
+            max_keys: Maximum keys tracked locally (least recent evicted)
+        """
+        self.cache_manager = cache_manager
+        self.lease_fraction = lease_fraction
+        self.max_lease = max_lease
+        self.hot_interval = hot_interval
+        self.max_keys = max_keys
+        self._states: "OrderedDict[Hashable, _KeyState]" = OrderedDict()
+        self._local_tats: "OrderedDict[Hashable, float]" = OrderedDict()
+        self._script = None
+        self._script_client = None
+        self.stats: Dict[str, int] = {
+            "checks": 0,
+            "redis_calls": 0,
+            "leased": 0,
+            "local_rejects": 0,
+            "fallbacks": 0,
+        }
+
+    async def hit(self, key: str, limit: int, period: float = 60) -> RateLimitResult:
+        """
+        Count one request against a key.
+
+        Args:
+            key: Rate limit key (e.g. ``org:1`` or ``ip:10.0.0.1``)
+            limit: Requests allowed per period
+            period: Period length in seconds
+
+        Returns:
+            RateLimitResult with the decision and header values
+        """
+        self.stats["checks"] += 1
+        now = time.monotonic()
+        state = self._state(key, limit)
+
+        if state.blocked_until > now:
+            self.stats["local_rejects"] += 1
+            return RateLimitResult(False, limit, 0, state.reset_at - now, state.blocked_until - now)
+
+        if state.tokens > 0 and state.reset_at > now:
+            state.tokens -= 1
+            self.stats["leased"] += 1
+            return RateLimitResult(True, limit, state.remaining + state.tokens, state.reset_at - now)
+
+        quantity = 1
+        if now - state.refilled_at < self.hot_interval:
+            quantity = max(1, min(self.max_lease, int(limit * self.lease_fraction)))
+        state.refilled_at = now
+
+        granted, remaining, reset_after, retry_after = await self._take(key, limit, period, quantity)
+        state.reset_at = now + reset_after
+        if not granted:
+            state.tokens = 0
+            state.blocked_until = now + retry_after
+            return RateLimitResult(False, limit, 0, reset_after, retry_after)
+
+        state.tokens = granted - 1
+        state.remaining = remaining
+        return RateLimitResult(True, limit, remaining + state.tokens, reset_after)
+
+    async def is_allowed(self, key: str, max_requests: int, window_seconds: int) -> bool:
+        """
+        Check if request is allowed under rate limit.
+
+        Args:
+            key: Rate limit key (e.g., user ID or IP)
+            max_requests: Maximum requests allowed
+            window_seconds: Time window in seconds
+
+        Returns:
+            True if request is allowed, False otherwise
+        """
+        return (await self.hit(key, max_requests, window_seconds)).allowed
+
+    def reset(self, key: Optional[str] = None):
+        """Forget local state for one key, or for all keys."""
+        if key is None:
+            self._states.clear()
+            self._local_tats.clear()
+        else:
+            self._states.pop(key, None)
+            self._local_tats.pop(key, None)
+
+    def _state(self, key: str, limit: int) -> _KeyState:
+        state = self._states.get(key)
+        if state is None or state.limit != limit:
+            state = self._states[key] = _KeyState(limit)
+            if len(self._states) > self.max_keys:
+                self._states.popitem(last=False)
+        else:
+            self._states.move_to_end(key)
+        return state
+
+    async def _take(
+        self,
+        key: str,
+        limit: int,
+        period: float,
+        quantity: int
+    ) -> Tuple[int, int, float, float]:
+        """Take tokens from the shared bucket, falling back to the local one."""
+        client = cache.redis_client
+        if client is not None:
+            try:
+                self.stats["redis_calls"] += 1
+                result = await self._run_script(client, key, limit, period, quantity)
+                return int(result[0]), int(result[1]), float(result[2]), float(result[3])
+            except Exception as e:
+                self.stats["fallbacks"] += 1
+                logger.warning(f"Rate limit script failed, using local limiter: {e}")
+
+        now = time.monotonic()
+        tat, granted, remaining, reset_after, retry_after = gcra(
+            self._local_tats.get(key, 0.0), now, limit, period, quantity
+        )
+        self._local_tats[key] = tat
+        self._local_tats.move_to_end(key)
+        if len(self._local_tats) > self.max_keys:
+            self._local_tats.popitem(last=False)
+        return granted, remaining, reset_after, retry_after
+
+    async def _run_script(self, client: Any, key: str, limit: int, period: float, quantity: int):
+        # register_script runs EVALSHA and only resends the source on NOSCRIPT
+        if self._script is None or self._script_client is not client:
+            self._script = client.register_script(GCRA_SCRIPT)
+            self._script_client = client
+        full_key = self.cache_manager._make_key(f"ratelimit:{key}")
+        return await self._script(keys=[full_key], args=[limit, period, quantity])
+
+
+# Global rate limiter instance
+rate_limiter = RateLimiter(cache.cache_manager)
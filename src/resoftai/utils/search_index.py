@@ -0,0 +1,404 @@
+"""Embedded inverted index with BM25 ranking, prefix and typo-tolerant matching."""
+import bisect
+import math
+import re
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+_TOKEN_RE = re.compile(r"[0-9a-z]+|[\u4e00-\u9fff]")
+
+STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is",
+    "it", "of", "on", "or", "the", "to", "with",
+})
+
+# Score multipliers for non-exact matches
+PREFIX_MATCH_WEIGHT = 0.8
+FUZZY_MATCH_WEIGHT = 0.5
+
+# Limits on query-term expansion
+MAX_PREFIX_EXPANSIONS = 50
+MIN_FUZZY_LENGTH = 4
+
+
+@dataclass(frozen=True)
+class AnyOf:
+    """Filter value matching documents that pass any one of several attribute filters."""
+    filters: Dict[str, Any]
+
+
+def _matches_value(value: Any, expected: Any) -> bool:
+    if isinstance(expected, (list, tuple, set, frozenset)):
+        return value in expected
+    return value == expected
+
+
+def _stem(token: str) -> str:
+    """Very light English plural stemming."""
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: Optional[str], stem: bool = True) -> List[str]:
+    """
+    Split text into normalized index terms.
+
+    Latin text is lowercased, split on non-alphanumerics, stripped of
+    stopwords and lightly stemmed; CJK characters become single-character
+    terms.
+
+    Args:
+        text: Text to tokenize
+        stem: Apply plural stemming (off for terms matched as prefixes of
+            unstemmed text, where "studies" must not become "study")
+
+    Returns:
+        List of terms in order of appearance
+    """
+    if not text:
+        return []
+    return [
+        _stem(token) if stem else token
+        for token in _TOKEN_RE.findall(text.lower())
+        if token not in STOPWORDS
+    ]
+
+
+def _deletes(term: str) -> Set[str]:
+    """All strings at deletion distance one from term."""
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+def edit_distance_at_most_one(a: str, b: str) -> bool:
+    """Check Damerau-Levenshtein distance <= 1 (with adjacent transposition)."""
+    if a == b:
+        return True
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    if la == lb:
+        diffs = [i for i in range(la) if a[i] != b[i]]
+        if len(diffs) == 1:
+            return True
+        return (
+            len(diffs) == 2
+            and diffs[1] == diffs[0] + 1
+            and a[diffs[0]] == b[diffs[1]]
+            and a[diffs[1]] == b[diffs[0]]
+        )
+    if la > lb:
+        a, b = b, a
+    # b is one character longer than a
+    for i in range(len(a)):
+        if a[i] != b[i]:
+            return a[i:] == b[i + 1:]
+    return True
+
+
+@dataclass
+class _Document:
+    terms: Dict[str, float]
+    length: float
+    tags: Tuple[str, ...]
+    attributes: Dict[str, Any]
+    boost: float
+
+
+@dataclass
+class SearchHit:
+    """A ranked search result."""
+    doc_id: int
+    score: float
+
+
+@dataclass
+class SearchResult:
+    """Ranked hits plus facet counts for the full match set."""
+    hits: List[SearchHit]
+    total: int
+    facets: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+
+class InvertedIndex:
+    """
+    In-memory inverted index with BM25F-style ranking.
+
+    Documents are indexed from weighted text fields. Every query term must
+    match a document, either exactly, as a prefix, or within one edit (for
+    terms of MIN_FUZZY_LENGTH characters or more); non-exact matches score
+    lower. When no document matches all terms, the query falls back to
+    matching any term.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._docs: Dict[int, _Document] = {}
+        self._postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self._deletes: Dict[str, Set[str]] = defaultdict(set)
+        self._sorted_terms: List[str] = []
+        self._terms_dirty = False
+        self._total_length = 0.0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, doc_id: int) -> bool:
+        return doc_id in self._docs
+
+    @property
+    def vocabulary_size(self) -> int:
+        """Number of distinct indexed terms."""
+        return len(self._postings)
+
+    def add(
+        self,
+        doc_id: int,
+        fields: Dict[str, Tuple[Optional[str], float]],
+        tags: Optional[Iterable[str]] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+        boost: float = 0.0
+    ):
+        """
+        Add or replace a document.
+
+        Args:
+            doc_id: Document identifier
+            fields: Mapping of field name to (text, weight)
+            tags: Tags for filtering and facets (also indexed as terms)
+            attributes: Exact-match filter attributes (e.g. status, category)
+            boost: Static popularity score used to break ties
+        """
+        if doc_id in self._docs:
+            self.remove(doc_id)
+
+        tags = tuple(str(tag).lower() for tag in (tags or ()) if tag)
+        fields = dict(fields)
+        if tags:
+            fields["__tags__"] = (" ".join(tags), 1.0)
+
+        weighted: Dict[str, float] = defaultdict(float)
+        length = 0.0
+        for text, weight in fields.values():
+            for term, count in Counter(tokenize(text)).items():
+                weighted[term] += count * weight
+                length += count * weight
+
+        for term, weight in weighted.items():
+            if term not in self._postings:
+                self._terms_dirty = True
+                if len(term) >= MIN_FUZZY_LENGTH:
+                    for variant in _deletes(term):
+                        self._deletes[variant].add(term)
+            self._postings[term][doc_id] = weight
+
+        self._docs[doc_id] = _Document(
+            terms=dict(weighted),
+            length=length,
+            tags=tags,
+            attributes=dict(attributes or {}),
+            boost=boost,
+        )
+        self._total_length += length
+
+    def remove(self, doc_id: int):
+        """Remove a document if present."""
+        doc = self._docs.pop(doc_id, None)
+        if doc is None:
+            return
+
+        self._total_length -= doc.length
+        for term in doc.terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+                self._terms_dirty = True
+                if len(term) >= MIN_FUZZY_LENGTH:
+                    for variant in _deletes(term):
+                        neighbours = self._deletes.get(variant)
+                        if neighbours is not None:
+                            neighbours.discard(term)
+                            if not neighbours:
+                                del self._deletes[variant]
+
+    def clear(self):
+        """Remove all documents."""
+        self._docs.clear()
+        self._postings.clear()
+        self._deletes.clear()
+        self._sorted_terms = []
+        self._terms_dirty = False
+        self._total_length = 0.0
+
+    def _prefix_terms(self, prefix: str) -> List[str]:
+        if self._terms_dirty:
+            self._sorted_terms = sorted(self._postings)
+            self._terms_dirty = False
+
+        terms = self._sorted_terms
+        position = bisect.bisect_left(terms, prefix)
+        matches = []
+        while position < len(terms) and terms[position].startswith(prefix):
+            if terms[position] != prefix:
+                matches.append(terms[position])
+            position += 1
+
+        if len(matches) > MAX_PREFIX_EXPANSIONS:
+            matches.sort(key=lambda t: len(self._postings[t]), reverse=True)
+            matches = matches[:MAX_PREFIX_EXPANSIONS]
+        return matches
+
+    def _fuzzy_terms(self, term: str) -> List[str]:
+        if len(term) < MIN_FUZZY_LENGTH:
+            return []
+
+        candidates: Set[str] = set(self._deletes.get(term, ()))
+        for variant in _deletes(term):
+            if variant in self._postings:
+                candidates.add(variant)
+            candidates.update(self._deletes.get(variant, ()))
+        candidates.discard(term)
+        return [c for c in candidates if edit_distance_at_most_one(term, c)]
+
+    def expand(self, term: str, prefix: bool = True, fuzzy: bool = True) -> Dict[str, float]:
+        """
+        Expand a query term to index terms with match weights.
+
+        Args:
+            term: Normalized query term
+            prefix: Allow prefix matches
+            fuzzy: Allow matches within one edit
+
+        Returns:
+            Mapping of index term to score multiplier
+        """
+        expansions: Dict[str, float] = {}
+        if term in self._postings:
+            expansions[term] = 1.0
+        if prefix:
+            for candidate in self._prefix_terms(term):
+                expansions.setdefault(candidate, PREFIX_MATCH_WEIGHT)
+        if fuzzy and not expansions:
+            for candidate in self._fuzzy_terms(term):
+                expansions.setdefault(candidate, FUZZY_MATCH_WEIGHT)
+        return expansions
+
+    def _matches_filters(
+        self,
+        doc: _Document,
+        filters: Optional[Dict[str, Any]],
+        tags: Optional[Sequence[str]],
+        any_tag: bool = False
+    ) -> bool:
+        if filters:
+            for key, expected in filters.items():
+                if isinstance(expected, AnyOf):
+                    if not any(
+                        _matches_value(doc.attributes.get(name), value)
+                        for name, value in expected.filters.items()
+                    ):
+                        return False
+                elif not _matches_value(doc.attributes.get(key), expected):
+                    return False
+        if tags:
+            wanted = [tag.lower() in doc.tags for tag in tags]
+            return any(wanted) if any_tag else all(wanted)
+        return True
+
+    def search(
+        self,
+        query: str,
+        filters: Optional[Dict[str, Any]] = None,
+        tags: Optional[Sequence[str]] = None,
+        limit: int = 20,
+        offset: int = 0,
+        any_tag: bool = False,
+        prefix: bool = True,
+        fuzzy: bool = True,
+        facet_fields: Sequence[str] = ("category",),
+        max_facet_values: int = 20
+    ) -> SearchResult:
+        """
+        Search the index.
+
+        Args:
+            query: Free-text query
+            filters: Attribute filters; a collection value means "any of", and
+                an ``AnyOf`` value (under any key) matches if one of its filters does
+            tags: Tags that every hit must carry
+            limit: Maximum number of hits to return
+            offset: Number of hits to skip
+            any_tag: Hits need only one of ``tags``
+            prefix: Allow prefix matching
+            fuzzy: Allow typo-tolerant matching
+            facet_fields: Attributes to compute facet counts for (tags always included)
+            max_facet_values: Maximum values per facet
+
+        Returns:
+            SearchResult with ranked hits and facet counts
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return SearchResult(hits=[], total=0)
+
+        doc_count = len(self._docs)
+        avg_length = self._total_length / doc_count if doc_count else 0.0
+
+        per_term_scores: List[Dict[int, float]] = []
+        for term in terms:
+            scores: Dict[int, float] = {}
+            for index_term, multiplier in self.expand(term, prefix, fuzzy).items():
+                postings = self._postings[index_term]
+                df = len(postings)
+                idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+                for doc_id, tf in postings.items():
+                    length = self._docs[doc_id].length
+                    norm = 1 - self.b + self.b * (length / avg_length if avg_length else 0)
+                    score = multiplier * idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+                    if score > scores.get(doc_id, 0.0):
+                        scores[doc_id] = score
+            per_term_scores.append(scores)
+
+        matched = set(per_term_scores[0])
+        for scores in per_term_scores[1:]:
+            matched &= set(scores)
+        if not matched:
+            matched = set().union(*per_term_scores)
+
+        ranked = []
+        for doc_id in matched:
+            doc = self._docs[doc_id]
+            if not self._matches_filters(doc, filters, tags, any_tag):
+                continue
+            score = sum(scores.get(doc_id, 0.0) for scores in per_term_scores)
+            ranked.append((score, doc.boost, doc_id))
+
+        ranked.sort(key=lambda item: (-item[0], -item[1], item[2]))
+
+        facets: Dict[str, Dict[str, int]] = {}
+        tag_counts: Counter = Counter()
+        attr_counts: Dict[str, Counter] = {name: Counter() for name in facet_fields}
+        for _, _, doc_id in ranked:
+            doc = self._docs[doc_id]
+            tag_counts.update(doc.tags)
+            for name in facet_fields:
+                value = doc.attributes.get(name)
+                if value is not None:
+                    attr_counts[name][str(value)] += 1
+        facets["tags"] = dict(tag_counts.most_common(max_facet_values))
+        for name, counts in attr_counts.items():
+            facets[name] = dict(counts.most_common(max_facet_values))
+
+        page = ranked[offset:offset + limit]
+        return SearchResult(
+            hits=[SearchHit(doc_id=doc_id, score=round(score, 6)) for score, _, doc_id in page],
+            total=len(ranked),
+            facets=facets,
+        )
@@ -0,0 +1,236 @@
+"""Time-series downsampling utilities for metrics and dashboard charts."""
+import math
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Rollup resolutions, finest first, mapped to bucket width in seconds
+RESOLUTIONS: Dict[str, int] = {
+    "1m": 60,
+    "5m": 300,
+    "1h": 3600,
+    "1d": 86400,
+}
+
+# Default upper bound on points returned to a chart
+DEFAULT_MAX_POINTS = 500
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def bucket_start(timestamp: datetime, bucket_seconds: int) -> datetime:
+    """
+    Align a timestamp to the start of its bucket.
+
+    Buckets are aligned to the Unix epoch so that every resolution
+    nests cleanly inside the next coarser one.
+
+    Args:
+        timestamp: Naive UTC timestamp
+        bucket_seconds: Bucket width in seconds
+
+    Returns:
+        Start of the bucket containing the timestamp
+    """
+    offset = int((timestamp - _EPOCH).total_seconds())
+    return _EPOCH + timedelta(seconds=offset - offset % bucket_seconds)
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """
+    Compute a percentile with linear interpolation.
+
+    Args:
+        sorted_values: Values sorted ascending (must be non-empty)
+        q: Percentile in the range [0, 100]
+
+    Returns:
+        Interpolated percentile value
+    """
+    if len(sorted_values) == 1:
+        return float(sorted_values[0])
+
+    rank = (len(sorted_values) - 1) * q / 100.0
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+    if lower == upper:
+        return float(sorted_values[lower])
+
+    fraction = rank - lower
+    return float(sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction)
+
+
+@dataclass
+class Bucket:
+    """Aggregated statistics for one time bucket."""
+
+    start: datetime
+    count: int
+    min: float
+    max: float
+    sum: float
+    p95: float
+
+    @property
+    def avg(self) -> float:
+        """Mean value of the bucket."""
+        return self.sum / self.count if self.count else 0.0
+
+
+def select_resolution(
+    start: datetime,
+    end: datetime,
+    max_points: int = DEFAULT_MAX_POINTS
+) -> str:
+    """
+    Pick the finest resolution that keeps the series within the point budget.
+
+    Args:
+        start: Range start
+        end: Range end
+        max_points: Maximum number of buckets the caller accepts
+
+    Returns:
+        Resolution name from RESOLUTIONS
+    """
+    span = max((end - start).total_seconds(), 0)
+    for name, seconds in RESOLUTIONS.items():
+        if math.ceil(span / seconds) <= max_points:
+            return name
+    return "1d"
+
+
+def aggregate_points(
+    points: Iterable[Tuple[datetime, float]],
+    bucket_seconds: int
+) -> List[Bucket]:
+    """
+    Aggregate raw (timestamp, value) points into fixed-width buckets.
+
+    Args:
+        points: Raw samples; None values are skipped
+        bucket_seconds: Bucket width in seconds
+
+    Returns:
+        Buckets sorted by start time
+    """
+    grouped: Dict[datetime, List[float]] = {}
+    for timestamp, value in points:
+        if value is None:
+            continue
+        grouped.setdefault(bucket_start(timestamp, bucket_seconds), []).append(float(value))
+
+    buckets = []
+    for start in sorted(grouped):
+        values = sorted(grouped[start])
+        buckets.append(Bucket(
+            start=start,
+            count=len(values),
+            min=values[0],
+            max=values[-1],
+            sum=sum(values),
+            p95=percentile(values, 95),
+        ))
+    return buckets
+
+
+def merge_buckets(buckets: Iterable[Bucket], bucket_seconds: int) -> List[Bucket]:
+    """
+    Re-bucket already aggregated buckets into a coarser resolution.
+
+    Count, min, max and sum merge exactly. The merged p95 is the
+    count-weighted p95 of the child p95 values, which is an approximation
+    that is good enough for charts.
+
+    Args:
+        buckets: Finer-grained buckets
+        bucket_seconds: Target bucket width in seconds
+
+    Returns:
+        Merged buckets sorted by start time
+    """
+    grouped: Dict[datetime, List[Bucket]] = {}
+    for bucket in buckets:
+        grouped.setdefault(bucket_start(bucket.start, bucket_seconds), []).append(bucket)
+
+    merged = []
+    for start in sorted(grouped):
+        children = grouped[start]
+        if len(children) == 1:
+            child = children[0]
+            merged.append(Bucket(start, child.count, child.min, child.max, child.sum, child.p95))
+            continue
+
+        weighted = sorted((child.p95, child.count) for child in children)
+        total = sum(child.count for child in children)
+        threshold = total * 0.95
+        running = 0
+        p95 = weighted[-1][0]
+        for value, count in weighted:
+            running += count
+            if running >= threshold:
+                p95 = value
+                break
+
+        merged.append(Bucket(
+            start=start,
+            count=total,
+            min=min(child.min for child in children),
+            max=max(child.max for child in children),
+            sum=sum(child.sum for child in children),
+            p95=p95,
+        ))
+    return merged
+
+
+def downsample(buckets: List[Bucket], max_points: int, bucket_seconds: int) -> Tuple[List[Bucket], int]:
+    """
+    Coarsen buckets until they fit within the point budget.
+
+    Merged buckets are aligned to multiples of the new width, so the range
+    can straddle one more bucket than its span suggests; the width grows
+    until the result fits.
+
+    Args:
+        buckets: Buckets at the given resolution
+        max_points: Maximum number of buckets to return
+        bucket_seconds: Current bucket width in seconds
+
+    Returns:
+        Tuple of (buckets, effective bucket width in seconds)
+    """
+    if len(buckets) <= max_points or not buckets:
+        return buckets, bucket_seconds
+
+    span = (buckets[-1].start - buckets[0].start).total_seconds() + bucket_seconds
+    factor = math.ceil(span / bucket_seconds / max(max_points, 1))
+    while True:
+        width = bucket_seconds * factor
+        merged = merge_buckets(buckets, width)
+        if len(merged) <= max_points or len(merged) == 1:
+            return merged, width
+        factor += 1
+
+
+def to_columnar(
+    buckets: Sequence[Bucket],
+    fields: Optional[Sequence[str]] = None
+) -> Dict[str, List[Any]]:
+    """
+    Convert buckets into a compact column-oriented payload.
+
+    Args:
+        buckets: Buckets to convert
+        fields: Statistics to include (default: min, max, avg, p95)
+
+    Returns:
+        Dictionary with a "timestamps" column (epoch seconds) plus one
+        column per requested statistic
+    """
+    fields = fields or ("min", "max", "avg", "p95")
+    columns: Dict[str, List[Any]] = {
+        "timestamps": [int((b.start - _EPOCH).total_seconds()) for b in buckets]
+    }
+    for field in fields:
+        columns[field] = [round(getattr(b, field), 6) for b in buckets]
+    return columns
@@ -3,10 +3,10 @@ import asyncio
 import logging
 from typing import Dict, List, Any
 from datetime import datetime, timedelta
-from collections import OrderedDict, defaultdict
-from time import time
+from collections import OrderedDict
 
 from resoftai.websocket.manager import sio, manager
+from resoftai.websocket.throttle import PresenceCoalescer, SlidingWindowRateLimiter
 
 logger = logging.getLogger(__name__)
 
@@ -77,8 +77,8 @@ async def verify_file_access(file_id: int, user_id: int) -> bool:
         return False
 
 
-# Rate limit tracking
-_rate_limits: Dict[str, List[float]] = defaultdict(list)
+# Rate limit tracking (idle keys are evicted after a minute)
+_rate_limiter = SlidingWindowRateLimiter(ttl=60)
 
 
 def check_rate_limit(
@@ -97,21 +97,22 @@ def check_rate_limit(
     Returns:
         True if within limit, False if exceeded
     """
-    now = time()
+    return _rate_limiter.allow(key, max_requests, window)
 
-    # Clean old timestamps
-    _rate_limits[key] = [
-        t for t in _rate_limits[key]
-        if now - t < window
-    ]
 
-    # Check limit
-    if len(_rate_limits[key]) >= max_requests:
-        return False
+async def _flush_cursor_positions(file_id: int, updates: Dict[int, Dict[str, Any]]):
+    """Broadcast each editor's latest cursor/selection to the other editors of a file."""
+    editors = active_editors.get(file_id, {})
+    for user_id, state in updates.items():
+        await sio.emit('cursor_position_changed', {
+            'file_id': file_id,
+            'user_id': user_id,
+            **state
+        }, room=f"file:{file_id}", skip_sid=editors.get(user_id, {}).get('sid'))
+
 
-    # Record request
-    _rate_limits[key].append(now)
-    return True
+# Latest cursor/selection per editor, flushed at most 20 times per second per file
+presence = PresenceCoalescer(_flush_cursor_positions, tick_rate=20)
 
 
 # Track active editors per file using LRU cache
@@ -226,10 +227,12 @@ async def leave_file_editing(sid, data):
     if file_id in active_editors and user_id in active_editors[file_id]:
         username = active_editors[file_id][user_id].get('username', 'Unknown')
         del active_editors[file_id][user_id]
+        presence.remove_member(file_id, user_id)
 
         # Clean up empty file entries
         if not active_editors[file_id]:
             del active_editors[file_id]
+            presence.discard_room(file_id)
 
         # Leave room
         room = f"file:{file_id}"
@@ -315,6 +318,10 @@ async def cursor_position_change(sid, data):
     """
     Update cursor position for an editor with rate limiting.
 
+    Updates are coalesced per file: each editor's latest position is
+    broadcast to the other editors as ``cursor_position_changed`` at most 20
+    times per second, and superseded positions are never sent.
+
     Expected data:
         {
             "file_id": 123,
@@ -344,15 +351,12 @@ async def cursor_position_change(sid, data):
         active_editors[file_id][user_id]['cursor_position'] = position
         active_editors[file_id][user_id]['selection'] = selection
 
-        # Broadcast cursor position to other editors
-        room = f"file:{file_id}"
-        await sio.emit('cursor_position_changed', {
-            'file_id': file_id,
-            'user_id': user_id,
+        # Coalesce with other editors' updates; only the latest state is sent
+        await presence.update(file_id, user_id, {
             'username': active_editors[file_id][user_id].get('username'),
             'position': position,
             'selection': selection
-        }, room=room, skip_sid=sid)
+        })
 
 
 @sio.event
@@ -530,10 +534,12 @@ async def disconnect(sid):
                 if file_id in active_editors and user_id in active_editors[file_id]:
                     username = active_editors[file_id][user_id].get('username', 'Unknown')
                     del active_editors[file_id][user_id]
+                    presence.remove_member(file_id, user_id)
 
                     # Clean empty file entries
                     if not active_editors[file_id]:
                         del active_editors[file_id]
+                        presence.discard_room(file_id)
 
                     # Notify other users
                     room = f"file:{file_id}"
@@ -549,6 +555,8 @@ async def disconnect(sid):
 
         del sid_to_sessions[sid]
 
+    _rate_limiter.reset(sid)
+
 
 # Start cleanup task
 try:
@@ -1,6 +1,10 @@
 """WebSocket connection manager."""
+import os
+import time
 import socketio
 import logging
+from contextvars import ContextVar
+from socketio import packet
 from typing import Dict, Set, Any
 from resoftai.utils.performance import (
     timing_decorator,
@@ -9,15 +13,84 @@ from resoftai.utils.performance import (
     message_batcher
 )
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+try:
+    from socketio import msgpack_packet
+except ImportError:  # pragma: no cover - msgpack is optional
+    msgpack_packet = None
+
 logger = logging.getLogger(__name__)
 
+# Size of the last packet encoded in the current task, read back after an emit
+_encoded_size: ContextVar[int] = ContextVar("websocket_encoded_size", default=0)
+
+
+class _FastJSON:
+    """JSON module shim backed by orjson for Socket.IO packet encoding."""
+
+    @staticmethod
+    def dumps(obj, **kwargs):
+        return orjson.dumps(obj, default=str).decode("utf-8")
+
+    @staticmethod
+    def loads(data, **kwargs):
+        return orjson.loads(data)
+
+
+def _measured_packet_class(base):
+    """
+    Wrap a Socket.IO packet class so each encoding records its size.
+
+    Room emits encode a payload once and reuse it for every recipient, so the
+    recorded size describes the whole fan-out without serializing again.
+    """
+
+    class MeasuredPacket(base):
+        def encode(self):
+            encoded = super().encode()
+            parts = encoded if isinstance(encoded, list) else [encoded]
+            _encoded_size.set(sum(len(part) for part in parts))
+            return encoded
+
+    return MeasuredPacket
+
+
+def _create_server() -> socketio.AsyncServer:
+    """
+    Create the Socket.IO server.
+
+    ``WEBSOCKET_SERIALIZER=msgpack`` switches to binary msgpack packets
+    (clients must use the msgpack parser); JSON is used otherwise, encoded
+    with orjson when it is installed.
+    """
+    serializer = os.getenv("WEBSOCKET_SERIALIZER", "json").lower()
+    options = {}
+
+    if serializer == "msgpack" and msgpack_packet is not None:
+        packet_class = _measured_packet_class(msgpack_packet.MsgPackPacket)
+    else:
+        if serializer == "msgpack":
+            logger.warning("msgpack is not installed, falling back to JSON WebSocket packets")
+        packet_class = _measured_packet_class(packet.Packet)
+        if orjson is not None:
+            options["json"] = _FastJSON
+
+    return socketio.AsyncServer(
+        async_mode='asgi',
+        cors_allowed_origins='*',  # Configure properly in production
+        logger=False,
+        engineio_logger=False,
+        serializer=packet_class,
+        **options
+    )
+
+
 # Create Socket.IO server
-sio = socketio.AsyncServer(
-    async_mode='asgi',
-    cors_allowed_origins='*',  # Configure properly in production
-    logger=False,
-    engineio_logger=False
-)
+sio = _create_server()
 
 
 class ConnectionManager:
@@ -31,6 +104,11 @@ class ConnectionManager:
         self.session_user_info: Dict[str, Dict[str, Any]] = {}  # sid -> {user_id, username}
         self.file_versions: Dict[int, int] = {}  # file_id -> current_version
 
+        # Reverse indexes so disconnect only touches the rooms a session joined
+        self.session_projects: Dict[str, Set[str]] = {}  # sid -> set of project_ids
+        self.session_users: Dict[str, int] = {}  # sid -> user_id
+        self.session_files: Dict[str, Set[int]] = {}  # sid -> set of file_ids
+
     @timing_decorator("manager.connect")
     async def connect(self, sid: str, project_id: str, user_id: int = None):
         """
@@ -45,6 +123,7 @@ class ConnectionManager:
         if project_id not in self.active_connections:
             self.active_connections[project_id] = set()
         self.active_connections[project_id].add(sid)
+        self.session_projects.setdefault(sid, set()).add(project_id)
         await sio.enter_room(sid, f"project:{project_id}")
 
         # Add to user tracking
@@ -52,32 +131,61 @@ class ConnectionManager:
             if user_id not in self.user_connections:
                 self.user_connections[user_id] = set()
             self.user_connections[user_id].add(sid)
+            self.session_users[sid] = user_id
 
         # Track metrics
         websocket_metrics.connection_opened()
 
         logger.info(f"Client {sid} connected to project {project_id}")
 
+    async def leave_project(self, sid: str, project_id: str):
+        """
+        Remove connection from a project room.
+
+        Args:
+            sid: Session ID
+            project_id: Project ID to leave
+        """
+        sids = self.active_connections.get(project_id)
+        if sids is not None:
+            sids.discard(sid)
+            if not sids:
+                del self.active_connections[project_id]
+                websocket_metrics.room_closed(f"project:{project_id}")
+
+        projects = self.session_projects.get(sid)
+        if projects is not None:
+            projects.discard(project_id)
+            if not projects:
+                del self.session_projects[sid]
+
+        await sio.leave_room(sid, f"project:{project_id}")
+
     @timing_decorator("manager.disconnect")
     async def disconnect(self, sid: str):
         """
         Remove connection from all rooms.
 
+        Only the rooms recorded for this session are visited, so the cost is
+        proportional to the rooms it joined rather than to all open rooms.
+
         Args:
             sid: Session ID
         """
         # Remove from project rooms
-        for project_id, sids in list(self.active_connections.items()):
-            if sid in sids:
-                sids.remove(sid)
-                await sio.leave_room(sid, f"project:{project_id}")
-                if not sids:
-                    del self.active_connections[project_id]
+        for project_id in list(self.session_projects.get(sid, ())):
+            await self.leave_project(sid, project_id)
+
+        # Remove from file editing sessions
+        for file_id in list(self.session_files.get(sid, ())):
+            await self.leave_file(sid, file_id)
 
         # Remove from user tracking
-        for user_id, sids in list(self.user_connections.items()):
-            if sid in sids:
-                sids.remove(sid)
+        user_id = self.session_users.pop(sid, None)
+        if user_id is not None:
+            sids = self.user_connections.get(user_id)
+            if sids is not None:
+                sids.discard(sid)
                 if not sids:
                     del self.user_connections[user_id]
 
@@ -86,6 +194,40 @@ class ConnectionManager:
 
         logger.info(f"Client {sid} disconnected")
 
+    async def _emit_to_room(
+        self,
+        room: str,
+        event: str,
+        data: Any,
+        recipients: int,
+        skip_sid: str = None
+    ):
+        """
+        Emit one message to a room and record fan-out metrics.
+
+        Socket.IO encodes the packet once per room emit and reuses it for every
+        member, so the Python work per message does not grow with room size.
+
+        Args:
+            room: Room name
+            event: Event name
+            data: Event data
+            recipients: Expected number of receiving sessions
+            skip_sid: Optional session ID that should not receive the message
+        """
+        _encoded_size.set(0)
+        start = time.perf_counter()
+
+        if skip_sid:
+            await sio.emit(event, data, room=room, skip_sid=skip_sid)
+        else:
+            await sio.emit(event, data, room=room)
+
+        duration = time.perf_counter() - start
+        message_size = _encoded_size.get()
+        websocket_metrics.message_sent(message_size)
+        websocket_metrics.broadcast_completed(room, recipients, message_size, duration)
+
     @timing_decorator("manager.broadcast_to_project")
     async def broadcast_to_project(self, project_id: int, event: str, data: Any):
         """
@@ -96,13 +238,8 @@ class ConnectionManager:
             event: Event name
             data: Event data
         """
-        import json
-        room = f"project:{project_id}"
-        await sio.emit(event, data, room=room)
-
-        # Track message metrics
-        message_size = len(json.dumps(data).encode('utf-8'))
-        websocket_metrics.message_sent(message_size)
+        recipients = len(self.active_connections.get(str(project_id), ()))
+        await self._emit_to_room(f"project:{project_id}", event, data, recipients)
 
         logger.debug(f"Broadcasted {event} to project {project_id}")
 
@@ -167,6 +304,8 @@ class ConnectionManager:
             'project_id': project_id
         }
 
+        self.session_files.setdefault(sid, set()).add(file_id)
+
         await sio.enter_room(sid, f"file:{file_id}")
         logger.info(f"User {username} (sid: {sid}) joined file {file_id}")
 
@@ -184,6 +323,13 @@ class ConnectionManager:
                 del self.file_sessions[file_id]
                 if file_id in self.file_versions:
                     del self.file_versions[file_id]
+                websocket_metrics.room_closed(f"file:{file_id}")
+
+        files = self.session_files.get(sid)
+        if files is not None:
+            files.discard(file_id)
+            if not files:
+                del self.session_files[sid]
 
         if sid in self.session_user_info:
             del self.session_user_info[sid]
@@ -226,20 +372,9 @@ class ConnectionManager:
             data: Event data
             exclude_sid: Optional session ID to exclude from broadcast
         """
-        import json
-        room = f"file:{file_id}"
-        message_size = len(json.dumps(data).encode('utf-8'))
-
-        if exclude_sid:
-            # Send to all in room except the sender
-            if file_id in self.file_sessions:
-                for sid in self.file_sessions[file_id].keys():
-                    if sid != exclude_sid:
-                        await sio.emit(event, data, room=sid)
-                        websocket_metrics.message_sent(message_size)
-        else:
-            await sio.emit(event, data, room=room)
-            websocket_metrics.message_sent(message_size)
+        members = self.file_sessions.get(file_id, {})
+        recipients = len(members) - (1 if exclude_sid in members else 0)
+        await self._emit_to_room(f"file:{file_id}", event, data, recipients, skip_sid=exclude_sid)
 
         logger.debug(f"Broadcasted {event} to file {file_id}")
 
@@ -304,7 +439,7 @@ async def leave_project(sid, data):
         await sio.emit('error', {'message': 'project_id is required'}, room=sid)
         return
 
-    await sio.leave_room(sid, f"project:{project_id}")
+    await manager.leave_project(sid, project_id)
     await sio.emit('left', {
         'project_id': project_id,
         'message': f'Left project {project_id}'
@@ -0,0 +1,216 @@
+"""
+Rate limiting and presence coalescing for collaboration traffic.
+
+Cursor and selection updates are high-frequency and only the latest state per
+user matters, so they are merged per room and flushed at a fixed tick rate.
+Room traffic is then bounded by the tick rate instead of by how often every
+editor moves their cursor.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class SlidingWindowRateLimiter:
+    """
+    Sliding-window rate limiter with O(1) work per check.
+
+    Each key keeps two counters: the current window and the previous one. The
+    request rate is estimated by weighting the previous window by how much of
+    it still overlaps the sliding window. Windows start at a key's first
+    request, so a burst is never split across two windows. Keys idle for
+    longer than ``ttl`` seconds are evicted.
+    """
+
+    def __init__(self, ttl: float = 60.0):
+        """
+        Initialize rate limiter.
+
+        Args:
+            ttl: Seconds after which an idle key is forgotten
+        """
+        self.ttl = ttl
+        # key -> [window_start, current_count, previous_count, last_seen]
+        self._windows: "OrderedDict[Hashable, list]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._windows)
+
+    def allow(
+        self,
+        key: Hashable,
+        max_requests: int,
+        window: float,
+        now: Optional[float] = None
+    ) -> bool:
+        """
+        Record a request if it is within the limit.
+
+        Args:
+            key: Identifier (e.g., user_id or sid)
+            max_requests: Maximum requests allowed per window
+            window: Window length in seconds
+            now: Current monotonic time (defaults to ``time.monotonic()``)
+
+        Returns:
+            True if within limit, False if exceeded
+        """
+        if now is None:
+            now = time.monotonic()
+        self._evict(now)
+
+        entry = self._windows.get(key)
+        if entry is None:
+            entry = self._windows[key] = [now, 0, 0, now]
+        else:
+            self._windows.move_to_end(key)
+            elapsed_windows = int((now - entry[0]) // window)
+            if elapsed_windows >= 1:
+                entry[2] = entry[1] if elapsed_windows == 1 else 0
+                entry[1] = 0
+                entry[0] += elapsed_windows * window
+        entry[3] = now
+
+        overlap = 1.0 - (now - entry[0]) / window
+        if entry[2] * overlap + entry[1] >= max_requests:
+            return False
+
+        entry[1] += 1
+        return True
+
+    def _evict(self, now: float):
+        """Drop keys idle for longer than the TTL (least recently seen first)."""
+        while self._windows:
+            key, entry = next(iter(self._windows.items()))
+            if now - entry[3] <= self.ttl:
+                break
+            del self._windows[key]
+
+    def reset(self, key: Hashable):
+        """Forget a key's counters."""
+        self._windows.pop(key, None)
+
+
+FlushCallback = Callable[[Any, Dict[Any, Dict[str, Any]]], Awaitable[None]]
+
+
+class PresenceCoalescer:
+    """
+    Merge presence updates per room and flush them at a fixed tick rate.
+
+    The first update in an idle room is flushed immediately. Later updates
+    within the same tick replace that member's pending state and go out
+    together in the next tick. While a flush is still being delivered, new
+    updates keep overwriting the pending state, so superseded positions are
+    dropped instead of queueing behind a slow room.
+    """
+
+    def __init__(self, flush: FlushCallback, tick_rate: float = 20.0):
+        """
+        Initialize presence coalescer.
+
+        Args:
+            flush: Coroutine called with (room, {member: latest_state})
+            tick_rate: Maximum flushes per second per room
+        """
+        self.flush = flush
+        self.interval = 1.0 / tick_rate
+        self._pending: Dict[Any, Dict[Any, Dict[str, Any]]] = {}
+        self._last_flush: Dict[Any, float] = {}
+        self._busy: Set[Any] = set()
+        self._tasks: Dict[Any, asyncio.Task] = {}
+        self.updates = 0
+        self.superseded = 0
+        self.flushes = 0
+
+    async def update(self, room: Any, member: Any, state: Dict[str, Any]):
+        """
+        Record a member's latest presence state.
+
+        Args:
+            room: Room key (e.g. file ID)
+            member: Member key (e.g. user ID)
+            state: Latest cursor/selection state
+        """
+        pending = self._pending.setdefault(room, {})
+        if member in pending:
+            self.superseded += 1
+        pending[member] = state
+        self.updates += 1
+
+        if room in self._busy:
+            return
+
+        delay = self._last_flush.get(room, float("-inf")) + self.interval - time.monotonic()
+        if delay > 0:
+            self._schedule(room, delay)
+        else:
+            await self._flush_now(room)
+
+    def remove_member(self, room: Any, member: Any):
+        """Drop a member's pending state (e.g. when they leave the room)."""
+        pending = self._pending.get(room)
+        if pending is not None:
+            pending.pop(member, None)
+            if not pending:
+                del self._pending[room]
+
+    def discard_room(self, room: Any):
+        """Forget all state for a room that has no members left."""
+        self._pending.pop(room, None)
+        self._last_flush.pop(room, None)
+        self._busy.discard(room)
+        task = self._tasks.pop(room, None)
+        if task and not task.done():
+            task.cancel()
+
+    def _schedule(self, room: Any, delay: float):
+        self._busy.add(room)
+        self._tasks[room] = asyncio.create_task(self._flush_later(room, delay))
+
+    async def _flush_later(self, room: Any, delay: float):
+        await asyncio.sleep(delay)
+        self._busy.discard(room)
+        self._tasks.pop(room, None)
+        await self._flush_now(room)
+
+    async def _flush_now(self, room: Any):
+        updates = self._pending.pop(room, None)
+        if not updates:
+            return
+
+        self._busy.add(room)
+        self._last_flush[room] = time.monotonic()
+        try:
+            await self.flush(room, updates)
+            self.flushes += 1
+        except Exception as e:
+            logger.warning(f"Presence flush failed for room {room}: {e}")
+        finally:
+            self._busy.discard(room)
+
+        # Updates that arrived during delivery go out on the next tick
+        if room in self._pending and room not in self._busy:
+            delay = self._last_flush[room] + self.interval - time.monotonic()
+            self._schedule(room, max(delay, 0.0))
+
+    async def stop(self):
+        """Cancel scheduled flushes."""
+        for task in list(self._tasks.values()):
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+        self._busy.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get coalescing statistics."""
+        return {
+            "updates": self.updates,
+            "superseded": self.superseded,
+            "flushes": self.flushes,
+            "pending_rooms": len(self._pending),
+        }
@@ -8,6 +8,8 @@ from resoftai.ai.code_reviewer import (
     IssueCategory
 )
 from resoftai.ai.multi_model_coordinator import MultiModelCoordinator
+from resoftai.llm.base import LLMConfig, LLMResponse, ModelProvider
+from resoftai.llm.batch import BatchBackend, BatchExecutor, BatchStatus
 
 
 class TestIntelligentCodeReviewer:
@@ -184,3 +186,37 @@ if True:
 
         assert len(recommendations) > 0
         assert any("security" in r.lower() for r in recommendations)
+
+    @pytest.mark.asyncio
+    async def test_review_files_submits_one_batch(self, coordinator):
+        """Test that reviewing several files submits their AI analysis as one batch job."""
+        submitted = []
+
+        async def submit(requests):
+            submitted.append(requests)
+            return "batch-1"
+
+        async def results(batch_id):
+            return {
+                request.custom_id: LLMResponse(
+                    content="", model="m", provider=ModelProvider.ANTHROPIC, usage={}
+                )
+                for request in submitted[0]
+            }
+
+        backend = Mock(spec=BatchBackend)
+        backend.submit = AsyncMock(side_effect=submit)
+        backend.poll = AsyncMock(return_value=BatchStatus(batch_id="batch-1", done=True))
+        backend.results = AsyncMock(side_effect=results)
+        config = LLMConfig(provider=ModelProvider.ANTHROPIC, api_key="k", model_name="m")
+        executor = BatchExecutor(config, backend=backend, collect_window=3600)
+        coordinator.execute = AsyncMock()
+        reviewer = IntelligentCodeReviewer(coordinator, batch_executor=executor)
+
+        reports = await reviewer.review_files({"a.py": "x = 1", "b.py": "y = 2\nz = 3"})
+
+        assert backend.submit.await_count == 1
+        assert len(submitted[0]) == 2
+        assert [report.total_lines for report in reports] == [1, 2]
+        assert reports[0].ai_models_used == ["batch"]
+        coordinator.execute.assert_not_called()
@@ -0,0 +1,145 @@
+"""Tests for multi-model collaboration with early-exit consensus."""
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+
+from resoftai.ai.multi_model_collaboration import (
+    CollaborationStrategy,
+    ConsensusTracker,
+    ModelConfig,
+    ModelRole,
+    MultiModelCollaborator,
+    extract_verdict,
+    output_similarity,
+)
+from resoftai.llm.base import LLMConfig, LLMResponse, ModelProvider
+
+ROLES = [ModelRole.CODE_REVIEW, ModelRole.BUG_DETECTION, ModelRole.TESTING]
+
+
+class FakeProvider:
+    """Provider answering ``answer`` after ``delay`` seconds."""
+
+    provider_name = "fake"
+
+    def __init__(self, answer, delay):
+        self.answer = answer
+        self.delay = delay
+        self.cancelled = False
+
+    async def generate(self, prompt, system_prompt=None, **kwargs):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return LLMResponse(
+            content=self.answer, model="m", provider=ModelProvider.DEEPSEEK, usage={"total_tokens": 100}
+        )
+
+
+def make_collaborator(answers, **options):
+    """Collaborator whose models answer (content, delay) in ROLES order."""
+    providers = iter([FakeProvider(content, delay) for content, delay in answers])
+    config = LLMConfig(provider=ModelProvider.DEEPSEEK, api_key="k", model_name="m")
+    with patch("resoftai.ai.multi_model_collaboration.LLMFactory.create", side_effect=lambda _: next(providers)):
+        return MultiModelCollaborator([ModelConfig(config, role) for role in ROLES[:len(answers)]], **options)
+
+
+class TestAgreement:
+    """Test the similarity measure and consensus tracking."""
+
+    def test_verdicts_are_compared_directly(self):
+        """Test stated verdicts decide agreement regardless of wording."""
+        assert extract_verdict("Verdict: **Approve** - nice work") == "approve"
+        assert extract_verdict("LGTM, ship it") == "approve"
+        assert output_similarity("Decision: request changes", "Verdict: needs work, see below") == 1.0
+        assert output_similarity("Verdict: approve", "Verdict: reject") == 0.0
+
+    def test_text_similarity_ignores_case_and_punctuation(self):
+        """Test free-text outputs are compared on their normalized words."""
+        assert output_similarity("Use a context manager.", "use a Context Manager") == 1.0
+        assert output_similarity("Use a context manager", "Rewrite in Go") == 0.0
+
+    def test_tracker_settles_on_quorum(self):
+        """Test the tracker settles once the leading group reaches the quorum."""
+        tracker = ConsensusTracker(total_weight=3, quorum=2)
+
+        tracker.add({"content": "Verdict: approve"}, 1)
+        assert not tracker.settled()
+        tracker.add({"content": "Verdict: reject"}, 1)
+        assert not tracker.settled()
+        tracker.add({"content": "Result: LGTM"}, 1)
+        assert tracker.settled()
+
+    def test_tracker_confidence_threshold(self):
+        """Test a heavy model can settle the call through the confidence threshold."""
+        tracker = ConsensusTracker(total_weight=4, quorum=3, confidence_threshold=0.5)
+
+        tracker.add({"content": "Verdict: approve"}, 2.5)
+
+        assert tracker.settled()
+
+
+@pytest.mark.asyncio
+class TestEarlyExit:
+    """Test strategies stop once the models agree."""
+
+    async def test_consensus_stops_at_second_agreeing_response(self):
+        """Test consensus returns at the quorum and cancels the slowest model."""
+        collaborator = make_collaborator([
+            ("Verdict: approve. Clean code.", 0.01),
+            ("Verdict: approve, minor nits.", 0.02),
+            ("Verdict: reject", 5),
+        ])
+        slow = collaborator.providers[ModelRole.TESTING]
+        collaborator._latency_ewma[ModelRole.TESTING] = 5.0
+
+        start = time.monotonic()
+        result = await collaborator.collaborate("Review", CollaborationStrategy.CONSENSUS)
+
+        assert time.monotonic() - start < 1
+        assert result.final_output == "Verdict: approve. Clean code."
+        assert result.consensus_score == 1.0
+        assert slow.cancelled
+        assert result.early_exit["cancelled_roles"] == ["testing"]
+        assert result.early_exit["tokens_saved_estimate"] == 100
+        assert result.early_exit["latency_saved_seconds_estimate"] > 4
+        assert collaborator.stats["early_exits"] == 1
+
+    async def test_disagreement_waits_for_all(self):
+        """Test no early exit happens while the models disagree."""
+        collaborator = make_collaborator([
+            ("Verdict: approve", 0.01), ("Verdict: reject", 0.02), ("Verdict: reject", 0.05),
+        ])
+
+        result = await collaborator.collaborate("Review", CollaborationStrategy.CONSENSUS)
+
+        assert result.final_output == "Verdict: reject"
+        assert result.model_votes == {"Verdict: approve": 1, "Verdict: reject": 2}
+        assert len(result.individual_outputs) == 3
+        assert result.early_exit is None
+
+    async def test_parallel_picks_best_of_agreeing(self):
+        """Test parallel selects among the agreeing responses once settled."""
+        collaborator = make_collaborator([
+            ("use a context manager", 0.01), ("Use a context manager.", 0.02), ("x", 5),
+        ])
+
+        result = await collaborator.collaborate("Fix", CollaborationStrategy.PARALLEL)
+
+        assert result.final_output == "Use a context manager."
+        assert len(result.individual_outputs) == 2
+
+    async def test_early_exit_can_be_disabled(self):
+        """Test early_exit=False waits for every model."""
+        collaborator = make_collaborator(
+            [("same", 0.01), ("same", 0.01), ("other", 0.05)], early_exit=False
+        )
+
+        result = await collaborator.collaborate("Q", CollaborationStrategy.ENSEMBLE)
+
+        assert len(result.individual_outputs) == 3
+        assert result.early_exit is None
@@ -1,4 +1,7 @@
 """Tests for multi-model coordinator."""
+import asyncio
+import time
+
 import pytest
 from unittest.mock import Mock, AsyncMock, patch
 
@@ -152,3 +155,116 @@ class TestMultiModelCoordinator:
         # Should prefer high quality/cost ratio
         assert len(selected) > 0
         assert all(m.cost_per_token <= 0.001 for m in selected)
+
+
+class FakeProvider:
+    """Provider answering after the given delays, one per call."""
+
+    def __init__(self, answer, delays):
+        self.answer = answer
+        self.delays = list(delays)
+        self.calls = 0
+        self.cancelled = 0
+
+    async def generate(self, **kwargs):
+        delay = self.delays[min(self.calls, len(self.delays) - 1)]
+        self.calls += 1
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return self.answer
+
+
+@pytest.mark.asyncio
+class TestLatencyAwareRouting:
+    """Test hedging, early completion and provider pooling."""
+
+    def make_coordinator(self, providers):
+        """Coordinator over ``providers`` ({name: FakeProvider})."""
+        factory = Mock(spec=LLMFactory)
+        factory.create.side_effect = lambda name: providers[name]
+        coordinator = MultiModelCoordinator(factory)
+        for index, name in enumerate(providers):
+            coordinator.add_model(ModelConfig(name, f"{name}-model", priority=index + 1, quality_score=0.9))
+        return coordinator
+
+    async def test_providers_are_pooled(self):
+        """Test the factory is called once per model, not once per request."""
+        coordinator = self.make_coordinator({"a": FakeProvider("x", [0])})
+
+        for _ in range(3):
+            await coordinator.execute("Q", task_complexity=TaskComplexity.SIMPLE)
+
+        assert coordinator.llm_factory.create.call_count == 1
+
+    async def test_voting_completes_on_majority(self):
+        """Test voting returns once a majority agrees and cancels the slow model."""
+        slow = FakeProvider("B", [5])
+        coordinator = self.make_coordinator({
+            "a": FakeProvider("A", [0.01]), "b": FakeProvider("A", [0.02]), "c": slow
+        })
+
+        start = time.monotonic()
+        result = await coordinator.execute("Q", CombinationStrategy.VOTING, TaskComplexity.COMPLEX)
+
+        assert time.monotonic() - start < 1
+        assert result.final_output == "A"
+        assert result.metadata["models_completed"] == 2
+        assert slow.cancelled == 1
+        assert coordinator.stats["early_completions"] == 1
+        assert coordinator.stats["cancelled"] == 1
+
+    async def test_first_k_of_n(self):
+        """Test first_k stops after k successful responses."""
+        coordinator = self.make_coordinator({
+            "a": FakeProvider("A", [0.01]), "b": FakeProvider("B", [5]), "c": FakeProvider("C", [5])
+        })
+
+        result = await coordinator.execute(
+            "Q", CombinationStrategy.BEST_OF_N, TaskComplexity.COMPLEX, first_k=1
+        )
+
+        assert [r.provider for r in result.individual_responses] == ["a"]
+
+    async def test_slow_request_is_hedged(self):
+        """Test a request slower than the model's p95 gets a duplicate that wins."""
+        provider = FakeProvider("A", [0.01] * 10 + [5, 0.01])
+        coordinator = self.make_coordinator({"a": provider})
+        for _ in range(10):
+            await coordinator.execute("Q", task_complexity=TaskComplexity.SIMPLE)
+
+        start = time.monotonic()
+        result = await coordinator.execute("Q", task_complexity=TaskComplexity.SIMPLE)
+
+        assert time.monotonic() - start < 1
+        assert result.final_output == "A"
+        assert coordinator.stats["hedges_sent"] == 1
+        assert coordinator.stats["hedges_won"] == 1
+        assert provider.cancelled == 1
+        assert coordinator.stats["cancelled"] == 1
+
+    async def test_cancelled_attempts_are_latency_samples(self):
+        """Test a cancelled slow request still counts towards the model's latency tail."""
+        slow = FakeProvider("B", [0.3])
+        coordinator = self.make_coordinator({"a": FakeProvider("A", [0.01]), "b": slow})
+
+        await coordinator.execute("Q", CombinationStrategy.BEST_OF_N, TaskComplexity.MODERATE, first_k=1)
+
+        stats = coordinator.model_stats["b/b-model"]
+        assert slow.cancelled == 1
+        assert len(stats.recent_latencies) == 1
+        assert 0 < stats.recent_latencies[0] < 0.3
+        assert stats.samples == 0 and stats.error_ewma == 0.0
+
+    async def test_unhealthy_model_routed_last(self):
+        """Test a model with a high error rate loses its place to a healthy one."""
+        coordinator = self.make_coordinator({"a": FakeProvider("A", [0]), "b": FakeProvider("B", [0])})
+        for _ in range(5):
+            coordinator._record_latency(ModelResponse("a", "a-model", "", 0, 1.0, False))
+
+        selected = coordinator._select_models(TaskComplexity.SIMPLE, None, 0.7)
+
+        assert selected[0].provider == "b"
+        assert coordinator.get_routing_stats()["models"]["a/a-model"]["error_rate"] > 0.5
@@ -2,6 +2,7 @@
 import pytest
 import asyncio
 from typing import Generator, AsyncGenerator
+from sqlalchemy import MetaData
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.pool import NullPool
 from httpx import AsyncClient
@@ -29,6 +30,24 @@ def event_loop() -> Generator:
     loop.close()
 
 
+@pytest.fixture(autouse=True)
+def reset_process_caches():
+    """Give every test fresh rate limits and empty in-process caches."""
+    from resoftai.api.middleware import rate_limit_policy
+    from resoftai.core.semantic_cache import semantic_cache
+    from resoftai.llm.pool import provider_pool
+    from resoftai.services.llm_usage import llm_usage_recorder
+    from resoftai.utils.cache import cache_manager
+    from resoftai.utils.rate_limit import rate_limiter
+    rate_limiter.reset()
+    rate_limit_policy.invalidate()
+    cache_manager.local.clear()
+    semantic_cache.clear()
+    provider_pool.clear()
+    llm_usage_recorder.clear()
+    yield
+
+
 @pytest.fixture(scope="function")
 async def db_engine():
     """Create test database engine."""
@@ -65,6 +84,134 @@ async def db(db_engine) -> AsyncGenerator[AsyncSession, None]:
         await session.rollback()
 
 
+@pytest.fixture
+async def make_session_factory(tmp_path):
+    """
+    Build session factories over fresh SQLite databases holding only the given tables.
+
+    Call with tables or metadata to create, and optionally ``rows``
+    ({table: [row, ...]}) to insert. ``shared=True`` backs the database
+    with a file, so concurrent sessions see each other's commits.
+    """
+    engines = []
+
+    async def make(*schemas, rows=None, shared=False):
+        if shared:
+            engine = create_async_engine(
+                f"sqlite+aiosqlite:///{tmp_path / f'test{len(engines)}.db'}", poolclass=NullPool
+            )
+        else:
+            engine = create_async_engine(TEST_DATABASE_URL)
+        engines.append(engine)
+
+        async with engine.begin() as conn:
+            for schema in schemas:
+                await conn.run_sync(schema.create_all if isinstance(schema, MetaData) else schema.create)
+            for table, table_rows in (rows or {}).items():
+                await conn.execute(table.insert(), table_rows)
+
+        return async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    yield make
+
+    for engine in engines:
+        await engine.dispose()
+
+
+class FakePipeline:
+    """Collects commands and runs them on execute."""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    def __getattr__(self, name):
+        def queue(*args):
+            self.commands.append((name, args))
+        return queue
+
+    async def execute(self):
+        return [await getattr(self.redis, name)(*args) for name, args in self.commands]
+
+
+class FakeRedis:
+    """
+    In-memory stand-in for the Redis commands used by caches, counters and limiters.
+
+    Lua scripts are emulated by the coroutine functions in ``scripts``
+    (script source -> ``fn(redis, keys, args)``); ``fail`` makes them raise.
+    """
+
+    def __init__(self):
+        self.store = {}
+        self.published = []
+        self.scripts = {}
+        self.gets = 0
+        self.calls = 0
+        self.fail = False
+
+    async def get(self, key):
+        self.gets += 1
+        return self.store.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.store[key] = value.decode() if isinstance(value, bytes) else value
+
+    async def sadd(self, key, *members):
+        self.store.setdefault(key, set()).update(members)
+
+    async def smembers(self, key):
+        return set(self.store.get(key, set()))
+
+    async def expire(self, key, ttl):
+        return True
+
+    async def delete(self, *keys):
+        return sum(1 for key in keys if self.store.pop(key, None) is not None)
+
+    async def rename(self, src, dst):
+        if src not in self.store:
+            raise Exception("no such key")
+        self.store[dst] = self.store.pop(src)
+
+    async def hincrby(self, key, field, amount):
+        bucket = self.store.setdefault(key, {})
+        bucket[field] = bucket.get(field, 0) + amount
+        return bucket[field]
+
+    async def hgetall(self, key):
+        return {k: str(v) for k, v in self.store.get(key, {}).items()}
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def register_script(self, source):
+        async def script(keys, args):
+            self.calls += 1
+            if self.fail:
+                raise ConnectionError("redis down")
+            return await self.scripts[source](self, keys, args)
+        return script
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Install a fake Redis client."""
+    from resoftai.utils import cache
+    fake = FakeRedis()
+    monkeypatch.setattr(cache, "redis_client", fake)
+    return fake
+
+
 @pytest.fixture
 def test_settings():
     """Create test settings."""
@@ -0,0 +1,160 @@
+"""
+In-process fake of the Anthropic and OpenAI batch APIs, for tests.
+
+``FakeBatchServer`` implements the endpoints ``AnthropicBatchBackend`` and
+``OpenAIBatchBackend`` use, on top of ``httpx.MockTransport``::
+
+    server = FakeBatchServer(responder=lambda prompt: prompt.upper(), polls_until_done=2)
+    backend = AnthropicBatchBackend(config, client=server.client())
+
+Jobs finish after ``polls_until_done`` status checks. Requests whose prompt
+contains one of ``error_prompts`` come back errored, and ``fail_submissions``
+makes job creation return HTTP 500. Cancelled job ids are kept in
+``cancelled``.
+"""
+
+import itertools
+import json
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+
+class FakeBatchServer:
+    """Fake batch API answering every request with ``responder(prompt)``."""
+
+    def __init__(
+        self,
+        responder: Callable[[str], str] = lambda prompt: f"echo: {prompt}",
+        polls_until_done: int = 1,
+        error_prompts: Optional[List[str]] = None,
+        fail_submissions: bool = False
+    ):
+        self.responder = responder
+        self.polls_until_done = polls_until_done
+        self.error_prompts = error_prompts or []
+        self.fail_submissions = fail_submissions
+
+        self.batches: Dict[str, Dict[str, Any]] = {}
+        self.files: Dict[str, str] = {}
+        self.cancelled: List[str] = []
+        self.requests_seen = 0
+        self._ids = itertools.count(1)
+
+    def client(self) -> httpx.AsyncClient:
+        """HTTP client routed to this server."""
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handle))
+
+    def _answer(self, prompt: str) -> Optional[str]:
+        """Response text for a prompt, or None if it should error."""
+        self.requests_seen += 1
+        if any(marker in prompt for marker in self.error_prompts):
+            return None
+        return self.responder(prompt)
+
+    def _tick(self, batch: Dict[str, Any]) -> bool:
+        """Count a status check; return True once the job is done."""
+        batch["polls"] += 1
+        return batch["polls"] >= self.polls_until_done
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        """Route a request to the fake endpoint."""
+        path = request.url.path
+        if request.method == "POST" and path.endswith("/messages/batches"):
+            return self._anthropic_create(json.loads(request.content))
+        if "/messages/batches/" in path:
+            batch_id = path.split("/messages/batches/")[1].split("/")[0]
+            if path.endswith("/cancel"):
+                self.cancelled.append(batch_id)
+                return httpx.Response(200, json={"id": batch_id, "processing_status": "canceling"})
+            if path.endswith("/results"):
+                return self._anthropic_results(batch_id)
+            return self._anthropic_status(batch_id)
+        if request.method == "POST" and path.endswith("/files"):
+            return self._openai_upload(request)
+        if request.method == "POST" and path.endswith("/batches"):
+            return self._openai_create(json.loads(request.content))
+        if request.method == "POST" and path.endswith("/cancel"):
+            batch_id = path.rsplit("/", 2)[1]
+            self.cancelled.append(batch_id)
+            return httpx.Response(200, json={"id": batch_id, "status": "cancelling"})
+        if "/batches/" in path:
+            return self._openai_status(path.rsplit("/", 1)[1])
+        if path.endswith("/content"):
+            return httpx.Response(200, text=self.files[path.split("/")[-2]])
+        return httpx.Response(404, json={"error": f"No fake endpoint for {request.method} {path}"})
+
+    # Anthropic Message Batches
+
+    def _anthropic_create(self, body: Dict[str, Any]) -> httpx.Response:
+        if self.fail_submissions:
+            return httpx.Response(500, json={"error": "unavailable"})
+        batch_id = f"msgbatch_{next(self._ids)}"
+        self.batches[batch_id] = {"requests": body["requests"], "polls": 0}
+        return httpx.Response(200, json={"id": batch_id, "processing_status": "in_progress"})
+
+    def _anthropic_status(self, batch_id: str) -> httpx.Response:
+        batch = self.batches[batch_id]
+        done = self._tick(batch)
+        return httpx.Response(200, json={
+            "id": batch_id,
+            "processing_status": "ended" if done else "in_progress",
+            "request_counts": {"processing": 0 if done else len(batch["requests"])},
+        })
+
+    def _anthropic_results(self, batch_id: str) -> httpx.Response:
+        lines = []
+        for item in self.batches[batch_id]["requests"]:
+            prompt = item["params"]["messages"][-1]["content"]
+            answer = self._answer(prompt)
+            if answer is None:
+                result = {"type": "errored", "error": {"type": "invalid_request_error"}}
+            else:
+                result = {"type": "succeeded", "message": {
+                    "model": item["params"]["model"],
+                    "content": [{"type": "text", "text": answer}],
+                    "usage": {"input_tokens": len(prompt.split()), "output_tokens": len(answer.split())},
+                }}
+            lines.append(json.dumps({"custom_id": item["custom_id"], "result": result}))
+        return httpx.Response(200, text="\n".join(lines))
+
+    # OpenAI-compatible batches
+
+    def _openai_upload(self, request: httpx.Request) -> httpx.Response:
+        # The multipart body holds the JSONL file between the part headers and the closing boundary
+        body = request.content.decode("utf-8")
+        jsonl = "\n".join(line for line in body.splitlines() if line.startswith("{"))
+        file_id = f"file-{next(self._ids)}"
+        self.files[file_id] = jsonl
+        return httpx.Response(200, json={"id": file_id})
+
+    def _openai_create(self, body: Dict[str, Any]) -> httpx.Response:
+        if self.fail_submissions:
+            return httpx.Response(500, json={"error": "unavailable"})
+        batch_id = f"batch_{next(self._ids)}"
+        requests = [json.loads(line) for line in self.files[body["input_file_id"]].splitlines()]
+        self.batches[batch_id] = {"requests": requests, "polls": 0, "output": None}
+        return httpx.Response(200, json={"id": batch_id, "status": "validating"})
+
+    def _openai_status(self, batch_id: str) -> httpx.Response:
+        batch = self.batches[batch_id]
+        if not self._tick(batch):
+            return httpx.Response(200, json={"id": batch_id, "status": "in_progress"})
+        if batch["output"] is None:
+            lines = []
+            for item in batch["requests"]:
+                prompt = item["body"]["messages"][-1]["content"]
+                answer = self._answer(prompt)
+                if answer is None:
+                    response = {"status_code": 400, "body": {"error": {"message": "bad request"}}}
+                else:
+                    response = {"status_code": 200, "body": {
+                        "model": item["body"]["model"],
+                        "choices": [{"message": {"role": "assistant", "content": answer}}],
+                        "usage": {"prompt_tokens": len(prompt.split()), "completion_tokens": len(answer.split()),
+                                  "total_tokens": len(prompt.split()) + len(answer.split())},
+                    }}
+                lines.append(json.dumps({"custom_id": item["custom_id"], "response": response, "error": None}))
+            batch["output"] = f"file-{next(self._ids)}"
+            self.files[batch["output"]] = "\n".join(lines)
+        return httpx.Response(200, json={"id": batch_id, "status": "completed", "output_file_id": batch["output"]})
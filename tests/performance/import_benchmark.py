@@ -0,0 +1,76 @@
+"""
+Import-Time Benchmark for ResoftAI
+
+Measures cold import time of the entry points (CLI, API, workers) in fresh
+interpreters with ``python -X importtime`` and lists the most expensive
+modules each one pulls in. ``tests/test_startup_time.py`` checks the same
+entry points against a budget.
+Run with: PYTHONPATH=src python tests/performance/import_benchmark.py --top 15
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ENTRY_POINTS = [
+    "resoftai",
+    "resoftai.cli.main",
+    "resoftai.core.agent",
+    "resoftai.llm",
+    "resoftai.db",
+    "resoftai.orchestration",
+]
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def importtime(module: str) -> Tuple[float, Dict[str, Tuple[int, int]]]:
+    """
+    Import ``module`` in a fresh interpreter.
+
+    Returns:
+        Cumulative seconds for ``module``, and {module: (self_us, cumulative_us)}
+        for everything imported on the way
+    """
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env, check=True
+    )
+    modules: Dict[str, Tuple[int, int]] = {}
+    total = 0
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        modules[name] = (int(self_us), int(cumulative_us))
+        if not indent.strip(" ") and len(indent) == 1:
+            # Top-level imports of the -c statement
+            total += int(cumulative_us)
+    return total / 1e6, modules
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("modules", nargs="*", default=ENTRY_POINTS)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="Slowest modules to list per entry point")
+    args = parser.parse_args(argv)
+
+    for module in args.modules:
+        runs = [importtime(module) for _ in range(args.repeats)]
+        seconds = statistics.median(total for total, _ in runs)
+        _, modules = runs[-1]
+        print(f"{module}: {seconds * 1000:.1f} ms ({len(modules)} modules)")
+        slowest = sorted(modules.items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+        for name, (self_us, cumulative_us) in slowest:
+            print(f"    {self_us / 1000:8.1f} ms self {cumulative_us / 1000:8.1f} ms total  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+OT Transform Micro-Benchmark for ResoftAI
+
+Measures how long it takes to transform a lagging client's multi-range edit
+across a history of concurrent multi-range edits, for growing sizes. With the
+linear transform, time per history operation should stay flat as ranges grow
+proportionally.
+Run with: PYTHONPATH=src python tests/performance/ot_benchmark.py --ranges 10 100 1000
+"""
+
+import argparse
+import random
+import statistics
+import time
+from typing import List
+
+from resoftai.utils.ot import OTDocument, TextOperation
+
+
+def random_operation(rng: random.Random, length: int, ranges: int) -> TextOperation:
+    """Build an operation with ``ranges`` edits spread over a text of ``length``."""
+    operation = TextOperation()
+    step = max(length // (ranges + 1), 1)
+    remaining = length
+    for _ in range(ranges):
+        skip = min(rng.randint(0, step), remaining)
+        operation.retain(skip)
+        remaining -= skip
+        operation.insert("x" * rng.randint(1, 3))
+        removed = min(rng.randint(0, 2), remaining)
+        operation.delete(removed)
+        remaining -= removed
+    return operation
+
+
+def run(ranges: int, history_size: int, doc_length: int, repeats: int, seed: int = 0) -> float:
+    """
+    Time transforming one lagging client operation across the history.
+
+    Returns:
+        Median seconds per transform_operation call
+    """
+    rng = random.Random(seed)
+    text = "a" * doc_length
+    doc = OTDocument(text)
+    for _ in range(history_size):
+        doc.apply_operation(random_operation(rng, len(doc.content), ranges))
+    client_op = random_operation(rng, len(text), ranges)
+
+    timings: List[float] = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        doc.transform_operation(client_op, from_version=0)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OT transform micro-benchmark")
+    parser.add_argument("--ranges", type=int, nargs="+", default=[10, 100, 1000],
+                        help="Edit ranges per operation")
+    parser.add_argument("--history", type=int, default=50,
+                        help="Concurrent operations the client is behind by")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'ranges':>8} {'history':>8} {'median ms':>10} {'us/range/op':>12}")
+    for ranges in args.ranges:
+        seconds = run(ranges, args.history, doc_length=ranges * 20, repeats=args.repeats)
+        per_unit = seconds / (ranges * args.history) * 1e6
+        print(f"{ranges:>8} {args.history:>8} {seconds * 1000:>10.2f} {per_unit:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
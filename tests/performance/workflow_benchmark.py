@@ -0,0 +1,609 @@
+"""
+End-to-End Workflow Benchmark for ResoftAI
+
+Runs N concurrent projects with all seven agents backed by ``ReplayProvider``,
+which answers every LLM call with a synthesized response after a simulated
+latency, so the numbers describe the workflow engine rather than a model
+provider. ``--driver`` selects what runs a project:
+
+- ``workflow``: ``ProjectWorkflow`` through every stage, one agent set per project
+- ``orchestrator``: ``WorkflowOrchestrator.execute`` (pooled providers, lazy agents)
+- ``optimized``: ``OptimizedWorkflowOrchestrator.execute``
+- ``executor``: ``ProjectExecutor``, including its project updates in a
+  temporary SQLite database
+
+The orchestrators' own stage methods call an agent API the agents do not
+implement, so for these drivers ``StagedOrchestrator`` runs each stage's
+tasks through ``ProjectWorkflow`` instead; stage sequencing, parallelism,
+agent creation and provider pooling are the orchestrators' own.
+
+Reports throughput, p50/p95/p99 latency per stage, event-loop lag, traced
+memory per project and token accounting accuracy (how close the tokens the
+agents counted are to the tokens the backend served), and writes them as
+JSON. With ``--baseline`` the run is compared against an earlier result and
+the script exits with status 1 on regressions beyond ``REGRESSION_THRESHOLDS``.
+Run with: PYTHONPATH=src python tests/performance/workflow_benchmark.py --projects 20 --baseline reports/base.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from resoftai.agents import (
+    ArchitectAgent,
+    DeveloperAgent,
+    ProjectManagerAgent,
+    QualityExpertAgent,
+    RequirementsAnalystAgent,
+    TestEngineerAgent,
+    UXUIDesignerAgent,
+)
+from resoftai.config.settings import get_settings
+from resoftai.core.agent import AgentRole
+from resoftai.core.message_bus import Message, MessageBus, MessageType
+from resoftai.core.semantic_cache import semantic_cache as shared_semantic_cache
+from resoftai.core.state import ProjectState, TaskStatus, WorkflowStage
+from resoftai.core.workflow import ProjectWorkflow
+from resoftai.db.connection import Base
+from resoftai.llm.base import LLMConfig, ModelProvider
+from resoftai.llm.pool import provider_pool
+from resoftai.llm.providers.replay_provider import register_replay_provider
+from resoftai.models.project import Project
+from resoftai.models.user import User
+from resoftai.orchestration.executor import ProjectExecutor
+from resoftai.orchestration.optimized_workflow import (
+    CacheConfig,
+    CheckpointConfig,
+    OptimizedWorkflowConfig,
+    OptimizedWorkflowOrchestrator,
+)
+from resoftai.orchestration.workflow import WorkflowConfig, WorkflowOrchestrator
+
+REPORTS_DIR = Path(__file__).parent / "reports"
+
+AGENTS = [
+    (AgentRole.PROJECT_MANAGER, ProjectManagerAgent),
+    (AgentRole.REQUIREMENTS_ANALYST, RequirementsAnalystAgent),
+    (AgentRole.ARCHITECT, ArchitectAgent),
+    (AgentRole.UXUI_DESIGNER, UXUIDesignerAgent),
+    (AgentRole.DEVELOPER, DeveloperAgent),
+    (AgentRole.TEST_ENGINEER, TestEngineerAgent),
+    (AgentRole.QUALITY_EXPERT, QualityExpertAgent),
+]
+
+DRIVERS = ("workflow", "orchestrator", "optimized", "executor")
+
+# Owner of every benchmark project; they share semantic cache entries
+OWNER_ID = 1
+
+REQUIREMENTS = [
+    "Build a REST API for a bookstore with JWT authentication, search and pagination",
+    "Create a task tracker web app with teams, due dates and email reminders",
+    "Develop an inventory service with barcode scanning, stock alerts and CSV export",
+    "Build a customer support portal with tickets, SLAs and a knowledge base",
+]
+
+# metric path -> (better direction, relative tolerance, absolute slack)
+# A metric regresses when it is worse than the baseline by more than both.
+REGRESSION_THRESHOLDS: Dict[str, Tuple[str, float, float]] = {
+    "throughput.projects_per_second": ("higher", 0.20, 0.0),
+    "stage_latency_seconds.all.p50": ("lower", 0.25, 0.005),
+    "stage_latency_seconds.all.p95": ("lower", 0.25, 0.010),
+    "stage_latency_seconds.all.p99": ("lower", 0.35, 0.020),
+    "event_loop_lag_ms.p99": ("lower", 0.50, 5.0),
+    "memory_kb_per_project.peak": ("lower", 0.25, 64.0),
+    "token_accounting.accuracy": ("higher", 0.0, 0.001),
+}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Linearly interpolated percentile of ``values`` (0 for no values)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(values: List[float], scale: float = 1.0) -> Dict[str, float]:
+    """p50/p95/p99/max/mean of ``values`` multiplied by ``scale``."""
+    return {
+        "count": len(values),
+        "p50": round(percentile(values, 50) * scale, 6),
+        "p95": round(percentile(values, 95) * scale, 6),
+        "p99": round(percentile(values, 99) * scale, 6),
+        "max": round(max(values, default=0.0) * scale, 6),
+        "mean": round(statistics.fmean(values) * scale, 6) if values else 0.0,
+    }
+
+
+def llm_config(ttft: float, ttft_sigma: float, tokens_per_second: float, seed: int) -> LLMConfig:
+    """Replay configuration answering every call after a simulated latency."""
+    ttft_spec = {"dist": "lognormal", "median": ttft, "sigma": ttft_sigma} if ttft_sigma else ttft
+    return LLMConfig(
+        provider=ModelProvider.REPLAY,
+        api_key="",
+        model_name="benchmark",
+        extra_params={
+            "on_miss": "synthesize",
+            "profile": {"ttft": ttft_spec, "tokens_per_second": tokens_per_second, "seed": seed},
+        },
+    )
+
+
+class StageTimer:
+    """
+    Stage latencies taken from the STAGE_START messages on a project's bus.
+
+    A stage lasts from its STAGE_START until the next one (or the end of the
+    run). Stages an orchestrator runs concurrently are measured as if they
+    ran one after the other.
+    """
+
+    def __init__(self, message_bus: MessageBus):
+        self.marks: List[Tuple[str, float]] = []
+        message_bus.subscribe(f"type:{MessageType.STAGE_START.value}", self._mark)
+
+    def _mark(self, message: Message) -> None:
+        self.marks.append((message.content["stage"], time.perf_counter()))
+
+    def timings(self, end: float) -> List[Tuple[str, float]]:
+        ends = [at for _, at in self.marks[1:]] + [end]
+        return [(stage, finish - start) for (stage, start), finish in zip(self.marks, ends)]
+
+
+class StagedOrchestrator:
+    """
+    Orchestrator mixin running each stage's tasks through ``ProjectWorkflow``.
+
+    The message bus awaits the agents, so a stage's tasks are handled when
+    ``advance_to_stage`` returns; an agent that fails leaves its task
+    unfinished, which fails the stage.
+    """
+
+    async def _run_stages(self, *stages: WorkflowStage) -> None:
+        workflow = getattr(self, "_workflow", None)
+        if workflow is None:
+            workflow = self._workflow = ProjectWorkflow(self.message_bus, self.project_state)
+            self.project_state.requirements["initial_input"] = self.config.requirements
+        for stage in stages:
+            existing = set(self.project_state.tasks)
+            await workflow.advance_to_stage(stage)
+            unfinished = [
+                task.title for task_id, task in self.project_state.tasks.items()
+                if task_id not in existing and task.stage == stage and task.status != TaskStatus.COMPLETED
+            ]
+            if unfinished:
+                raise RuntimeError(f"Stage {stage.value} did not complete: {', '.join(unfinished)}")
+
+    async def _run_requirement_analysis(self):
+        await self._run_stages(WorkflowStage.REQUIREMENTS_GATHERING, WorkflowStage.REQUIREMENTS_ANALYSIS)
+
+    async def _run_architecture_design(self):
+        await self._run_stages(WorkflowStage.ARCHITECTURE_DESIGN)
+
+    async def _run_ui_design(self):
+        await self._run_stages(WorkflowStage.UI_UX_DESIGN)
+
+    async def _run_development(self):
+        await self._run_stages(WorkflowStage.IMPLEMENTATION)
+
+    async def _run_testing(self):
+        await self._run_stages(WorkflowStage.TESTING)
+
+    async def _run_qa_review(self):
+        await self._run_stages(WorkflowStage.QUALITY_ASSURANCE)
+
+
+class BenchmarkOrchestrator(StagedOrchestrator, WorkflowOrchestrator):
+    """``WorkflowOrchestrator`` with stages run through ``ProjectWorkflow``."""
+
+
+class BenchmarkOptimizedOrchestrator(StagedOrchestrator, OptimizedWorkflowOrchestrator):
+    """``OptimizedWorkflowOrchestrator`` with stages run through ``ProjectWorkflow``."""
+
+
+class BenchmarkExecutor(ProjectExecutor):
+    """``ProjectExecutor`` running ``BenchmarkOrchestrator``."""
+    orchestrator_class = BenchmarkOrchestrator
+
+
+class BenchmarkProject:
+    """One project run by the selected driver."""
+
+    def __init__(
+        self,
+        driver: str,
+        index: int,
+        config: LLMConfig,
+        semantic_cache: bool,
+        db: Optional[AsyncSession] = None
+    ):
+        self.driver = driver
+        self.index = index
+        self.config = config
+        self.requirements = REQUIREMENTS[index % len(REQUIREMENTS)]
+        self.db = db
+        self.orchestrator = None
+        self._agents: list = []
+
+        if driver == "workflow":
+            message_bus = MessageBus()
+            project_state = ProjectState(
+                name=f"Benchmark {index}", description=self.requirements, metadata={"owner": f"user:{OWNER_ID}"}
+            )
+            self.workflow = ProjectWorkflow(message_bus, project_state)
+            self._agents = [agent_class(role, message_bus, project_state, config) for role, agent_class in AGENTS]
+            for agent in self._agents:
+                agent.semantic_cache = shared_semantic_cache if semantic_cache and agent.semantic_cache_enabled else None
+        elif driver == "orchestrator":
+            self.orchestrator = BenchmarkOrchestrator(WorkflowConfig(
+                project_id=index, requirements=self.requirements, llm_config=config,
+                output_directory=tempfile.gettempdir(), owner_id=OWNER_ID
+            ))
+        elif driver == "optimized":
+            self.orchestrator = BenchmarkOptimizedOrchestrator(OptimizedWorkflowConfig(
+                project_id=index, requirements=self.requirements, llm_config=config,
+                output_directory=tempfile.gettempdir(), owner_id=OWNER_ID,
+                cache_config=CacheConfig(enabled=False), checkpoint_config=CheckpointConfig(enabled=False)
+            ))
+
+    @property
+    def agents(self) -> list:
+        """Agents that took part in the run."""
+        if self.orchestrator is not None:
+            return list(self.orchestrator.agents.instantiated().values())
+        return self._agents
+
+    async def run(self) -> List[Tuple[str, float]]:
+        """Run the project through every stage and return (stage, seconds) pairs."""
+        if self.driver == "workflow":
+            return await self._run_workflow()
+        if self.driver == "executor":
+            return await self._run_executor()
+
+        timer = StageTimer(self.orchestrator.message_bus)
+        if not await self.orchestrator.execute():
+            raise RuntimeError(f"Project {self.index} failed: {self.orchestrator.errors}")
+        return timer.timings(time.perf_counter())
+
+    async def _run_workflow(self) -> List[Tuple[str, float]]:
+        """
+        Advance the workflow through the whole sequence.
+
+        Stage work happens when the workflow advances into a stage, so the time
+        of ``start`` is charged to the first stage and the time of each
+        ``complete_stage`` to the stage it advances to.
+        """
+        workflow = self.workflow
+        sequence = workflow.WORKFLOW_SEQUENCE
+        timings = []
+        start = time.perf_counter()
+        await workflow.start(workflow.project_state.description)
+        timings.append((sequence[0].value, time.perf_counter() - start))
+        for position, stage in enumerate(sequence[:-1]):
+            start = time.perf_counter()
+            await workflow.complete_stage(stage)
+            timings.append((sequence[position + 1].value, time.perf_counter() - start))
+        return timings
+
+    async def _run_executor(self) -> List[Tuple[str, float]]:
+        """Run the project through ``ProjectExecutor`` and its database updates."""
+        project = Project(name=f"Benchmark {self.index}", requirements=self.requirements, user_id=OWNER_ID)
+        self.db.add(project)
+        await self.db.commit()
+
+        # Only the attributes the executor reads from a stored configuration
+        stored_config = SimpleNamespace(
+            provider=self.config.provider.value, api_key=self.config.api_key, model=self.config.model_name,
+            api_base=None, max_tokens=self.config.max_tokens, temperature=self.config.temperature,
+            top_p=self.config.top_p
+        )
+        executor = BenchmarkExecutor(project, stored_config, self.db)
+        # A stored configuration has no replay profile; keep the simulated latency
+        executor.workflow_config.llm_config = self.config
+        await executor.start()
+        # The execution task has not run yet, so no stage is missed
+        self.orchestrator = executor.orchestrator
+        timer = StageTimer(self.orchestrator.message_bus)
+        await executor.execution_task
+        end = time.perf_counter()
+        if self.orchestrator.current_stage.value != "completed":
+            raise RuntimeError(f"Project {self.index} failed: {self.orchestrator.errors}")
+        return timer.timings(end)
+
+
+async def executor_database(directory: str) -> AsyncEngine:
+    """SQLite database holding the benchmark user, for the executor's project updates."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{directory}/benchmark.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[User.__table__, Project.__table__])
+        await conn.execute(User.__table__.insert(), [
+            {"id": OWNER_ID, "username": "benchmark", "email": "benchmark@example.com", "password_hash": "-"}
+        ])
+    return engine
+
+
+class LoopLagMonitor:
+    """Samples how late the event loop wakes a task that sleeps ``interval``."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(loop.time() - start - self.interval, 0.0))
+
+    async def __aenter__(self) -> "LoopLagMonitor":
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+
+async def run_projects(
+    projects: int,
+    config: LLMConfig,
+    concurrency: Optional[int],
+    semantic_cache: bool,
+    driver: str = "workflow"
+) -> Dict[str, Any]:
+    """Run ``projects`` projects with at most ``concurrency`` at a time."""
+    limit = asyncio.Semaphore(concurrency or projects)
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine, sessions = None, []
+        if driver == "executor":
+            engine = await executor_database(directory)
+            session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+            sessions = [session_factory() for _ in range(projects)]
+        built = [
+            BenchmarkProject(driver, index, config, semantic_cache, sessions[index] if sessions else None)
+            for index in range(projects)
+        ]
+
+        async def bounded(project):
+            async with limit:
+                return await project.run()
+
+        try:
+            async with LoopLagMonitor() as monitor:
+                start = time.perf_counter()
+                timings = await asyncio.gather(*(bounded(project) for project in built))
+                wall = time.perf_counter() - start
+        finally:
+            for session in sessions:
+                await session.close()
+            if engine is not None:
+                await engine.dispose()
+            # Orchestrators share pooled providers; start every run with fresh ones
+            await provider_pool.close()
+
+    return {"built": built, "timings": timings, "wall": wall, "lag": monitor.samples}
+
+
+def measure_memory(projects: int, config: LLMConfig, semantic_cache: bool, driver: str) -> Dict[str, float]:
+    """
+    Traced memory per project, measured in a separate run.
+
+    tracemalloc slows allocation down, so it is kept out of the timed run.
+    """
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        result = asyncio.run(run_projects(projects, config, None, semantic_cache, driver))
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return {
+        "peak": round((peak - before) / 1024 / projects, 1),
+        "retained": round((current - before) / 1024 / projects, 1),
+    }
+
+
+def run_benchmark(
+    projects: int = 10,
+    concurrency: Optional[int] = None,
+    ttft: float = 0.05,
+    ttft_sigma: float = 0.3,
+    tokens_per_second: float = 2000.0,
+    seed: int = 0,
+    memory: bool = True,
+    semantic_cache: bool = False,
+    driver: str = "workflow"
+) -> Dict[str, Any]:
+    """
+    Run the benchmark.
+
+    Args:
+        projects: Number of projects
+        concurrency: Projects running at once (default: all)
+        ttft: Median simulated time to first token in seconds
+        ttft_sigma: Lognormal spread of the time to first token (0 for fixed)
+        tokens_per_second: Simulated generation speed
+        seed: Seed for the simulated latencies
+        memory: Whether to measure memory in a second run
+        semantic_cache: Whether agents may reuse outputs across projects
+        driver: What runs each project, one of ``DRIVERS``
+
+    Returns:
+        JSON-serializable result
+    """
+    register_replay_provider()
+    config = llm_config(ttft, ttft_sigma, tokens_per_second, seed)
+    # Agents created by the orchestrators pick the semantic cache up from the settings
+    get_settings().semantic_cache_enabled = semantic_cache
+
+    run = asyncio.run(run_projects(projects, config, concurrency, semantic_cache, driver))
+
+    stage_latencies: Dict[str, List[float]] = {}
+    for project_timings in run["timings"]:
+        for stage, seconds in project_timings:
+            stage_latencies.setdefault(stage, []).append(seconds)
+    all_latencies = [seconds for values in stage_latencies.values() for seconds in values]
+
+    agents = [agent for project in run["built"] for agent in project.agents]
+    # Pooled providers serve many agents; count each provider once
+    providers = list({id(agent.llm): agent.llm for agent in agents}.values())
+    counted_tokens = sum(agent.total_tokens for agent in agents)
+    served_tokens = sum(provider.replayer.stats["tokens_served"] for provider in providers)
+    counted_requests = sum(agent.requests_count for agent in agents)
+    served_requests = sum(
+        provider.replayer.stats["replayed"] + provider.replayer.stats["synthesized"] for provider in providers
+    )
+
+    return {
+        "benchmark": "workflow",
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "config": {
+            "driver": driver,
+            "projects": projects,
+            "concurrency": concurrency or projects,
+            "ttft": ttft,
+            "ttft_sigma": ttft_sigma,
+            "tokens_per_second": tokens_per_second,
+            "seed": seed,
+            "semantic_cache": semantic_cache,
+        },
+        "wall_seconds": round(run["wall"], 4),
+        "throughput": {
+            "projects_per_second": round(projects / run["wall"], 4),
+            "llm_requests_per_second": round(served_requests / run["wall"], 2),
+        },
+        "stage_latency_seconds": {
+            "all": summarize(all_latencies),
+            **{stage: summarize(values) for stage, values in stage_latencies.items()},
+        },
+        "event_loop_lag_ms": summarize(run["lag"], scale=1000),
+        "memory_kb_per_project": measure_memory(projects, config, semantic_cache, driver) if memory else None,
+        "token_accounting": {
+            "counted_tokens": counted_tokens,
+            "served_tokens": served_tokens,
+            "counted_requests": counted_requests,
+            "served_requests": served_requests,
+            # Over- and under-counting both lower the accuracy
+            "accuracy": round(1 - abs(counted_tokens - served_tokens) / served_tokens, 4) if served_tokens else 1.0,
+        },
+    }
+
+
+def _lookup(result: Dict[str, Any], path: str) -> Optional[float]:
+    value: Any = result
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def compare(
+    result: Dict[str, Any],
+    baseline: Dict[str, Any],
+    thresholds: Dict[str, Tuple[str, float, float]] = REGRESSION_THRESHOLDS
+) -> List[str]:
+    """
+    Regressions of ``result`` against ``baseline``.
+
+    Returns:
+        One message per regressed metric; a single message if the runs used
+        different configurations and cannot be compared
+    """
+    if result["config"] != baseline["config"]:
+        return [f"Configurations differ, not comparable: {result['config']} vs {baseline['config']}"]
+
+    regressions = []
+    for path, (direction, tolerance, slack) in thresholds.items():
+        current, previous = _lookup(result, path), _lookup(baseline, path)
+        if current is None or previous is None:
+            continue
+        worse_by = previous - current if direction == "higher" else current - previous
+        if worse_by > abs(previous) * tolerance and worse_by > slack:
+            regressions.append(f"{path}: {previous} -> {current} (allowed {tolerance:.0%} worse)")
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--driver", choices=DRIVERS, default="workflow", help="What runs each project")
+    parser.add_argument("--projects", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, help="Projects running at once (default: all)")
+    parser.add_argument("--ttft", type=float, default=0.05, help="Median time to first token in seconds")
+    parser.add_argument("--ttft-sigma", type=float, default=0.3, help="Lognormal spread (0 for fixed)")
+    parser.add_argument("--tokens-per-second", type=float, default=2000.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--semantic-cache", action="store_true", help="Let agents reuse outputs across projects")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the memory measurement run")
+    parser.add_argument("--output", type=Path, help="Result file (default: reports/workflow-<time>.json)")
+    parser.add_argument("--baseline", type=Path, help="Earlier result to check for regressions")
+    args = parser.parse_args(argv)
+
+    # Agents log every call; keep the output to the report
+    logging.disable(logging.WARNING)
+
+    result = run_benchmark(
+        projects=args.projects,
+        concurrency=args.concurrency,
+        ttft=args.ttft,
+        ttft_sigma=args.ttft_sigma,
+        tokens_per_second=args.tokens_per_second,
+        seed=args.seed,
+        memory=not args.no_memory,
+        semantic_cache=args.semantic_cache,
+        driver=args.driver,
+    )
+
+    output = args.output or REPORTS_DIR / f"workflow-{datetime.utcnow():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2))
+
+    latency = result["stage_latency_seconds"]["all"]
+    print(f"{result['config']['projects']} projects ({result['config']['driver']}) in {result['wall_seconds']:.2f}s "
+          f"({result['throughput']['projects_per_second']:.2f} projects/s, "
+          f"{result['throughput']['llm_requests_per_second']:.1f} LLM requests/s)")
+    print(f"stage latency p50/p95/p99: {latency['p50'] * 1000:.1f} / {latency['p95'] * 1000:.1f} / "
+          f"{latency['p99'] * 1000:.1f} ms")
+    print(f"event loop lag p99: {result['event_loop_lag_ms']['p99']:.2f} ms")
+    if result["memory_kb_per_project"]:
+        print(f"memory per project: {result['memory_kb_per_project']['peak']:.0f} KB peak, "
+              f"{result['memory_kb_per_project']['retained']:.0f} KB retained")
+    print(f"token accounting accuracy: {result['token_accounting']['accuracy']:.2%}")
+    print(f"result written to {output}")
+
+    if args.baseline:
+        regressions = compare(result, json.loads(args.baseline.read_text()))
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
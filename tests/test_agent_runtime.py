@@ -0,0 +1,168 @@
+"""Tests for the shared provider pool and the lazy agent runtime."""
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from resoftai.agents.developer import DeveloperAgent
+from resoftai.core.agent import AgentRole
+from resoftai.core.agent_runtime import AgentRuntime
+from resoftai.core.message_bus import Message, MessageBus, MessageType
+from resoftai.core.state import ProjectState
+from resoftai.llm.base import LLMConfig, ModelProvider
+from resoftai.llm.pool import ProviderPool
+from resoftai.llm.providers.deepseek_provider import DeepSeekProvider
+from resoftai.orchestration.workflow import WorkflowConfig, WorkflowOrchestrator
+
+
+def llm_config(**overrides):
+    """DeepSeek configuration for tests."""
+    return LLMConfig(
+        provider=ModelProvider.DEEPSEEK,
+        api_key="test-key",
+        model_name=overrides.pop("model_name", "deepseek-chat"),
+        **overrides
+    )
+
+
+@pytest.fixture
+def create_provider():
+    """Patch provider creation to return mocks carrying their config."""
+    def create(config):
+        provider = MagicMock()
+        provider.config = config
+        return provider
+
+    with patch("resoftai.llm.factory.LLMFactory.create", side_effect=create) as mock_create:
+        yield mock_create
+
+
+class TestProviderPool:
+    """Test providers are shared per configuration."""
+
+    def test_equal_configs_share_a_provider(self, create_provider):
+        """Test the factory only runs for configurations not seen before."""
+        pool = ProviderPool()
+
+        first = pool.get(llm_config())
+        second = pool.get(llm_config())
+        other = pool.get(llm_config(model_name="deepseek-coder"))
+
+        assert first is second
+        assert other is not first
+        assert create_provider.call_count == 2
+        stats = pool.get_stats()
+        assert (stats["hits"], stats["misses"], stats["providers"]) == (1, 2, 2)
+
+    def test_least_recently_used_provider_is_evicted(self, create_provider):
+        """Test the pool stays within its size limit."""
+        pool = ProviderPool(max_size=2)
+        pool.get(llm_config(model_name="a"))
+        pool.get(llm_config(model_name="b"))
+        pool.get(llm_config(model_name="a"))
+        pool.get(llm_config(model_name="c"))
+
+        assert len(pool) == 2
+        assert pool.stats["evictions"] == 1
+        pool.get(llm_config(model_name="a"))
+        assert pool.stats["misses"] == 3
+
+    async def test_evicted_provider_is_closed_after_its_requests(self):
+        """Test eviction closes the provider's client once in-flight requests finish."""
+        pool = ProviderPool(max_size=1)
+        evicted = pool.get(llm_config(model_name="a"))
+
+        async with evicted.http_client() as client:
+            pool.get(llm_config(model_name="b"))
+            await asyncio.sleep(0.1)
+            assert not client.is_closed
+
+        await asyncio.gather(*pool._closing)
+        assert client.is_closed
+        assert pool.stats["closed"] == 1
+        await pool.close()
+
+    def test_client_of_a_closed_loop_is_recorded(self):
+        """Test a client left behind by a finished event loop is counted, not leaked silently."""
+        provider = DeepSeekProvider(llm_config())
+
+        async def use_client():
+            async with provider.http_client() as client:
+                return client
+
+        first = asyncio.run(use_client())
+        second = asyncio.run(use_client())
+
+        assert second is not first
+        assert provider.abandoned_http_clients == 1
+        asyncio.run(provider.aclose())
+        assert provider.abandoned_http_clients == 2
+
+    async def test_provider_reuses_its_http_client(self):
+        """Test requests of one provider share a client until it is closed."""
+        provider = DeepSeekProvider(llm_config())
+
+        async with provider.http_client() as first:
+            pass
+        async with provider.http_client() as second:
+            pass
+        await provider.aclose()
+        async with provider.http_client() as third:
+            pass
+
+        assert first is second
+        assert first.is_closed
+        assert third is not first
+        await provider.aclose()
+
+
+class TestAgentRuntime:
+    """Test agents are created on demand and bound to their project."""
+
+    async def test_agents_are_created_when_work_arrives(self, create_provider):
+        """Test only the agent receiving a task is created, and it handles the task once."""
+        bus = MessageBus()
+        agents = AgentRuntime(bus, ProjectState(name="p"), llm_config(), pool=ProviderPool())
+
+        assert len(agents) == 7 and agents.instantiated() == {}
+        await bus.publish(Message(
+            type=MessageType.STAGE_START, sender="workflow", content={"stage": "implementation"}
+        ))
+        assert agents.instantiated() == {}
+
+        with patch.object(DeveloperAgent, "handle_task_assignment", new_callable=AsyncMock) as handle:
+            await bus.publish(Message(
+                type=MessageType.TASK_ASSIGNED, sender="workflow",
+                receiver=AgentRole.DEVELOPER.value, content={"task": {}}
+            ))
+
+        handle.assert_awaited_once()
+        assert list(agents.instantiated()) == [AgentRole.DEVELOPER]
+        stats = agents.get_stats()
+        assert stats["dispatched"] == 1
+        assert AgentRole.ARCHITECT.value in stats["skipped_roles"]
+
+    def test_projects_share_providers_but_not_state(self, create_provider):
+        """Test agents of two projects use one provider and their own project state."""
+        pool = ProviderPool()
+        first = AgentRuntime(MessageBus(), ProjectState(name="first"), llm_config(), pool=pool)
+        second = AgentRuntime(MessageBus(), ProjectState(name="second"), llm_config(), pool=pool)
+
+        architects = [first[AgentRole.ARCHITECT], second[AgentRole.ARCHITECT]]
+
+        assert architects[0].llm is architects[1].llm
+        assert [agent.project_state.name for agent in architects] == ["first", "second"]
+        assert create_provider.call_count == 1
+        assert pool.get_stats()["hits"] == 1
+
+    def test_orchestrator_defers_agent_creation(self, create_provider):
+        """Test constructing an orchestrator creates no agent and no provider."""
+        orchestrator = WorkflowOrchestrator(WorkflowConfig(
+            project_id=1, requirements="Build a TODO app", llm_config=llm_config(), output_directory="/tmp/todo"
+        ))
+
+        assert create_provider.call_count == 0
+        assert AgentRole.UXUI_DESIGNER in orchestrator.agents
+        assert orchestrator.get_progress()["total_tokens"] == 0
+        assert orchestrator.agents[AgentRole.QUALITY_EXPERT].role == AgentRole.QUALITY_EXPERT
+        assert orchestrator.agents.get_stats()["instantiated"] == 1
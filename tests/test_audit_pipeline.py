@@ -0,0 +1,186 @@
+"""Tests for the write-behind audit pipeline."""
+import asyncio
+import os
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+
+from resoftai.models.enterprise import AuditAction, AuditLog
+from resoftai.services.audit_pipeline import AuditPipeline
+
+
+@pytest.fixture
+async def audit_db(make_session_factory):
+    """File-backed audit_logs table."""
+    return await make_session_factory(AuditLog.__table__, shared=True)
+
+
+@pytest.fixture
+def pipeline(audit_db, tmp_path):
+    """Pipeline writing to the test database, spilling under tmp_path."""
+    return AuditPipeline(batch_size=10, write_timeout=0.5, spill_path=tmp_path / "spill.jsonl", session_factory=audit_db)
+
+
+async def stored(factory):
+    """Number of stored audit rows."""
+    async with factory() as session:
+        return await session.scalar(select(func.count(AuditLog.__table__.c.id)))
+
+
+def record(pipeline, count, **fields):
+    """Queue ``count`` team creation events."""
+    for index in range(count):
+        pipeline.record(action="CREATE", resource_type="team", resource_id=index, **fields)
+
+
+def queued_events(pipeline, count):
+    """Build events through ``record`` without leaving them queued."""
+    record(pipeline, count)
+    events = list(pipeline._queue)
+    pipeline._queue.clear()
+    return events
+
+
+async def failing_write(batch):
+    """Stand-in for a database that does not answer in time."""
+    await asyncio.sleep(10)
+
+
+@pytest.mark.asyncio
+class TestAuditPipeline:
+    """Test batching, spilling and replay."""
+
+    async def test_batched_write(self, pipeline, audit_db):
+        """Test queued events are written in batches with their fields intact."""
+        record(pipeline, 25, user_id=3, changes={"name": {"old": "a", "new": "b"}})
+
+        assert await stored(audit_db) == 0
+        assert await pipeline.flush() == 25
+
+        async with audit_db() as session:
+            log = (await session.execute(select(AuditLog.__table__).limit(1))).one()
+        assert await stored(audit_db) == 25
+        assert log.action == AuditAction.CREATE
+        assert log.changes == {"name": {"old": "a", "new": "b"}}
+        stats = pipeline.get_stats()
+        assert stats["written"] == 25 and stats["queued"] == 0
+        assert stats["flush_lag_seconds"] >= 0
+
+    def test_action_names_and_values(self, pipeline):
+        """Test actions are accepted as members, names or values."""
+        pipeline.record(action="UPDATE", resource_type="team")
+        pipeline.record(action="permission_change", resource_type="team")
+        pipeline.record(action=AuditAction.DELETE, resource_type="team")
+
+        assert [event["action"] for event in pipeline._queue] == [
+            AuditAction.UPDATE, AuditAction.PERMISSION_CHANGE, AuditAction.DELETE
+        ]
+
+    async def test_slow_database_spills_then_replays(self, pipeline, audit_db, monkeypatch):
+        """Test a timed-out write goes to the spill file and is replayed later."""
+        pipeline.write_timeout = 0.05
+        record(pipeline, 15)
+        with monkeypatch.context() as patch:
+            patch.setattr(pipeline, "_write", failing_write)
+            assert await pipeline.flush() == 0
+
+        assert pipeline.stats["spilled"] == 15
+        assert pipeline._spill_file.exists()
+        assert pipeline.get_stats()["queued"] == 0
+
+        record(pipeline, 2)
+        assert await pipeline.flush() == 17
+        assert await stored(audit_db) == 17
+        assert not pipeline._spill_file.exists()
+        assert not pipeline._replay_path.exists()
+        assert pipeline.stats["replayed"] == 15
+
+    async def test_full_queue_spills(self, audit_db, tmp_path):
+        """Test events beyond the queue bound are kept on disk, not dropped."""
+        pipeline = AuditPipeline(max_queue=2, spill_path=tmp_path / "spill.jsonl", session_factory=audit_db)
+        record(pipeline, 5)
+
+        assert pipeline.get_stats()["queued"] == 2
+        assert await pipeline.flush() == 5
+        assert pipeline.stats["spilled"] == 3
+        assert await stored(audit_db) == 5
+
+    async def test_failed_replay_is_retried(self, pipeline, audit_db, monkeypatch):
+        """Test a replay that fails keeps its events for the next flush."""
+        pipeline._spill(queued_events(pipeline, 3))
+        calls = []
+
+        async def flaky_write(batch):
+            calls.append(len(batch))
+            raise ConnectionError("database went away")
+
+        with monkeypatch.context() as patch:
+            patch.setattr(pipeline, "_write", flaky_write)
+            assert await pipeline.flush() == 0
+
+        assert calls == [3]
+        assert await pipeline.flush() == 3
+        assert await stored(audit_db) == 3
+
+    async def test_size_trigger_wakes_flush_task(self, pipeline, audit_db):
+        """Test reaching the batch size flushes before the interval elapses."""
+        pipeline._flusher.interval = 60
+        pipeline.start()
+        try:
+            record(pipeline, 10)
+            for _ in range(50):
+                if pipeline.stats["written"] == 10:
+                    break
+                await asyncio.sleep(0.02)
+        finally:
+            await pipeline.stop()
+
+        assert await stored(audit_db) == 10
+
+    async def test_rejected_event_is_quarantined(self, pipeline, audit_db, monkeypatch):
+        """Test an event the database refuses does not hold back the rest of its batch."""
+        write = pipeline._write
+
+        async def strict_write(batch):
+            if any(event["resource_id"] == 2 for event in batch):
+                raise IntegrityError("INSERT", {}, Exception("foreign key violation"))
+            await write(batch)
+
+        monkeypatch.setattr(pipeline, "_write", strict_write)
+        record(pipeline, 5)
+
+        assert await pipeline.flush() == 4
+        assert await stored(audit_db) == 4
+        assert pipeline.stats["rejected"] == 1
+        assert pipeline._rejected_path.read_text().count("\n") == 1
+        assert not pipeline._spill_file.exists()
+
+    async def test_rejected_event_does_not_block_replay(self, pipeline, audit_db, monkeypatch):
+        """Test a spilled batch containing a refused event is replayed without it."""
+        pipeline._spill(queued_events(pipeline, 3))
+        write = pipeline._write
+
+        async def strict_write(batch):
+            if any(event["resource_id"] == 0 for event in batch):
+                raise IntegrityError("INSERT", {}, Exception("foreign key violation"))
+            await write(batch)
+
+        monkeypatch.setattr(pipeline, "_write", strict_write)
+
+        assert await pipeline.flush() == 2
+        assert not pipeline._replay_path.exists()
+        assert await pipeline.flush() == 0
+        assert pipeline.stats["rejected"] == 1
+
+    async def test_spill_files_of_stopped_processes_are_adopted(self, pipeline, audit_db, tmp_path):
+        """Test events spilled by a process that is gone are replayed by another one."""
+        events = queued_events(pipeline, 2)
+        orphan = tmp_path / "spill.jsonl.999999999"
+        orphan.write_text("".join(pipeline._dump(event) + "\n" for event in events))
+        live = tmp_path / f"spill.jsonl.{os.getppid()}"
+        live.write_text(pipeline._dump(events[0]) + "\n")
+
+        assert await pipeline.flush() == 2
+        assert await stored(audit_db) == 2
+        assert not orphan.exists()
+        assert live.exists()
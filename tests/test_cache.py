@@ -0,0 +1,302 @@
+"""Tests for the two-tier cache."""
+import asyncio
+import time
+import pytest
+
+from resoftai.utils import cache
+from resoftai.utils.cache import CacheManager, LocalCache, _MISSING, _dumps
+
+
+class TestLocalCache:
+    """Test the in-process L1."""
+
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted first."""
+        local = LocalCache(maxsize=2)
+        local.set("a", 1, ttl=60)
+        local.set("b", 2, ttl=60)
+        local.get("a")
+        local.set("c", 3, ttl=60)
+
+        assert local.get("b") is _MISSING
+        assert local.get("a") == 1
+        assert len(local) == 2
+
+    def test_ttl_and_tags(self):
+        """Test expired entries are dropped and tags evict their entries."""
+        local = LocalCache()
+        local.set("old", 1, ttl=0.001)
+        local.set("x", 1, ttl=60, tags=["project:1"])
+        local.set("y", 2, ttl=60, tags=["project:1", "project:2"])
+        time.sleep(0.002)
+
+        assert local.get("old") is _MISSING
+
+        local.invalidate_tag("project:1")
+        assert local.get("x") is _MISSING
+        assert local.get("y") is _MISSING
+        assert local._tags == {}
+
+
+@pytest.mark.asyncio
+class TestCacheManagerFetch:
+    """Test the tiered read path."""
+
+    async def test_l1_serves_repeat_reads(self, fake_redis):
+        """Test a loaded value is served from L1 without Redis round trips."""
+        manager = CacheManager()
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            return {"id": 1}
+
+        for _ in range(5):
+            assert await manager.fetch("file:1", loader, ttl=60) == {"id": 1}
+
+        assert len(calls) == 1
+        assert fake_redis.gets == 1
+        assert manager.stats["l1_hits"] == 4
+
+    async def test_l2_hit_fills_l1(self, fake_redis):
+        """Test another worker's Redis entry is reused and kept locally."""
+        writer, reader = CacheManager(), CacheManager()
+
+        async def loader():
+            return [1, 2, 3]
+
+        await writer.fetch("k", loader, ttl=60)
+        assert await reader.fetch("k", lambda: pytest.fail("should not load"), ttl=60) == [1, 2, 3]
+        assert reader.stats["l2_hits"] == 1
+        assert reader.local.get("k") is not _MISSING
+
+    async def test_concurrent_misses_load_once(self, fake_redis):
+        """Test a stampede on one key results in a single load."""
+        manager = CacheManager()
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "value"
+
+        results = await asyncio.gather(*[manager.fetch("hot", loader, ttl=60) for _ in range(50)])
+
+        assert results == ["value"] * 50
+        assert len(calls) == 1
+        assert manager.stats["coalesced"] == 49
+
+    async def test_l1_hits_share_the_cached_value(self, fake_redis):
+        """Test L1 hits return the cached object itself unless a copy is asked for."""
+        manager = CacheManager()
+
+        async def loader():
+            return {"id": 1}
+
+        first = await manager.fetch("file:1", loader, ttl=60)
+
+        assert await manager.fetch("file:1", loader, ttl=60) is first
+        assert await manager.fetch("file:1", loader, ttl=60, copy=True) is not first
+
+    async def test_copy_gives_callers_independent_values(self, fake_redis):
+        """Test mutating a copied value changes neither L1 nor other callers' results."""
+        manager = CacheManager()
+
+        async def loader():
+            await asyncio.sleep(0.01)
+            return {"id": 1, "tags": ["a"]}
+
+        first, second = await asyncio.gather(
+            manager.fetch("file:1", loader, ttl=60, copy=True),
+            manager.fetch("file:1", loader, ttl=60, copy=True)
+        )
+        first["tags"].append("b")
+
+        assert second == {"id": 1, "tags": ["a"]}
+        cached = await manager.fetch("file:1", loader, ttl=60, copy=True)
+        assert cached == {"id": 1, "tags": ["a"]}
+        cached["id"] = 2
+        assert (await manager.fetch("file:1", loader, ttl=60, copy=True))["id"] == 1
+
+    async def test_cancelled_waiter_leaves_leader_running(self, fake_redis):
+        """Test cancelling a coalesced caller raises for it alone."""
+        manager = CacheManager()
+        release = asyncio.Event()
+
+        async def loader():
+            await release.wait()
+            return "value"
+
+        leader = asyncio.create_task(manager.fetch("k", loader, ttl=60))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(manager.fetch("k", loader, ttl=60))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await leader == "value"
+        assert waiter.cancelled()
+
+    async def test_waiter_loads_itself_when_leader_is_cancelled(self, fake_redis):
+        """Test a coalesced caller is not cancelled along with the leader."""
+        manager = CacheManager()
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "value"
+
+        leader = asyncio.create_task(manager.fetch("k", loader, ttl=60))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(manager.fetch("k", loader, ttl=60))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        assert await waiter == "value"
+        assert leader.cancelled()
+        assert len(calls) == 2
+
+    async def test_single_flight_shares_errors(self, fake_redis):
+        """Test waiters receive the loader's exception and nothing is cached."""
+        manager = CacheManager()
+
+        async def loader():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(
+            *[manager.fetch("bad", loader, ttl=60) for _ in range(3)], return_exceptions=True
+        )
+
+        assert all(isinstance(result, ValueError) for result in results)
+        assert "resoftai:bad" not in fake_redis.store
+
+    async def test_negative_caching(self, fake_redis):
+        """Test None results are cached only when negative_ttl is set."""
+        manager = CacheManager()
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            return None
+
+        await manager.fetch("missing", loader, ttl=60)
+        await manager.fetch("missing", loader, ttl=60)
+        assert len(calls) == 2
+
+        await manager.fetch("absent", loader, ttl=60, negative_ttl=30)
+        await manager.fetch("absent", loader, ttl=60, negative_ttl=30)
+        assert len(calls) == 3
+
+    async def test_early_refresh(self, fake_redis):
+        """Test entries close to expiry are recomputed by a caller before expiring."""
+        manager = CacheManager()
+        manager.local.set("slow", ("old", 10.0, time.time() + 1), ttl=60)
+
+        async def loader():
+            return "new"
+
+        assert await manager.fetch("slow", loader, ttl=60, beta=0) == "old"
+        assert await manager.fetch("slow", loader, ttl=60, beta=100) == "new"
+        assert manager.stats["early_refreshes"] == 1
+
+    async def test_tag_invalidation(self, fake_redis):
+        """Test tags delete their keys in Redis and L1 and are published."""
+        manager = CacheManager()
+
+        async def loader():
+            return {"project_id": 7}
+
+        await manager.fetch("file:1", loader, ttl=60, tags=lambda file: [f"project:{file['project_id']}"])
+        await manager.fetch("file:2", loader, ttl=60, tags=["project:7"])
+        assert fake_redis.store["resoftai:tag:project:7"] == {"resoftai:file:1", "resoftai:file:2"}
+
+        deleted = await manager.invalidate_tags("project:7")
+
+        assert deleted == 3
+        assert fake_redis.store == {}
+        assert manager.local.get("file:1") is _MISSING
+        assert fake_redis.published[-1][0] == "resoftai:invalidate"
+
+    async def test_remote_invalidation_evicts_l1(self, fake_redis):
+        """Test invalidations from other workers evict L1 and own ones are ignored."""
+        manager = CacheManager()
+        manager.local.set("file:1", ("v", 0.0, time.time() + 60), ttl=60)
+        manager.local.set("file:2", ("v", 0.0, time.time() + 60), ttl=60)
+
+        manager.handle_invalidation(_dumps({"origin": manager.instance_id, "keys": ["file:1"], "tags": []}))
+        assert manager.local.get("file:1") is not _MISSING
+
+        manager.handle_invalidation(_dumps({"origin": "other", "keys": ["file:1", "file:2"], "tags": []}))
+        assert manager.local.get("file:1") is _MISSING
+        assert manager.local.get("file:2") is _MISSING
+
+
+@pytest.mark.asyncio
+class TestCachedDecorator:
+    """Test the decorator on top of the tiered cache."""
+
+    async def test_key_matches_invalidation(self, fake_redis, monkeypatch):
+        """Test decorated keys are the ones deleted by write paths."""
+        manager = CacheManager()
+        monkeypatch.setattr(cache, "cache_manager", manager)
+        calls = []
+
+        @cache.cached(key_func=lambda item_id: f"item:{item_id}", ttl=60)
+        async def get_item(item_id):
+            calls.append(item_id)
+            return {"id": item_id, "version": len(calls)}
+
+        assert (await get_item(1))["version"] == 1
+        assert (await get_item(1))["version"] == 1
+        assert "resoftai:item:1" in fake_redis.store
+
+        await manager.delete("item:1")
+        assert (await get_item(1))["version"] == 2
+
+    async def test_without_redis_calls_through(self, monkeypatch):
+        """Test the function runs every time when Redis is unavailable."""
+        monkeypatch.setattr(cache, "redis_client", None)
+        monkeypatch.setattr(cache, "cache_manager", CacheManager())
+        calls = []
+
+        @cache.cached(key_func=lambda item_id: f"item:{item_id}", ttl=60)
+        async def get_item(item_id):
+            calls.append(item_id)
+            return item_id
+
+        await get_item(1)
+        await get_item(1)
+
+        assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+class TestFileInvalidation:
+    """Test file writes invalidate the cache after they are committed."""
+
+    async def test_update_invalidates_after_commit(self, monkeypatch):
+        """Test a read racing the write cannot cache the pre-commit row again."""
+        from unittest.mock import AsyncMock, MagicMock
+        from resoftai.crud import file as file_crud
+
+        events = []
+        row = MagicMock(id=1, current_version=1)
+        db = MagicMock()
+        db.execute = AsyncMock(return_value=MagicMock(scalar_one_or_none=lambda: row))
+        db.commit = AsyncMock(side_effect=lambda: events.append("commit"))
+        db.refresh = AsyncMock()
+        db.delete = AsyncMock()
+
+        async def delete(key):
+            events.append(("invalidate", key))
+
+        monkeypatch.setattr(file_crud.cache_manager, "delete", delete)
+
+        await file_crud.update_file(db, 1, "new content")
+        assert await file_crud.delete_file(db, 1) is True
+
+        assert events == ["commit", ("invalidate", "file:1")] * 2
+        db.delete.assert_awaited_once_with(row)
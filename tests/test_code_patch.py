@@ -0,0 +1,125 @@
+"""Tests for patch-based code refinement."""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from resoftai.agents.developer import DeveloperAgent
+from resoftai.core.agent import AgentRole
+from resoftai.core.code_patch import PatchError, apply_patch, validate_syntax
+from resoftai.core.code_quality import LanguageType
+from resoftai.core.message_bus import MessageBus
+from resoftai.core.state import ProjectState
+from resoftai.llm.base import LLMConfig, ModelProvider
+
+CODE = '''import os
+
+API_KEY = "sk-test-123"
+
+
+def load(path):
+    with open(path) as f:
+        return f.read()
+'''
+
+FIX = '''<<<<<<< SEARCH
+API_KEY = "sk-test-123"
+=======
+API_KEY = os.environ["API_KEY"]
+>>>>>>> REPLACE'''
+
+
+@patch("resoftai.llm.factory.LLMFactory.create")
+def make_developer(responses, mock_create):
+    """Developer agent whose LLM answers with ``responses`` in turn."""
+    llm = MagicMock()
+    llm.generate = AsyncMock(side_effect=[
+        MagicMock(content=content, total_tokens=len(content) // 4, usage={}) for content in responses
+    ])
+    mock_create.return_value = llm
+    config = LLMConfig(provider=ModelProvider.DEEPSEEK, api_key="k", model_name="m")
+    return DeveloperAgent(AgentRole.DEVELOPER, MessageBus(), ProjectState(name="P", description="D"), llm_config=config)
+
+
+class TestApplyPatch:
+    """Test edits are applied to the current code."""
+
+    def test_search_replace(self):
+        """Test a search/replace block changes only the matched lines."""
+        patched = apply_patch(CODE, f"Here is the fix:\n\n{FIX}\n")
+
+        assert 'API_KEY = os.environ["API_KEY"]\n' in patched
+        assert patched.replace('os.environ["API_KEY"]', '"sk-test-123"') == CODE
+
+    def test_search_ignores_indentation_differences(self):
+        """Test a SEARCH block with wrong indentation still matches a unique location."""
+        response = "<<<<<<< SEARCH\n        return f.read()\n=======\n        return f.read().strip()\n>>>>>>> REPLACE"
+
+        patched = apply_patch(CODE, response)
+
+        assert "return f.read().strip()" in patched
+
+    def test_unified_diff(self):
+        """Test a fenced unified diff is applied at the matching hunk."""
+        diff = (
+            "```diff\n--- a/app.py\n+++ b/app.py\n@@ -2,3 +2,3 @@\n \n"
+            '-API_KEY = "sk-test-123"\n+API_KEY = os.environ["API_KEY"]\n \n```'
+        )
+
+        patched = apply_patch(CODE, diff)
+
+        assert 'API_KEY = os.environ["API_KEY"]' in patched
+        assert "sk-test-123" not in patched
+
+    @pytest.mark.parametrize("response", [
+        "I rewrote the file for you.",
+        "<<<<<<< SEARCH\nAPI_KEY = 'other'\n=======\nAPI_KEY = None\n>>>>>>> REPLACE",
+        "<<<<<<< SEARCH\n\n=======\nx = 1\n>>>>>>> REPLACE",
+    ])
+    def test_unusable_responses_raise(self, response):
+        """Test responses without applicable edits raise PatchError."""
+        with pytest.raises(PatchError):
+            apply_patch(CODE, response)
+
+    def test_validate_syntax(self):
+        """Test broken Python and unbalanced brackets are detected."""
+        assert validate_syntax(CODE, LanguageType.PYTHON) is None
+        assert "SyntaxError" in validate_syntax("def f(:\n", LanguageType.PYTHON)
+        assert validate_syntax("function f() {", LanguageType.JAVASCRIPT) == "Unbalanced {}"
+
+
+@pytest.mark.asyncio
+class TestDeveloperRefinement:
+    """Test generate_code_with_quality_check refines with patches."""
+
+    async def test_refines_with_patch(self):
+        """Test the second round sends the current code and applies the returned edits."""
+        agent = make_developer([CODE, FIX])
+
+        code, report = await agent.generate_code_with_quality_check("Write a loader", "app.py")
+
+        assert report["critical_issues"] == 0
+        assert 'os.environ["API_KEY"]' in code
+        assert agent.refinement_stats == {"patched": 1, "patch_failed": 0, "regenerated": 0}
+        patch_prompt = agent.llm.generate.call_args_list[1].kwargs["prompt"]
+        assert "def load(path):" in patch_prompt
+        assert '- Line 3: `API_KEY = "sk-test-123"` Hardcoded API key detected' in patch_prompt
+
+    async def test_falls_back_to_regeneration(self):
+        """Test a patch that does not apply leads to a full regeneration."""
+        regenerated = CODE.replace('"sk-test-123"', 'os.getenv("API_KEY")')
+        agent = make_developer([CODE, "No changes needed.", regenerated])
+
+        code, report = await agent.generate_code_with_quality_check("Write a loader", "app.py")
+
+        assert code == regenerated
+        assert agent.refinement_stats == {"patched": 0, "patch_failed": 1, "regenerated": 1}
+        assert "Original prompt: Write a loader" in agent.llm.generate.call_args_list[2].kwargs["prompt"]
+
+    async def test_keeps_best_version(self):
+        """Test a round that lowers the score does not replace the better code."""
+        worse = CODE + 'PASSWORD = "hunter2"\nSECRET = "s"\n'
+        agent = make_developer([CODE, "unusable", worse])
+
+        code, report = await agent.generate_code_with_quality_check("Write a loader", "app.py", max_iterations=2)
+
+        assert code == CODE
+        assert report["critical_issues"] == 1
@@ -0,0 +1,192 @@
+"""Tests for token-budgeted agent context."""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from resoftai.core import context
+from resoftai.core.agent import Agent, AgentRole
+from resoftai.core.context import ContextBuilder, count_tokens, summarize_artifact
+from resoftai.core.message_bus import MessageBus
+from resoftai.core.state import ProjectState, WorkflowStage
+from resoftai.llm.base import LLMConfig, ModelProvider
+
+
+def large_state():
+    """Project state whose artifacts are far larger than a prompt budget."""
+    state = ProjectState(name="Shop", description="Online shop")
+    state.requirements = {
+        "functional": [f"Requirement {i}: users can manage item {i} " * 3 for i in range(200)],
+        "non_functional": {"latency": "p95 under 200ms", "availability": "99.9%"},
+    }
+    state.architecture = {
+        "components": [{"name": f"service-{i}", "description": "handles orders " * 10} for i in range(150)],
+        "tech_stack": "Python/FastAPI",
+    }
+    state.design = {"screens": [f"Screen {i} with a long layout description " * 4 for i in range(100)]}
+    state.implementation_plan = {"tasks": [f"Task {i}" for i in range(50)]}
+    state.add_decision("Use PostgreSQL", "architect", "Relational data")
+    return state
+
+
+class ContextAgent(Agent):
+    """Minimal concrete agent."""
+
+    name = "Context Agent"
+    system_prompt = "You are a test agent."
+    capabilities = []
+    responsible_stages = []
+
+    async def process_request(self, message):
+        pass
+
+    async def handle_task_assignment(self, message):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def clear_summary_cache():
+    """Start each test with an empty summary cache."""
+    context._summary_cache.clear()
+    context.summary_stats.update(hits=0, misses=0)
+
+
+@patch("resoftai.llm.factory.LLMFactory.create")
+def make_agent(role, state, mock_create):
+    """Agent with ``role`` and a fake LLM."""
+    llm = MagicMock()
+    llm.generate = AsyncMock(return_value=MagicMock(
+        content="ok", total_tokens=10, usage={"prompt_tokens": 900, "completion_tokens": 10, "total_tokens": 910}
+    ))
+    mock_create.return_value = llm
+    config = LLMConfig(provider=ModelProvider.DEEPSEEK, api_key="k", model_name="m")
+    return ContextAgent(role, MessageBus(), state, llm_config=config)
+
+
+class TestContextBuilder:
+    """Test section ranking and budgeting."""
+
+    def test_small_state_is_included_in_full(self):
+        """Test a state that fits the budget is passed through unchanged."""
+        state = ProjectState(name="Tiny", description="Small", requirements={"goal": "Build a CLI"})
+
+        text, report = ContextBuilder(1000).build(state, "developer")
+
+        assert '{"goal":"Build a CLI"}' in text
+        assert report.to_dict()["sections"]["requirements"]["mode"] == "full"
+        assert report.total_tokens == report.full_tokens
+
+    def test_large_state_stays_within_budget(self):
+        """Test large artifacts are summarized to fit the budget."""
+        state = large_state()
+
+        text, report = ContextBuilder(1500).build(state, "developer")
+
+        assert report.full_tokens > 10 * 1500
+        assert count_tokens(text) <= 1500
+        assert report.total_tokens <= 1500
+        assert "Architecture (summary):" in text
+
+    def test_sections_ranked_by_role(self):
+        """Test the budget goes to the sections most relevant to the role."""
+        state = large_state()
+
+        _, architect = ContextBuilder(1200).build(state, "architect")
+        _, designer = ContextBuilder(1200).build(state, "uxui_designer")
+
+        def tokens(report, name):
+            return report.to_dict()["sections"][name]["tokens"]
+
+        assert tokens(architect, "architecture") > tokens(designer, "architecture")
+        assert tokens(designer, "design") > tokens(architect, "design")
+
+    def test_stage_boost_changes_ranking(self):
+        """Test the current stage makes its artifact more relevant."""
+        state = large_state()
+        builder = ContextBuilder(800)
+
+        _, planning = builder.build(state, "quality_expert", stage=WorkflowStage.DEVELOPMENT_PLANNING)
+        _, other = builder.build(state, "quality_expert", stage=WorkflowStage.TESTING)
+
+        sections = planning.to_dict()["sections"]
+        assert list(sections).index("implementation_plan") < list(other.to_dict()["sections"]).index(
+            "implementation_plan"
+        )
+
+    def test_summaries_are_cached(self):
+        """Test a summary is computed once and reused for the same artifact and size."""
+        artifact = large_state().architecture
+
+        first = summarize_artifact(artifact, 300)
+        second = summarize_artifact(artifact, 300)
+
+        assert first == second
+        assert context.summary_stats == {"hits": 1, "misses": 1}
+        assert count_tokens(first) <= 300
+
+    def test_summaries_are_shared_across_budgets(self):
+        """Test budgets within one size tier reuse a single summary, cut to each budget."""
+        artifact = large_state().architecture
+
+        summaries = [summarize_artifact(artifact, budget) for budget in (300, 350, 420, 500)]
+
+        assert context.summary_stats == {"hits": 3, "misses": 1}
+        assert all(count_tokens(summary) <= budget for summary, budget in zip(summaries, (300, 350, 420, 500)))
+        assert summaries[-1].startswith(summaries[0].rstrip("…"))
+
+    def test_text_sections_are_summarized(self):
+        """Test a text section too large for the budget is shortened, not dropped."""
+        state = ProjectState(name="Notes", description="Text only")
+        state.requirements = "The shop must support guest checkout. " * 400
+
+        text, report = ContextBuilder(300).build(state, "developer")
+
+        assert report.to_dict()["sections"]["requirements"]["mode"] == "summary"
+        assert "Requirements (summary):\nThe shop must support guest checkout." in text
+        assert count_tokens(text) <= 300
+
+    def test_fallback_counts_cjk_per_character(self, monkeypatch):
+        """Test the estimate without tiktoken counts CJK characters individually."""
+        monkeypatch.setattr(context, "_encoding", False)
+
+        assert count_tokens("需求分析") == 4
+        assert count_tokens("abcdefgh") == 2
+
+
+class TestAgentContext:
+    """Test agents use the budgeted context."""
+
+    def test_agent_budget_and_report(self):
+        """Test the agent budget applies and the last breakdown is kept."""
+        agent = make_agent(AgentRole.DEVELOPER, large_state())
+        agent.context_token_budget = 1000
+
+        text = agent.get_context_from_state()
+
+        assert text.startswith("Project: Shop")
+        assert agent.last_context_report.budget == 1000
+        assert count_tokens(text) <= 1000
+
+    def test_stage_budget_override(self):
+        """Test a per-stage budget takes precedence over the agent budget."""
+        agent = make_agent(AgentRole.DEVELOPER, large_state())
+        agent.context_stage_budgets = {WorkflowStage.IMPLEMENTATION: 500}
+
+        agent.get_context_from_state(stage=WorkflowStage.IMPLEMENTATION)
+
+        assert agent.last_context_report.budget == 500
+
+    @pytest.mark.asyncio
+    async def test_generate_records_prompt_breakdown(self):
+        """Test each LLM call records system, context and instruction tokens."""
+        agent = make_agent(AgentRole.ARCHITECT, large_state())
+        context_text = agent.get_context_from_state()
+        context_tokens = agent.last_context_report.total_tokens
+
+        await agent.generate(f"{context_text}\n\nDesign the payment service.")
+        await agent.generate("No context here.")
+
+        with_context, without_context = agent.prompt_reports
+        assert with_context["context_tokens"] == context_tokens > 0
+        assert with_context["instruction_tokens"] > 0
+        assert "architecture" in with_context["context_sections"]
+        assert with_context["reported_prompt_tokens"] == 900
+        assert without_context["context_tokens"] == 0
@@ -0,0 +1,136 @@
+"""Tests for batch execution through provider batch APIs."""
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from resoftai.llm.base import LLMConfig, LLMResponse, ModelProvider
+from resoftai.llm.batch import (
+    AnthropicBatchBackend, BatchExecutor, BatchRequest, OpenAIBatchBackend
+)
+from resoftai.llm.factory import LLMFactory
+from tests.fake_batch_server import FakeBatchServer
+
+
+def config(provider=ModelProvider.ANTHROPIC):
+    """LLM configuration for ``provider``."""
+    return LLMConfig(provider=provider, api_key="k", model_name="model-1")
+
+
+def realtime_provider():
+    """Real-time provider answering ``realtime: <prompt>``."""
+    provider = MagicMock()
+    provider.generate = AsyncMock(side_effect=lambda prompt, system_prompt=None, **kwargs: LLMResponse(
+        content=f"realtime: {prompt}", model="model-1", provider=ModelProvider.ANTHROPIC, usage={}
+    ))
+    return provider
+
+
+def executor(server, backend_class=AnthropicBatchBackend, provider=ModelProvider.ANTHROPIC, **options):
+    """Batch executor talking to ``server``."""
+    return BatchExecutor(
+        config(provider),
+        backend=backend_class(config(provider), client=server.client()),
+        realtime_provider=realtime_provider(),
+        poll_interval=0,
+        **options
+    )
+
+
+@pytest.mark.asyncio
+class TestBatchExecutor:
+    """Test requests are batched, polled and demultiplexed."""
+
+    @pytest.mark.parametrize("backend_class,provider", [
+        (AnthropicBatchBackend, ModelProvider.ANTHROPIC),
+        (OpenAIBatchBackend, ModelProvider.ZHIPU),
+    ])
+    async def test_results_reach_their_callers(self, backend_class, provider):
+        """Test each caller gets the response to its own prompt from one job."""
+        server = FakeBatchServer(polls_until_done=3)
+        batch = executor(server, backend_class, provider)
+
+        responses = await batch.run([BatchRequest(prompt=f"file {i}") for i in range(5)])
+
+        assert [r.content for r in responses] == [f"echo: file {i}" for i in range(5)]
+        assert responses[0].usage["prompt_tokens"] == 2
+        assert len(server.batches) == 1
+        assert batch.stats["batched_responses"] == 5
+        batch.realtime_provider.generate.assert_not_called()
+
+    async def test_generate_collects_concurrent_calls(self):
+        """Test concurrent generate calls within the window share one job."""
+        server = FakeBatchServer()
+        batch = executor(server, collect_window=0.05)
+
+        responses = await asyncio.gather(*(batch.generate(f"q{i}", "system") for i in range(3)))
+
+        assert [r.content for r in responses] == ["echo: q0", "echo: q1", "echo: q2"]
+        assert len(server.batches) == 1
+        assert server.batches["msgbatch_1"]["requests"][0]["params"]["system"] == "system"
+
+    async def test_batch_size_splits_jobs(self):
+        """Test more requests than max_batch_size are split into several jobs."""
+        server = FakeBatchServer()
+        batch = executor(server, max_batch_size=2)
+
+        await batch.run([BatchRequest(prompt=str(i)) for i in range(5)])
+
+        assert len(server.batches) == 3
+
+    async def test_errored_requests_fall_back_to_realtime(self):
+        """Test requests that error in the batch are retried with real-time calls."""
+        server = FakeBatchServer(error_prompts=["bad"])
+        batch = executor(server, OpenAIBatchBackend, ModelProvider.ZHIPU)
+
+        responses = await batch.run([BatchRequest(prompt="good"), BatchRequest(prompt="bad one")])
+
+        assert [r.content for r in responses] == ["echo: good", "realtime: bad one"]
+        assert batch.stats["realtime_fallbacks"] == 1
+
+    async def test_failed_submission_falls_back_to_realtime(self):
+        """Test a job that cannot be created is served entirely in real time."""
+        batch = executor(FakeBatchServer(fail_submissions=True))
+
+        responses = await batch.run([BatchRequest(prompt="a"), BatchRequest(prompt="b")])
+
+        assert [r.content for r in responses] == ["realtime: a", "realtime: b"]
+
+    @pytest.mark.parametrize("backend_class,provider,batch_id", [
+        (AnthropicBatchBackend, ModelProvider.ANTHROPIC, "msgbatch_1"),
+        (OpenAIBatchBackend, ModelProvider.ZHIPU, "batch_2"),
+    ])
+    async def test_unfinished_job_is_cancelled_before_realtime(self, backend_class, provider, batch_id):
+        """Test a job that does not finish in time is cancelled, then served in real time."""
+        server = FakeBatchServer(polls_until_done=1000)
+        batch = executor(server, backend_class, provider, completion_timeout=0)
+
+        [response] = await batch.run([BatchRequest(prompt="slow")])
+
+        assert response.content == "realtime: slow"
+        assert server.cancelled == [batch_id]
+        assert batch.stats["batches_cancelled"] == 1
+        assert server.requests_seen == 0
+
+    async def test_failed_cancel_still_falls_back(self):
+        """Test a job that cannot be cancelled is abandoned and its results never read."""
+        server = FakeBatchServer(polls_until_done=1000)
+        batch = executor(server, completion_timeout=0)
+        batch.backend.cancel = AsyncMock(side_effect=RuntimeError("gone"))
+
+        [response] = await batch.run([BatchRequest(prompt="slow")])
+
+        assert response.content == "realtime: slow"
+        assert batch.stats["batches_cancelled"] == 0
+        assert server.requests_seen == 0
+
+    async def test_factory_without_batch_api_uses_realtime(self):
+        """Test providers without a batch API get an executor with no backend."""
+        batch = LLMFactory.create_batch(config(ModelProvider.DEEPSEEK))
+        batch._realtime_provider = realtime_provider()
+
+        [response] = await batch.run([BatchRequest(prompt="x")])
+
+        assert batch.backend is None
+        assert response.content == "realtime: x"
+        await batch.close()
@@ -0,0 +1,181 @@
+"""Tests for the record/replay provider and the mock upstream server."""
+import random
+import time
+
+import httpx
+import pytest
+
+from resoftai.llm.base import LLMConfig, ModelProvider
+from resoftai.llm.factory import LLMFactory
+from resoftai.llm.mock_server import MockLLMServer
+from resoftai.llm.providers.replay_provider import ReplayProvider, register_replay_provider
+from resoftai.llm.replay import Cassette, Distribution, Interaction, ReplayMiss, ReplayProfile, request_key
+
+
+def replay_config(**params):
+    """Replay provider configuration with ``params`` as extra_params."""
+    return LLMConfig(provider=ModelProvider.REPLAY, api_key="", model_name="m", extra_params=params)
+
+
+def recorded_cassette(tmp_path, **fields):
+    """Cassette holding one interaction for prompt "hello"."""
+    cassette = Cassette(tmp_path / "cassette.jsonl")
+    cassette.record(Interaction(
+        key=request_key("m", "hello", "system"), model="m", content="Hello there, how can I help?",
+        usage={"prompt_tokens": 3, "completion_tokens": 7, "total_tokens": 10}, **fields
+    ))
+    return cassette
+
+
+@pytest.fixture
+def registered():
+    """Register the replay provider for one test."""
+    register_replay_provider()
+    yield
+    LLMFactory._custom_providers.pop(ModelProvider.REPLAY.value, None)
+
+
+class TestProfile:
+    """Test timing distributions and profile parsing."""
+
+    @pytest.mark.parametrize("spec,low,high", [
+        (0.5, 0.5, 0.5),
+        ({"dist": "uniform", "low": 0.1, "high": 0.2}, 0.1, 0.2),
+        ({"dist": "lognormal", "median": 0.3, "sigma": 0.5}, 0.0, 10.0),
+    ])
+    def test_distributions(self, spec, low, high):
+        """Test samples stay within the distribution's range."""
+        rng = random.Random(1)
+        samples = [Distribution.parse(spec).sample(rng) for _ in range(50)]
+
+        assert all(low <= sample <= high for sample in samples)
+
+    def test_unknown_fault_is_rejected(self):
+        """Test a misspelled fault name fails loudly."""
+        with pytest.raises(ValueError, match="Unknown faults"):
+            ReplayProfile.from_dict({"error_rates": {"418": 0.5}})
+
+
+@pytest.mark.asyncio
+class TestReplayProvider:
+    """Test replaying recorded interactions in-process."""
+
+    async def test_factory_creates_registered_provider(self, tmp_path, registered):
+        """Test the provider is created through LLMFactory once registered."""
+        recorded_cassette(tmp_path)
+        provider = LLMFactory.create(replay_config(cassette=str(tmp_path / "cassette.jsonl")))
+
+        response = await provider.generate("hello", "system")
+
+        assert isinstance(provider, ReplayProvider)
+        assert response.content == "Hello there, how can I help?"
+        assert response.total_tokens == 10
+        assert provider.replayer.stats["replayed"] == 1
+
+    async def test_recorded_latency_and_stream_timing(self, tmp_path):
+        """Test replay reproduces recorded time to first token and chunk timing."""
+        recorded_cassette(tmp_path, latency=0.2, ttft=0.1, chunks=[[11, 0.0], [17, 0.1]])
+        provider = ReplayProvider(replay_config(cassette=str(tmp_path / "cassette.jsonl")))
+
+        start = time.monotonic()
+        arrivals = []
+        async for chunk in provider.generate_stream("hello", "system"):
+            arrivals.append((chunk, time.monotonic() - start))
+
+        assert [chunk for chunk, _ in arrivals] == ["Hello there", ", how can I help?"]
+        assert 0.09 <= arrivals[0][1] < 0.18
+        assert 0.19 <= arrivals[1][1] < 0.35
+
+    async def test_token_rate_overrides_recording(self, tmp_path):
+        """Test a profile token rate and time scale replace the recorded latency."""
+        recorded_cassette(tmp_path, latency=30.0)
+        provider = ReplayProvider(replay_config(
+            cassette=str(tmp_path / "cassette.jsonl"),
+            profile={"ttft": 0.01, "tokens_per_second": 1000, "chunk_tokens": 2},
+        ))
+
+        start = time.monotonic()
+        chunks = [chunk async for chunk in provider.generate_stream("hello", "system")]
+
+        assert "".join(chunks) == "Hello there, how can I help?"
+        assert len(chunks) == 4
+        assert time.monotonic() - start < 1
+
+    @pytest.mark.parametrize("fault,error", [("429", httpx.HTTPStatusError), ("timeout", httpx.ReadTimeout)])
+    async def test_injected_faults(self, tmp_path, fault, error):
+        """Test faults are raised as the HTTP providers raise them."""
+        recorded_cassette(tmp_path)
+        provider = ReplayProvider(replay_config(
+            cassette=str(tmp_path / "cassette.jsonl"), profile={"error_rates": {fault: 1.0}}
+        ))
+
+        with pytest.raises(error) as exc_info:
+            await provider.generate("hello", "system")
+
+        if fault == "429":
+            assert exc_info.value.response.status_code == 429
+        assert provider.replayer.stats["faults"][fault] == 1
+
+    async def test_unrecorded_requests(self):
+        """Test misses raise by default and are synthesized on request."""
+        with pytest.raises(ReplayMiss):
+            await ReplayProvider(replay_config()).generate("unknown")
+
+        response = await ReplayProvider(replay_config(on_miss="synthesize", profile={"time_scale": 0})).generate("x")
+        assert response.content.startswith("[replay ")
+        assert response.usage["completion_tokens"] > 0
+
+
+@pytest.mark.asyncio
+class TestMockServer:
+    """Test the unmodified HTTP providers against the mock server."""
+
+    @pytest.mark.parametrize("provider,suffix", [
+        (ModelProvider.DEEPSEEK, ""),
+        (ModelProvider.MOONSHOT, "/v1"),
+        (ModelProvider.ZHIPU, "/api/paas/v4"),
+    ])
+    async def test_providers_run_offline(self, tmp_path, provider, suffix):
+        """Test completions and SSE streaming reach each OpenAI-style provider."""
+        async with MockLLMServer(recorded_cassette(tmp_path), ReplayProfile(chunk_tokens=2)) as server:
+            llm = LLMFactory.create(LLMConfig(provider=provider, api_key="k", model_name="m", api_base=server.url + suffix))
+
+            response = await llm.generate("hello", "system")
+            chunks = [chunk async for chunk in llm.generate_stream("hello", "system")]
+
+        assert response.content == "Hello there, how can I help?"
+        assert response.usage["total_tokens"] == 10
+        assert "".join(chunks) == response.content
+        assert len(chunks) == 4
+
+    async def test_injected_server_errors(self):
+        """Test injected 503s surface as provider HTTP errors."""
+        profile = ReplayProfile(error_rates={"503": 1.0})
+        async with MockLLMServer(profile=profile, on_miss="synthesize") as server:
+            llm = LLMFactory.create(LLMConfig(
+                provider=ModelProvider.DEEPSEEK, api_key="k", model_name="m", api_base=server.url
+            ))
+            with pytest.raises(httpx.HTTPStatusError) as exc_info:
+                await llm.generate("hello")
+
+        assert exc_info.value.response.status_code == 503
+
+    async def test_record_then_replay_offline(self, tmp_path):
+        """Test interactions recorded from a real provider replay without the server."""
+        path = str(tmp_path / "recorded.jsonl")
+        async with MockLLMServer(profile=ReplayProfile(time_scale=0), on_miss="synthesize") as server:
+            recorder = ReplayProvider(LLMConfig(
+                provider=ModelProvider.REPLAY, api_key="k", model_name="m", api_base=server.url,
+                extra_params={"cassette": path, "mode": "record", "upstream": "deepseek"},
+            ))
+            recorded = await recorder.generate("design an API", "system", context="Project: shop")
+            streamed = "".join([chunk async for chunk in recorder.generate_stream("list files", "system")])
+
+        replayer = ReplayProvider(replay_config(cassette=path))
+        replayed = await replayer.generate("design an API", "system", context="Project: shop")
+        replayed_stream = "".join([chunk async for chunk in replayer.generate_stream("list files", "system")])
+
+        assert replayed.content == recorded.content
+        assert replayed.usage["total_tokens"] == recorded.usage["total_tokens"]
+        assert replayed_stream == streamed
+        assert len(Cassette(path)) == 2
@@ -0,0 +1,134 @@
+"""Tests for single-query marketplace statistics."""
+import pytest
+from sqlalchemy import Column, MetaData, Table, event
+
+from resoftai.models.plugin import Plugin, PluginStatus, PluginCategory
+from resoftai.models.template import TemplateModel, TemplateStatus, TemplateCategory, ContributorProfile
+from resoftai.services.marketplace_stats import MarketplaceStatsService
+from resoftai.utils.cache import cache_manager
+
+
+def _without_foreign_keys(table: Table) -> Table:
+    """Copy of a table without foreign keys, so it can be created on its own."""
+    return Table(
+        table.name,
+        MetaData(),
+        *[Column(column.name, column.type, primary_key=column.primary_key) for column in table.columns]
+    )
+
+
+@pytest.fixture
+async def stats_db(make_session_factory):
+    """In-memory marketplace with a statement counter."""
+    tables = (Plugin.__table__, TemplateModel.__table__, ContributorProfile.__table__)
+    factory = await make_session_factory(*(_without_foreign_keys(table) for table in tables), rows={
+        Plugin.__table__: [
+            {"name": "a", "slug": "a", "category": PluginCategory.INTEGRATION, "version": "1.0.0",
+             "status": PluginStatus.SUBMITTED, "author_id": 1, "downloads_count": 10, "installs_count": 1,
+             "rating_average": 4.0, "rating_count": 2},
+            {"name": "b", "slug": "b", "category": PluginCategory.INTEGRATION, "version": "1.0.0",
+             "status": PluginStatus.APPROVED, "author_id": 1, "downloads_count": 20, "installs_count": 2,
+             "rating_average": 0.0, "rating_count": 0},
+            {"name": "c", "slug": "c", "category": PluginCategory.INTEGRATION, "version": "1.0.0",
+             "status": PluginStatus.REJECTED, "author_id": 2, "downloads_count": 5, "installs_count": 0,
+             "rating_average": 2.0, "rating_count": 1},
+        ],
+        TemplateModel.__table__: [
+            {"name": "t", "slug": "t", "category": TemplateCategory.WEB_APP, "version": "1.0.0",
+             "template_data": {}, "status": TemplateStatus.APPROVED, "author_id": 1,
+             "downloads_count": 100, "installs_count": 7, "rating_average": 5.0, "rating_count": 1},
+        ],
+        ContributorProfile.__table__: [
+            {"user_id": 1, "display_name": "one"},
+            {"user_id": 2, "display_name": "two"},
+        ],
+    })
+
+    statements = []
+    event.listen(factory.kw["bind"].sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    async with factory() as session:
+        yield session, statements
+
+
+@pytest.mark.asyncio
+class TestMarketplaceStats:
+    """Test aggregation and caching."""
+
+    async def test_admin_stats_single_statement(self, stats_db):
+        """Test admin stats are computed in one statement and cached."""
+        session, statements = stats_db
+        service = MarketplaceStatsService(ttl=60)
+
+        stats = await service.get_admin_stats(session)
+        assert len(statements) == 1
+
+        assert stats == {
+            "pending_plugins": 1,
+            "pending_templates": 0,
+            "approved_plugins": 1,
+            "approved_templates": 1,
+            "rejected_plugins": 1,
+            "rejected_templates": 0,
+            "total_contributors": 2,
+            "total_downloads": 135,
+            "total_installs": 10,
+        }
+
+        await service.get_admin_stats(session)
+        assert len(statements) == 1
+        assert service.hits == 1
+
+    async def test_invalidation(self, stats_db):
+        """Test invalidation forces recomputation."""
+        session, statements = stats_db
+        service = MarketplaceStatsService(ttl=60)
+
+        await service.get_admin_stats(session)
+        await service.invalidate()
+        await service.get_admin_stats(session)
+
+        assert len(statements) == 2
+
+    async def test_contributor_stats(self, stats_db):
+        """Test contributor stats come from one statement."""
+        session, statements = stats_db
+        service = MarketplaceStatsService(ttl=60)
+
+        stats = await service.get_contributor_stats(session, 1)
+
+        assert len(statements) == 1
+        assert stats["plugins_count"] == 2
+        assert stats["templates_count"] == 1
+        assert stats["total_downloads"] == 130
+        assert stats["total_installs"] == 10
+        # Unrated plugins are excluded from the plugin average
+        assert stats["average_rating"] == pytest.approx((4.0 + 5.0) / 2)
+
+    async def test_invalidation_is_per_contributor(self, stats_db):
+        """Test invalidating one contributor keeps the other contributors' cached stats."""
+        session, statements = stats_db
+        service = MarketplaceStatsService(ttl=60)
+
+        await service.get_contributor_stats(session, 1)
+        await service.get_contributor_stats(session, 2)
+        await service.invalidate(author_id=1)
+        await service.get_contributor_stats(session, 1)
+        await service.get_contributor_stats(session, 2)
+
+        assert len(statements) == 3
+        assert (service.hits, service.misses) == (1, 3)
+
+    async def test_cached_in_redis(self, stats_db, fake_redis):
+        """Test stats are shared through Redis and invalidated there too."""
+        session, statements = stats_db
+        service = MarketplaceStatsService(ttl=60)
+
+        await service.get_admin_stats(session)
+        cache_manager.local.clear()
+        await service.get_admin_stats(session)
+        assert len(statements) == 1
+
+        await service.invalidate()
+        await service.get_admin_stats(session)
+        assert len(statements) == 2
@@ -0,0 +1,287 @@
+"""Tests for queued notification delivery."""
+import asyncio
+import httpx
+import pytest
+from unittest.mock import AsyncMock
+from sqlalchemy import select
+
+from resoftai.models.notification import (
+    Notification, NotificationChannel, NotificationPreference, NotificationType
+)
+from resoftai.models.user import User
+from resoftai.services import notification_service
+from resoftai.services.notification_delivery import NotificationDelivery, validate_webhook_url
+from resoftai.services.notification_service import NotificationService
+
+
+class FakeManager:
+    """Records in-app pushes."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def broadcast_to_user(self, user_id, event, data):
+        self.sent.append((user_id, event, data["id"]))
+
+
+class RecordingEmail:
+    """Email sender that records messages and tracks concurrency."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.sent = []
+        self.active = 0
+        self.max_active = 0
+
+    async def __call__(self, to, subject, body):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+        self.sent.append((to, subject, body))
+
+
+@pytest.fixture
+async def notify_db(make_session_factory):
+    """File-backed users, preferences and notifications tables with three users."""
+    return await make_session_factory(
+        User.__table__, Notification.__table__, NotificationPreference.__table__,
+        rows={User.__table__: [
+            {"id": i, "username": f"user{i}", "email": f"user{i}@example.com", "password_hash": "x",
+             "role": "user", "is_active": True}
+            for i in (1, 2, 3)
+        ]},
+        shared=True
+    )
+
+
+@pytest.fixture
+async def delivery(notify_db, monkeypatch):
+    """Running delivery workers used by the notification service."""
+    delivery = NotificationDelivery(
+        backoff_base=0.01,
+        flush_interval=60,
+        email_sender=RecordingEmail(),
+        connection_manager=FakeManager(),
+        session_factory=notify_db
+    )
+    # Webhook hosts in these tests resolve to a public address
+    delivery._resolve = AsyncMock(return_value=["93.184.216.34"])
+    monkeypatch.setattr(notification_service, "notification_delivery", delivery)
+    delivery.start()
+    yield delivery
+    await delivery.stop()
+
+
+async def notify(factory, user_ids, **kwargs):
+    """Create a system announcement for ``user_ids``."""
+    async with factory() as session:
+        return await NotificationService(session).create_notifications(
+            user_ids,
+            notification_type=NotificationType.SYSTEM_ANNOUNCEMENT,
+            title=kwargs.pop("title", "Hello"),
+            message="Message",
+            **kwargs
+        )
+
+
+async def stored(factory):
+    """All notification rows by id."""
+    async with factory() as session:
+        return {n.id: n for n in (await session.execute(select(Notification))).scalars()}
+
+
+def webhook_client(responses, calls):
+    """HTTP client answering webhook POSTs with the given status codes in turn."""
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(responses.pop(0) if responses else 200)
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+@pytest.mark.asyncio
+class TestNotificationDelivery:
+    """Test queued delivery through the notification service."""
+
+    async def test_bulk_create_returns_before_delivery(self, notify_db, delivery):
+        """Test a slow email sender does not hold up notification creation."""
+        delivery.email_sender = RecordingEmail(delay=0.2)
+
+        notifications = await notify(notify_db, [1, 2, 3])
+
+        assert [n.user_id for n in notifications] == [1, 2, 3]
+        assert delivery.email_sender.sent == []
+        await delivery.drain()
+        assert sorted(to for to, _, _ in delivery.email_sender.sent) == [
+            "user1@example.com", "user2@example.com", "user3@example.com"
+        ]
+        assert sorted(delivery.connection_manager.sent) == [
+            (n.user_id, "notification", n.id) for n in notifications
+        ]
+        assert all(n.email_sent and n.email_sent_at for n in (await stored(notify_db)).values())
+
+    async def test_channel_concurrency_limit(self, notify_db, delivery):
+        """Test no more email workers run at once than configured."""
+        await delivery.stop()
+        delivery.concurrency[NotificationChannel.EMAIL] = 2
+        delivery.email_sender = RecordingEmail(delay=0.02)
+        delivery.digest_threshold = 100
+        delivery.start()
+
+        for _ in range(3):
+            await notify(notify_db, [1, 2, 3])
+        await delivery.drain()
+
+        assert len(delivery.email_sender.sent) == 9
+        assert delivery.email_sender.max_active == 2
+
+    async def test_webhook_retries_then_succeeds(self, notify_db, delivery):
+        """Test server errors are retried with backoff over one shared client."""
+        calls = []
+        delivery.http_client = webhook_client([503, 500], calls)
+        async with notify_db() as session:
+            session.add(NotificationPreference(user_id=1, webhook_enabled=True, webhook_url="https://hooks.test/a",
+                                               email_enabled=False, preferences={}))
+            await session.commit()
+
+        [notification] = await notify(notify_db, [1])
+        await delivery.drain()
+
+        assert len(calls) == 3
+        assert delivery.stats["retries"] == 2
+        row = (await stored(notify_db))[notification.id]
+        assert row.webhook_sent and row.webhook_error is None
+        assert row.email_sent is False
+
+    async def test_webhook_client_error_is_not_retried(self, notify_db, delivery):
+        """Test a 4xx response fails the delivery immediately and records the error."""
+        calls = []
+        delivery.http_client = webhook_client([404], calls)
+        async with notify_db() as session:
+            session.add(NotificationPreference(user_id=2, webhook_enabled=True, webhook_url="https://hooks.test/b",
+                                               preferences={}))
+            await session.commit()
+        [notification] = await notify(notify_db, [2], channels=[NotificationChannel.WEBHOOK])
+        await delivery.drain()
+
+        assert len(calls) == 1
+        assert delivery.stats["failed"] == 1
+        assert "404" in (await stored(notify_db))[notification.id].webhook_error
+
+    async def test_high_volume_emails_are_digested(self, notify_db, delivery):
+        """Test emails beyond the threshold are coalesced into one digest."""
+        delivery.digest_threshold = 2
+
+        for index in range(5):
+            await notify(notify_db, [3], title=f"Event {index}")
+        await delivery.drain()
+
+        assert [subject for _, subject, _ in delivery.email_sender.sent] == ["Event 0", "Event 1"]
+        assert delivery.get_stats()["held_for_digest"] == 3
+
+        assert delivery.release_digests(force=True) == 1
+        await delivery.drain()
+
+        to, subject, body = delivery.email_sender.sent[-1]
+        assert subject == "You have 3 new notifications"
+        assert body.splitlines() == ["- Event 2", "- Event 3", "- Event 4"]
+        assert all(n.email_sent for n in (await stored(notify_db)).values())
+
+    async def test_digest_preference_holds_every_email(self, notify_db, delivery):
+        """Test users who opted into digests get no individual emails."""
+        async with notify_db() as session:
+            session.add(NotificationPreference(user_id=1, digest_enabled=True, digest_frequency="daily",
+                                               preferences={}))
+            await session.commit()
+
+        await notify(notify_db, [1, 2])
+        await delivery.drain()
+
+        assert [to for to, _, _ in delivery.email_sender.sent] == ["user2@example.com"]
+        assert delivery.release_digests() == 0
+
+    async def test_stop_delivers_outstanding_jobs(self, notify_db, delivery):
+        """Test stop sends held digests and retries waiting jobs before the workers exit."""
+        calls = []
+        delivery.backoff_base = 60
+        delivery.http_client = webhook_client([503], calls)
+        async with notify_db() as session:
+            session.add(NotificationPreference(user_id=1, webhook_enabled=True, webhook_url="https://hooks.test/a",
+                                               digest_enabled=True, digest_frequency="daily", preferences={}))
+            await session.commit()
+
+        [notification] = await notify(notify_db, [1])
+        while not delivery.get_stats()["retrying"]:
+            await asyncio.sleep(0.01)
+        await delivery.stop(timeout=5)
+
+        assert len(calls) == 2
+        assert [to for to, _, _ in delivery.email_sender.sent] == ["user1@example.com"]
+        row = (await stored(notify_db))[notification.id]
+        assert row.webhook_sent and row.email_sent
+        assert delivery.stats["abandoned"] == 0
+
+    async def test_stop_records_jobs_left_after_timeout(self, notify_db, delivery):
+        """Test jobs still undelivered when the drain times out are marked with an error."""
+        delivery.email_sender = RecordingEmail(delay=10)
+
+        [notification] = await notify(notify_db, [2])
+        await delivery.stop(timeout=0.05)
+
+        assert delivery.stats["abandoned"] == 1
+        assert delivery.get_stats()["queued"]["email"] == 0
+        assert (await stored(notify_db))[notification.id].email_error == "Not delivered before shutdown"
+
+    async def test_webhook_to_private_address_is_refused(self, notify_db, delivery):
+        """Test a webhook host resolving to an internal address is never called."""
+        calls = []
+        delivery.http_client = webhook_client([], calls)
+        delivery._resolve = AsyncMock(return_value=["169.254.169.254"])
+        async with notify_db() as session:
+            session.add(NotificationPreference(user_id=2, webhook_enabled=True, webhook_url="https://hooks.test/b",
+                                               preferences={}))
+            await session.commit()
+
+        [notification] = await notify(notify_db, [2], channels=[NotificationChannel.WEBHOOK])
+        await delivery.drain()
+
+        assert calls == []
+        assert delivery.stats["failed"] == 1
+        assert "not a public address" in (await stored(notify_db))[notification.id].webhook_error
+
+    async def test_webhook_client_does_not_follow_redirects(self, delivery):
+        """Test the owned webhook client leaves redirects to internal hosts unfollowed."""
+        assert delivery._client().follow_redirects is False
+
+
+class TestValidateWebhookUrl:
+    """Test webhook URLs are checked when preferences are saved."""
+
+    def test_public_https_url_is_accepted(self):
+        """Test https URLs naming a host or a public address pass."""
+        assert validate_webhook_url("https://hooks.example.com/a") == "https://hooks.example.com/a"
+        assert validate_webhook_url("https://93.184.216.34/a") == "https://93.184.216.34/a"
+
+    @pytest.mark.parametrize("url", [
+        "http://hooks.example.com/a",
+        "file:///etc/passwd",
+        "https://localhost:8000/admin",
+        "https://127.0.0.1/",
+        "https://10.0.0.5/",
+        "https://169.254.169.254/latest/meta-data",
+        "https://[::1]/",
+    ])
+    def test_unsafe_url_is_rejected(self, url):
+        """Test non-https URLs and local, private and link-local hosts are refused."""
+        with pytest.raises(ValueError):
+            validate_webhook_url(url)
+
+    def test_preference_update_validates_webhook_url(self):
+        """Test the preferences request model refuses unsafe webhook URLs."""
+        from pydantic import ValidationError
+        from resoftai.api.routes.notifications import NotificationPreferenceUpdate
+
+        assert NotificationPreferenceUpdate(webhook_url="https://hooks.example.com/a").webhook_url
+        with pytest.raises(ValidationError):
+            NotificationPreferenceUpdate(webhook_url="http://169.254.169.254/latest/meta-data")
@@ -145,7 +145,8 @@ class TestTextOperation:
         ])
 
         composed = op1.compose(op2)
-        assert len(composed.operations) == 2
+        assert composed.apply("xyz") == "ABxyz"
+        assert len(composed.operations) == 1
 
 
 class TestTransform:
@@ -427,3 +428,117 @@ class TestOTIntegration:
         assert "A" in doc.content
         assert "B" in doc.content
         assert "C" in doc.content
+
+
+def _random_operation(rng, length, max_ranges=5):
+    """Random multi-range operation valid for a text of ``length`` characters."""
+    operation = TextOperation()
+    remaining = length
+    for _ in range(rng.randint(0, max_ranges)):
+        skip = rng.randint(0, remaining)
+        operation.retain(skip)
+        remaining -= skip
+        if rng.random() < 0.5:
+            operation.insert("".join(rng.choice("xyz") for _ in range(rng.randint(1, 4))))
+        if remaining and rng.random() < 0.5:
+            removed = rng.randint(1, min(remaining, 6))
+            operation.delete(removed)
+            remaining -= removed
+    return operation
+
+
+class TestOTProperties:
+    """Randomized convergence and composition properties."""
+
+    SEEDS = range(300)
+
+    def _text(self, rng):
+        return "".join(rng.choice("abcdef") for _ in range(rng.randint(0, 30)))
+
+    def test_transform_converges(self):
+        """Test both application orders produce the same text."""
+        import random
+        for seed in self.SEEDS:
+            rng = random.Random(seed)
+            text = self._text(rng)
+            op_a = _random_operation(rng, len(text))
+            op_b = _random_operation(rng, len(text))
+
+            a_prime, b_prime = transform(op_a, op_b)
+
+            assert b_prime.apply(op_a.apply(text)) == a_prime.apply(op_b.apply(text)), seed
+
+    def test_compose_matches_sequential_apply(self):
+        """Test compose(A, B) equals applying A then B."""
+        import random
+        for seed in self.SEEDS:
+            rng = random.Random(seed)
+            text = self._text(rng)
+            op_a = _random_operation(rng, len(text))
+            op_b = _random_operation(rng, len(op_a.apply(text)))
+
+            assert op_a.compose(op_b).apply(text) == op_b.apply(op_a.apply(text)), seed
+
+    def test_lagging_client_converges(self):
+        """Test a client behind by several versions ends up with the server's text."""
+        import random
+        for seed in self.SEEDS:
+            rng = random.Random(seed)
+            text = self._text(rng)
+            doc = OTDocument(text)
+            client_op = _random_operation(rng, len(text))
+
+            history = []
+            for _ in range(rng.randint(1, 5)):
+                op = _random_operation(rng, len(doc.content))
+                doc.apply_operation(op)
+                history.append(op)
+
+            # Server transforms the client's operation up to its current version
+            assert doc.apply_operation(doc.transform_operation(client_op, from_version=0))
+
+            # Client transforms the missed history against its own pending operation
+            client_text = client_op.apply(text)
+            pending = client_op
+            for op in history:
+                pending, op_prime = transform(pending, op)
+                client_text = op_prime.apply(client_text)
+
+            assert client_text == doc.content, seed
+
+    def test_positional_round_trip(self):
+        """Test the positional view rebuilds the same operation."""
+        import random
+        for seed in self.SEEDS:
+            rng = random.Random(seed)
+            text = self._text(rng)
+            op = _random_operation(rng, len(text))
+
+            rebuilt = TextOperation(op.operations)
+
+            assert rebuilt == op, seed
+            assert TextOperation.from_components(op.to_components()) == op
+
+    def test_overlapping_deletes_remove_once(self):
+        """Test overlapping concurrent deletes don't delete extra text."""
+        text = "0123456789"
+        op_a = TextOperation().retain(2).delete(5)   # removes 23456
+        op_b = TextOperation().retain(4).delete(5)   # removes 45678
+
+        a_prime, b_prime = transform(op_a, op_b)
+
+        assert b_prime.apply(op_a.apply(text)) == "019"
+        assert a_prime.apply(op_b.apply(text)) == "019"
+
+    def test_transform_size_is_linear(self):
+        """Test transforming many-range operations keeps component counts linear."""
+        op_a = TextOperation()
+        op_b = TextOperation()
+        for _ in range(2000):
+            op_a.retain(3).insert("a").delete(1)
+            op_b.retain(2).delete(1).insert("b")
+
+        a_prime, b_prime = transform(op_a, op_b)
+
+        assert len(a_prime.components) <= len(op_a.components) + len(op_b.components)
+        assert len(b_prime.components) <= len(op_a.components) + len(op_b.components)
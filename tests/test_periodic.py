@@ -0,0 +1,59 @@
+"""Tests for the periodic background task helper."""
+import asyncio
+
+import pytest
+
+from resoftai.services.periodic import PeriodicTask
+
+
+@pytest.mark.asyncio
+class TestPeriodicTask:
+    """Test scheduling, waking and stopping."""
+
+    async def test_runs_every_interval_and_survives_errors(self):
+        """Test the callback keeps running after raising."""
+        calls = []
+
+        async def callback():
+            calls.append(1)
+            raise RuntimeError("boom")
+
+        task = PeriodicTask(callback, 0.01, "test")
+        task.start()
+        await asyncio.sleep(0.1)
+        await task.stop()
+
+        assert len(calls) >= 3
+        assert not task.running
+
+    async def test_wake_runs_before_the_interval(self):
+        """Test wake() calls the callback without waiting for the interval."""
+        called = asyncio.Event()
+
+        async def callback():
+            called.set()
+
+        task = PeriodicTask(callback, 60, "test")
+        task.start()
+        try:
+            await asyncio.sleep(0)
+            assert not called.is_set()
+            task.wake()
+            await asyncio.wait_for(called.wait(), 1)
+        finally:
+            await task.stop()
+
+    async def test_run_on_start_and_on_stop(self):
+        """Test the optional first call and the final call after stopping."""
+        calls = []
+
+        async def callback():
+            calls.append(1)
+
+        task = PeriodicTask(callback, 60, "test", run_on_start=True, run_on_stop=True)
+        task.start()
+        await asyncio.sleep(0.01)
+        assert calls == [1]
+
+        await task.stop()
+        assert calls == [1, 1]
@@ -0,0 +1,139 @@
+"""Tests for write-coalesced popularity counters."""
+import pytest
+from unittest.mock import AsyncMock
+
+from sqlalchemy import Column, Integer, select
+from sqlalchemy.orm import declarative_base
+
+from resoftai.models.popularity import PopularityDaily
+from resoftai.services.popularity_counters import (
+    PopularityCounters,
+    register_counter_target,
+)
+from resoftai.utils import cache
+
+ItemBase = declarative_base()
+
+
+class CountedItem(ItemBase):
+    """Minimal table with counter columns."""
+    __tablename__ = "counted_items"
+    id = Column(Integer, primary_key=True)
+    downloads = Column(Integer, default=0)
+    views = Column(Integer, default=0)
+
+
+register_counter_target("counted_item", CountedItem, ("downloads", "views"))
+
+
+@pytest.fixture
+async def session_factory(make_session_factory):
+    """Session factory bound to an in-memory database."""
+    return await make_session_factory(ItemBase.metadata, PopularityDaily.__table__, rows={
+        CountedItem.__table__: [{"id": i, "downloads": 0, "views": 0} for i in range(1, 4)]
+    })
+
+
+async def _downloads(factory, item_id):
+    async with factory() as session:
+        result = await session.execute(
+            select(CountedItem.__table__.c.downloads).where(CountedItem.__table__.c.id == item_id)
+        )
+        return result.scalar_one()
+
+
+@pytest.mark.asyncio
+class TestPopularityCounters:
+    """Test buffering, flushing and trending."""
+
+    async def test_increments_are_coalesced(self, session_factory):
+        """Test many increments become one row update."""
+        counters = PopularityCounters(use_redis=False, session_factory=session_factory)
+
+        for _ in range(50):
+            await counters.increment("counted_item", 1, "downloads")
+        await counters.increment("counted_item", 2, "downloads", 3)
+
+        assert counters.pending()[("counted_item", 1, "downloads")] == 50
+        assert await _downloads(session_factory, 1) == 0
+
+        rows = await counters.flush()
+
+        assert rows == 2
+        assert counters.pending() == {}
+        assert await _downloads(session_factory, 1) == 50
+        assert await _downloads(session_factory, 2) == 3
+        assert await counters.flush() == 0
+
+    async def test_unregistered_counter_ignored(self, session_factory):
+        """Test unknown targets and columns are not buffered."""
+        counters = PopularityCounters(use_redis=False, session_factory=session_factory)
+
+        await counters.increment("counted_item", 1, "id")
+        await counters.increment("unknown", 1, "downloads")
+
+        assert counters.pending() == {}
+
+    async def test_trending_from_daily_counts(self, session_factory):
+        """Test trending sums daily counts across flushes."""
+        counters = PopularityCounters(use_redis=False, session_factory=session_factory)
+
+        await counters.increment("counted_item", 1, "downloads", 2)
+        await counters.increment("counted_item", 3, "downloads", 5)
+        await counters.flush()
+        await counters.increment("counted_item", 1, "downloads", 4)
+        await counters.increment("counted_item", 2, "views", 100)
+        await counters.flush()
+
+        async with session_factory() as session:
+            trending = await counters.get_trending(session, "counted_item", ("downloads",))
+
+        assert trending == [(1, 6), (3, 5)]
+
+    async def test_failed_flush_requeues(self, session_factory):
+        """Test increments survive a failed flush."""
+        counters = PopularityCounters(use_redis=False, session_factory=session_factory)
+        await counters.increment("counted_item", 1, "downloads", 7)
+
+        async def broken_apply(db, increments):
+            raise RuntimeError("database unavailable")
+
+        counters._apply = broken_apply
+        with pytest.raises(RuntimeError):
+            await counters.flush()
+
+        assert counters.pending()[("counted_item", 1, "downloads")] == 7
+
+    async def test_redis_buffer_shared(self, session_factory, fake_redis):
+        """Test increments go through Redis when it is available."""
+        counters = PopularityCounters(use_redis=True, session_factory=session_factory)
+
+        await counters.increment("counted_item", 1, "downloads")
+        await counters.increment("counted_item", 1, "downloads")
+
+        assert counters.pending() == {}
+        assert fake_redis.store["resoftai:counters:pending"] == {"counted_item:1:downloads": 2}
+
+        await counters.flush()
+
+        assert await _downloads(session_factory, 1) == 2
+        assert fake_redis.store == {}
+
+    async def test_failed_redis_read_is_retried(self, session_factory, fake_redis, monkeypatch):
+        """Test counts renamed away by a drain whose read failed are picked up by the next flush."""
+        monkeypatch.setattr(cache.cache_manager, "_unread_drains", {})
+        counters = PopularityCounters(use_redis=True, session_factory=session_factory)
+        await counters.increment("counted_item", 1, "downloads", 3)
+
+        hgetall = fake_redis.hgetall
+        fake_redis.hgetall = AsyncMock(side_effect=ConnectionError("redis timeout"))
+        await counters.flush()
+        assert await _downloads(session_factory, 1) == 0
+
+        fake_redis.hgetall = hgetall
+        await counters.increment("counted_item", 1, "downloads", 2)
+        await counters.flush()
+
+        assert await _downloads(session_factory, 1) == 5
+        assert fake_redis.store == {}
+        assert cache.cache_manager._unread_drains == {}
@@ -0,0 +1,123 @@
+"""Tests for cached principal resolution."""
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from resoftai.auth import dependencies
+from resoftai.auth.principal import Principal, PrincipalCache
+from resoftai.auth.security import create_access_token
+from resoftai.crud import enterprise as enterprise_crud
+from resoftai.crud.user import update_user
+from resoftai.models.enterprise import Permission, Role, RolePermission, UserRole
+from resoftai.models.user import User
+from resoftai.utils import cache
+
+
+@pytest.fixture
+async def rbac_db(make_session_factory, monkeypatch):
+    """In-memory users and RBAC tables with a statement counter, without Redis."""
+    monkeypatch.setattr(cache, "redis_client", None)
+    manager = cache.CacheManager()
+    monkeypatch.setattr(enterprise_crud, "cache_manager", manager)
+    monkeypatch.setattr("resoftai.crud.user.cache_manager", manager)
+    monkeypatch.setattr(dependencies, "principal_cache", PrincipalCache(manager))
+
+    factory = await make_session_factory(
+        *(model.__table__ for model in (User, Role, Permission, RolePermission, UserRole))
+    )
+
+    statements = []
+    event.listen(factory.kw["bind"].sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    async with factory() as session:
+        user = User(username="alice", email="alice@example.com", password_hash="x", role="user")
+        session.add(user)
+        role = Role(name="Editor", code="editor")
+        session.add(role)
+        session.add_all([
+            Permission(code="project.read", name="Read", resource_type="project"),
+            Permission(code="project.write", name="Write", resource_type="project"),
+        ])
+        await session.commit()
+        statements.clear()
+        yield session, statements, user, role
+
+
+async def authenticate(db, user):
+    """Resolve a fresh access token for a user."""
+    token = create_access_token({"sub": user.username, "user_id": user.id})
+    return await dependencies.get_current_user(token=token, db=db)
+
+
+@pytest.mark.asyncio
+class TestPrincipalCache:
+    """Test authentication and authorization from the cache."""
+
+    async def test_steady_state_makes_no_queries(self, rbac_db):
+        """Test repeat authentications are served without database queries."""
+        db, statements, user, _ = rbac_db
+
+        principal = await authenticate(db, user)
+        loads = len(statements)
+        for _ in range(10):
+            assert await authenticate(db, user) == principal
+
+        assert isinstance(principal, Principal)
+        assert principal.username == "alice"
+        assert principal.permissions == frozenset()
+        assert loads == 2
+        assert len(statements) == loads
+
+    async def test_role_assignment_invalidates(self, rbac_db):
+        """Test assigning a role evicts the user's principal."""
+        db, _, user, role = rbac_db
+        await enterprise_crud.assign_permission_to_role(db, role.id, 1)
+        assert not (await authenticate(db, user)).has_permission("project.read")
+
+        await enterprise_crud.assign_role_to_user(db, user.id, role.id)
+
+        principal = await authenticate(db, user)
+        assert principal.has_permission("project.read")
+        assert principal.role_ids == (role.id,)
+
+    async def test_role_permission_change_invalidates_holders(self, rbac_db):
+        """Test granting a permission to a role evicts every holder of the role."""
+        db, _, user, role = rbac_db
+        await enterprise_crud.assign_role_to_user(db, user.id, role.id)
+        assert not (await authenticate(db, user)).has_permission("project.write")
+
+        await enterprise_crud.assign_permission_to_role(db, role.id, 2)
+
+        assert (await authenticate(db, user)).has_permission("project.write")
+
+    async def test_deactivation_invalidates(self, rbac_db):
+        """Test deactivated users are rejected right after the update."""
+        db, _, user, _ = rbac_db
+        await dependencies.get_current_active_user(await authenticate(db, user))
+
+        await update_user(db, user.id, is_active=False)
+
+        with pytest.raises(HTTPException) as exc_info:
+            await dependencies.get_current_active_user(await authenticate(db, user))
+        assert exc_info.value.status_code == 400
+
+    async def test_require_permission(self, rbac_db):
+        """Test the permission dependency checks the cached permission set."""
+        db, _, user, role = rbac_db
+        await enterprise_crud.assign_role_to_user(db, user.id, role.id)
+        await enterprise_crud.assign_permission_to_role(db, role.id, 1)
+        principal = await authenticate(db, user)
+
+        assert await dependencies.require_permission("project.read")(principal) is principal
+        with pytest.raises(HTTPException) as exc_info:
+            await dependencies.require_permission("project.write")(principal)
+        assert exc_info.value.status_code == 403
+
+    async def test_check_user_permission(self, rbac_db):
+        """Test the uncached check tests one permission code."""
+        db, _, user, role = rbac_db
+        await enterprise_crud.assign_role_to_user(db, user.id, role.id)
+        await enterprise_crud.assign_permission_to_role(db, role.id, 1)
+
+        assert await enterprise_crud.check_user_permission(db, user.id, "project.read") is True
+        assert await enterprise_crud.check_user_permission(db, user.id, "project.write") is False
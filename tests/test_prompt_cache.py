@@ -0,0 +1,203 @@
+"""Tests for cache-aware prompt layout and cached-token usage."""
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from sqlalchemy import select
+
+from resoftai.core.agent import Agent, AgentRole
+from resoftai.core.message_bus import MessageBus
+from resoftai.core.state import ProjectState
+from resoftai.llm.base import LLMConfig, LLMResponse, ModelProvider, layout_messages, normalize_usage
+from resoftai.llm.providers.anthropic_provider import AnthropicProvider
+from resoftai.models.performance_metrics import LLMUsageMetrics
+from resoftai.services.llm_usage import LLMUsageRecorder, llm_usage_recorder
+
+
+class PromptAgent(Agent):
+    """Minimal concrete agent."""
+
+    name = "Prompt Agent"
+    system_prompt = "You are a long, static system prompt."
+    capabilities = []
+    responsible_stages = []
+
+    async def process_request(self, message):
+        pass
+
+    async def handle_task_assignment(self, message):
+        pass
+
+
+@patch("resoftai.llm.factory.LLMFactory.create")
+def make_agent(mock_create):
+    """Architect agent on a small project with a fake LLM."""
+    llm = MagicMock()
+    llm.generate = AsyncMock(return_value=LLMResponse(
+        content="ok", model="m", provider=ModelProvider.DEEPSEEK,
+        usage=normalize_usage({"prompt_tokens": 1000, "prompt_cache_hit_tokens": 800,
+                               "completion_tokens": 10, "total_tokens": 1010})
+    ))
+    mock_create.return_value = llm
+    state = ProjectState(name="Shop", description="Online shop", requirements={"goal": "Sell books"})
+    config = LLMConfig(provider=ModelProvider.DEEPSEEK, api_key="k", model_name="m")
+    return PromptAgent(AgentRole.ARCHITECT, MessageBus(), state, llm_config=config)
+
+
+class TestPromptLayout:
+    """Test segments are ordered static, semi-static, dynamic."""
+
+    def test_openai_layout_puts_context_before_request(self):
+        """Test the context leads the user message after the system prompt."""
+        messages = layout_messages("Design the API.", "System", context="Project: Shop")
+
+        assert messages == [
+            {"role": "system", "content": "System"},
+            {"role": "user", "content": "Project: Shop\n\nDesign the API."},
+        ]
+
+    def test_anthropic_layout_marks_cache_breakpoints(self):
+        """Test the system prompt and the context carry cache_control breakpoints."""
+        system, messages = AnthropicProvider._layout("Design the API.", "System", "Project: Shop")
+
+        assert system == [{"type": "text", "text": "System", "cache_control": {"type": "ephemeral"}}]
+        assert messages[0]["content"] == [
+            {"type": "text", "text": "Project: Shop", "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": "Design the API."},
+        ]
+
+    @pytest.mark.asyncio
+    async def test_agent_moves_context_ahead_of_request(self):
+        """Test the context embedded in an agent prompt is sent as its own segment."""
+        agent = make_agent()
+        context = agent.get_context_from_state()
+
+        await agent.generate(f"Design an architecture based on:\n\n{context}\n\nInclude a diagram.")
+
+        kwargs = agent.llm.generate.call_args.kwargs
+        assert kwargs["context"] == context
+        assert context not in kwargs["prompt"]
+        assert agent.CONTEXT_REFERENCE in kwargs["prompt"]
+
+    @pytest.mark.asyncio
+    async def test_prompt_without_context_is_unchanged(self):
+        """Test prompts that do not embed the context are passed through."""
+        agent = make_agent()
+        agent.get_context_from_state()
+
+        await agent.generate("Say hello.")
+
+        assert "context" not in agent.llm.generate.call_args.kwargs
+        assert agent.llm.generate.call_args.kwargs["prompt"] == "Say hello."
+
+
+class TestCachedUsage:
+    """Test cached and uncached prompt tokens are reported."""
+
+    def test_deepseek_usage(self):
+        """Test DeepSeek cache hits are read from prompt_cache_hit_tokens."""
+        usage = normalize_usage({"prompt_tokens": 1000, "prompt_cache_hit_tokens": 768,
+                                 "prompt_cache_miss_tokens": 232})
+
+        assert usage["cached_prompt_tokens"] == 768
+        assert usage["uncached_prompt_tokens"] == 232
+
+    def test_openai_compatible_usage(self):
+        """Test cached tokens are read from prompt_tokens_details."""
+        usage = normalize_usage({"prompt_tokens": 500, "prompt_tokens_details": {"cached_tokens": 256}})
+
+        assert usage["cached_prompt_tokens"] == 256
+        assert usage["uncached_prompt_tokens"] == 244
+
+    def test_no_cache_fields(self):
+        """Test providers without prompt caching report nothing cached."""
+        usage = normalize_usage({"prompt_tokens": 10, "total_tokens": 20})
+
+        assert usage["cached_prompt_tokens"] == 0
+        assert usage["uncached_prompt_tokens"] == 10
+
+    def test_anthropic_usage_counts_cache_reads_as_prompt(self):
+        """Test Anthropic cache reads and writes are added to the prompt tokens."""
+        usage = AnthropicProvider._usage(SimpleNamespace(
+            input_tokens=50, output_tokens=20, cache_read_input_tokens=1200, cache_creation_input_tokens=0
+        ))
+
+        assert usage["prompt_tokens"] == 1250
+        assert usage["cached_prompt_tokens"] == 1200
+        assert usage["uncached_prompt_tokens"] == 50
+        assert usage["total_tokens"] == 1270
+
+    def test_anthropic_cache_writes(self):
+        """Test Anthropic cache_creation_input_tokens are reported as cache writes."""
+        usage = normalize_usage({"prompt_tokens": 900, "cache_creation_input_tokens": 800})
+        written = AnthropicProvider._usage(SimpleNamespace(
+            input_tokens=50, output_tokens=20, cache_read_input_tokens=0, cache_creation_input_tokens=700
+        ))
+
+        assert usage["cache_write_tokens"] == 800
+        assert written["cache_write_tokens"] == 700
+        assert written["prompt_tokens"] == 750
+
+    @pytest.mark.asyncio
+    async def test_agent_tracks_cached_tokens(self):
+        """Test the agent accumulates cached tokens and reports them per call."""
+        agent = make_agent()
+
+        await agent.generate("One")
+        await agent.generate("Two")
+
+        assert agent.cached_prompt_tokens == 1600
+        assert agent.prompt_reports[-1]["cached_prompt_tokens"] == 800
+
+
+@pytest.fixture
+async def usage_db(make_session_factory):
+    """File-backed llm_usage_metrics table."""
+    return await make_session_factory(LLMUsageMetrics.__table__, shared=True)
+
+
+class TestUsageRecording:
+    """Test LLM usage reaches the usage metrics table."""
+
+    @pytest.mark.asyncio
+    async def test_agent_queues_usage_of_owned_projects(self):
+        """Test agents queue their usage for the project owner, and skip projects without one."""
+        agent = make_agent()
+        await agent.generate("Anonymous")
+        assert llm_usage_recorder.get_stats()["queued"] == 0
+
+        agent.project_state.metadata.update(user_id=7, project_id=3)
+        await agent.generate("Owned")
+
+        record = llm_usage_recorder._queue[-1]
+        assert (record["user_id"], record["project_id"], record["agent_role"]) == (7, 3, "architect")
+        assert (record["prompt_tokens"], record["cached_prompt_tokens"]) == (1000, 800)
+
+    @pytest.mark.asyncio
+    async def test_flush_writes_usage_rows(self, usage_db):
+        """Test queued usage is written with create_llm_usage_metrics."""
+        recorder = LLMUsageRecorder(session_factory=usage_db)
+        recorder.record(7, "anthropic", "claude", normalize_usage({
+            "prompt_tokens": 900, "completion_tokens": 30, "cache_read_input_tokens": 600,
+            "cache_creation_input_tokens": 250,
+        }), project_id=3)
+
+        assert await recorder.flush() == 1
+
+        async with usage_db() as session:
+            row = (await session.execute(select(LLMUsageMetrics))).scalar_one()
+        assert (row.total_tokens, row.cached_prompt_tokens, row.cache_write_tokens) == (930, 600, 250)
+        assert recorder.get_stats()["written"] == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_keeps_records(self, usage_db):
+        """Test records are kept for the next flush when the write fails."""
+        recorder = LLMUsageRecorder(session_factory=usage_db)
+        recorder.record(7, "deepseek", "deepseek-chat", {"prompt_tokens": 10, "completion_tokens": 5})
+
+        with patch("resoftai.services.llm_usage.create_llm_usage_metrics", side_effect=RuntimeError("down")):
+            with pytest.raises(RuntimeError):
+                await recorder.flush()
+
+        assert recorder.get_stats()["queued"] == 1
+        assert await recorder.flush() == 1
@@ -0,0 +1,218 @@
+"""Tests for counter-based quota enforcement."""
+import asyncio
+import pytest
+from sqlalchemy import func, select
+
+from resoftai.crud import enterprise as enterprise_crud
+from resoftai.models.enterprise import Quota, QuotaCounter, ResourceType, UsageRecord
+from resoftai.services.quota_engine import QuotaEngine, RELEASE_SCRIPT, RESERVE_SCRIPT
+from resoftai.utils import cache
+
+
+async def reserve_script(redis, keys, args):
+    """The quota reservation script, run against the fake store."""
+    amount = args[0]
+    for index, key in enumerate(keys):
+        limit, _, _, seed = args[1 + index * 4:5 + index * 4]
+        if key not in redis.store:
+            if seed == "":
+                return [-1, index + 1]
+            redis.store[key] = int(seed)
+        if redis.store[key] + amount > limit:
+            return [0, index + 1, redis.store[key]]
+    result = [1]
+    for index, key in enumerate(keys):
+        warn_at = args[1 + index * 4 + 1]
+        redis.store[key] += amount
+        result += [redis.store[key], int(redis.store[key] - amount < warn_at <= redis.store[key])]
+    return result
+
+
+async def release_script(redis, keys, args):
+    """The quota release script, run against the fake store."""
+    for key in keys:
+        if key in redis.store:
+            redis.store[key] -= args[0]
+    return 1
+
+
+@pytest.fixture
+def fake_redis(fake_redis):
+    """Fake Redis running the quota scripts."""
+    fake_redis.scripts.update({RESERVE_SCRIPT: reserve_script, RELEASE_SCRIPT: release_script})
+    return fake_redis
+
+
+@pytest.fixture
+async def quota_db(make_session_factory, monkeypatch):
+    """File-backed quota tables (shared by concurrent sessions) and a fresh L1."""
+    monkeypatch.setattr(cache, "redis_client", None)
+    monkeypatch.setattr(cache, "cache_manager", cache.CacheManager())
+    monkeypatch.setattr(enterprise_crud, "cache_manager", cache.cache_manager)
+
+    return await make_session_factory(Quota.__table__, QuotaCounter.__table__, UsageRecord.__table__, shared=True)
+
+
+async def add_quota(factory, limit, period=None, threshold=0.8, org_id=1):
+    """Create an API_CALLS quota."""
+    async with factory() as session:
+        quota = await enterprise_crud.create_quota(
+            session, org_id, ResourceType.API_CALLS, limit, period=period, warning_threshold=threshold
+        )
+        return quota.id
+
+
+async def counters(factory):
+    """Current counter rows as {(quota_id, period_key): used}."""
+    async with factory() as session:
+        result = await session.execute(select(QuotaCounter.quota_id, QuotaCounter.period_key, QuotaCounter.used))
+        return {(quota_id, key): used for quota_id, key, used in result}
+
+
+async def reserve(engine, factory, amount=1):
+    """Reserve API calls for organization 1."""
+    async with factory() as session:
+        return await engine.reserve(session, 1, ResourceType.API_CALLS, amount)
+
+
+@pytest.mark.asyncio
+class TestQuotaEngineDatabase:
+    """Test enforcement on the counters table (no Redis)."""
+
+    async def test_enforces_limit_and_batches_records(self, quota_db):
+        """Test reservations stop at the limit and records are written in one flush."""
+        quota_id = await add_quota(quota_db, 5)
+        engine = QuotaEngine(session_factory=quota_db)
+
+        decisions = [await reserve(engine, quota_db) for _ in range(7)]
+
+        assert [d.allowed for d in decisions] == [True] * 5 + [False] * 2
+        assert decisions[4].remaining == 0
+        assert "Limit: 5, Current: 5" in decisions[5].message
+        assert await counters(quota_db) == {(quota_id, "total"): 5}
+
+        assert await engine.flush() == 5
+        async with quota_db() as session:
+            assert await session.scalar(select(func.count(UsageRecord.id))) == 5
+
+    async def test_all_quotas_or_none(self, quota_db):
+        """Test a reservation rejected by one quota consumes no other quota."""
+        daily = await add_quota(quota_db, 10, period="daily")
+        total = await add_quota(quota_db, 3)
+        engine = QuotaEngine(session_factory=quota_db)
+
+        allowed = [(await reserve(engine, quota_db)).allowed for _ in range(4)]
+
+        assert allowed == [True, True, True, False]
+        used = await counters(quota_db)
+        assert used[(total, "total")] == 3
+        assert sum(value for (quota_id, _), value in used.items() if quota_id == daily) == 3
+
+    async def test_warning_once_per_period(self, quota_db):
+        """Test only the reservation crossing the threshold reports a warning."""
+        await add_quota(quota_db, 10, threshold=0.8)
+        engine = QuotaEngine(session_factory=quota_db)
+        warnings = []
+
+        async def listener(org_id, resource_type, spec, used):
+            warnings.append(used)
+
+        engine.add_warning_listener(listener)
+        decisions = [await reserve(engine, quota_db, amount=3) for _ in range(3)]
+
+        assert [d.warning for d in decisions] == [False, False, True]
+        assert warnings == [9]
+
+    async def test_concurrent_reservations(self, quota_db):
+        """Test concurrent consumers never exceed the limit."""
+        quota_id = await add_quota(quota_db, 20)
+        engine = QuotaEngine(session_factory=quota_db)
+
+        async with quota_db() as session:
+            await engine.get_specs(session, 1, ResourceType.API_CALLS)
+            await session.commit()
+            decisions = await asyncio.gather(*[
+                engine.reserve(session, 1, ResourceType.API_CALLS) for _ in range(40)
+            ])
+
+        assert sum(d.allowed for d in decisions) == 20
+        assert (await counters(quota_db))[(quota_id, "total")] == 20
+
+    async def test_release_refunds(self, quota_db):
+        """Test released units can be reserved again."""
+        await add_quota(quota_db, 1)
+        engine = QuotaEngine(session_factory=quota_db)
+        assert (await reserve(engine, quota_db)).allowed
+        async with quota_db() as session:
+            specs = await engine.get_specs(session, 1, ResourceType.API_CALLS)
+
+        await engine.release(1, ResourceType.API_CALLS, specs)
+
+        assert (await reserve(engine, quota_db)).allowed
+
+    async def test_new_quota_applies_immediately(self, quota_db):
+        """Test creating a quota evicts the cached definitions."""
+        engine = QuotaEngine(session_factory=quota_db)
+        assert (await reserve(engine, quota_db)).limit is None
+
+        await add_quota(quota_db, 1)
+
+        assert (await reserve(engine, quota_db)).limit == 1
+
+
+@pytest.mark.asyncio
+class TestQuotaEngineRedis:
+    """Test enforcement on Redis counters."""
+
+    async def test_one_round_trip_and_flushed_counters(self, quota_db, fake_redis):
+        """Test reservations use one script call and flushes persist the counters."""
+        quota_id = await add_quota(quota_db, 5)
+        engine = QuotaEngine(session_factory=quota_db)
+
+        allowed = [(await reserve(engine, quota_db)).allowed for _ in range(6)]
+        await engine.flush()
+
+        assert allowed == [True] * 5 + [False]
+        assert fake_redis.calls == 6
+        assert await counters(quota_db) == {(quota_id, "total"): 5}
+
+    async def test_reseeds_after_redis_reset(self, quota_db, fake_redis):
+        """Test counters lost from Redis are restored from the database."""
+        await add_quota(quota_db, 5)
+        engine = QuotaEngine(session_factory=quota_db)
+        for _ in range(3):
+            await reserve(engine, quota_db)
+        await engine.flush()
+
+        fake_redis.store.clear()
+        allowed = [(await reserve(engine, quota_db)).allowed for _ in range(3)]
+
+        assert allowed == [True, True, False]
+
+
+@pytest.mark.asyncio
+class TestQuotaCrud:
+    """Test the counter-backed CRUD helpers."""
+
+    async def test_record_usage_and_check_quota(self, quota_db):
+        """Test recorded usage is counted without summing history."""
+        await add_quota(quota_db, 10)
+        async with quota_db() as session:
+            await enterprise_crud.record_usage(session, 1, ResourceType.API_CALLS, 8)
+
+            assert await enterprise_crud.check_quota(session, 1, ResourceType.API_CALLS, 2) == (True, None)
+            allowed, message = await enterprise_crud.check_quota(session, 1, ResourceType.API_CALLS, 3)
+
+        assert allowed is False
+        assert "Current: 8" in message
+
+    def test_period_keys(self):
+        """Test period buckets and their end times."""
+        from datetime import datetime
+        now = datetime(2026, 12, 31, 23, 59, 30)
+
+        assert enterprise_crud.quota_period_key("daily", now) == "20261231"
+        assert enterprise_crud.quota_period_key("monthly", now) == "202612"
+        assert enterprise_crud.quota_period_key(None, now) == "total"
+        assert enterprise_crud.quota_period_end("monthly", now) == datetime(2027, 1, 1)
+        assert enterprise_crud.quota_period_end("minute", now) == datetime(2027, 1, 1)
@@ -0,0 +1,229 @@
+"""Tests for GCRA rate limiting and the rate limit middleware."""
+import json
+import time
+import pytest
+
+from resoftai.api.middleware import RateLimitMiddleware, RateLimitPolicy
+from resoftai.auth.security import create_access_token
+from resoftai.utils import cache
+from resoftai.utils.rate_limit import GCRA_SCRIPT, RateLimiter, gcra
+
+
+async def gcra_script(redis, keys, args):
+    """The rate limit script, run with the in-process GCRA."""
+    key = keys[0]
+    limit, period, quantity = args
+    tat, granted, remaining, reset_after, retry_after = gcra(
+        redis.store.get(key, 0.0), time.monotonic(), limit, period, quantity
+    )
+    redis.store[key] = tat
+    return [granted, remaining, f"{reset_after:.6f}", f"{retry_after:.6f}"]
+
+
+@pytest.fixture
+def fake_redis(fake_redis):
+    """Fake Redis running the rate limit script."""
+    fake_redis.scripts[GCRA_SCRIPT] = gcra_script
+    return fake_redis
+
+
+@pytest.fixture
+def no_redis(monkeypatch):
+    """Run without Redis."""
+    monkeypatch.setattr(cache, "redis_client", None)
+
+
+class TestGCRA:
+    """Test the GCRA arithmetic."""
+
+    def test_burst_then_steady_rate(self):
+        """Test a full burst is allowed, then one request per emission interval."""
+        tat = 0.0
+        for _ in range(10):
+            tat, granted, _, _, _ = gcra(tat, 100.0, 10, 60)
+            assert granted == 1
+
+        tat, granted, remaining, _, retry_after = gcra(tat, 100.0, 10, 60)
+        assert (granted, remaining) == (0, 0)
+        assert retry_after == pytest.approx(6.0)
+
+        _, granted, _, _, _ = gcra(tat, 106.0, 10, 60)
+        assert granted == 1
+
+    def test_partial_grant(self):
+        """Test a batch request receives what is left rather than nothing."""
+        tat, granted, remaining, reset_after, _ = gcra(0.0, 0.0, 10, 60, quantity=4)
+        assert (granted, remaining) == (4, 6)
+        assert reset_after == pytest.approx(24.0)
+
+        _, granted, remaining, _, _ = gcra(tat, 0.0, 10, 60, quantity=8)
+        assert (granted, remaining) == (6, 0)
+
+
+@pytest.mark.asyncio
+class TestRateLimiter:
+    """Test leasing, local rejection and fallback."""
+
+    async def test_local_fallback_enforces_limit(self, no_redis):
+        """Test the limit is enforced without Redis instead of failing open."""
+        limiter = RateLimiter(cache.CacheManager())
+
+        results = [await limiter.hit("ip:1", 5, 60) for _ in range(7)]
+
+        assert [result.allowed for result in results] == [True] * 5 + [False] * 2
+        assert results[0].remaining == 4
+        assert results[5].retry_after == pytest.approx(12.0, abs=0.1)
+
+    async def test_rejections_skip_redis(self, fake_redis):
+        """Test a rejected key is answered locally until it may retry."""
+        limiter = RateLimiter(cache.CacheManager())
+        for _ in range(3):
+            await limiter.hit("ip:1", 3, 60)
+        calls = fake_redis.calls
+
+        for _ in range(20):
+            assert not (await limiter.hit("ip:1", 3, 60)).allowed
+
+        assert fake_redis.calls == calls + 1
+        assert limiter.stats["local_rejects"] == 19
+
+    async def test_hot_keys_lease_tokens(self, fake_redis):
+        """Test a busy key costs well under one round trip per request."""
+        limiter = RateLimiter(cache.CacheManager())
+
+        results = [await limiter.hit("org:1", 2000, 60) for _ in range(400)]
+
+        assert all(result.allowed for result in results)
+        assert fake_redis.calls < 20
+        # Leased tokens are charged to the shared bucket up front
+        assert results[-1].remaining <= 2000 - 400
+
+    async def test_workers_share_the_limit(self, fake_redis):
+        """Test two limiters on one Redis never admit more than the limit."""
+        workers = [RateLimiter(cache.CacheManager()) for _ in range(2)]
+
+        allowed = 0
+        for index in range(300):
+            allowed += (await workers[index % 2].hit("org:1", 100, 60)).allowed
+
+        assert allowed == 100
+
+    async def test_redis_errors_fall_back(self, fake_redis):
+        """Test a failing Redis falls back to the local limiter."""
+        fake_redis.fail = True
+        limiter = RateLimiter(cache.CacheManager())
+
+        results = [await limiter.hit("ip:1", 2, 60) for _ in range(3)]
+
+        assert [result.allowed for result in results] == [True, True, False]
+        assert limiter.stats["fallbacks"] >= 2
+
+    async def test_headers(self, no_redis):
+        """Test header values for allowed and rejected requests."""
+        limiter = RateLimiter(cache.CacheManager())
+
+        allowed = (await limiter.hit("ip:1", 1, 60)).headers()
+        rejected = (await limiter.hit("ip:1", 1, 60)).headers()
+
+        assert allowed == {"X-RateLimit-Limit": "1", "X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "60"}
+        assert rejected["Retry-After"] == "60"
+
+
+class FakePolicy(RateLimitPolicy):
+    """Policy with organizations from a dict instead of the database."""
+
+    def __init__(self, organizations):
+        super().__init__()
+        self.organizations = organizations
+        self.lookups = 0
+
+    async def load_organization_limit(self, user_id):
+        self.lookups += 1
+        return self.organizations.get(user_id)
+
+
+async def call(middleware, path="/api/projects", token=None, client="10.0.0.1"):
+    """Send one request through the middleware and collect the response."""
+    headers = [(b"authorization", f"Bearer {token}".encode())] if token else []
+    scope = {"type": "http", "method": "GET", "path": path, "headers": headers, "client": (client, 1234)}
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    await middleware(scope, receive, send)
+    start = messages[0]
+    return start["status"], dict((k.decode(), v.decode()) for k, v in start["headers"]), messages[1]["body"]
+
+
+async def ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+@pytest.mark.asyncio
+class TestRateLimitMiddleware:
+    """Test enforcement at the ASGI layer."""
+
+    async def test_anonymous_limit_by_ip(self, no_redis):
+        """Test anonymous callers are limited per IP with headers and 429s."""
+        middleware = RateLimitMiddleware(ok_app, limiter=RateLimiter(cache.CacheManager()),
+                                         policy=FakePolicy({}))
+        middleware.policy.default_limit = 2
+
+        first = await call(middleware)
+        await call(middleware)
+        status, headers, body = await call(middleware)
+        other_ip = await call(middleware, client="10.0.0.2")
+
+        assert first[0] == 200
+        assert first[1]["x-ratelimit-limit"] == "2"
+        assert first[1]["x-ratelimit-remaining"] == "1"
+        assert status == 429
+        assert int(headers["retry-after"]) >= 1
+        assert json.loads(body)["detail"] == "Rate limit exceeded"
+        assert other_ip[0] == 200
+
+    async def test_organization_tier_and_quota(self, no_redis):
+        """Test members share their organization's tier limit or custom quota."""
+        policy = FakePolicy({1: (10, "professional", None), 2: (10, "professional", None), 3: (20, "enterprise", 50000)})
+        middleware = RateLimitMiddleware(ok_app, limiter=RateLimiter(cache.CacheManager()), policy=policy)
+        tokens = {user_id: create_access_token({"sub": f"u{user_id}", "user_id": user_id}) for user_id in (1, 2, 3, 4)}
+
+        _, headers_1, _ = await call(middleware, token=tokens[1])
+        _, headers_2, _ = await call(middleware, token=tokens[2])
+        _, headers_3, _ = await call(middleware, token=tokens[3])
+        _, headers_4, _ = await call(middleware, token=tokens[4])
+        await call(middleware, token=tokens[1])
+
+        assert headers_1["x-ratelimit-limit"] == "2000"
+        assert headers_2["x-ratelimit-remaining"] == "1998"
+        assert headers_3["x-ratelimit-limit"] == "50000"
+        assert headers_4["x-ratelimit-limit"] == "100"
+        assert policy.lookups == 4
+
+    async def test_logout_and_deactivation_drop_cached_tokens(self, no_redis):
+        """Test a token's user is forgotten on logout and on the user's deactivation."""
+        policy = FakePolicy({})
+        tokens = {user_id: create_access_token({"sub": f"u{user_id}", "user_id": user_id}) for user_id in (1, 2)}
+        for token in tokens.values():
+            await policy.resolve({"headers": [(b"authorization", f"Bearer {token}".encode())]})
+
+        policy.forget_token(tokens[1])
+        policy.invalidate(2)
+
+        assert len(policy._tokens) == 0
+        assert policy.token_ttl < policy.ttl
+
+    async def test_exempt_paths(self, no_redis):
+        """Test health checks are never limited."""
+        middleware = RateLimitMiddleware(ok_app, limiter=RateLimiter(cache.CacheManager()),
+                                         policy=FakePolicy({}))
+        middleware.policy.default_limit = 1
+
+        statuses = [(await call(middleware, path="/health"))[0] for _ in range(3)]
+
+        assert statuses == [200, 200, 200]
@@ -0,0 +1,231 @@
+"""Tests for precomputed marketplace recommendations."""
+import asyncio
+import pytest
+from datetime import date, datetime, timedelta
+from sqlalchemy import Column, Integer, String, func, select
+from sqlalchemy.orm import declarative_base
+
+from resoftai.models.popularity import PopularityDaily
+from resoftai.models.recommendation import RecommendationSnapshot
+from resoftai.services import recommendations
+from resoftai.services.recommendations import (
+    RecommendationEngine,
+    compute_similarities,
+    decayed_scores,
+    register_recommendation_source,
+)
+
+ItemBase = declarative_base()
+
+
+class CatalogItem(ItemBase):
+    """Minimal marketplace item."""
+    __tablename__ = "catalog_items"
+    id = Column(Integer, primary_key=True)
+    status = Column(String(20))
+    downloads = Column(Integer, default=0)
+
+
+class CatalogInstall(ItemBase):
+    """Minimal installation record."""
+    __tablename__ = "catalog_installs"
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer)
+    item_id = Column(Integer)
+
+
+@pytest.fixture(autouse=True)
+def catalog_source(monkeypatch):
+    """Register only the test catalog, hiding sources registered by crud modules."""
+    monkeypatch.setattr(recommendations, "_sources", {})
+    register_recommendation_source(
+        "catalog",
+        CatalogItem,
+        CatalogInstall,
+        "item_id",
+        eligible={"status": "approved"},
+        popularity_field="downloads",
+        trending_metrics=("downloads",),
+    )
+
+
+class TestRecommendationMath:
+    """Test pure similarity and decay helpers."""
+
+    def test_cosine_similarity(self):
+        """Test co-installed items are neighbours with cosine scores."""
+        pairs = [(1, 10), (1, 20), (2, 10), (2, 20), (3, 10), (3, 30)]
+
+        similarities = compute_similarities(pairs)
+
+        assert similarities[20][0] == (10, pytest.approx(2 / (3 * 2) ** 0.5))
+        assert [item for item, _ in similarities[10]] == [20, 30]
+        assert 20 not in dict(similarities[30])
+
+    def test_eligible_and_neighbour_limit(self):
+        """Test ineligible neighbours are dropped and lists are capped."""
+        pairs = [(1, item) for item in range(10)]
+
+        similarities = compute_similarities(pairs, neighbours=3, eligible={1, 2, 3, 4})
+
+        assert len(similarities[0]) == 3
+        assert all(item in {1, 2, 3, 4} for item, _ in similarities[0])
+
+    def test_decay(self):
+        """Test older activity counts less."""
+        today = date(2026, 1, 10)
+        rows = [(1, today, 12), (2, today - timedelta(days=3), 16), (2, today - timedelta(days=6), 8)]
+
+        ranked = decayed_scores(rows, today, half_life_days=3)
+
+        assert [item for item, _ in ranked] == [1, 2]
+        assert dict(ranked)[2] == pytest.approx(16 * 0.5 + 8 * 0.25)
+
+
+@pytest.fixture
+async def session_factory(make_session_factory):
+    """Session factory bound to an in-memory marketplace."""
+    return await make_session_factory(
+        ItemBase.metadata, PopularityDaily.__table__, RecommendationSnapshot.__table__,
+        rows={
+            CatalogItem.__table__: [
+                {"id": 1, "status": "approved", "downloads": 100},
+                {"id": 2, "status": "approved", "downloads": 50},
+                {"id": 3, "status": "approved", "downloads": 10},
+                {"id": 4, "status": "draft", "downloads": 1000},
+                {"id": 5, "status": "approved", "downloads": 5},
+            ],
+            CatalogInstall.__table__: [
+                {"user_id": 1, "item_id": 1}, {"user_id": 1, "item_id": 2},
+                {"user_id": 2, "item_id": 1}, {"user_id": 2, "item_id": 2},
+                {"user_id": 3, "item_id": 1}, {"user_id": 3, "item_id": 3},
+                {"user_id": 3, "item_id": 4},
+                {"user_id": 4, "item_id": 1},
+            ],
+            PopularityDaily.__table__: [
+                {"target": "catalog", "metric": "downloads", "day": datetime.utcnow().date(), "item_id": 5, "count": 40},
+                {"target": "catalog", "metric": "downloads", "day": datetime.utcnow().date(), "item_id": 4, "count": 90},
+            ],
+        }
+    )
+
+
+@pytest.mark.asyncio
+class TestRecommendationEngine:
+    """Test snapshot refresh and serving."""
+
+    async def test_refresh_and_recommend(self, session_factory):
+        """Test user recommendations come from co-installs, excluding installed items."""
+        engine = RecommendationEngine(session_factory=session_factory)
+        written = await engine.refresh_all()
+        assert written["catalog"]["similar"] > 0
+
+        async with session_factory() as session:
+            await engine.recommend_for_user(session, "catalog", 4, limit=3)
+        assert await engine.compute_pending() == 1
+
+        async with session_factory() as session:
+            recommended = await engine.recommend_for_user(session, "catalog", 4, limit=3)
+
+        # Item 2 is co-installed with item 1 most often; draft item 4 never appears
+        assert recommended[0] == 2
+        assert 1 not in recommended
+        assert 4 not in recommended
+
+    async def test_trending_is_decayed_and_padded(self, session_factory):
+        """Test trending ranks recent activity first and skips ineligible items."""
+        engine = RecommendationEngine(session_factory=session_factory)
+        await engine.refresh_all()
+
+        async with session_factory() as session:
+            trending = await engine.get_trending(session, "catalog", days=7, limit=3)
+
+        assert trending == [5, 1, 2]
+
+    async def test_user_snapshot_is_single_lookup_until_invalidated(self, session_factory):
+        """Test stored user recommendations are reused and dropped on install."""
+        engine = RecommendationEngine(session_factory=session_factory)
+        await engine.refresh_all()
+
+        async with session_factory() as session:
+            await engine.recommend_for_user(session, "catalog", 4)
+        await engine.compute_pending()
+
+        async with session_factory() as session:
+            first = await engine.recommend_for_user(session, "catalog", 4)
+
+            await session.execute(CatalogInstall.__table__.insert(), [{"user_id": 4, "item_id": 2}])
+            assert await engine.recommend_for_user(session, "catalog", 4) == first
+
+            await engine.invalidate_user(session, "catalog", 4)
+            await session.commit()
+            await engine.recommend_for_user(session, "catalog", 4)
+        await engine.compute_pending()
+
+        async with session_factory() as session:
+            updated = await engine.recommend_for_user(session, "catalog", 4)
+            count = await session.execute(
+                select(func.count()).select_from(RecommendationSnapshot).where(
+                    RecommendationSnapshot.kind == "user"
+                )
+            )
+
+        assert 2 in first
+        assert 2 not in updated
+        assert count.scalar_one() == 1
+
+    async def test_cold_start_user_gets_trending(self, session_factory):
+        """Test users without installs get trending items."""
+        engine = RecommendationEngine(session_factory=session_factory)
+        await engine.refresh_all()
+
+        async with session_factory() as session:
+            recommended = await engine.recommend_for_user(session, "catalog", 99, limit=2)
+
+        assert recommended == [5, 1]
+
+    async def test_reads_without_snapshots_fall_back_and_queue(self, session_factory):
+        """Test reads before any refresh write nothing and queue the missing snapshots."""
+        engine = RecommendationEngine(session_factory=session_factory)
+
+        async with session_factory() as session:
+            trending = await engine.get_trending(session, "catalog", days=7, limit=3)
+            recommended = await engine.recommend_for_user(session, "catalog", 4, limit=3)
+            count = await session.execute(select(func.count()).select_from(RecommendationSnapshot))
+
+        # All-time popular eligible items; the user's installed item 1 is skipped
+        assert trending == [1, 2, 3]
+        assert recommended == [2, 3, 5]
+        assert count.scalar_one() == 0
+        assert await engine.compute_pending() == 2
+
+        async with session_factory() as session:
+            assert await engine.get_trending(session, "catalog", days=7, limit=3) == [5, 1, 2]
+
+    async def test_background_task_computes_queued_snapshots(self, session_factory):
+        """Test a queued snapshot is stored by the running background task."""
+        engine = RecommendationEngine(session_factory=session_factory, refresh_interval=3600)
+        engine.start()
+        try:
+            await asyncio.sleep(0.05)
+            async with session_factory() as session:
+                await engine.recommend_for_user(session, "catalog", 4)
+            for _ in range(50):
+                await asyncio.sleep(0.01)
+                async with session_factory() as session:
+                    if await engine._lookup(session, "catalog", "user", 4) is not None:
+                        break
+            else:
+                pytest.fail("user snapshot was not computed")
+        finally:
+            await engine.stop()
+
+    async def test_failing_source_does_not_stop_refresh(self, session_factory):
+        """Test a source whose tables are missing is reported and the others still refresh."""
+        register_recommendation_source("broken", CatalogItem, CatalogInstall, "missing_column")
+        engine = RecommendationEngine(session_factory=session_factory)
+
+        written = await engine.refresh_all()
+
+        assert "missing_column" in written["broken"]["error"]
+        assert written["catalog"]["similar"] > 0
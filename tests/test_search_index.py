@@ -0,0 +1,279 @@
+"""Tests for the embedded search index and search service."""
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+from sqlalchemy import JSON, Column, DateTime, Integer, String, Text
+from sqlalchemy.orm import declarative_base
+
+from resoftai.services.search_service import SearchCollection, SearchService
+from resoftai.utils.search_index import (
+    AnyOf, InvertedIndex, SearchResult, edit_distance_at_most_one, tokenize
+)
+
+SearchBase = declarative_base()
+
+
+class SearchableItem(SearchBase):
+    """Minimal searchable table."""
+    __tablename__ = "searchable_items"
+    id = Column(Integer, primary_key=True)
+    name = Column(String(200))
+    description = Column(Text)
+    category = Column(String(50))
+    tags = Column(JSON)
+    downloads = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+def _collection():
+    return SearchCollection(
+        name="item",
+        model=SearchableItem,
+        fields={"name": 3.0, "description": 1.0},
+        filter_fields=("category",),
+        boost_field="downloads",
+    )
+
+
+def _index():
+    index = InvertedIndex()
+    index.add(1, {"name": ("GitHub Integration", 3.0), "description": ("Sync issues and pull requests", 1.0)},
+              tags=["git", "vcs"], attributes={"category": "integration"})
+    index.add(2, {"name": ("Code Formatter", 3.0), "description": ("Format Python code", 1.0)},
+              tags=["python"], attributes={"category": "quality"})
+    index.add(3, {"name": ("Python Linter", 3.0), "description": ("Static analysis for Python", 1.0)},
+              tags=["python", "lint"], attributes={"category": "quality"}, boost=2.0)
+    return index
+
+
+class TestTokenize:
+    """Test text normalization."""
+
+    def test_tokenize_without_stemming(self):
+        """Test stemming can be turned off."""
+        assert tokenize("Studies Plugins", stem=False) == ["studies", "plugins"]
+
+    def test_tokenize(self):
+        """Test lowercasing, stopwords, plural stemming and CJK."""
+        assert tokenize("The FastAPI Plugins for 代码 libraries") == [
+            "fastapi", "plugin", "代", "码", "library"
+        ]
+        assert tokenize(None) == []
+
+    def test_edit_distance(self):
+        """Test single edits and transpositions."""
+        assert edit_distance_at_most_one("python", "pyhton")
+        assert edit_distance_at_most_one("python", "pythn")
+        assert edit_distance_at_most_one("python", "pythons")
+        assert edit_distance_at_most_one("python", "pithon")
+        assert not edit_distance_at_most_one("python", "pyhtno")
+
+
+class TestInvertedIndex:
+    """Test ranking, matching and facets."""
+
+    def test_name_matches_rank_first(self):
+        """Test weighted fields influence ranking."""
+        result = _index().search("python")
+        assert [hit.doc_id for hit in result.hits][0] == 3
+        assert {hit.doc_id for hit in result.hits} == {2, 3}
+
+    def test_all_terms_required(self):
+        """Test multi-term queries prefer documents matching every term."""
+        result = _index().search("python linter")
+        assert [hit.doc_id for hit in result.hits] == [3]
+
+    def test_prefix_and_typo(self):
+        """Test prefix and single-typo matches."""
+        index = _index()
+        assert [hit.doc_id for hit in index.search("form").hits] == [2]
+        assert [hit.doc_id for hit in index.search("githb").hits] == [1]
+        assert index.search("githb", fuzzy=False).total == 0
+
+    def test_filters_tags_and_facets(self):
+        """Test attribute and tag filters and facet counts."""
+        index = _index()
+        result = index.search("python", tags=["lint"])
+        assert [hit.doc_id for hit in result.hits] == [3]
+
+        result = index.search("python", filters={"category": ["quality"]})
+        assert result.facets["category"] == {"quality": 2}
+        assert result.facets["tags"]["python"] == 2
+
+    def test_any_of_filter_and_any_tag(self):
+        """Test an AnyOf filter ORs fields and any_tag needs only one tag."""
+        index = _index()
+        result = index.search("python", filters={"scope": AnyOf({"category": "none", "id": 2})})
+        assert result.total == 0
+
+        index.add(4, {"name": ("Python Docs", 3.0)}, tags=["docs"], attributes={"category": "docs", "owner": 7})
+        result = index.search("python", filters={"scope": AnyOf({"category": "quality", "owner": 7})})
+        assert {hit.doc_id for hit in result.hits} == {2, 3, 4}
+
+        result = index.search("python", tags=["lint", "docs"], any_tag=True)
+        assert {hit.doc_id for hit in result.hits} == {3, 4}
+        assert index.search("python", tags=["lint", "docs"]).total == 0
+
+    def test_update_and_remove(self):
+        """Test re-adding replaces a document and removal drops it."""
+        index = _index()
+        index.add(2, {"name": ("Markdown Renderer", 3.0)})
+        assert index.search("formatter").total == 0
+        assert [hit.doc_id for hit in index.search("markdown").hits] == [2]
+
+        index.remove(2)
+        assert index.search("markdown").total == 0
+        assert len(index) == 2
+
+    def test_pagination(self):
+        """Test limit and offset over the ranked hits."""
+        result = _index().search("python", limit=1, offset=1)
+        assert result.total == 2
+        assert [hit.doc_id for hit in result.hits] == [2]
+
+
+@pytest.fixture
+async def session_factory(make_session_factory):
+    """Session factory of an in-memory database with searchable items."""
+    return await make_session_factory(SearchBase.metadata, rows={
+        SearchableItem.__table__: [
+            {"id": 1, "name": "Slack Notifier", "description": "Post messages", "category": "chat",
+             "tags": ["slack"], "downloads": 5},
+            {"id": 2, "name": "Slack Archiver", "description": "Export channels", "category": "chat",
+             "tags": ["slack"], "downloads": 50},
+            {"id": 3, "name": "Jira Sync", "description": "Sync tickets", "category": "pm",
+             "tags": [], "downloads": 1},
+        ]
+    })
+
+
+@pytest.fixture
+async def session(session_factory):
+    """Session bound to the searchable items database."""
+    async with session_factory() as db:
+        yield db
+
+
+@pytest.mark.asyncio
+class TestSearchService:
+    """Test index building and incremental sync."""
+
+    async def test_search_builds_index(self, session):
+        """Test the index is built on first search and popularity breaks ties."""
+        service = SearchService()
+        service.register_collection(_collection())
+
+        result = await service.search(session, "item", "slack")
+
+        assert [hit.doc_id for hit in result.hits] == [2, 1]
+        assert result.facets["category"] == {"chat": 2}
+        assert service.get_stats()["item"]["documents"] == 3
+
+    async def test_incremental_sync(self, session):
+        """Test rows updated after the last sync are picked up."""
+        service = SearchService(sync_interval=0)
+        service.register_collection(_collection())
+        await service.search(session, "item", "slack")
+
+        await session.execute(SearchableItem.__table__.insert(), [{
+            "id": 4, "name": "Slack Bot", "description": "", "category": "chat",
+            "tags": [], "downloads": 0, "updated_at": datetime.utcnow() + timedelta(seconds=1),
+        }])
+
+        items, total = await service.search_objects(session, "item", "slack")
+        assert sorted(item.id for item in items) == [1, 2, 4]
+        assert total == 3
+
+    async def test_index_and_remove_object(self, session):
+        """Test write hooks update a built index."""
+        service = SearchService(sync_interval=3600)
+        service.register_collection(_collection())
+        await service.search(session, "item", "jira")
+
+        service.index_object("item", SearchableItem(
+            id=3, name="Linear Sync", description="", category="pm", tags=[], downloads=0,
+            updated_at=datetime.utcnow()
+        ))
+        assert (await service.search(session, "item", "jira")).total == 0
+        assert [hit.doc_id for hit in (await service.search(session, "item", "linear")).hits] == [3]
+
+        service.remove_object("item", 3)
+        assert (await service.search(session, "item", "linear")).total == 0
+
+    async def test_search_objects_filters_and_pages_in_rank_order(self, session):
+        """Test rows are loaded in rank order after filtering and paging in the search."""
+        service = SearchService()
+        service.register_collection(_collection())
+        await session.execute(SearchableItem.__table__.insert(), [
+            {"id": 10 + i, "name": f"Slack Tool {i}", "description": "", "category": "tools",
+             "tags": [], "downloads": i}
+            for i in range(5)
+        ])
+
+        page, total = await service.search_objects(
+            session, "item", "slack", filters={"category": "tools"}, limit=2, offset=1
+        )
+
+        assert total == 5
+        assert [item.id for item in page] == [13, 12]
+
+    async def test_detect_postgres_schema(self, session):
+        """Test only tables migrated with a search_vector column are searched with it."""
+        service = SearchService()
+        service.register_collection(_collection())
+
+        await service.detect_postgres_schema(await session.connection())
+        assert service.get_stats() == {} and not service._postgres_ready
+
+        conn = MagicMock()
+        conn.dialect.name = "postgresql"
+        conn.execute = AsyncMock(return_value=MagicMock(scalars=lambda: ["searchable_items"]))
+        await service.detect_postgres_schema(conn)
+        assert service._postgres_ready == {"item"}
+
+    async def test_rows_deleted_elsewhere_are_evicted(self, session):
+        """Test a hit whose row was deleted by another process is dropped and evicted."""
+        service = SearchService(sync_interval=3600)
+        service.register_collection(_collection())
+        await service.search(session, "item", "slack")
+
+        await session.execute(SearchableItem.__table__.delete().where(SearchableItem.id == 1))
+        result = await service.search(session, "item", "slack")
+
+        assert [hit.doc_id for hit in result.hits] == [2]
+        assert result.total == 1
+        assert service.get_stats()["item"]["documents"] == 2
+
+
+@pytest.mark.asyncio
+class TestPostgresFallback:
+    """Test the embedded index behind PostgreSQL full-text search."""
+
+    def make_service(self, session_factory):
+        """Service that searches ``item`` as if it had a tsvector column that finds nothing."""
+        service = SearchService(session_factory=session_factory)
+        service.register_collection(_collection())
+        service._uses_postgres = lambda db, name: True
+        service._search_postgres = AsyncMock(return_value=SearchResult(hits=[], total=0))
+        return service
+
+    async def test_index_is_built_in_the_background(self, session, session_factory):
+        """Test a zero-hit query does not build the embedded index inside the request."""
+        service = self.make_service(session_factory)
+
+        first = await service.search(session, "item", "slakc")
+        assert first.total == 0
+        assert "item" not in service.get_stats()
+
+        await service._building["item"]
+        second = await service.search(session, "item", "slakc")
+        assert [hit.doc_id for hit in second.hits] == [2, 1]
+
+    async def test_prefix_terms_are_not_stemmed(self, session, session_factory):
+        """Test tsquery prefix terms keep their plural endings."""
+        service = self.make_service(session_factory)
+
+        await service.search(session, "item", "studies channels")
+
+        assert service._search_postgres.await_args.args[2] == ["studies", "channels"]
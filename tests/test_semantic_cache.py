@@ -0,0 +1,180 @@
+"""Tests for the semantic cache of agent outputs."""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from resoftai.agents.requirements_analyst import RequirementsAnalystAgent
+from resoftai.config.settings import get_settings
+from resoftai.core.agent import AgentRole
+from resoftai.core.message_bus import MessageBus
+from resoftai.core.semantic_cache import SemanticCache, cosine, embed, semantic_cache
+from resoftai.core.state import ProjectState
+from resoftai.llm.base import LLMConfig, ModelProvider
+
+BOOKSTORE = (
+    "Build a REST API for a bookstore with user authentication (JWT), CRUD endpoints "
+    "for books and authors, search by title, pagination, PostgreSQL storage and Docker deployment."
+)
+LIBRARY = BOOKSTORE.replace("bookstore", "library")
+GAME = "Create a mobile game where players race cars through procedurally generated tracks with leaderboards."
+
+
+class TestEmbedding:
+    """Test local embeddings rank near-duplicates above unrelated text."""
+
+    def test_near_duplicates_are_similar(self):
+        """Test a one-word change keeps the similarity high."""
+        assert cosine(embed(BOOKSTORE), embed(BOOKSTORE)) == pytest.approx(1.0)
+        assert cosine(embed(BOOKSTORE), embed(LIBRARY)) > 0.85
+        assert cosine(embed(BOOKSTORE), embed(GAME)) < 0.2
+
+    def test_embedding_is_stable(self):
+        """Test embeddings do not depend on the process hash seed."""
+        assert embed("REST API") == embed("rest apis")
+        assert embed("") == {}
+
+
+class TestSemanticCache:
+    """Test lookups, thresholds and persistence."""
+
+    def test_thresholds_decide_reuse_draft_or_miss(self):
+        """Test identical input is reused, similar input drafted and different input missed."""
+        cache = SemanticCache(threshold=0.85, reuse_threshold=0.97)
+        cache.store("analyst:srs", BOOKSTORE, "SRS for bookstore", tokens=1200)
+
+        reused = cache.lookup("analyst:srs", BOOKSTORE)
+        drafted = cache.lookup("analyst:srs", LIBRARY)
+
+        assert reused.reuse and reused.entry.output == "SRS for bookstore"
+        assert not drafted.reuse and 0.85 <= drafted.similarity < 0.97
+        assert cache.lookup("analyst:srs", GAME) is None
+        assert cache.get_stats()["hit_rate"] == pytest.approx(2 / 3)
+
+    def test_namespaces_are_separate(self):
+        """Test outputs are only matched against the same question."""
+        cache = SemanticCache()
+        cache.store("architect:design", BOOKSTORE, "architecture")
+
+        assert cache.lookup("analyst:srs", BOOKSTORE) is None
+
+    def test_returns_most_similar_entry(self):
+        """Test the closest past input wins among several candidates."""
+        cache = SemanticCache(threshold=0.5)
+        cache.store("ns", GAME, "game")
+        cache.store("ns", BOOKSTORE, "bookstore")
+        cache.store("ns", BOOKSTORE + " Also send email notifications.", "bookstore with email")
+
+        assert cache.lookup("ns", LIBRARY).entry.output == "bookstore"
+
+    def test_persists_entries(self, tmp_path):
+        """Test entries saved to the path are found by a new cache."""
+        path = tmp_path / "semantic-cache.json"
+        SemanticCache(path=path).store("ns", BOOKSTORE, "SRS", tokens=10)
+
+        match = SemanticCache(path=path).lookup("ns", LIBRARY)
+
+        assert match.entry.output == "SRS"
+        assert match.entry.tokens == 10
+
+    def test_evicts_oldest_entries(self):
+        """Test the cache keeps at most max_entries outputs."""
+        cache = SemanticCache(max_entries=1)
+        cache.store("ns", BOOKSTORE, "old")
+        cache.store("ns", GAME, "new")
+
+        assert len(cache) == 1
+        assert cache.lookup("ns", BOOKSTORE) is None
+        assert cache.stats["evictions"] == 1
+        indexed = set().union(*(ids for buckets in cache._index.buckets for ids in buckets.values()))
+        assert len(indexed) == 1
+
+    @pytest.mark.asyncio
+    async def test_saves_are_batched_off_the_event_loop(self, tmp_path):
+        """Test stores inside an event loop are saved together after the interval or on flush."""
+        path = tmp_path / "semantic-cache.json"
+        cache = SemanticCache(path=path, save_interval=60)
+        cache.store("ns", BOOKSTORE, "bookstore")
+        cache.store("ns", GAME, "game")
+
+        assert not path.exists()
+        await cache.flush()
+
+        assert cache.stats["saves"] == 1
+        assert len(SemanticCache(path=path)) == 2
+
+
+@pytest.fixture(autouse=True)
+def semantic_cache_enabled():
+    """Enable the semantic cache, which is off by default."""
+    with patch.object(get_settings(), "semantic_cache_enabled", True):
+        yield
+
+
+@patch("resoftai.llm.factory.LLMFactory.create")
+def make_analyst(requirements, responses, mock_create, owner="user:1"):
+    """Requirements analyst for a project of ``owner`` whose LLM answers ``responses``."""
+    llm = MagicMock()
+    llm.generate = AsyncMock(side_effect=[
+        MagicMock(content=content, total_tokens=1000, usage={}) for content in responses
+    ])
+    mock_create.return_value = llm
+    state = ProjectState(
+        name="Project", description=requirements, requirements={"raw_text": requirements},
+        metadata={"owner": owner} if owner else {}
+    )
+    config = LLMConfig(provider=ModelProvider.DEEPSEEK, api_key="k", model_name="m")
+    return RequirementsAnalystAgent(AgentRole.REQUIREMENTS_ANALYST, MessageBus(), state, llm_config=config)
+
+
+@pytest.mark.asyncio
+class TestAgentReuse:
+    """Test agents reuse outputs of similar projects."""
+
+    async def test_similar_project_gets_a_draft(self):
+        """Test a similar project's SRS is offered as a draft to adapt."""
+        await make_analyst(BOOKSTORE, ["Bookstore SRS"])._create_requirements_specification()
+        analyst = make_analyst(LIBRARY, ["Library SRS"])
+
+        await analyst._create_requirements_specification()
+
+        prompt = analyst.llm.generate.call_args.kwargs["prompt"]
+        assert "<draft>\nBookstore SRS\n</draft>" in prompt
+        assert analyst.project_state.requirements["srs_document"] == "Library SRS"
+        assert analyst.last_cache_match.similarity >= semantic_cache.threshold
+        assert semantic_cache.stats["draft_hits"] == 1
+
+    async def test_identical_project_reuses_output(self):
+        """Test an identical input is answered from the cache without an LLM call."""
+        await make_analyst(BOOKSTORE, ["Bookstore SRS"])._create_requirements_specification()
+        analyst = make_analyst(BOOKSTORE, [])
+
+        await analyst._create_requirements_specification()
+
+        analyst.llm.generate.assert_not_called()
+        assert analyst.project_state.requirements["srs_document"] == "Bookstore SRS"
+        assert semantic_cache.get_stats()["tokens_saved"] == 1000
+
+    async def test_unrelated_project_generates_from_scratch(self):
+        """Test a dissimilar project gets no draft."""
+        await make_analyst(BOOKSTORE, ["Bookstore SRS"])._create_requirements_specification()
+        analyst = make_analyst(GAME, ["Game SRS"])
+
+        await analyst._create_requirements_specification()
+
+        assert "<draft>" not in analyst.llm.generate.call_args.kwargs["prompt"]
+        assert analyst.last_cache_match is None
+
+    async def test_other_owners_outputs_are_never_offered(self):
+        """Test an identical project of another owner generates from scratch."""
+        await make_analyst(BOOKSTORE, ["Bookstore SRS"])._create_requirements_specification()
+        analyst = make_analyst(BOOKSTORE, ["Other SRS"], owner="user:2")
+
+        await analyst._create_requirements_specification()
+
+        assert analyst.last_cache_match is None
+        assert analyst.project_state.requirements["srs_document"] == "Other SRS"
+
+    async def test_projects_without_owner_are_not_cached(self):
+        """Test outputs of projects with unknown owner are neither stored nor looked up."""
+        await make_analyst(BOOKSTORE, ["Bookstore SRS"], owner=None)._create_requirements_specification()
+
+        assert len(semantic_cache) == 0
@@ -0,0 +1,119 @@
+"""Import-time budget for the CLI, agents and database entry points."""
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC = str(Path(__file__).resolve().parents[1] / "src")
+
+# Cold import budgets in seconds. Eager provider/agent imports used to cost
+# about two seconds for each of these; the budgets leave room for slow CI.
+IMPORT_BUDGETS = {
+    "resoftai": 0.2,
+    "resoftai.cli.main": 0.6,
+    "resoftai.core.agent": 0.8,
+}
+
+_IMPORTTIME = re.compile(r"import time:\s+\d+ \|\s+(\d+) \| (\S+)")
+
+
+def run_python(code, *flags):
+    """Run ``code`` in a fresh interpreter with ``src`` on the path."""
+    env = dict(os.environ, PYTHONPATH=SRC, PYTHONDONTWRITEBYTECODE="1")
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code], capture_output=True, text=True, env=env, check=True
+    )
+
+
+def loaded_modules(code):
+    """Modules loaded after running ``code``."""
+    result = run_python(f"{code}\nimport sys, json\nprint(json.dumps(sorted(sys.modules)))")
+    return set(json.loads(result.stdout.strip().splitlines()[-1]))
+
+
+def import_seconds(module):
+    """Median cumulative import time of ``module`` over three cold imports."""
+    timings = []
+    for _ in range(3):
+        stderr = run_python(f"import {module}", "-X", "importtime").stderr
+        # Only top-level lines (no indentation) count towards the import statement
+        timings.append(sum(int(us) for us, _ in _IMPORTTIME.findall(stderr)) / 1e6)
+    return statistics.median(timings)
+
+
+class TestLazyImports:
+    """Test entry points do not load what they do not use."""
+
+    def test_package_import_is_light(self):
+        """Test ``import resoftai`` loads no agent, provider or SDK."""
+        modules = loaded_modules("import resoftai")
+
+        assert "resoftai.core.agent" not in modules
+        assert not {"anthropic", "httpx", "sqlalchemy"} & modules
+
+    def test_lazy_exports_still_resolve(self):
+        """Test names exported by the packages are imported on access."""
+        modules = loaded_modules(
+            "import resoftai, resoftai.llm.providers as p\n"
+            "assert resoftai.Agent.__name__ == 'Agent'\n"
+            "assert p.DeepSeekProvider.__name__ == 'DeepSeekProvider'"
+        )
+
+        assert "resoftai.llm.providers.deepseek_provider" in modules
+        assert "resoftai.llm.providers.anthropic_provider" not in modules
+
+    def test_cli_help_loads_no_agents(self):
+        """Test ``resoftai --help`` loads neither agents nor settings."""
+        modules = loaded_modules(
+            "from resoftai.cli.main import cli\n"
+            "try:\n"
+            "    cli(['--help'])\n"
+            "except SystemExit:\n"
+            "    pass"
+        )
+
+        assert not any(name.startswith("resoftai.agents") for name in modules)
+        assert not {"resoftai.generators", "resoftai.config.settings", "anthropic"} & modules
+
+    def test_agent_base_loads_no_provider_sdk(self):
+        """Test the agent base class does not import provider modules."""
+        modules = loaded_modules("import resoftai.core.agent")
+
+        assert not any(name.startswith("resoftai.llm.providers.") for name in modules)
+        assert "anthropic" not in modules
+
+    def test_provider_imported_on_first_use(self):
+        """Test the factory imports a provider module when a config needs it."""
+        modules = loaded_modules(
+            "from resoftai.llm.factory import LLMFactory\n"
+            "from resoftai.llm.base import LLMConfig, ModelProvider\n"
+            "LLMFactory.create(LLMConfig(provider=ModelProvider.DEEPSEEK, api_key='k', model_name='m'))"
+        )
+
+        assert "resoftai.llm.providers.deepseek_provider" in modules
+        assert "resoftai.llm.providers.anthropic_provider" not in modules
+
+    def test_engine_created_on_first_use(self):
+        """Test importing the database package creates no engine."""
+        modules = loaded_modules(
+            "import resoftai.db.connection as connection\n"
+            "assert connection._engine is None"
+        )
+
+        assert "asyncpg" not in modules
+
+
+class TestImportBudget:
+    """Test cold import times stay within budget."""
+
+    @pytest.mark.parametrize("module", sorted(IMPORT_BUDGETS))
+    def test_import_budget(self, module):
+        """Test a cold import of the entry point stays within its budget."""
+        seconds = import_seconds(module)
+
+        assert seconds < IMPORT_BUDGETS[module], f"import {module} took {seconds:.3f}s"
@@ -0,0 +1,229 @@
+"""Tests for time-series downsampling and system metrics rollups."""
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from resoftai.utils.timeseries import (
+    Bucket,
+    aggregate_points,
+    bucket_start,
+    downsample,
+    merge_buckets,
+    percentile,
+    select_resolution,
+    to_columnar,
+)
+from resoftai.models.performance_metrics import SystemMetrics, SystemMetricsRollup
+from sqlalchemy import select
+
+from resoftai.crud.performance_metrics import (
+    _upsert_rollups,
+    get_system_metric_series,
+    prune_system_metrics_rollups,
+    rollup_all_system_metrics,
+    rollup_system_metrics,
+)
+
+
+class TestTimeseriesUtils:
+    """Test pure downsampling helpers."""
+
+    def test_bucket_start_alignment(self):
+        """Test buckets align to epoch boundaries."""
+        ts = datetime(2026, 1, 1, 10, 7, 42)
+        assert bucket_start(ts, 60) == datetime(2026, 1, 1, 10, 7)
+        assert bucket_start(ts, 300) == datetime(2026, 1, 1, 10, 5)
+        assert bucket_start(ts, 3600) == datetime(2026, 1, 1, 10, 0)
+        assert bucket_start(ts, 86400) == datetime(2026, 1, 1)
+
+    def test_percentile(self):
+        """Test interpolated percentile."""
+        values = list(range(1, 101))
+        assert percentile(values, 50) == pytest.approx(50.5)
+        assert percentile(values, 95) == pytest.approx(95.05)
+        assert percentile([7], 95) == 7
+
+    def test_aggregate_points(self):
+        """Test raw points are aggregated per bucket."""
+        base = datetime(2026, 1, 1)
+        points = [(base + timedelta(seconds=i * 10), float(i)) for i in range(12)]
+        points.append((base, None))
+
+        buckets = aggregate_points(points, 60)
+
+        assert len(buckets) == 2
+        assert buckets[0].count == 6
+        assert buckets[0].min == 0
+        assert buckets[0].max == 5
+        assert buckets[0].avg == pytest.approx(2.5)
+        assert buckets[1].start == base + timedelta(minutes=1)
+
+    def test_merge_buckets_exact_aggregates(self):
+        """Test merging keeps count/min/max/sum exact."""
+        base = datetime(2026, 1, 1)
+        points = [(base + timedelta(seconds=i), float(i % 17)) for i in range(600)]
+        fine = aggregate_points(points, 60)
+        merged = merge_buckets(fine, 300)
+        direct = aggregate_points(points, 300)
+
+        assert [b.start for b in merged] == [b.start for b in direct]
+        for m, d in zip(merged, direct):
+            assert m.count == d.count
+            assert m.min == d.min
+            assert m.max == d.max
+            assert m.sum == pytest.approx(d.sum)
+
+    def test_select_resolution(self):
+        """Test resolution grows with the range to respect the budget."""
+        end = datetime(2026, 1, 31)
+        assert select_resolution(end - timedelta(hours=1), end, 500) == "1m"
+        assert select_resolution(end - timedelta(hours=24), end, 500) == "5m"
+        assert select_resolution(end - timedelta(days=7), end, 500) == "1h"
+        assert select_resolution(end - timedelta(days=30), end, 1000) == "1h"
+        assert select_resolution(end - timedelta(days=30), end, 500) == "1d"
+        assert select_resolution(end - timedelta(days=365), end, 100) == "1d"
+
+    def test_downsample_respects_budget(self):
+        """Test downsample coarsens until within max_points."""
+        base = datetime(2026, 1, 1)
+        buckets = [Bucket(base + timedelta(minutes=i), 1, i, i, i, i) for i in range(1000)]
+
+        result, width = downsample(buckets, 100, 60)
+
+        assert len(result) <= 100
+        assert width % 60 == 0
+        assert sum(b.count for b in result) == 1000
+
+    def test_downsample_never_exceeds_budget_when_misaligned(self):
+        """Test a range straddling an extra aligned bucket is still clamped to max_points."""
+        base = datetime(2026, 1, 1, 0, 1)
+        buckets = [Bucket(base + timedelta(minutes=i), 1, i, i, i, i) for i in range(4)]
+
+        result, width = downsample(buckets, 2, 60)
+
+        assert len(result) == 2
+        assert width == 180
+        assert sum(b.count for b in result) == 4
+
+    def test_to_columnar(self):
+        """Test columnar conversion."""
+        base = datetime(1970, 1, 1, 0, 1)
+        columns = to_columnar([Bucket(base, 2, 1.0, 3.0, 4.0, 2.9)], ["avg", "max"])
+        assert columns == {"timestamps": [60], "avg": [2.0], "max": [3.0]}
+
+    def test_columnar_response_keeps_integer_columns(self):
+        """Test the response model does not turn timestamps and counts into floats."""
+        from resoftai.api.routes.monitoring import ColumnarTimeSeriesResponse
+
+        base = datetime(1970, 1, 1, 0, 1)
+        response = ColumnarTimeSeriesResponse(
+            metric_name="cpu_usage_percent", resolution="1m", bucket_seconds=60, start=base, end=base,
+            columns=to_columnar([Bucket(base, 2, 1.0, 3.0, 4.0, 2.9)], ["count", "avg"])
+        )
+
+        assert response.model_dump()["columns"] == {"timestamps": [60], "count": [2], "avg": [2.0]}
+        assert isinstance(response.columns["timestamps"][0], int)
+
+
+@pytest.fixture
+async def metrics_session(make_session_factory):
+    """Session bound to an in-memory database with only metrics tables."""
+    session_factory = await make_session_factory(SystemMetrics.__table__, SystemMetricsRollup.__table__)
+    async with session_factory() as session:
+        yield session
+
+
+async def _insert_samples(session: AsyncSession, start: datetime, count: int, step_seconds: int):
+    for i in range(count):
+        session.add(SystemMetrics(
+            timestamp=start + timedelta(seconds=i * step_seconds),
+            cpu_usage_percent=float(i % 100),
+        ))
+    await session.flush()
+
+
+@pytest.mark.asyncio
+class TestSystemMetricsRollups:
+    """Test rollup materialization and series queries."""
+
+    async def test_rollup_is_incremental(self, metrics_session):
+        """Test repeated rollups only write newly closed buckets."""
+        start = datetime.utcnow().replace(second=0, microsecond=0) - timedelta(hours=2)
+        await _insert_samples(metrics_session, start, 120, 30)
+
+        until = start + timedelta(minutes=30)
+        first = await rollup_system_metrics(metrics_session, "1m", until)
+        second = await rollup_system_metrics(metrics_session, "1m", until)
+
+        # One row per minute for every populated metric column
+        assert first > 0
+        assert first % 30 == 0
+        assert second == 0
+
+    async def test_coarse_rollups_follow_fine_ones(self, metrics_session):
+        """Test 5m buckets are never written ahead of 1m buckets."""
+        start = datetime.utcnow().replace(second=0, microsecond=0) - timedelta(hours=2)
+        await _insert_samples(metrics_session, start, 60, 60)
+
+        assert await rollup_system_metrics(metrics_session, "5m") == 0
+
+        written = await rollup_all_system_metrics(metrics_session)
+        assert written["1m"] > 0
+        assert written["5m"] > 0
+
+    async def test_series_combines_rollups_and_raw_tail(self, metrics_session):
+        """Test series covers both rolled-up and not-yet-rolled-up data."""
+        end = datetime.utcnow()
+        start = end - timedelta(hours=3)
+        await _insert_samples(metrics_session, start, 180, 60)
+        await rollup_system_metrics(metrics_session, "1m", start + timedelta(hours=1))
+
+        series = await get_system_metric_series(
+            metrics_session, "cpu_usage_percent", start, end, max_points=500
+        )
+
+        assert series["resolution"] == "1m"
+        assert sum(b.count for b in series["buckets"]) == 180
+
+    async def test_series_point_budget(self, metrics_session):
+        """Test long ranges stay within the point budget."""
+        end = datetime.utcnow()
+        start = end - timedelta(days=30)
+        await _insert_samples(metrics_session, start, 500, 3600)
+        await rollup_all_system_metrics(metrics_session)
+
+        series = await get_system_metric_series(
+            metrics_session, "cpu_usage_percent", start, end, max_points=50
+        )
+
+        assert len(series["buckets"]) <= 50
+        assert sum(b.count for b in series["buckets"]) == 500
+
+    async def test_rewritten_buckets_are_replaced(self, metrics_session):
+        """Test writing an existing bucket again replaces it instead of violating uq_rollup_bucket."""
+        start = datetime(2026, 1, 1)
+        row = {
+            "metric_name": "cpu_usage_percent", "resolution": "1m", "bucket_start": start,
+            "sample_count": 1, "min_value": 1.0, "max_value": 1.0, "sum_value": 1.0, "p95_value": 1.0,
+        }
+
+        await _upsert_rollups(metrics_session, [row])
+        await _upsert_rollups(metrics_session, [dict(row, sample_count=2, max_value=5.0, sum_value=6.0)])
+
+        rollups = (await metrics_session.execute(select(SystemMetricsRollup))).scalars().all()
+        assert [(r.sample_count, r.max_value) for r in rollups] == [(2, 5.0)]
+
+    async def test_unknown_metric(self, metrics_session):
+        """Test unknown metrics are rejected."""
+        now = datetime.utcnow()
+        with pytest.raises(ValueError):
+            await get_system_metric_series(metrics_session, "id", now - timedelta(hours=1), now)
+
+    async def test_prune_rollups(self, metrics_session):
+        """Test expired fine-grained rollups are pruned."""
+        old = datetime.utcnow() - timedelta(days=10)
+        await _insert_samples(metrics_session, old, 10, 60)
+        await rollup_system_metrics(metrics_session, "1m")
+
+        deleted = await prune_system_metrics_rollups(metrics_session)
+        assert deleted > 0
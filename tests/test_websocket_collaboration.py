@@ -138,8 +138,13 @@ async def test_cursor_position_change():
         # Verify cursor was updated
         assert active_editors[1][100]["cursor_position"] == {"line": 10, "column": 5}
 
-        # Verify broadcast was sent
+        # Verify broadcast was sent to the other editors only
         mock_sio.emit.assert_called_once()
+        event, payload = mock_sio.emit.call_args.args
+        assert event == "cursor_position_changed"
+        assert payload["user_id"] == 100
+        assert payload["position"] == {"line": 10, "column": 5}
+        assert mock_sio.emit.call_args.kwargs == {"room": "file:1", "skip_sid": "test_sid"}
 
 
 @pytest.mark.asyncio
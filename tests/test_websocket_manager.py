@@ -340,3 +340,103 @@ class TestConnectionManagerIntegration:
             await manager.disconnect("u300_p2_s2")
             assert 300 not in manager.user_connections
             assert len(manager.active_connections["2"]) == 1  # only u100 left
+
+
+class TestRoomFanout:
+    """Test reverse indexes and single-emit room broadcasts."""
+
+    @pytest.mark.asyncio
+    async def test_disconnect_uses_reverse_index(self):
+        """Test disconnect only leaves the rooms the session joined."""
+        manager = ConnectionManager()
+
+        with patch('resoftai.websocket.manager.sio') as mock_sio:
+            mock_sio.enter_room = AsyncMock()
+            mock_sio.leave_room = AsyncMock()
+
+            for project_id in range(50):
+                await manager.connect(sid=f"other{project_id}", project_id=str(project_id), user_id=project_id + 1)
+            await manager.connect(sid="sid1", project_id="7", user_id=100)
+            await manager.join_file("sid1", 3, 7, 100, "alice")
+
+            await manager.disconnect("sid1")
+
+            left = {call.args for call in mock_sio.leave_room.call_args_list}
+            assert left == {("sid1", "project:7"), ("sid1", "file:3")}
+            assert "sid1" not in manager.session_projects
+            assert "sid1" not in manager.session_files
+            assert 3 not in manager.file_sessions
+            assert len(manager.active_connections) == 50
+
+    @pytest.mark.asyncio
+    async def test_leave_project_updates_indexes(self):
+        """Test leaving a project keeps both indexes consistent."""
+        manager = ConnectionManager()
+
+        with patch('resoftai.websocket.manager.sio') as mock_sio:
+            mock_sio.enter_room = AsyncMock()
+            mock_sio.leave_room = AsyncMock()
+
+            await manager.connect(sid="sid1", project_id="1", user_id=100)
+            await manager.connect(sid="sid1", project_id="2", user_id=100)
+            await manager.leave_project("sid1", "1")
+
+            assert "1" not in manager.active_connections
+            assert manager.session_projects["sid1"] == {"2"}
+
+    @pytest.mark.asyncio
+    async def test_broadcast_to_file_skips_sender_in_one_emit(self):
+        """Test excluded broadcasts are a single room emit with skip_sid."""
+        manager = ConnectionManager()
+
+        with patch('resoftai.websocket.manager.sio') as mock_sio:
+            mock_sio.enter_room = AsyncMock()
+            mock_sio.emit = AsyncMock()
+
+            for index in range(100):
+                await manager.join_file(f"sid{index}", 5, 1, index, f"user{index}")
+
+            await manager.broadcast_to_file(5, "file.edit", {"version": 1}, exclude_sid="sid0")
+
+            mock_sio.emit.assert_called_once_with(
+                "file.edit", {"version": 1}, room="file:5", skip_sid="sid0"
+            )
+
+    @pytest.mark.asyncio
+    async def test_fanout_metrics(self):
+        """Test per-room fan-out statistics are recorded and dropped with the room."""
+        from resoftai.websocket.manager import websocket_metrics
+        manager = ConnectionManager()
+
+        with patch('resoftai.websocket.manager.sio') as mock_sio:
+            mock_sio.enter_room = AsyncMock()
+            mock_sio.leave_room = AsyncMock()
+            mock_sio.emit = AsyncMock()
+
+            await manager.connect(sid="sid1", project_id="fanout", user_id=100)
+            await manager.connect(sid="sid2", project_id="fanout", user_id=200)
+            await manager.broadcast_to_project("fanout", "update", {})
+
+            stats = websocket_metrics.get_room_stats(limit=1000)["project:fanout"]
+            assert stats["broadcasts"] == 1
+            assert stats["avg_recipients"] == 2
+            assert stats["max_latency_ms"] >= 0
+
+            await manager.disconnect("sid1")
+            await manager.disconnect("sid2")
+            assert "project:fanout" not in websocket_metrics.room_fanout
+
+
+class TestPacketEncoding:
+    """Test payload size is taken from the single Socket.IO encoding."""
+
+    def test_measured_packet_records_size(self):
+        """Test encoding a packet records its size in the current context."""
+        from socketio import packet
+        from resoftai.websocket.manager import _encoded_size, _measured_packet_class, sio
+
+        packet_class = _measured_packet_class(packet.Packet)
+        encoded = packet_class(packet.EVENT, data=["update", {"message": "hi"}]).encode()
+
+        assert _encoded_size.get() == len(encoded)
+        assert issubclass(sio.packet_class, packet.Packet)
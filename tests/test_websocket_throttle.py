@@ -0,0 +1,114 @@
+"""Tests for collaboration rate limiting and presence coalescing."""
+import asyncio
+import pytest
+
+from resoftai.websocket.throttle import PresenceCoalescer, SlidingWindowRateLimiter
+
+
+class TestSlidingWindowRateLimiter:
+    """Test the O(1) sliding-window limiter."""
+
+    def test_limit_within_window(self):
+        """Test requests beyond the limit are rejected inside one window."""
+        limiter = SlidingWindowRateLimiter()
+
+        assert all(limiter.allow("sid", 5, 1, now=100.0 + i * 0.01) for i in range(5))
+        assert limiter.allow("sid", 5, 1, now=100.1) is False
+
+    def test_previous_window_is_weighted(self):
+        """Test the previous window counts in proportion to its overlap."""
+        limiter = SlidingWindowRateLimiter()
+        for _ in range(10):
+            limiter.allow("sid", 10, 1, now=100.0)
+
+        # Halfway into the next window, half of the previous 10 still count
+        assert sum(limiter.allow("sid", 10, 1, now=101.5) for _ in range(10)) == 5
+        # Two windows later everything has expired
+        assert sum(limiter.allow("sid", 10, 1, now=103.0) for _ in range(10)) == 10
+
+    def test_idle_keys_are_evicted(self):
+        """Test keys idle past the TTL are dropped."""
+        limiter = SlidingWindowRateLimiter(ttl=60)
+        for index in range(100):
+            limiter.allow(f"sid{index}", 10, 1, now=100.0)
+        limiter.allow("active", 10, 1, now=150.0)
+
+        limiter.allow("active", 10, 1, now=170.0)
+
+        assert len(limiter) == 1
+
+
+@pytest.mark.asyncio
+class TestPresenceCoalescer:
+    """Test presence merging and tick-rate flushing."""
+
+    async def test_first_update_flushes_immediately(self):
+        """Test an idle room sends its first update without waiting for a tick."""
+        flushed = []
+
+        async def flush(room, updates):
+            flushed.append((room, dict(updates)))
+
+        coalescer = PresenceCoalescer(flush, tick_rate=20)
+        await coalescer.update(1, 100, {"position": 1})
+
+        assert flushed == [(1, {100: {"position": 1}})]
+
+    async def test_burst_is_bounded_by_tick_rate(self):
+        """Test many editors' updates within a tick become one merged flush."""
+        flushed = []
+
+        async def flush(room, updates):
+            flushed.append(dict(updates))
+
+        coalescer = PresenceCoalescer(flush, tick_rate=20)
+        for step in range(50):
+            for user_id in range(20):
+                await coalescer.update(1, user_id, {"position": step})
+
+        await asyncio.sleep(coalescer.interval * 2)
+
+        assert len(flushed) == 2
+        assert len(flushed[1]) == 20
+        assert all(state == {"position": 49} for state in flushed[1].values())
+        assert coalescer.superseded == 20 * 50 - 1 - 20
+
+    async def test_slow_flush_drops_superseded_updates(self):
+        """Test updates arriving during a slow delivery are merged, not queued."""
+        flushed = []
+        release = asyncio.Event()
+
+        async def flush(room, updates):
+            flushed.append(dict(updates))
+            if len(flushed) == 1:
+                await release.wait()
+
+        coalescer = PresenceCoalescer(flush, tick_rate=100)
+        first = asyncio.create_task(coalescer.update(1, 100, {"position": 0}))
+        await asyncio.sleep(0)
+
+        for step in range(1, 30):
+            await coalescer.update(1, 100, {"position": step})
+        release.set()
+        await first
+        await asyncio.sleep(coalescer.interval * 2)
+
+        assert flushed == [{100: {"position": 0}}, {100: {"position": 29}}]
+
+    async def test_removed_member_is_not_flushed(self):
+        """Test leaving members are dropped from the pending snapshot."""
+        flushed = []
+
+        async def flush(room, updates):
+            flushed.append(dict(updates))
+
+        coalescer = PresenceCoalescer(flush, tick_rate=20)
+        await coalescer.update(1, 100, {"position": 0})
+        await coalescer.update(1, 100, {"position": 1})
+        await coalescer.update(1, 200, {"position": 1})
+        coalescer.remove_member(1, 100)
+
+        await asyncio.sleep(coalescer.interval * 2)
+        await coalescer.stop()
+
+        assert flushed[-1] == {200: {"position": 1}}
@@ -0,0 +1,91 @@
+"""Smoke test of the end-to-end workflow benchmark and its regression check."""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+BENCHMARK = ROOT / "tests" / "performance" / "workflow_benchmark.py"
+
+# Near-zero simulated latency keeps the run short; the numbers are not checked
+FAST = ["--projects", "3", "--ttft", "0.001", "--ttft-sigma", "0", "--tokens-per-second", "1000000"]
+
+
+def run_benchmark(*args):
+    """Run the benchmark script in a fresh interpreter."""
+    env = dict(os.environ, PYTHONPATH=str(ROOT / "src"))
+    return subprocess.run(
+        [sys.executable, str(BENCHMARK), *FAST, *args], capture_output=True, text=True, env=env, timeout=300
+    )
+
+
+@pytest.fixture(scope="module")
+def baseline(tmp_path_factory):
+    """Result of one benchmark run."""
+    path = tmp_path_factory.mktemp("benchmark") / "baseline.json"
+    completed = run_benchmark("--output", str(path))
+    assert completed.returncode == 0, completed.stderr
+    return path
+
+
+class TestWorkflowBenchmark:
+    """Test the benchmark measures every project, stage and token."""
+
+    def test_result_covers_every_stage(self, baseline):
+        """Test the JSON result reports latency for every stage and full token accounting."""
+        result = json.loads(baseline.read_text())
+
+        assert result["config"]["projects"] == 3
+        assert result["throughput"]["projects_per_second"] > 0
+        assert result["stage_latency_seconds"]["all"]["count"] == 3 * 14
+        assert {"requirements_gathering", "implementation", "deployment", "completed"} <= set(
+            result["stage_latency_seconds"]
+        )
+        assert result["event_loop_lag_ms"]["count"] > 0
+        assert result["memory_kb_per_project"]["peak"] > 0
+        accounting = result["token_accounting"]
+        assert accounting["served_requests"] == accounting["counted_requests"] > 0
+        assert accounting["accuracy"] == 1.0
+
+    @pytest.mark.parametrize("driver", ["orchestrator", "optimized", "executor"])
+    def test_orchestration_drivers(self, driver, tmp_path):
+        """Test the orchestrators and the executor run every project to completion."""
+        path = tmp_path / "run.json"
+        completed = run_benchmark("--driver", driver, "--no-memory", "--output", str(path))
+        assert completed.returncode == 0, completed.stderr
+        result = json.loads(path.read_text())
+
+        assert result["config"]["driver"] == driver
+        assert {"requirements_gathering", "implementation", "quality_assurance"} <= set(
+            result["stage_latency_seconds"]
+        )
+        accounting = result["token_accounting"]
+        assert accounting["served_requests"] == accounting["counted_requests"] > 0
+        assert accounting["accuracy"] == 1.0
+
+    def test_regression_fails_the_run(self, baseline, tmp_path):
+        """Test a baseline with much higher throughput makes the comparison fail."""
+        faster = json.loads(baseline.read_text())
+        faster["throughput"]["projects_per_second"] *= 10
+        faster_path = tmp_path / "faster.json"
+        faster_path.write_text(json.dumps(faster))
+
+        completed = run_benchmark("--no-memory", "--output", str(tmp_path / "run.json"), "--baseline", str(faster_path))
+
+        assert completed.returncode == 1
+        assert "REGRESSION throughput.projects_per_second" in completed.stdout
+
+    def test_different_configurations_are_not_compared(self, baseline, tmp_path):
+        """Test results of different configurations are reported as not comparable."""
+        other = json.loads(baseline.read_text())
+        other["config"]["projects"] = 50
+        other_path = tmp_path / "other.json"
+        other_path.write_text(json.dumps(other))
+
+        completed = run_benchmark("--no-memory", "--output", str(tmp_path / "run.json"), "--baseline", str(other_path))
+
+        assert completed.returncode == 1
+        assert "not comparable" in completed.stdout